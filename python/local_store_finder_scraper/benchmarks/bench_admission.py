@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Admission Queue Benchmark
+
+Simulates a worker under a burst of batch shopping-list requests from one
+tenant while interactive searches keep arriving from others. Scrapes are
+simulated with sleeps (no network), so only queueing is measured.
+
+Runs the same load three ways and reports queue wait for each kind of
+request, separately from scrape time:
+
+- fifo:      one class, one tenant (arrival order)
+- fair:      one class, tenants served round-robin
+- priority:  interactive and batch classes, tenants round-robin
+
+Usage:
+    python benchmarks/bench_admission.py
+    python benchmarks/bench_admission.py --batch 400 --executors 4
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers.admission import AdmissionQueue, QueueFull
+
+BATCH_SCRAPE_S = 0.02
+INTERACTIVE_SCRAPE_S = 0.005
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000 if ordered else 0.0
+
+
+def run(args, mode: str) -> dict:
+    admission = AdmissionQueue(capacity=args.batch + args.interactive)
+    waits = {'batch': [], 'interactive': []}
+    scrapes = {'batch': [], 'interactive': []}
+
+    def execute():
+        while True:
+            request = admission.get()
+            if request is None:
+                return
+            time.sleep(BATCH_SCRAPE_S if request.payload == 'batch' else INTERACTIVE_SCRAPE_S)
+            scrape_s = admission.done(request)
+            waits[request.payload].append(request.wait_s)
+            scrapes[request.payload].append(scrape_s)
+
+    executors = [threading.Thread(target=execute) for _ in range(args.executors)]
+    for executor in executors:
+        executor.start()
+
+    # The burst lands first, then interactive searches trickle in
+    for _ in range(args.batch):
+        admission.put('batch', 'batch' if mode == 'priority' else 'interactive',
+                      tenant='' if mode == 'fifo' else 'shopping-lists')
+    for i in range(args.interactive):
+        try:
+            admission.put('interactive', 'interactive', tenant='' if mode == 'fifo' else f'user-{i % 5}')
+        except QueueFull:
+            pass
+        time.sleep(args.interval)
+
+    admission.close()
+    for executor in executors:
+        executor.join()
+    return {kind: (waits[kind], scrapes[kind]) for kind in waits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Admission queue benchmark')
+    parser.add_argument('--batch', type=int, default=200, help='Batch requests in the burst')
+    parser.add_argument('--interactive', type=int, default=50, help='Interactive requests')
+    parser.add_argument('--interval', type=float, default=0.01, help='Seconds between interactive requests')
+    parser.add_argument('--executors', type=int, default=2, help='Executor threads')
+    args = parser.parse_args()
+
+    print(f"{args.batch} batch + {args.interactive} interactive requests, {args.executors} executors")
+    print(f"{'mode':<10} {'requests':<12} {'done':>5} {'wait p50':>9} {'wait p95':>9} {'scrape p50':>11}")
+    for mode in ('fifo', 'fair', 'priority'):
+        for kind, (waits, scrapes) in run(args, mode).items():
+            print(f"{mode:<10} {kind:<12} {len(waits):>5} {percentile(waits, 0.5):>9.1f} "
+                  f"{percentile(waits, 0.95):>9.1f} {percentile(scrapes, 0.5):>11.1f}")
+    print("(times in ms)")
+
+
+if __name__ == '__main__':
+    main()
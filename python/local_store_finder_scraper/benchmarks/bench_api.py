@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Search API Benchmark
+
+Serves fixtures/ on a local HTTP server and scrapes each store twice per
+query, through its recorded HTML search page (source 'requests') and
+through its recorded JSON search API (source 'api'):
+
+- time per scrape, through one pooled session
+- whether both paths return the same best result
+- a payload whose shape changed (another store's JSON), which must fall
+  back to the HTML page and still return that result
+
+Usage:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --repeat 200
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import BaseScraper, get_scraper_for_store
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+# (store name, HTML page, JSON payload, payload of another shape, query)
+CASES = [
+    ('Home Depot', 'homedepot_search.html', 'homedepot_search.json', 'bestbuy_search.json', 'cordless drill'),
+    ('Best Buy', 'bestbuy_search.html', 'bestbuy_search.json', 'homedepot_search.json', 'aa batteries'),
+    ('Corner Grocer', 'generic_search.html', 'generic_search.json', 'homedepot_search.html', 'olive oil'),
+]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def scrape(store_name: str, source: str, root: str, page: str, payload: str, query: str):
+    scraper = get_scraper_for_store(store_name, source)
+    if source == 'requests' and type(scraper) is not BaseScraper:
+        # Best Buy defaults to Playwright; the benchmark reads its recorded page
+        scraper = type(scraper)(source='requests')
+    return scraper.scrape(
+        'store-1', store_name, root, f"{root}/{page}?q={{query}}", query,
+        api_url_template=f"{root}/{payload}?q={{query}}"
+    )[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search API benchmark')
+    parser.add_argument('--repeat', type=int, default=50, help='Scrapes per store and path')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    root = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{'store':<14} {'path':<9} {'ms/scrape':>9}  best result")
+    try:
+        for store_name, page, payload, other, query in CASES:
+            best = {}
+            for path, source, api_payload in (
+                ('html', 'requests', payload),
+                ('api', 'api', payload),
+                ('fallback', 'api', other),
+            ):
+                scrape(store_name, source, root, page, api_payload, query)  # warm the connection
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    result = scrape(store_name, source, root, page, api_payload, query)
+                elapsed = (time.perf_counter() - start) / args.repeat
+                best[path] = (result.item_name, result.price_cents)
+                print(f"{store_name:<14} {path:<9} {elapsed * 1000:>9.2f}  {result.item_name} ({result.price})")
+            assert best['api'] == best['html'], f"{store_name}: API and HTML results differ"
+            assert best['fallback'] == best['html'], f"{store_name}: fallback differs from HTML"
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
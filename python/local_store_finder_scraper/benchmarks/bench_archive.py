@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Page Archive Benchmark
+
+Fills a temporary snapshot archive with search pages (the recorded
+fixture pages and generated mock pages, in turn), then measures:
+
+- archive:  appending pages (compression, segment write, index row)
+- read:     memory-mapped reads and decompression of every body
+- extract:  re-extraction with the current parsers, in-process and on
+            a process pool
+
+Usage:
+    python benchmarks/bench_archive.py
+    python benchmarks/bench_archive.py --pages 5000 --workers 4
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers.archive import PageArchive, SegmentReader, reextract
+from scrapers.mock import MockBackend
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FIXTURES_DIR = os.path.join(BASE_DIR, 'fixtures')
+
+FIXTURE_PAGES = [
+    ('Home Depot', 'homedepot_search.html', 'cordless drill'),
+    ('Best Buy', 'bestbuy_search.html', 'drill'),
+    ('Local Grocer', 'generic_search.html', 'eggs'),
+]
+
+MOCK_QUERIES = ['paper towels', 'led bulbs', 'garden hose', 'olive oil', 'usb charger']
+
+
+def sample_pages() -> list:
+    """(store name, query, body) for each fixture page and a few mock pages."""
+    pages = []
+    for store_name, page, query in FIXTURE_PAGES:
+        with open(os.path.join(FIXTURES_DIR, page), 'rb') as f:
+            pages.append((store_name, query, f.read()))
+    backend = MockBackend()
+    for query in MOCK_QUERIES:
+        pages.append(('Corner Grocer', query, backend.render('Corner Grocer', query).encode('utf-8')))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Page archive benchmark')
+    parser.add_argument('--pages', type=int, default=2000, help='Pages to archive')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Re-extraction processes')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    samples = sample_pages()
+    workdir = tempfile.mkdtemp(prefix='bench_archive_')
+    try:
+        archive = PageArchive(workdir)
+        start = time.perf_counter()
+        for i in range(args.pages):
+            store_name, query, body = samples[i % len(samples)]
+            archive.add(f'store-{i % 50}', store_name, 'requests',
+                        f'https://store-{i % 50}.example.test/search?q={query}', query, body, 'utf-8')
+        archive_s = time.perf_counter() - start
+        stats = archive.stats()
+        pages = archive.pages()
+        archive.close()
+
+        reader = SegmentReader(workdir)
+        start = time.perf_counter()
+        for page in pages:
+            reader.body(page)
+        read_s = time.perf_counter() - start
+        reader.close()
+
+        print(f"{stats['pages']} pages in {stats['segments']} segments, "
+              f"{stats['raw_bytes'] / 1024:.0f} KB -> {stats['stored_bytes'] / 1024:.0f} KB on disk")
+        print(f"{'stage':<22} {'seconds':>8} {'pages/s':>9}")
+        print(f"{'archive':<22} {archive_s:>8.2f} {len(pages) / archive_s:>9.0f}")
+        print(f"{'read (mmap+inflate)':<22} {read_s:>8.2f} {len(pages) / read_s:>9.0f}")
+
+        baseline = None
+        for workers in (0, args.workers):
+            start = time.perf_counter()
+            results = reextract(workdir, pages, workers=workers)
+            elapsed = time.perf_counter() - start
+            items = [(r.item_name, r.price_cents) for page_results in results for r in page_results]
+            if baseline is None:
+                baseline = items
+            assert items == baseline, "Parallel re-extraction differs from in-process"
+            label = f"extract ({workers} procs)" if workers else "extract (in-process)"
+            print(f"{label:<22} {elapsed:>8.2f} {len(pages) / elapsed:>9.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
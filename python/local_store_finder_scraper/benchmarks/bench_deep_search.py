@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Deep Search Benchmark
+
+Serves paginated mock search pages (no network, simulated latency) where
+the only full match for the query is on page --match-page, and compares:
+
+- first page:   deep search off (the match is missed)
+- sequential:   one extra page at a time
+- concurrent:   DEEP_FETCH_THREADS pages at once, cancelled on a match
+
+Reports extra pages fetched, time to the answer, and whether the match
+was found.
+
+Usage:
+    python benchmarks/bench_deep_search.py
+    python benchmarks/bench_deep_search.py --pages 8 --match-page 3 --latency-ms 100
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, quote_plus, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import deep, get_scraper_for_store, mock
+from scrapers.ratelimit import RateLimiter
+from scrapers.session import FetchResult
+
+QUERY = 'cordless drill'
+
+
+class PagedBackend(mock.MockBackend):
+    """Mock pages with a next link; only match_page holds a full match."""
+
+    def __init__(self, pages: int, match_page: int, latency: float):
+        super().__init__(latency=latency)
+        self.pages = pages
+        self.match_page = match_page
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, search_url: str, store_name: str, query: str) -> FetchResult:
+        with self._lock:
+            self.fetched += 1
+        time.sleep(self.latency)
+        number = int(parse_qs(urlsplit(search_url).query).get('page', ['1'])[0])
+        cards = []
+        for i in range(6):
+            # Near misses everywhere: the first query word only
+            title = f"{query.split()[0].title()} Bit Set {number}-{i}"
+            if number == self.match_page and i == 2:
+                title = f"{query.title()} Kit {number}-{i}"
+            cards.append(
+                f'<div class="product-card"><h3>{title}</h3>'
+                f'<span class="price">${10 + number + i}.99</span>'
+                f'<a href="/p/{number}-{i}">view</a></div>'
+            )
+        if number <= self.pages:
+            cards.append(f'<a rel="next" href="/search?q={quote_plus(query)}&page={number + 1}">Next</a>')
+        body = f"<html><body>{''.join(cards)}</body></html>".encode('utf-8')
+        return FetchResult(body, 'utf-8', '', 'fetched', time.time())
+
+
+def run(backend: PagedBackend, deep_pages: int) -> tuple:
+    mock.set_backend(backend)
+    scraper = get_scraper_for_store('Corner Hardware', 'mock')
+    start = time.perf_counter()
+    results = scraper.scrape(
+        'store-1', 'Corner Hardware', 'https://corner.example.test',
+        'https://corner.example.test/search?q={query}', QUERY, deep_pages=deep_pages
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, max(0, backend.fetched - 1), results[0].item_name
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deep search benchmark')
+    parser.add_argument('--pages', type=int, default=6, help='Extra pages deep search may fetch')
+    parser.add_argument('--match-page', type=int, default=3, help='Results page holding the match')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Simulated fetch latency')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # The benchmark host isn't a real store; don't let the politeness budget dominate
+    deep.page_limiter = RateLimiter(rate=1000, burst=1000)
+    latency = args.latency_ms / 1000
+    threads = deep.DEEP_FETCH_THREADS
+
+    print(f"match on page {args.match_page}, up to {args.pages} extra pages, {args.latency_ms} ms per fetch")
+    print(f"{'mode':<12} {'extra pages':>11} {'ms':>8}  best result")
+    try:
+        for mode, deep_pages, fetch_threads in (
+            ('first page', 0, threads),
+            ('sequential', args.pages, 1),
+            ('concurrent', args.pages, threads),
+        ):
+            deep.DEEP_FETCH_THREADS = fetch_threads
+            backend = PagedBackend(args.pages, args.match_page, latency)
+            elapsed, extra, best = run(backend, deep_pages)
+            print(f"{mode:<12} {extra:>11} {elapsed * 1000:>8.0f}  {best}")
+    finally:
+        deep.DEEP_FETCH_THREADS = threads
+        mock.set_backend(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Product Detail Enrichment Benchmark
+
+Scrapes mock stores (no network, simulated latency), then enriches the
+selected results from their product pages:
+
+- sequential:  one product page at a time
+- parallel:    DETAIL_FETCH_THREADS pages at once
+- cached:      the same results again, served from the detail cache
+- deadline:    parallel, with a deadline shorter than the fetches need
+
+Reports products enriched, pages fetched and time spent enriching.
+
+Usage:
+    python benchmarks/bench_enrich.py
+    python benchmarks/bench_enrich.py --queries 10 --latency-ms 150 --deadline-ms 200
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import enrich, get_scraper_for_store, mock
+from scrapers.ratelimit import RateLimiter
+
+QUERIES = [
+    'cordless drill', 'led bulbs', 'garden hose', 'usb charger', 'paint roller',
+    'extension cord', 'smoke detector', 'wood screws', 'hdmi cable', 'light switch',
+]
+
+STORE_NAMES = ['Home Depot', 'Best Buy', 'Hardware Hut']
+
+
+def selected_results(queries: list) -> list:
+    """The ranked result per (store, query), as run_scrape returns them."""
+    results = []
+    for name in STORE_NAMES:
+        scraper = get_scraper_for_store(name, 'mock')
+        for query in queries:
+            results.extend(scraper.scrape(
+                f'store-{name}', name, 'https://store.example.test',
+                'https://store.example.test/search?q={query}', query
+            ))
+    return results
+
+
+def run(queries: list, deadline_s: float, cache) -> tuple:
+    results = selected_results(queries)
+    sources = {f'store-{name}': 'mock' for name in STORE_NAMES}
+    start = time.monotonic()
+    stats = enrich.enrich(results, start + deadline_s, sources, cache)
+    elapsed = time.monotonic() - start
+    return stats, elapsed, sum(1 for r in results if r.details and 'in_stock' in r.details)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Product detail enrichment benchmark')
+    parser.add_argument('--queries', type=int, default=5, help='Queries per store')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Simulated fetch latency')
+    parser.add_argument('--deadline-ms', type=float, default=250, help='Deadline for the deadline run')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    # The benchmark hosts aren't real stores; don't let the politeness budget dominate
+    enrich.detail_limiter = RateLimiter(rate=1000, burst=1000)
+    mock.set_backend(mock.MockBackend(latency=args.latency_ms / 1000))
+    queries = QUERIES[:args.queries]
+    threads = enrich.DETAIL_FETCH_THREADS
+
+    print(f"{len(STORE_NAMES)} stores x {len(queries)} queries, {args.latency_ms} ms per fetch")
+    print(f"{'mode':<11} {'enriched':>8} {'fetched':>8} {'cached':>7} {'timed out':>9} {'ms':>7}")
+    cache = enrich.DetailCache()
+    try:
+        for mode, fetch_threads, deadline_s, mode_cache in (
+            ('sequential', 1, 60.0, None),
+            ('parallel', threads, 60.0, cache),
+            ('cached', threads, 60.0, cache),
+            ('deadline', threads, args.deadline_ms / 1000, None),
+        ):
+            enrich.DETAIL_FETCH_THREADS = fetch_threads
+            stats, elapsed, enriched = run(queries, deadline_s, mode_cache)
+            print(f"{mode:<11} {enriched:>8} {stats.fetched:>8} {stats.cached:>7} "
+                  f"{stats.timed_out:>9} {elapsed * 1000:>7.0f}")
+    finally:
+        enrich.DETAIL_FETCH_THREADS = threads
+        mock.set_backend(None)
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
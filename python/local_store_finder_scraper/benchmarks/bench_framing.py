@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Bridge Protocol Benchmark
+
+Builds run_scrape output documents from the fixture search pages (one
+store up to a large batch) and compares the two bridge protocols:
+
+- json:            write_output() text, json.loads() to read it back
+- framed:          scrapers.framing frame (MessagePack results table,
+                   zlib above the threshold), stdlib codec
+- framed+msgpack:  same frame using the msgpack package, if installed
+
+Reports bytes on the pipe and Python encode/decode time per document.
+With node on PATH it also times the Node side (JSON.parse vs
+scraperFraming.decodeFrames + decodeOutput).
+
+Usage:
+    python benchmarks/bench_framing.py
+    python benchmarks/bench_framing.py --repeat 500
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import framing, get_scraper_for_store
+from scrapers.serialize import write_output
+
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FIXTURES_DIR = os.path.join(BASE_DIR, 'fixtures')
+FRAMING_JS = os.path.abspath(os.path.join(BASE_DIR, '..', '..', 'services', 'scraperFraming.js'))
+
+PAGES = [
+    ('Home Depot', 'homedepot_search.html', 'cordless drill'),
+    ('Best Buy', 'bestbuy_search.html', 'drill'),
+    ('Local Grocer', 'generic_search.html', 'eggs'),
+]
+
+# Stores per output document
+BATCH_SIZES = (1, 10, 100)
+
+NODE_SCRIPT = """
+const fs = require('fs');
+const { decodeFrames, decodeOutput } = require(process.argv[1]);
+const [jsonPath, framePath, repeat] = [process.argv[2], process.argv[3], Number(process.argv[4])];
+const text = fs.readFileSync(jsonPath);
+const frame = fs.readFileSync(framePath);
+function time(fn) {
+  fn();
+  const start = process.hrtime.bigint();
+  for (let i = 0; i < repeat; i++) fn();
+  return Number(process.hrtime.bigint() - start) / 1e6 / repeat;
+}
+const json = time(() => JSON.parse(text.toString('utf8')));
+const framed = time(() => decodeOutput(decodeFrames(frame).frames[0]));
+console.log(JSON.stringify({ json, framed }));
+"""
+
+
+def fixture_results() -> list:
+    """Parsed results of each fixture page, as a scrape would return them."""
+    pages = []
+    for store_name, page, query in PAGES:
+        with open(os.path.join(FIXTURES_DIR, page), encoding='utf-8') as f:
+            html = f.read()
+        scraper = get_scraper_for_store(store_name, 'requests')
+        pages.append(scraper.parse_page(
+            html, store_name, store_name, f'https://example.com/{page}?q={query}', query, 5
+        ))
+    return pages
+
+
+def build_output(pages: list, stores: int) -> dict:
+    """Output document for a batch of `stores` stores, cycling through the fixture pages."""
+    batch = []
+    for i in range(stores):
+        for result in pages[i % len(pages)]:
+            batch.append({**result.to_dict(), 'store_id': f'store-{i}'})
+    return {
+        'results': batch,
+        'errors': [],
+        'meta': {'query': 'drill', 'stores_processed': stores, 'total_results': len(batch)},
+    }
+
+
+def per_call_ms(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def json_encode(output: dict) -> bytes:
+    stream = io.StringIO()
+    write_output(output, stream)
+    return stream.getvalue().encode('utf-8')
+
+
+def frame_decode(frame: bytes) -> dict:
+    payload = framing.decode_frame(frame)
+    payload['results'] = framing.results_from_table(payload['results'])
+    return payload
+
+
+def node_decode_ms(text: bytes, frame: bytes, repeat: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix='bench_framing_')
+    try:
+        json_path = os.path.join(workdir, 'output.json')
+        frame_path = os.path.join(workdir, 'output.frame')
+        with open(json_path, 'wb') as f:
+            f.write(text)
+        with open(frame_path, 'wb') as f:
+            f.write(frame)
+        proc = subprocess.run(
+            ['node', '-e', NODE_SCRIPT, FRAMING_JS, json_path, frame_path, str(repeat)],
+            check=True, capture_output=True, text=True
+        )
+        return json.loads(proc.stdout)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bridge protocol benchmark')
+    parser.add_argument('--repeat', type=int, default=200, help='Encode/decode calls per measurement')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    pages = fixture_results()
+    installed_msgpack = framing.msgpack
+    codecs = [('framed', None)]
+    if installed_msgpack is not None:
+        codecs.append(('framed+msgpack', installed_msgpack))
+    node = bool(shutil.which('node')) and os.path.exists(FRAMING_JS)
+
+    print(f"{'stores':>6} {'results':>8} {'protocol':<15} {'bytes':>8} {'encode ms':>10} "
+          f"{'decode ms':>10}" + (f" {'node ms':>8}" if node else ''))
+    try:
+        for stores in BATCH_SIZES:
+            output = build_output(pages, stores)
+            count = len(output['results'])
+
+            text = json_encode(output)
+            frame = framing.encode_frame(framing.output_payload(output))
+            node_ms = node_decode_ms(text, frame, args.repeat) if node else {}
+            print(f"{stores:>6} {count:>8} {'json':<15} {len(text):>8} "
+                  f"{per_call_ms(lambda: json_encode(output), args.repeat):>10.3f} "
+                  f"{per_call_ms(lambda: json.loads(text), args.repeat):>10.3f}"
+                  + (f" {node_ms['json']:>8.3f}" if node else ''))
+
+            for name, module in codecs:
+                framing.msgpack = module
+                frame = framing.encode_frame(framing.output_payload(output))
+                assert frame_decode(frame) == json.loads(text)
+                encode_ms = per_call_ms(lambda: framing.encode_frame(framing.output_payload(output)), args.repeat)
+                decode_ms = per_call_ms(lambda: frame_decode(frame), args.repeat)
+                print(f"{'':>6} {'':>8} {name:<15} {len(frame):>8} {encode_ms:>10.3f} {decode_ms:>10.3f}"
+                      + (f" {node_ms['framed']:>8.3f}" if node and name == 'framed' else ''))
+    finally:
+        framing.msgpack = installed_msgpack
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+HTTP/2 Transport Benchmark
+
+Serves the fixture search pages over HTTPS (self-signed certificate
+generated with openssl) from two local stand-ins for one store host:
+
+- an HTTP/1.1 server (one thread per connection)
+- an HTTP/2 server built on h2 (one asyncio connection, a stream per
+  request), offering h2 and http/1.1 over ALPN
+
+Both answer each request after --latency-ms, compressed with the best
+coding the client accepts (zstd, br, gzip). A batch of --concurrency
+searches is sent to the host at once, for --rounds rounds, through the
+shared session:
+
+- http/1.1:      the requests session
+- http/2:        the HTTP/2 client against the HTTP/2 server
+- http/2 -> 1.1: the HTTP/2 client against the HTTP/1.1-only server
+
+Reports time for the first (cold) round and per warm round, connections
+the server accepted, bytes on the wire and the protocol negotiated. A
+second table compares the codings per fixture page: wire size and
+client decode time.
+
+Needs httpx[http2]; brotli and zstandard add the br and zstd codings.
+
+Usage:
+    python benchmarks/bench_http2.py
+    python benchmarks/bench_http2.py --concurrency 32 --rounds 10 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import get_scraper_for_store
+from scrapers.http2 import http2_available
+from scrapers.session import configure_http_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+PAGES = [
+    ('Home Depot', 'homedepot_search.html'),
+    ('Best Buy', 'bestbuy_search.html'),
+    ('Local Grocer', 'generic_search.html'),
+]
+
+QUERIES = [
+    'cordless drill', 'led bulbs', 'garden hose', 'usb charger', 'paint roller',
+    'extension cord', 'smoke detector', 'wood screws', 'hdmi cable', 'light switch',
+]
+
+
+def encoders() -> dict:
+    """Content codings the stand-ins can produce, best first."""
+    codings = {}
+    if zstandard is not None:
+        codings['zstd'] = zstandard.ZstdCompressor(level=3).compress
+    if brotli is not None:
+        codings['br'] = lambda body: brotli.compress(body, quality=5)
+    codings['gzip'] = lambda body: gzip.compress(body, compresslevel=6)
+    return codings
+
+
+def decoders() -> dict:
+    codings = {'identity': lambda body: body, 'gzip': gzip.decompress}
+    if brotli is not None:
+        codings['br'] = brotli.decompress
+    if zstandard is not None:
+        codings['zstd'] = zstandard.ZstdDecompressor().decompress
+    return codings
+
+
+class Origin:
+    """What both stand-ins serve: fixture pages, compressed per Accept-Encoding."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.encoders = encoders()
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.wire_bytes = 0
+
+    def connected(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def page(self, path: str, accept_encoding: str) -> tuple:
+        """(status, headers, body) for a request path."""
+        name = os.path.basename(urlsplit(path).path)
+        accepted = {c.strip().split(';')[0] for c in accept_encoding.split(',')}
+        coding = next((c for c in self.encoders if c in accepted), 'identity')
+        key = (name, coding)
+        with self._lock:
+            body = self._bodies.get(key)
+        if body is None:
+            try:
+                with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                return 404, [], b''
+            if coding != 'identity':
+                body = self.encoders[coding](body)
+            with self._lock:
+                self._bodies[key] = body
+        with self._lock:
+            self.wire_bytes += len(body)
+        headers = [('content-type', 'text/html; charset=utf-8'), ('content-length', str(len(body)))]
+        if coding != 'identity':
+            headers.append(('content-encoding', coding))
+        return 200, headers, body
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.wire_bytes = 0
+
+
+def http1_server(origin: Origin, context: ssl.SSLContext) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            origin.connected()
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(origin.latency)
+            status, headers, body = origin.page(self.path, self.headers.get('Accept-Encoding', ''))
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            if status != 200:
+                self.send_header('content-length', '0')
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_HEAD = do_GET
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # A batch connects all at once; the default backlog of 5 drops SYNs
+        request_queue_size = 256
+
+    server = Server(('127.0.0.1', 0), Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class H2Protocol(asyncio.Protocol):
+    """One HTTP/2 connection of the stand-in server."""
+
+    def __init__(self, origin: Origin):
+        import h2.config
+        import h2.connection
+
+        self.origin = origin
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+        )
+        self.transport = None
+        self.window_open = {}
+
+    def connection_made(self, transport):
+        self.origin.connected()
+        self.transport = transport
+        self.conn.initiate_connection()
+        transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+        import h2.exceptions
+
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self.transport.write(self.conn.data_to_send())
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.get_running_loop().create_task(self.respond(event.stream_id, dict(event.headers)))
+            elif isinstance(event, h2.events.WindowUpdated):
+                for waiter in (self.window_open.values() if event.stream_id == 0
+                               else [self.window_open.get(event.stream_id)]):
+                    if waiter is not None:
+                        waiter.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    async def respond(self, stream_id: int, headers: dict):
+        await asyncio.sleep(self.origin.latency)
+        status, response_headers, body = self.origin.page(
+            headers.get(':path', '/'), headers.get('accept-encoding', '')
+        )
+        end = not body or headers.get(':method') == 'HEAD'
+        self.conn.send_headers(stream_id, [(':status', str(status))] + response_headers, end_stream=end)
+        self.transport.write(self.conn.data_to_send())
+        while not end and body:
+            window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+            if window <= 0:
+                waiter = self.window_open[stream_id] = asyncio.Event()
+                await waiter.wait()
+                continue
+            chunk, body = body[:window], body[window:]
+            self.conn.send_data(stream_id, chunk, end_stream=not body)
+            self.transport.write(self.conn.data_to_send())
+        self.window_open.pop(stream_id, None)
+
+
+def http2_server(origin: Origin, context: ssl.SSLContext) -> tuple:
+    """Start the HTTP/2 stand-in on its own event loop thread. Returns (port, stop)."""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        loop.create_server(lambda: H2Protocol(origin), '127.0.0.1', 0, ssl=context)
+    )
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1], lambda: loop.call_soon_threadsafe(loop.stop)
+
+
+def make_certificate(directory: str) -> tuple:
+    """Self-signed certificate for localhost/127.0.0.1. Returns (cert, key) paths."""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+         '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def server_context(cert: str, key: str, alpn: list) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    context.set_alpn_protocols(alpn)
+    return context
+
+
+def search_batch(pool: ThreadPoolExecutor, base_url: str, concurrency: int) -> None:
+    """concurrency searches against the host at once, as a batch request sends them."""
+    def search(i: int):
+        store_name, page = PAGES[i % len(PAGES)]
+        scraper = get_scraper_for_store(store_name, 'requests')
+        if scraper.source != 'requests':
+            scraper = type(scraper)(source='requests')
+        results = scraper.scrape(
+            store_id=store_name, store_name=store_name, base_url=base_url,
+            search_url_template=f'{base_url}/{page}?q={{query}}', query=QUERIES[i % len(QUERIES)]
+        )
+        if not results or results[0].price_cents is None:
+            raise RuntimeError(results[0].notes if results else 'no results')
+
+    list(pool.map(search, range(concurrency)))
+
+
+def run(base_url: str, origin: Origin, http2: bool, concurrency: int, rounds: int) -> dict:
+    session = configure_http_cache(None, http2=http2)
+    origin.reset()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        search_batch(pool, base_url, concurrency)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(rounds):
+            search_batch(pool, base_url, concurrency)
+        warm = (time.perf_counter() - start) / max(1, rounds)
+    versions = session.http2.snapshot() if session.http2 else {'HTTP/1.1': (rounds + 1) * concurrency}
+    return {
+        'cold_ms': cold * 1000,
+        'warm_ms': warm * 1000,
+        'connections': origin.connections,
+        'kb': origin.wire_bytes / 1024,
+        'version': max(versions, key=versions.get),
+    }
+
+
+def coding_table(repeat: int) -> None:
+    print(f"\n{'page':<22} {'coding':<9} {'bytes':>7} {'decode us':>10}")
+    codings = {'identity': lambda body: body, **encoders()}
+    decode = decoders()
+    for _, page in PAGES:
+        with open(os.path.join(FIXTURES_DIR, page), 'rb') as f:
+            body = f.read()
+        for coding, encode in codings.items():
+            wire = encode(body)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                decode[coding](wire)
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"{page:<22} {coding:<9} {len(wire):>7} {elapsed * 1e6:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP/2 transport benchmark')
+    parser.add_argument('--concurrency', type=int, default=16, help='Searches sent to the host at once')
+    parser.add_argument('--rounds', type=int, default=5, help='Warm rounds after the first')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Server time per response')
+    args = parser.parse_args()
+
+    if not http2_available():
+        print("httpx and h2 are not installed (pip install 'httpx[http2]'); nothing to compare")
+        return
+
+    logging.disable(logging.WARNING)
+    origin = Origin(args.latency_ms / 1000)
+    workdir = tempfile.mkdtemp(prefix='bench_http2_')
+    stop_h2 = None
+    server = None
+    try:
+        cert, key = make_certificate(workdir)
+        os.environ['REQUESTS_CA_BUNDLE'] = cert
+
+        server = http1_server(origin, server_context(cert, key, ['http/1.1']))
+        h2_port, stop_h2 = http2_server(origin, server_context(cert, key, ['h2', 'http/1.1']))
+        http1_url = f'https://localhost:{server.server_address[1]}'
+        http2_url = f'https://localhost:{h2_port}'
+
+        # Imports, parser set-up and template learning, outside the timings
+        run(http1_url, origin, False, len(PAGES), 0)
+
+        print(f"{args.concurrency} concurrent searches per round, {args.latency_ms} ms server latency")
+        print(f"{'client':<15} {'cold ms':>8} {'warm ms':>8} {'conns':>6} {'wire KB':>8}  protocol")
+        for mode, base_url, http2 in (
+            ('http/1.1', http1_url, False),
+            ('http/2', http2_url, True),
+            ('http/2 -> 1.1', http1_url, True),
+        ):
+            r = run(base_url, origin, http2, args.concurrency, args.rounds)
+            print(f"{mode:<15} {r['cold_ms']:>8.1f} {r['warm_ms']:>8.1f} {r['connections']:>6} "
+                  f"{r['kb']:>8.1f}  {r['version']}")
+        print("(cold is the first round, new connections included; warm is per later round)")
+        coding_table(2000)
+    finally:
+        configure_http_cache(None, http2=False)
+        if server is not None:
+            server.shutdown()
+        if stop_h2 is not None:
+            stop_h2()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+HTTP Cache Benchmark
+
+Serves the fixture search pages from a local HTTP server that sends
+ETag/Last-Modified validators and a configurable Cache-Control max-age,
+then scrapes them repeatedly with:
+
+- no cache:     full GET and parse every time
+- revalidate:   HTTP cache, max-age=0 (every fetch is a conditional GET,
+                answered 304, and the stored extraction is reused)
+- fresh:        HTTP cache, max-age=3600 (no requests after the first)
+
+Reports wall time per scrape, body bytes sent by the server and how many
+pages were actually parsed.
+
+Usage:
+    python benchmarks/bench_http_cache.py
+    python benchmarks/bench_http_cache.py --rounds 50
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import get_scraper_for_store
+from scrapers.base import BaseScraper
+from scrapers.session import configure_http_cache
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+PAGES = [
+    ('Home Depot', 'homedepot_search.html', 'cordless drill'),
+    ('Best Buy', 'bestbuy_search.html', 'drill'),
+    ('Local Grocer', 'generic_search.html', 'eggs'),
+]
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Static fixture server with ETags, Cache-Control and byte counting."""
+
+    max_age = 0
+    bytes_sent = 0
+    lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'max-age={self.max_age}')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'max-age={self.max_age}')
+        self.end_headers()
+        self.wfile.write(body)
+        with FixtureHandler.lock:
+            FixtureHandler.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(base_url: str, rounds: int, cache_dir, max_age: int) -> dict:
+    FixtureHandler.max_age = max_age
+    FixtureHandler.bytes_sent = 0
+    configure_http_cache(cache_dir)
+
+    parsed = 0
+    original_parse_page = BaseScraper.parse_page
+
+    def counting_parse_page(self, *args, **kwargs):
+        nonlocal parsed
+        parsed += 1
+        return original_parse_page(self, *args, **kwargs)
+
+    BaseScraper.parse_page = counting_parse_page
+    try:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for store_name, page, query in PAGES:
+                scraper = get_scraper_for_store(store_name, 'requests')
+                scraper.scrape(
+                    store_id=store_name, store_name=store_name, base_url=base_url,
+                    search_url_template=f'{base_url}/{page}?q={{query}}', query=query
+                )
+        elapsed = time.perf_counter() - start
+    finally:
+        BaseScraper.parse_page = original_parse_page
+
+    scrapes = rounds * len(PAGES)
+    return {
+        'ms_per_scrape': elapsed / scrapes * 1000,
+        'bytes': FixtureHandler.bytes_sent,
+        'parsed': parsed,
+        'scrapes': scrapes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP cache benchmark')
+    parser.add_argument('--rounds', type=int, default=20, help='Scrapes of each fixture page')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    scenarios = [('no cache', False, 0), ('revalidate', True, 0), ('fresh', True, 3600)]
+    print(f"{'scenario':<12} {'ms/scrape':>10} {'body bytes':>12} {'pages parsed':>14}")
+    for name, cached, max_age in scenarios:
+        cache_dir = tempfile.mkdtemp(prefix='http_cache_') if cached else None
+        try:
+            stats = run(base_url, args.rounds, cache_dir, max_age)
+        finally:
+            configure_http_cache(None)
+            if cache_dir:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        print(f"{name:<12} {stats['ms_per_scrape']:>10.2f} {stats['bytes']:>12,} "
+              f"{stats['parsed']:>7}/{stats['scrapes']}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
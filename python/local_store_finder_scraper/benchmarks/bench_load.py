@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Load Benchmark
+
+Pushes batch requests for mock stores (source 'mock', see scrapers.mock)
+through run_scrape.process_request and serializes each output, so the
+whole request path is exercised with no network: validation, scheduling
+onto fetch threads, the parse pool or shard workers, parsing and ranking,
+unit normalization, and JSON or framed output.
+
+Each request is MAX_STORES stores x MAX_QUERIES queries. Every mode must
+produce the same results; throughput is reported in jobs ((store, query)
+pairs) per second.
+
+- threads:   scrape_jobs, fetch and parse on the same threads
+- pipeline:  fetch threads feeding the parse process pool
+- shards:    store hosts sharded over worker processes
+
+Usage:
+    python benchmarks/bench_load.py
+    python benchmarks/bench_load.py --requests 40 --latency-ms 5
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import run_scrape
+from scrapers import framing, mock
+from scrapers.serialize import write_output
+from scrapers.shard import Supervisor
+
+QUERIES = [
+    'cordless drill', 'eggs', 'paper towels', 'led bulbs', 'coffee filters',
+    'olive oil', 'hdmi cable', 'garden hose', 'laundry detergent', 'aa batteries',
+    'trash bags', 'dish soap', 'usb charger', 'peanut butter', 'light switch',
+    'paint roller', 'almond milk', 'extension cord', 'sponges', 'rice',
+    'bird seed', 'wood screws', 'tortilla chips', 'smoke detector', 'oat cereal',
+]
+
+STORE_NAMES = ['Home Depot', 'Best Buy', 'Corner Grocer', 'Hardware Hut', 'Value Mart']
+
+
+def build_requests(count: int) -> list:
+    """Batch requests over distinct store hosts, so host sharding has work to spread."""
+    requests = []
+    for n in range(count):
+        stores = [{
+            'id': f'store-{n}-{i}',
+            'name': name,
+            'base_url': f'https://store-{n}-{i}.example.test',
+            'search_url_template': f'https://store-{n}-{i}.example.test/search?q={{query}}',
+            'source': 'mock',
+        } for i, name in enumerate(STORE_NAMES[:run_scrape.MAX_STORES])]
+        requests.append({'stores': stores, 'queries': QUERIES[:run_scrape.MAX_QUERIES]})
+    return requests
+
+
+def serialize(output: dict, protocol: str) -> int:
+    if protocol == 'framed':
+        return len(framing.encode_frame(framing.output_payload(output)))
+    stream = io.StringIO()
+    write_output(output, stream)
+    return len(stream.getvalue())
+
+
+def run(mode: str, requests: list, args) -> tuple:
+    options = run_scrape.parse_args([
+        '--protocol', args.protocol,
+        '--parse-workers', str(args.workers if mode == 'pipeline' else 0),
+    ])
+    shards = None
+    if mode == 'shards':
+        # As open_shards() builds it, with the workers' logging quieted too
+        shards = Supervisor(
+            run_scrape.scrape_jobs, args.workers,
+            initializer=logging.disable, initargs=(logging.WARNING,)
+        )
+    try:
+        if shards is not None:
+            # Workers start on first use; keep startup out of the timing
+            shards.run([(requests[0]['stores'][0], 'warmup')])
+        items = []
+        jobs = wire_bytes = 0
+        start = time.perf_counter()
+        for data in requests:
+            output, _ = run_scrape.process_request(data, options, shards)
+            wire_bytes += serialize(output, args.protocol)
+            jobs += len(data['stores']) * len(data['queries'])
+            items.extend((r.store_id, r.item_name, r.price_cents) for r in output['results'])
+        elapsed = time.perf_counter() - start
+    finally:
+        if shards is not None:
+            shards.close()
+    return items, jobs, elapsed, wire_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load benchmark on the mock backend')
+    parser.add_argument('--requests', type=int, default=20, help='Batch requests per mode')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Parse processes (pipeline) or worker processes (shards)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated fetch latency')
+    parser.add_argument('--cards', type=int, default=mock.DEFAULT_CARDS, help='Product cards per page')
+    parser.add_argument('--protocol', choices=('json', 'framed'), default='json', help='Output encoding')
+    parser.add_argument('--modes', default='threads,pipeline,shards', help='Comma-separated modes to run')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # Shard workers are spawned and build their own backend from the environment
+    os.environ['SCRAPER_MOCK_CARDS'] = str(args.cards)
+    os.environ['SCRAPER_MOCK_LATENCY_MS'] = str(args.latency_ms)
+    mock.set_backend(None)
+
+    requests = build_requests(args.requests)
+    print(f"{args.requests} requests x {len(requests[0]['stores']) * len(requests[0]['queries'])} jobs, "
+          f"{args.cards} cards/page, {args.latency_ms} ms latency, {args.protocol} output")
+    print(f"{'mode':<10} {'jobs':>7} {'seconds':>8} {'jobs/s':>9} {'out KB':>8}")
+    baseline = None
+    for mode in args.modes.split(','):
+        items, jobs, elapsed, wire_bytes = run(mode, requests, args)
+        if baseline is None:
+            baseline = items
+        assert items == baseline, f"{mode} results differ from {args.modes.split(',')[0]}"
+        print(f"{mode:<10} {jobs:>7} {elapsed:>8.2f} {jobs / elapsed:>9.0f} {wire_bytes / 1024:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Logging Benchmark
+
+Scraper threads log the way a batch scrape does (a line per search, per
+selector match and per failed product page) to a pipe drained at a fixed
+rate, standing in for the Node bridge reading stderr. Scrapes are
+simulated with a short busy loop, so only logging cost is measured.
+
+- direct:   f-strings, StreamHandler writing from the scraping thread
+            (the previous setup)
+- queue:    %-style arguments, queued and written by a listener thread
+            (scrapers.logs, sampling off)
+- sampled:  as queue, with the default per-message-type rate limit
+
+Reports scrapes per second, per-scrape latency, and the lines written,
+suppressed by sampling and dropped at the queue cap.
+
+Usage:
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --threads 8 --drain-kbps 64
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers.logs import DEFAULT_RATE, TEXT_FORMAT, configure_logging, stop_logging
+
+MODES = ('direct', 'queue', 'sampled')
+
+logger = logging.getLogger('scrapers.bench')
+
+
+def busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def scrape_direct(i: int, work_s: float) -> None:
+    store, url = f"Store {i % 40}", f"https://store{i % 40}.example.com/search?q=drill+{i}"
+    logger.info(f"Scraping {store}: {url}")
+    busy(work_s)
+    logger.info(f"Found {24 + i % 7} products with selector: div.product-card.sku-item")
+    logger.debug(f"Error parsing product: {ValueError('no price')}")
+    for page in range(2):
+        logger.info(f"Product page failed for {store}: {str(TimeoutError('read timed out'))[:80]}")
+
+
+def scrape_lazy(i: int, work_s: float) -> None:
+    store, url = f"Store {i % 40}", f"https://store{i % 40}.example.com/search?q=drill+{i}"
+    logger.info("Scraping %s: %s", store, url)
+    busy(work_s)
+    logger.info("Found %s products with selector: %s", 24 + i % 7, 'div.product-card.sku-item')
+    logger.debug("Error parsing product: %s", ValueError('no price'))
+    for page in range(2):
+        logger.info("Product page failed for %s: %.80s", store, TimeoutError('read timed out'))
+
+
+def drain(fd: int, kbps: float, counts: dict) -> None:
+    """Read the pipe at about kbps, counting lines and suppressed notes."""
+    chunk = 4096
+    interval = chunk / (kbps * 1024)
+    pending = b''
+    while True:
+        data = os.read(fd, chunk)
+        if not data:
+            return
+        pending += data
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            counts['lines'] += 1
+            if b'similar suppressed]' in line:
+                counts['suppressed'] += int(line.rsplit(b'[', 1)[1].split()[0])
+            if b'Dropped' in line:
+                counts['dropped'] += int(line.split(b'Dropped ')[1].split()[0])
+        time.sleep(interval)
+
+
+def run(args, mode: str) -> dict:
+    read_fd, write_fd = os.pipe()
+    stream = open(write_fd, 'w', buffering=1)
+    counts = {'lines': 0, 'suppressed': 0, 'dropped': 0}
+    reader = threading.Thread(target=drain, args=(read_fd, args.drain_kbps, counts))
+    reader.start()
+
+    root = logging.getLogger()
+    if mode == 'direct':
+        stop_logging()
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        configure_logging('text', DEFAULT_RATE if mode == 'sampled' else 0, stream=stream)
+    scrape = scrape_direct if mode == 'direct' else scrape_lazy
+
+    latencies = []
+    lock = threading.Lock()
+    per_thread = args.scrapes // args.threads
+
+    def worker(t: int):
+        mine = []
+        for n in range(per_thread):
+            start = time.perf_counter()
+            scrape(t * per_thread + n, args.work_us / 1e6)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Let the listener write what it holds before closing the pipe
+    stop_logging(timeout=None)
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    stream.close()
+    reader.join()
+    os.close(read_fd)
+
+    latencies.sort()
+    return {
+        'rate': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1e6,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1e6,
+        **counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Logging benchmark')
+    parser.add_argument('--scrapes', type=int, default=20000, help='Simulated scrapes in total')
+    parser.add_argument('--threads', type=int, default=4, help='Scraping threads')
+    parser.add_argument('--work-us', type=float, default=50, help='Busy time per scrape, microseconds')
+    parser.add_argument('--drain-kbps', type=float, default=256, help='Rate the pipe is read at, KB/s')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to run')
+    args = parser.parse_args()
+
+    print(f"{args.scrapes} scrapes on {args.threads} threads, {args.work_us:.0f} us work each, "
+          f"stderr drained at {args.drain_kbps:.0f} KB/s")
+    print(f"{'mode':<9} {'scrapes/s':>10} {'p50 us':>8} {'p99 us':>9} {'lines':>7} {'suppressed':>11} {'dropped':>8}")
+    for mode in args.modes.split(','):
+        r = run(args, mode)
+        print(f"{mode:<9} {r['rate']:>10.0f} {r['p50']:>8.0f} {r['p99']:>9.0f} {r['lines']:>7} "
+              f"{r['suppressed']:>11} {r['dropped']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Cross-Store Matching Benchmark
+
+Builds a synthetic catalog of product families (one per brand, type and
+line such as "Brushless"; variants differing in size, voltage or pack
+count) and lists every
+product at three stores, each with its own title style and identifier
+coverage:
+
+- Home Depot style: "Brand 20V Cordless Drill Kit (2-Pack)", model number
+  on most cards
+- Best Buy style:   "Brand - 20V Cordless Drill Kit - Yellow", model and
+  SKU on most
+- grocer style:     shuffled words, no color, no identifiers
+
+Results are grouped three ways:
+
+- identifiers:  UPC/model only, a new group for everything else
+- pairwise:     identifiers, then exact title Jaccard against every
+                product seen so far (what a downstream pairwise pass does)
+- lsh:          scrapers.matching (identifiers, then MinHash LSH)
+
+and scored against the true products: pair precision/recall, groups
+found, and time per result.
+
+Usage:
+    python benchmarks/bench_matching.py
+    python benchmarks/bench_matching.py --families 1280
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import matching
+from scrapers.base import ScraperResult
+from scrapers.units import normalize_units
+
+BRANDS = ['DEWALT', 'RYOBI', 'Milwaukee', 'Makita', 'Bosch', 'Craftsman', 'Kobalt', 'Husky',
+          'Duracell', 'Energizer', 'Philips', 'GE', 'Samsung', 'Insignia', 'Anker', 'Belkin']
+TYPES = [
+    ('Cordless Drill/Driver Kit', 'V'), ('Impact Driver', 'V'), ('Circular Saw', 'V'),
+    ('AA Alkaline Batteries', 'Pack'), ('LED Light Bulbs', 'Pack'), ('USB-C Charging Cable', 'ft'),
+    ('Smart LED TV', 'in.'), ('Garden Hose', 'ft'), ('Extension Cord', 'ft'), ('Wood Screws', 'Pack'),
+]
+SIZES = {'V': [12, 18, 20, 40], 'Pack': [4, 8, 12, 24, 48], 'ft': [3, 6, 10, 25, 50, 100], 'in.': [43, 50, 55, 65, 75]}
+EXTRAS = ['Brushless', 'Heavy Duty', 'Compact', 'Pro', 'Max', 'Premium', 'Ultra', 'Outdoor']
+COLORS = ['Black', 'Yellow', 'White', 'Blue', 'Red', 'Gray']
+
+
+def catalog(families: int, rng: random.Random) -> list:
+    """(product id, brand, type, size label, extra, color, model, upc) per product."""
+    products = []
+    lines = [(brand, kind, extra) for brand in BRANDS for kind in TYPES for extra in EXTRAS]
+    for brand, (kind, measure), extra in rng.sample(lines, k=min(families, len(lines))):
+        for size in rng.sample(SIZES[measure], k=min(3, len(SIZES[measure]))):
+            label = f'{size}-Pack' if measure == 'Pack' else f'{size}{measure}' if measure == 'V' else f'{size} {measure}'
+            model = f'{brand[:2].upper()}{rng.randrange(100, 999)}{rng.choice("ABCDEFGH")}{size}'
+            upc = f'{rng.randrange(10 ** 11, 10 ** 12)}'
+            products.append((len(products), brand, kind, label, extra, rng.choice(COLORS), model, upc))
+    return products
+
+
+def shuffled(title: str, rng: random.Random) -> str:
+    words = title.split()
+    return ' '.join(rng.sample(words, k=len(words)))
+
+
+def listings(products: list, rng: random.Random) -> list:
+    """(true product id, ScraperResult) for every product at every store, shuffled."""
+    results = []
+    for pid, brand, kind, label, extra, color, model, upc in products:
+        stores = [
+            ('hd', 'Home Depot', f'{brand} {label} {extra} {kind}',
+             {'model': model} if rng.random() < 0.7 else None),
+            ('bb', 'Best Buy', f'{brand} - {extra} {label} {kind} - {color}',
+             {'model': model, 'sku': str(rng.randrange(10 ** 6, 10 ** 7))} if rng.random() < 0.8 else None),
+            ('gr', 'Corner Grocer', shuffled(f'{kind} {extra} {brand} {label}', rng), None),
+        ]
+        for store_id, store_name, title, details in stores:
+            result = ScraperResult(store_id, store_name, item_name=title, price_cents=rng.randrange(199, 29999),
+                                   product_url=f'https://{store_id}.example.test/p/{pid}', details=details)
+            results.append((pid, result))
+    rng.shuffle(results)
+    return results
+
+
+def group_identifiers(results: list) -> list:
+    by_id, groups = {}, []
+    for result in results:
+        ids = matching.identifiers(result)
+        key = next((f'{k}:{ids[k]}' for k in ('upc', 'model') if k in ids), None)
+        if key is None:
+            groups.append(id(result))
+            continue
+        groups.append(by_id.setdefault(key, len(by_id)))
+    return groups
+
+
+def group_pairwise(results: list) -> list:
+    seen, by_id, groups = [], {}, []
+    for result in results:
+        key = matching.product_key(result)
+        group = next((by_id[f'{k}:{key.identifiers[k]}'] for k in ('upc', 'model')
+                      if f'{k}:{key.identifiers.get(k)}' in by_id), None)
+        if group is None:
+            best = matching.MATCH_THRESHOLD
+            for other, other_group in seen:
+                score = matching.jaccard(key.shingles, other.shingles)
+                if score >= best and not matching.conflicts(key, other):
+                    group, best = other_group, score
+        if group is None:
+            group = len(groups)
+        for kind in ('upc', 'model'):
+            if kind in key.identifiers:
+                by_id.setdefault(f'{kind}:{key.identifiers[kind]}', group)
+        seen.append((key, group))
+        groups.append(group)
+    return groups
+
+
+def group_lsh(results: list) -> list:
+    index = matching.MatchIndex()
+    matching.match_products(results, index)
+    index.close()
+    return [r.product_group for r in results]
+
+
+def score(truth: list, groups: list) -> tuple:
+    """Pair precision and recall of groups against the true product ids."""
+    def pairs(labels):
+        members = {}
+        for i, label in enumerate(labels):
+            members.setdefault(label, []).append(i)
+        return {(a, b) for m in members.values() for i, a in enumerate(m) for b in m[i + 1:]}
+    true_pairs, found_pairs = pairs(truth), pairs(groups)
+    hits = len(true_pairs & found_pairs)
+    return hits / max(1, len(found_pairs)), hits / max(1, len(true_pairs)), len(set(groups))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-store matching benchmark')
+    parser.add_argument('--families', type=int, default=400, help='Product families (3 variants each, at most 1280)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    products = catalog(args.families, rng)
+    pairs = listings(products, rng)
+    truth = [pid for pid, _ in pairs]
+    results = [r for _, r in pairs]
+    normalize_units(results)
+
+    print(f"{len(products)} products, {len(results)} results from 3 stores")
+    print(f"{'method':<12} {'precision':>9} {'recall':>7} {'groups':>7} {'us/result':>10}")
+    for method, group in (('identifiers', group_identifiers), ('pairwise', group_pairwise), ('lsh', group_lsh)):
+        start = time.perf_counter()
+        groups = group(results)
+        elapsed = (time.perf_counter() - start) / len(results)
+        precision, recall, found = score(truth, groups)
+        print(f"{method:<12} {precision:>9.3f} {recall:>7.3f} {found:>7} {elapsed * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
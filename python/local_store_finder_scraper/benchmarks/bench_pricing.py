@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Price Normalization Benchmark
+
+Builds a large corpus of raw price strings from the fixture search pages
+and compares the bulk normalize_prices() path against normalizing each
+string on its own.
+
+Usage:
+    python benchmarks/bench_pricing.py
+    python benchmarks/bench_pricing.py --size 500000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup
+
+from scrapers.pricing import normalize_price, normalize_prices
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+AMOUNT_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+# Price elements on the fixture pages
+PRICE_SELECTORS = [
+    '[data-testid="product-pod-price"]',
+    '[data-testid="customer-price"] span',
+    '.price',
+]
+
+
+def load_fixture_prices() -> list:
+    """Collect raw price text from every fixture page."""
+    prices = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            soup = BeautifulSoup(f.read(), 'html.parser')
+        for selector in PRICE_SELECTORS:
+            prices.extend(elem.get_text(strip=True) for elem in soup.select(selector))
+    return prices
+
+
+def build_corpus(seed_prices: list, size: int, distinct: float) -> list:
+    """
+    Expand fixture prices into a corpus of `size` strings.
+    Roughly `distinct` of them get re-randomized amounts so the corpus is
+    not just a handful of repeated strings.
+    """
+    rng = random.Random(42)
+    corpus = []
+    for _ in range(size):
+        text = rng.choice(seed_prices)
+        if rng.random() < distinct:
+            amount = f"{rng.randint(0, 2499)}.{rng.randint(0, 99):02d}"
+            text = AMOUNT_RE.sub(amount, text, count=1)
+        corpus.append(text)
+    return corpus
+
+
+def bench(label: str, func, repeat: int, size: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:9.1f} ms   {size / best:12,.0f} prices/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Price normalization benchmark')
+    parser.add_argument('--size', type=int, default=200000, help='Corpus size')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions (best is reported)')
+    parser.add_argument('--distinct', type=float, default=0.5,
+                        help='Fraction of corpus entries with randomized amounts')
+    args = parser.parse_args()
+
+    seed_prices = load_fixture_prices()
+    corpus = build_corpus(seed_prices, args.size, args.distinct)
+    print(f"{len(seed_prices)} fixture prices -> corpus of {len(corpus):,} "
+          f"({len(set(corpus)):,} distinct)")
+
+    bulk = normalize_prices(corpus)
+    single = [normalize_price(text) for text in corpus]
+    assert bulk == single, "bulk and per-string normalization disagree"
+
+    per_string = bench('normalize_price (per str)', lambda: [normalize_price(t) for t in corpus],
+                       args.repeat, len(corpus))
+    bulk_time = bench('normalize_prices (bulk)', lambda: normalize_prices(corpus),
+                      args.repeat, len(corpus))
+    print(f"bulk speedup: {per_string / bulk_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
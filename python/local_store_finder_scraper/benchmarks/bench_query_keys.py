@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Query Canonicalization Benchmark
+
+Replays a query log (one search per line) and reports how many distinct
+cache keys each keying strategy produces, plus canonicalization cost:
+
+- raw:        the query exactly as typed
+- normalized: lowercase + collapsed whitespace
+- canonical:  scrapers.query.canonical_key
+
+Fewer distinct keys means more cache and index hits for the same traffic.
+
+Usage:
+    python benchmarks/bench_query_keys.py
+    python benchmarks/bench_query_keys.py --log path/to/queries.txt
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers.query import canonical_key
+
+DEFAULT_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures', 'query_log.txt')
+
+
+def hit_rate(keys: list) -> float:
+    """Share of requests whose key was already seen (an ideal, never-expiring cache)."""
+    return 1.0 - len(set(keys)) / len(keys) if keys else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query canonicalization benchmark')
+    parser.add_argument('--log', default=DEFAULT_LOG, help='Query log, one query per line')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions (best is reported)')
+    parser.add_argument('--top', type=int, default=5, help='Show the most-merged canonical keys')
+    args = parser.parse_args()
+
+    with open(args.log, encoding='utf-8') as f:
+        queries = [line.rstrip('\n') for line in f if line.strip()]
+
+    strategies = {
+        'raw': lambda q: q,
+        'normalized': lambda q: ' '.join(q.lower().split()),
+        'canonical': canonical_key,
+    }
+
+    print(f"{len(queries):,} queries from {os.path.basename(args.log)}")
+    print(f"{'strategy':<12} {'distinct keys':>14} {'ideal hit rate':>15}")
+    baseline = None
+    for name, key_func in strategies.items():
+        keys = [key_func(q) for q in queries]
+        distinct = len(set(keys))
+        baseline = baseline or distinct
+        print(f"{name:<12} {distinct:>14,} {hit_rate(keys):>14.1%}"
+              f"   ({1 - distinct / baseline:.1%} fewer than raw)")
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        canonical_key.cache_clear()
+        start = time.perf_counter()
+        for q in queries:
+            canonical_key(q)
+        best = min(best, time.perf_counter() - start)
+    print(f"canonical_key: {best * 1e6 / len(queries):.2f} us/query (memo cleared each run)")
+
+    groups = Counter()
+    variants = {}
+    for q in queries:
+        key = canonical_key(q)
+        groups[key] += 1
+        variants.setdefault(key, set()).add(q.strip())
+    print("\nMost-merged keys:")
+    for key, _ in sorted(groups.items(), key=lambda kv: len(variants[kv[0]]), reverse=True)[:args.top]:
+        sample = ', '.join(repr(v) for v in sorted(variants[key])[:4])
+        print(f"  {key!r:<28} {len(variants[key]):>3} phrasings, e.g. {sample}")
+
+
+if __name__ == '__main__':
+    main()
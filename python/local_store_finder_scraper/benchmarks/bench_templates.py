@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Learned Template Benchmark
+
+Parses the recorded fixture pages and a mock page as if their stores had
+no scraper of their own (BaseScraper), in two ways:
+
+- selectors:  the generic container and field selector lists
+- template:   a template learned from the host's first page, then
+              applied directly to the repeat pages
+
+For each page it reports the cards parsed, how many have a price, how
+many match the dedicated scraper's (title, price) pairs where the store
+has one, and the parse time per page. Learning time is reported apart.
+
+Usage:
+    python benchmarks/bench_templates.py
+    python benchmarks/bench_templates.py --repeat 500
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup
+
+from scrapers import get_scraper_for_store, templates
+from scrapers.base import BaseScraper
+from scrapers.mock import MockBackend
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+PAGES = [
+    ('homedepot_search.html', 'Home Depot'),
+    ('bestbuy_search.html', 'Best Buy'),
+    ('generic_search.html', None),
+    ('mock', None),
+]
+
+
+class SelectorScraper(BaseScraper):
+    """BaseScraper with template learning turned off."""
+    LEARN_TEMPLATES = False
+
+
+def load(page: str) -> str:
+    if page == 'mock':
+        return MockBackend(cards=12).render('Corner Grocer', 'olive oil')
+    with open(os.path.join(FIXTURES, page), encoding='utf-8') as f:
+        return f.read()
+
+
+def parse(scraper: BaseScraper, html: str, url: str) -> list:
+    soup = BeautifulSoup(html, 'html.parser')
+    return scraper.parse_results_requests(soup, 'store-1', 'Unknown Store', url, 'query')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Learned template benchmark')
+    parser.add_argument('--repeat', type=int, default=200, help='Parses per page and mode')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"{'page':<24} {'mode':<10} {'cards':>5} {'priced':>6} {'correct':>7} {'ms/page':>8}")
+    for page, store_name in PAGES:
+        html = load(page)
+        url = f"https://{page.split('_')[0].split('.')[0]}.example.test/search?q=query"
+        expected = None
+        if store_name:
+            expected = {(r.item_name, r.price_cents)
+                        for r in parse(get_scraper_for_store(store_name, 'requests'), html, url)}
+
+        store = templates.configure_templates(None)
+        start = time.perf_counter()
+        learned = templates.learn_template(BeautifulSoup(html, 'html.parser'))
+        learn_ms = (time.perf_counter() - start) * 1000
+        for mode, scraper in (('selectors', SelectorScraper()), ('template', BaseScraper())):
+            results = parse(scraper, html, url)  # learns the template on first use
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                parse(scraper, html, url)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            priced = sum(1 for r in results if r.price_cents is not None)
+            correct = '-' if expected is None else \
+                str(sum(1 for r in results if (r.item_name, r.price_cents) in expected))
+            print(f"{page:<24} {mode:<10} {len(results):>5} {priced:>6} {correct:>7} {elapsed * 1000:>8.2f}")
+        print(f"{'':<24} learned in {learn_ms:.1f} ms: {learned.card if learned else 'no template'}")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Connection Setup Benchmark
+
+Serves the fixture search pages over HTTPS (HTTP/1.1, self-signed
+certificate generated with openssl) on localhost and scrapes them under
+three connection regimes:
+
+- one-shot:   a new session per round of scrapes, as each run_scrape
+              process has (DNS lookup, TCP connect and full TLS handshake)
+- worker:     one long-lived session whose pooled connections are dropped
+              between scrapes (cached DNS, resumed TLS sessions)
+- keep-alive: one long-lived session reusing its pooled connections
+
+Reports wall time per scrape and the DNS / connect / TLS split per new
+connection, as recorded by scrapers.transport.ConnectionStats.
+
+Usage:
+    python benchmarks/bench_transport.py
+    python benchmarks/bench_transport.py --rounds 50
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers import get_scraper_for_store
+from scrapers.session import configure_http_cache, default_session
+from scrapers.transport import ConnectionStats
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+PAGES = [
+    ('Home Depot', 'homedepot_search.html', 'cordless drill'),
+    ('Best Buy', 'bestbuy_search.html', 'drill'),
+    ('Local Grocer', 'generic_search.html', 'eggs'),
+]
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # client's delayed ACK adds ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_certificate(directory: str) -> tuple:
+    """Self-signed certificate for localhost/127.0.0.1. Returns (cert, key) paths."""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+         '-keyout', key, '-out', cert],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def scrape_all(base_url: str) -> None:
+    for store_name, page, query in PAGES:
+        scraper = get_scraper_for_store(store_name, 'requests')
+        results = scraper.scrape(
+            store_id=store_name, store_name=store_name, base_url=base_url,
+            search_url_template=f'{base_url}/{page}?q={{query}}', query=query
+        )
+        if results and results[0].notes.startswith(('Request failed', 'Scraping failed')):
+            raise RuntimeError(results[0].notes)
+
+
+def run(base_url: str, rounds: int, mode: str) -> dict:
+    totals = {}
+    session = configure_http_cache(None)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if mode == 'one-shot':
+            stats = session.transport.stats.snapshot()
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+            session = configure_http_cache(None)
+        elif mode == 'worker':
+            session.drop_connections()
+        scrape_all(base_url)
+    elapsed = time.perf_counter() - start
+
+    stats = default_session().transport.stats.snapshot()
+    for key, value in stats.items():
+        totals[key] = totals.get(key, 0) + value
+    return {'elapsed': elapsed, **ConnectionStats.report(totals)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Connection setup benchmark')
+    parser.add_argument('--rounds', type=int, default=20, help='Scrapes of each fixture page')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    workdir = tempfile.mkdtemp(prefix='bench_transport_')
+    try:
+        cert, key = make_certificate(workdir)
+        os.environ['REQUESTS_CA_BUNDLE'] = cert
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'https://localhost:{server.server_address[1]}'
+
+        scrapes = args.rounds * len(PAGES)
+        print(f"{scrapes} scrapes per mode against {base_url}")
+        print(f"{'mode':<11} {'ms/scrape':>10} {'conns':>6} {'dns ms':>8} {'connect ms':>11} "
+              f"{'tls ms':>8} {'resumed':>8}")
+        for mode in ('one-shot', 'worker', 'keep-alive'):
+            r = run(base_url, args.rounds, mode)
+            conns = max(1, r['connections'])
+            print(f"{mode:<11} {r['elapsed'] / scrapes * 1000:>10.2f} {r['connections']:>6} "
+                  f"{r['dns_ms'] / conns:>8.3f} {r['connect_ms'] / conns:>11.3f} "
+                  f"{r['tls_ms'] / max(1, r['tls_handshakes']):>8.3f} "
+                  f"{r['tls_resumed']:>4}/{r['tls_handshakes']}")
+        print("(dns/connect ms are per new connection, tls ms per handshake)")
+        server.shutdown()
+    finally:
+        configure_http_cache(None)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Relevance Ranking Evaluation
+
+Parses the recorded search pages in fixtures/ and checks, for a small
+labeled query set, whether the returned result is the product a shopper
+meant. Compares the old first-card-wins selection against
+scrapers.ranking.rank_results, and times ranking per page.
+
+Each case is (fixture, store name, query, expected title substring).
+
+Usage:
+    python benchmarks/eval_ranking.py
+    python benchmarks/eval_ranking.py --verbose
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bs4 import BeautifulSoup
+
+from scrapers import get_scraper_for_store
+from scrapers.ranking import rank_results
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'fixtures')
+
+CASES = [
+    ('homedepot_search.html', 'Home Depot', 'cordless drill', 'RYOBI'),
+    ('homedepot_search.html', 'Home Depot', 'drill bit set', 'Drill Bit Set'),
+    ('homedepot_search.html', 'Home Depot', 'concrete mix', 'Concrete Mix'),
+    ('homedepot_search.html', 'Home Depot', 'white interior paint', 'Interior Paint'),
+    ('bestbuy_search.html', 'Best Buy', 'drill', 'Drill/Driver'),
+    ('bestbuy_search.html', 'Best Buy', 'aa batteries', 'AA Batteries'),
+    ('bestbuy_search.html', 'Best Buy', 'airpods', 'AirPods'),
+    ('bestbuy_search.html', 'Best Buy', 'microsd card', 'microSDXC'),
+    ('generic_search.html', 'Local Grocer', 'eggs', 'Eggs'),
+    ('generic_search.html', 'Local Grocer', 'cheddar cheese', 'Cheddar'),
+    ('generic_search.html', 'Local Grocer', 'olive oil', 'Olive Oil'),
+]
+
+
+def parse_candidates(fixture: str, store_name: str, query: str, cache: dict):
+    """Parse a fixture page into candidate results (parsed once per fixture)."""
+    if fixture not in cache:
+        with open(os.path.join(FIXTURES, fixture), encoding='utf-8') as f:
+            cache[fixture] = BeautifulSoup(f.read(), 'html.parser')
+    scraper = get_scraper_for_store(store_name, 'requests')
+    return scraper.parse_results_requests(cache[fixture], 'eval', store_name, 'http://fixture/', query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relevance ranking evaluation')
+    parser.add_argument('--verbose', action='store_true', help='Show the pick for every case')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed ranking repetitions per case')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    soups = {}
+    first_hits = ranked_hits = 0
+    elapsed = 0.0
+    for fixture, store_name, query, expected in CASES:
+        candidates = parse_candidates(fixture, store_name, query, soups)
+        first = candidates[0] if candidates else None
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            ranked = rank_results(candidates, query)
+        elapsed += time.perf_counter() - start
+        best = ranked[0] if ranked else None
+
+        first_ok = bool(first) and expected in first.item_name
+        ranked_ok = bool(best) and expected in best.item_name
+        first_hits += first_ok
+        ranked_hits += ranked_ok
+
+        if args.verbose or not ranked_ok:
+            mark = 'ok  ' if ranked_ok else 'MISS'
+            print(f"{mark} {store_name:<12} {query!r:<24} -> {best.item_name if best else '-'}")
+            if not first_ok:
+                print(f"     {'':<12} {'(first card)':<24} -> {first.item_name if first else '-'}")
+
+    total = len(CASES)
+    print(f"\nCases: {total}")
+    print(f"First card wins: {first_hits}/{total} correct")
+    print(f"Ranked:          {ranked_hits}/{total} correct")
+    print(f"Ranking cost:    {elapsed / (total * args.repeat) * 1e6:.1f} us/page")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Workload Replay
+
+Re-issues a workload captured with run_scrape.py --capture (see
+scrapers/capture.py) against the scraper, at the captured pace or N
+times faster. Every store is served by the mock backend (source 'mock',
+see scrapers.mock) under its captured host token, so the traffic keeps
+its shape without touching the network:
+
+- bursts of the same query hit the caches as they did live
+- batch shopping lists run their queries as batches
+- stores with their own scraper keep it; the long tail of other stores
+  goes through the generic scraper and learned templates
+
+Two targets:
+
+- worker:  one run_scrape.py --worker process fed over stdin (arguments
+           after -- are passed to it, e.g. -- --concurrency 4 --shards 2)
+- once:    one run_scrape.py process per request, as the Node bridge
+           spawns them by default
+
+Reports throughput, latency percentiles (all requests, interactive and
+batch, next to the captured durations), queue wait in worker mode, and
+the target's CPU time and peak memory (of its largest process).
+
+Usage:
+    python benchmarks/replay_workload.py capture.jsonl
+    python benchmarks/replay_workload.py capture.jsonl --speed 10 --latency-ms 150
+    python benchmarks/replay_workload.py capture.jsonl --speed 0 -- --concurrency 8 --shards 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scrapers.capture import read_capture
+
+RUN_SCRAPE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'run_scrape.py')
+
+REPLAY_DOMAIN = 'replay.test'
+
+
+def build_request(entry: dict, request_id: int) -> dict:
+    """A request shaped like the captured one, for mock stores."""
+    stores = [{
+        'id': f"{store['host']}-{i}",
+        'name': store.get('name') or f"Store {store['host']}",
+        'base_url': f"https://{store['host']}.{REPLAY_DOMAIN}",
+        'search_url_template': f"https://{store['host']}.{REPLAY_DOMAIN}/search?q={{query}}",
+        'source': 'mock',
+    } for i, store in enumerate(entry['stores'])]
+    queries = entry['queries'] or ['']
+    request = {'request_id': request_id, 'stores': stores}
+    if len(queries) > 1:
+        request['queries'] = queries
+    else:
+        request['query'] = queries[0]
+    request.update(entry.get('options', {}))
+    return request
+
+
+def request_kind(entry: dict) -> str:
+    options = entry.get('options', {})
+    if options.get('priority'):
+        return options['priority']
+    return 'batch' if len(entry['queries']) > 1 else 'interactive'
+
+
+def percentiles(samples: list) -> str:
+    if not samples:
+        return f"{'-':>8} {'-':>8} {'-':>8} {'-':>8}"
+    ordered = sorted(samples)
+    p50, p90, p99 = (ordered[min(len(ordered) - 1, int(len(ordered) * q))] for q in (0.5, 0.9, 0.99))
+    return f"{p50:>8.0f} {p90:>8.0f} {p99:>8.0f} {ordered[-1]:>8.0f}"
+
+
+def target_env(args) -> dict:
+    env = dict(os.environ, SCRAPER_MOCK_LATENCY_MS=str(args.latency_ms), PYTHONUNBUFFERED='1')
+    # Replays are not themselves captured
+    env.pop('SCRAPER_CAPTURE_PATH', None)
+    return env
+
+
+def sleep_until(deadline: float) -> None:
+    delay = deadline - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def replay_worker(requests: list, offsets: list, args) -> dict:
+    """Feed one worker process; returns request_id -> (latency s, output)."""
+    proc = subprocess.Popen(
+        [sys.executable, RUN_SCRAPE, '--worker', *args.scraper_args],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        env=target_env(args), text=True, bufsize=1,
+    )
+    # Wait for the worker to come up before starting the clock
+    proc.stdin.write(json.dumps({'stats': True}) + '\n')
+    proc.stdin.flush()
+    proc.stdout.readline()
+
+    sent = {}
+    done = {}
+
+    def read():
+        for line in proc.stdout:
+            output = json.loads(line)
+            request_id = output.get('meta', {}).get('request_id')
+            if request_id in sent:
+                done[request_id] = (time.perf_counter() - sent[request_id], output)
+
+    reader = threading.Thread(target=read, name='replay-reader')
+    reader.start()
+    start = time.perf_counter()
+    for request, offset in zip(requests, offsets):
+        sleep_until(start + offset)
+        sent[request['request_id']] = time.perf_counter()
+        proc.stdin.write(json.dumps(request) + '\n')
+        proc.stdin.flush()
+    proc.stdin.close()
+    reader.join()
+    proc.wait()
+    return done
+
+
+def replay_once(requests: list, offsets: list, args) -> dict:
+    """One process per request; returns request_id -> (latency s, output)."""
+    env = target_env(args)
+    done = {}
+
+    def run(request):
+        begin = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, RUN_SCRAPE, *args.scraper_args], input=json.dumps(request),
+            capture_output=True, text=True, env=env,
+        )
+        try:
+            output = json.loads(proc.stdout)
+        except ValueError:
+            output = {'results': [], 'errors': ['No output'], 'meta': {}}
+        done[request['request_id']] = (time.perf_counter() - begin, output)
+
+    threads = []
+    start = time.perf_counter()
+    for request, offset in zip(requests, offsets):
+        sleep_until(start + offset)
+        thread = threading.Thread(target=run, args=(request,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return done
+
+
+def describe_capture(entries: list) -> None:
+    span = entries[-1]['t'] - entries[0]['t']
+    stores = [store for entry in entries for store in entry['stores']]
+    queries = [query for entry in entries for query in entry['queries']]
+    kinds = Counter(request_kind(entry) for entry in entries)
+    scrapers = Counter(store['scraper'] for store in stores)
+    repeat = 1 - len(set(queries)) / len(queries) if queries else 0
+    print(f"Capture: {len(entries)} requests over {span:.0f} s "
+          f"({', '.join(f'{n} {kind}' for kind, n in kinds.most_common())})")
+    print(f"  {len(stores)} store searches at {len({s['host'] for s in stores})} hosts "
+          f"({', '.join(f'{n} {name}' for name, n in scrapers.most_common())})")
+    print(f"  {len(queries)} queries, {repeat:.0%} repeats")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a captured workload against the mock backend')
+    parser.add_argument('capture', help='JSON-lines file written by run_scrape.py --capture')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay N times faster than captured; 0 sends everything at once')
+    parser.add_argument('--target', choices=('worker', 'once'), default='worker',
+                        help='One --worker process, or one process per request')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Mock fetch latency per page')
+    parser.add_argument('--limit', type=int, default=0, help='Replay only the first N requests')
+    # Everything after -- goes to run_scrape.py
+    argv = sys.argv[1:]
+    split = argv.index('--') if '--' in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    args.scraper_args = argv[split + 1:]
+
+    entries = read_capture(args.capture)
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        sys.exit(f"No requests in {args.capture}")
+    describe_capture(entries)
+
+    requests = [build_request(entry, n) for n, entry in enumerate(entries)]
+    offsets = [(entry['t'] - entries[0]['t']) / args.speed if args.speed > 0 else 0.0 for entry in entries]
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    done = (replay_worker if args.target == 'worker' else replay_once)(requests, offsets, args)
+    elapsed = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    searches = sum(len(entry['stores']) * len(entry['queries']) for entry in entries)
+    cpu = (usage.ru_utime - before.ru_utime) + (usage.ru_stime - before.ru_stime)
+    speed = f"{args.speed:g}x" if args.speed > 0 else 'unpaced'
+    print(f"\nReplay: {args.target} {' '.join(args.scraper_args)}".rstrip()
+          + f", {speed}, mock latency {args.latency_ms:.0f} ms")
+    print(f"  {len(done)}/{len(entries)} answered in {elapsed:.1f} s: "
+          f"{len(done) / elapsed:.1f} requests/s, {searches / elapsed:.1f} searches/s")
+
+    print(f"\n{'latency ms':<22} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    latencies = {n: latency * 1000 for n, (latency, _) in done.items()}
+    print(f"{'all':<22} {percentiles(list(latencies.values()))}")
+    for kind in sorted({request_kind(entry) for entry in entries}):
+        ids = [n for n, entry in enumerate(entries) if request_kind(entry) == kind]
+        print(f"{kind:<22} {percentiles([latencies[n] for n in ids if n in latencies])}")
+    # Captured in worker mode, a request's latency includes its queue wait
+    live = [entry.get('wait_ms', 0) + entry['duration_ms'] for entry in entries]
+    print(f"{'captured (live)':<22} {percentiles(live)}")
+    waits = [output['meta']['queue']['wait_ms'] for _, output in done.values() if 'queue' in output.get('meta', {})]
+    if waits:
+        print(f"{'queue wait':<22} {percentiles(waits)}")
+
+    outputs = [output for _, output in done.values()]
+    # "Rejected: Queue full (...)" counts as Rejected
+    errors = Counter(o['errors'][0].split(':')[0].split(' (')[0] for o in outputs if o.get('errors'))
+    print(f"\n  errors in {sum(errors.values())} responses"
+          + (f" ({', '.join(f'{n} {kind}' for kind, n in errors.most_common())})" if errors else '')
+          + f", {sum(1 for o in outputs if o.get('meta', {}).get('cancelled'))} cancelled, "
+          f"{sum(len(o.get('results', [])) for o in outputs) / max(1, len(outputs)):.1f} results per response")
+    print(f"  CPU {cpu:.1f} s ({cpu / elapsed:.0%} of one core, {cpu / len(entries) * 1000:.0f} ms per request), "
+          f"peak RSS {usage.ru_maxrss / 1024:.0f} MB (largest process)")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,35 @@ Input JSON format:
             "name": "Store Name",
             "base_url": "https://store.com",
             "search_url_template": "https://store.com/search?q={query}",
-            "source": "requests|playwright"
+            "api_url_template": "https://store.com/api/search?q={query}",
+            "source": "requests|playwright|api|mock"
         }
     ],
     "query": "search term"
 }
 
+For batch scrapes, "queries" (an array of search terms) may be given
+instead of "query"; every store is searched for every query.
+
+Stores with source "api" are searched through their JSON search endpoint
+("api_url_template", optional where the scraper knows one) and fall back
+to their HTML search when it fails or its payload changes shape.
+
+"deep_pages" (optional, default --deep-pages) searches up to that many
+further results pages of each store when the first page has no
+confident match.
+
+"enrich" (optional, default --enrich) fetches the product page of each
+returned result and fills in its "details" (stock, rating, model, SKU).
+
+Every result gets a "product_group": results for the same product at
+different stores (same UPC or model, or near-identical titles) share it.
+Groups are kept in the match index (--match-index), in memory if unset.
+
+SIGTERM cancels a scrape in progress: in-flight fetches are dropped,
+browsers closed, and the output lists what finished with "Scraping
+cancelled" placeholders for the rest (meta.cancelled is true).
+
 Output JSON format:
 {
     "results": [
@@ -29,7 +52,13 @@ Output JSON format:
             "unit": "each",
             "product_url": "https://...",
             "notes": "additional info",
-            "collected_at": "Dec 27, 2025 14:30"
+            "collected_at": "Dec 27, 2025 14:30",
+            "price_cents": 9999,
+            "unit_quantity": 12.0,
+            "unit_measure": "ct",
+            "unit_price_cents": 833.25,
+            "details": {"model": "DCD771C2", "rating": 4.7, "in_stock": true},
+            "product_group": "pg_3f9a1c0d2b7e4a61"
         }
     ],
     "errors": [],
@@ -43,26 +72,107 @@ Output JSON format:
 Usage:
     echo '{"stores":[...],"query":"drill"}' | python run_scrape.py
     cat input.json | python run_scrape.py
+
+    # Parse pages in 4 worker processes, at most 16 pages buffered
+    cat batch.json | python run_scrape.py --parse-workers 4 --queue-depth 16
+
+    # Answer from the local product index, scraping only stale stores
+    cat input.json | python run_scrape.py --index products.db --lookup --max-age 3600
+
+    # Record prices and only emit the ones that changed
+    cat input.json | python run_scrape.py --history price_history --changes-only
+
+    # Serve from the result cache, and keep popular queries warm in the background
+    cat input.json | python run_scrape.py --cache cache.db
+    python run_scrape.py --scheduler --cache cache.db
+
+    # Revalidate repeat fetches and skip re-parsing unchanged pages
+    cat input.json | python run_scrape.py --http-cache http_cache
+
+    # Multiplex each store's searches over one HTTP/2 connection (needs httpx[http2])
+    cat input.json | python run_scrape.py --http2
+
+    # JSON log lines on stderr, each message type limited to 5 per second
+    cat input.json | python run_scrape.py --log-format json --log-rate 5
+
+    # Length-prefixed MessagePack frames instead of JSON (see scrapers/framing.py)
+    python run_scrape.py --protocol framed < request.frame > response.frame
+
+    # Long-lived worker: one JSON request per line in, one output line per request out
+    python run_scrape.py --worker --prewarm https://www.homedepot.com --prewarm https://www.bestbuy.com
+
+    # Worker serving 4 requests at once from a 128-slot priority queue
+    python run_scrape.py --worker --concurrency 4 --queue-capacity 128
+
+    # Cancel a worker request by id; it is answered with what finished so far
+    echo '{"cancel": "req-42"}'    # on the worker's stdin
+
+    # Scrape on 4 worker processes, each owning a share of the store hosts
+    python run_scrape.py --worker --shards 4
+
+    # Scrape through a shared job queue, served by workers on other machines
+    python run_scrape.py --worker --job-queue /mnt/shared/jobs.db
+    python run_scrape.py --queue-worker --job-queue /mnt/shared/jobs.db --shards 4
+
+    # Add stock, rating and model from product pages, cached for 10 minutes
+    cat input.json | python run_scrape.py --enrich --detail-cache details.db --detail-ttl 600
+
+    # Keep cross-store product groups stable across runs
+    cat input.json | python run_scrape.py --match-index products_matched.db
+
+    # Keep the page templates learned for unknown stores across runs
+    cat input.json | python run_scrape.py --templates templates.db
+
+    # Record anonymized request shapes, then replay them at 10x against the mock backend
+    python run_scrape.py --worker --capture workload.jsonl
+    python benchmarks/replay_workload.py workload.jsonl --speed 10 -- --concurrency 4
+
+    # Archive fetched pages, then re-run the current parsers over them
+    cat input.json | python run_scrape.py --archive page_archive
+    python run_scrape.py --reextract --archive page_archive --store "Home Depot" --parse-workers 4 --index products.db
 """
 
+import os
 import sys
 import json
+import argparse
 import logging
 import signal
-from datetime import datetime
-from typing import Dict, List, Any
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
-# Configure logging to stderr (stdout is reserved for JSON output)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stderr
-)
+# Configure logging to stderr (stdout is reserved for JSON output), off the
+# scraping threads; main() reapplies --log-format and --log-rate
+from scrapers.logs import DEFAULT_RATE, LOG_FORMATS, configure_logging
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Import scrapers
 from scrapers import get_scraper_for_store
+from scrapers.base import CANCELLED_NOTES, PAGE_SOURCES, ScraperResult
+from scrapers.cancel import CancelToken, Cancelled, bind, cancel_on_signal, cancel_scope, current_token
+from scrapers.serialize import write_output
+from scrapers.units import normalize_units
+from scrapers.pipeline import ScrapePipeline, DEFAULT_PARSE_WORKERS, DEFAULT_QUEUE_DEPTH, shutdown_parse_pools
+from scrapers.index import ProductIndex, DEFAULT_MAX_AGE
+from scrapers.history import PriceHistory, product_key
+from scrapers.cache import ResultCache, DEFAULT_CACHE_TTL
+from scrapers.query import normalize_query
+from scrapers.scheduler import RefreshScheduler, is_cacheable
+from scrapers.session import configure_http_cache, default_session
+from scrapers.archive import PageArchive, configure_archive, reextract
+from scrapers.enrich import DEFAULT_DETAIL_TTL, configure_detail_cache, default_detail_cache, enrich
+from scrapers.templates import configure_templates
+from scrapers.matching import configure_match_index, default_match_index, match_products
+from scrapers.transport import ConnectionStats
+from scrapers.framing import FramingError, read_frame, write_output_frame
+from scrapers.shard import Supervisor
+from scrapers.jobqueue import JobQueue, serve as serve_job_queue
+from scrapers.capture import WorkloadCapture
+from scrapers.admission import AdmissionQueue, QueueFull, DEFAULT_CAPACITY
 
 # Timeout for individual store scraping (seconds)
 STORE_SCRAPE_TIMEOUT = 20
@@ -70,6 +180,15 @@ STORE_SCRAPE_TIMEOUT = 20
 # Maximum stores to process
 MAX_STORES = 5
 
+# Maximum queries in a batch
+MAX_QUERIES = 25
+
+# Maximum extra results pages a deep search may fetch per store
+MAX_DEEP_PAGES = 10
+
+# Default seconds enrichment may add to a request (never past the job deadline)
+ENRICH_TIMEOUT = 5
+
 
 def validate_input(data: Dict) -> tuple:
     """
@@ -91,11 +210,28 @@ def validate_input(data: Dict) -> tuple:
     if len(data['stores']) > MAX_STORES:
         return False, f"Maximum {MAX_STORES} stores allowed"
 
-    if 'query' not in data:
-        return False, "Missing 'query' field"
+    if 'queries' in data:
+        queries = data['queries']
+        if not isinstance(queries, list) or len(queries) == 0:
+            return False, "'queries' must be a non-empty array"
+        if len(queries) > MAX_QUERIES:
+            return False, f"Maximum {MAX_QUERIES} queries allowed"
+        for i, query in enumerate(queries):
+            if not isinstance(query, str) or not query.strip():
+                return False, f"Query at index {i} must be a non-empty string"
+    else:
+        if 'query' not in data:
+            return False, "Missing 'query' field"
+
+        if not isinstance(data['query'], str) or not data['query'].strip():
+            return False, "'query' must be a non-empty string"
 
-    if not isinstance(data['query'], str) or not data['query'].strip():
-        return False, "'query' must be a non-empty string"
+    deep_pages = data.get('deep_pages', 0)
+    if not isinstance(deep_pages, int) or isinstance(deep_pages, bool) or not 0 <= deep_pages <= MAX_DEEP_PAGES:
+        return False, f"'deep_pages' must be an integer from 0 to {MAX_DEEP_PAGES}"
+
+    if not isinstance(data.get('enrich', False), bool):
+        return False, "'enrich' must be a boolean"
 
     # Validate each store
     for i, store in enumerate(data['stores']):
@@ -111,7 +247,7 @@ def validate_input(data: Dict) -> tuple:
     return True, None
 
 
-def scrape_store(store: Dict, query: str) -> List[Dict]:
+def scrape_store(store: Dict, query: str) -> List[ScraperResult]:
     """
     Scrape a single store and return results.
     """
@@ -121,7 +257,7 @@ def scrape_store(store: Dict, query: str) -> List[Dict]:
     search_template = store.get('search_url_template', '')
     source = store.get('source', 'requests')
 
-    logger.info(f"Scraping {store_name} ({source}) for '{query}'")
+    logger.info("Scraping %s (%s) for '%s'", store_name, source, query)
 
     try:
         scraper = get_scraper_for_store(store_name, source)
@@ -131,27 +267,394 @@ def scrape_store(store: Dict, query: str) -> List[Dict]:
             base_url=base_url,
             search_url_template=search_template,
             query=query,
-            max_results=1  # Only return best hit
+            max_results=1,  # Only return best hit
+            deep_pages=store.get('deep_pages', 0),
+            api_url_template=store.get('api_url_template', '')
         )
-        return [r.to_dict() for r in results]
+        return results
 
     except Exception as e:
-        logger.error(f"Error scraping {store_name}: {e}")
-        return [{
-            "store_id": store_id,
-            "store_name": store_name,
-            "item_name": query,
-            "price": "not available",
-            "unit": "each",
-            "product_url": base_url,
-            "notes": f"Scraping error: {str(e)[:100]}",
-            "collected_at": datetime.now().strftime("%b %d, %Y %H:%M")
-        }]
+        logger.error("Error scraping %s: %s", store_name, e)
+        return [ScraperResult(
+            store_id=store_id,
+            store_name=store_name,
+            item_name=query,
+            product_url=base_url,
+            notes=f"Scraping error: {str(e)[:100]}"
+        )]
 
 
-def main():
-    """Main entry point."""
-    output = {
+def scrape_jobs(jobs: List[Tuple[Dict, str]]) -> Tuple[List[List[ScraperResult]], List[str]]:
+    """
+    Scrape (store, query) jobs on a small thread pool, fetching and
+    parsing on the same thread. Stops waiting once the current CancelToken
+    is cancelled, leaving placeholder results for unfinished jobs.
+    Returns (one result list per job, errors).
+    """
+    job_results = []
+    errors = []
+    token = current_token()
+
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 3)) as executor:
+        futures = {
+            executor.submit(bind(scrape_store), store, query): (store, query)
+            for store, query in jobs
+        }
+
+        for future in futures:
+            store, query = futures[future]
+            try:
+                job_results.append(token.result(future, timeout=STORE_SCRAPE_TIMEOUT))
+            except FuturesTimeoutError:
+                logger.warning("Timeout scraping %s", store.get('name'))
+                job_results.append([ScraperResult(
+                    store_id=store.get('id', ''),
+                    store_name=store.get('name', 'Unknown'),
+                    item_name=query,
+                    product_url=store.get('base_url', ''),
+                    notes="Scraping timed out"
+                )])
+            except Cancelled:
+                # Jobs not started never will be; running ones abort at their next check
+                executor.shutdown(wait=False, cancel_futures=True)
+                job_results.append([ScraperResult(
+                    store_id=store.get('id', ''),
+                    store_name=store.get('name', 'Unknown'),
+                    item_name=query,
+                    product_url=store.get('base_url', ''),
+                    notes=CANCELLED_NOTES
+                )])
+            except Exception as e:
+                logger.error("Error with %s: %s", store.get('name'), e)
+                errors.append(f"{store.get('name')}: {str(e)[:80]}")
+                job_results.append([])
+
+    return job_results, errors
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command-line options. Input still arrives on stdin."""
+    parser = argparse.ArgumentParser(description='Local Store Finder Scraper')
+    parser.add_argument(
+        '--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+        help='Parser processes for the fetch/parse pipeline; 0 parses on the fetch threads '
+             '(env: SCRAPER_PARSE_WORKERS)'
+    )
+    parser.add_argument(
+        '--queue-depth', type=int, default=DEFAULT_QUEUE_DEPTH,
+        help='Fetched pages allowed to wait for a parser before fetching pauses '
+             '(env: SCRAPER_PARSE_QUEUE_DEPTH)'
+    )
+    parser.add_argument(
+        '--deep-pages', type=int, default=int(os.environ.get('SCRAPER_DEEP_PAGES', '0') or 0),
+        help='Further results pages to search per store when the first page has no confident '
+             'match; requests may override with "deep_pages" (env: SCRAPER_DEEP_PAGES)'
+    )
+    parser.add_argument(
+        '--enrich', action='store_true', default=os.environ.get('SCRAPER_ENRICH', '') not in ('', '0'),
+        help='Fetch product pages of the returned results for stock, rating, model and SKU; '
+             'requests may override with "enrich" (env: SCRAPER_ENRICH)'
+    )
+    parser.add_argument(
+        '--enrich-timeout', type=float, default=ENRICH_TIMEOUT,
+        help='Seconds enrichment may add to a request; it never runs past the job deadline'
+    )
+    parser.add_argument(
+        '--detail-cache', default=os.environ.get('SCRAPER_DETAIL_CACHE_PATH') or None,
+        help='SQLite cache of product details per product URL; in memory if unset '
+             '(env: SCRAPER_DETAIL_CACHE_PATH)'
+    )
+    parser.add_argument(
+        '--detail-ttl', type=float,
+        default=float(os.environ.get('SCRAPER_DETAIL_TTL', '') or DEFAULT_DETAIL_TTL),
+        help='Seconds cached product details stay valid (env: SCRAPER_DETAIL_TTL)'
+    )
+    parser.add_argument(
+        '--capture', default=os.environ.get('SCRAPER_CAPTURE_PATH') or None,
+        help='Append an anonymized descriptor of each request (stores, query shape, timing, '
+             'outcome) to this JSON-lines file, for benchmarks/replay_workload.py '
+             '(env: SCRAPER_CAPTURE_PATH)'
+    )
+    parser.add_argument(
+        '--match-index', default=os.environ.get('SCRAPER_MATCH_PATH') or None,
+        help='SQLite index of products seen, for stable cross-store product_group ids; '
+             'in memory if unset (env: SCRAPER_MATCH_PATH)'
+    )
+    parser.add_argument(
+        '--index', default=os.environ.get('SCRAPER_INDEX_PATH') or None,
+        help='SQLite product index to persist results into (env: SCRAPER_INDEX_PATH)'
+    )
+    parser.add_argument(
+        '--lookup', action='store_true',
+        help='Answer from the product index; scrape live only for stores with no fresh match'
+    )
+    parser.add_argument(
+        '--max-age', type=float, default=DEFAULT_MAX_AGE,
+        help='Freshness cutoff for index lookups, in seconds'
+    )
+    parser.add_argument(
+        '--history', default=os.environ.get('SCRAPER_HISTORY_PATH') or None,
+        help='Price history directory to record observed prices into (env: SCRAPER_HISTORY_PATH)'
+    )
+    parser.add_argument(
+        '--changes-only', action='store_true',
+        help='With --history, only output results whose price changed since last seen'
+    )
+    parser.add_argument(
+        '--cache', default=os.environ.get('SCRAPER_CACHE_PATH') or None,
+        help='SQLite result cache to read from and write to (env: SCRAPER_CACHE_PATH)'
+    )
+    parser.add_argument(
+        '--cache-ttl', type=float, default=DEFAULT_CACHE_TTL,
+        help='Seconds a cached result stays valid'
+    )
+    parser.add_argument(
+        '--http-cache', default=os.environ.get('SCRAPER_HTTP_CACHE_PATH') or None,
+        help='Directory for the HTTP response cache (conditional GETs, reused extractions) '
+             '(env: SCRAPER_HTTP_CACHE_PATH)'
+    )
+    parser.add_argument(
+        '--http2', action='store_true', default=os.environ.get('SCRAPER_HTTP2', '') not in ('', '0'),
+        help='Fetch over HTTP/2 where store hosts offer it, multiplexing concurrent searches '
+             'to a host over one connection; needs httpx[http2] (env: SCRAPER_HTTP2)'
+    )
+    parser.add_argument(
+        '--archive', default=os.environ.get('SCRAPER_ARCHIVE_PATH') or None,
+        help='Directory to archive every fetched search page into, for --reextract '
+             '(env: SCRAPER_ARCHIVE_PATH)'
+    )
+    parser.add_argument(
+        '--templates', default=os.environ.get('SCRAPER_TEMPLATE_PATH') or None,
+        help='SQLite file to keep page templates learned for stores without a scraper in, '
+             'shared by every process (env: SCRAPER_TEMPLATE_PATH)'
+    )
+    parser.add_argument(
+        '--protocol', choices=('json', 'framed'),
+        default=os.environ.get('SCRAPER_PROTOCOL') or 'json',
+        help='stdin/stdout encoding: JSON documents, or length-prefixed MessagePack frames '
+             '(env: SCRAPER_PROTOCOL)'
+    )
+    parser.add_argument(
+        '--log-format', choices=LOG_FORMATS,
+        default=os.environ.get('SCRAPER_LOG_FORMAT') or 'text',
+        help='stderr log lines: text, or one JSON object per record (env: SCRAPER_LOG_FORMAT)'
+    )
+    parser.add_argument(
+        '--log-rate', type=float,
+        default=float(os.environ.get('SCRAPER_LOG_RATE') or DEFAULT_RATE),
+        help='Records per second each message type may log before it is sampled; '
+             '0 logs everything (env: SCRAPER_LOG_RATE)'
+    )
+    parser.add_argument(
+        '--worker', action='store_true',
+        help='Serve one JSON request per stdin line (one output line each) until EOF, '
+             'keeping connections, DNS and TLS sessions warm between requests'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=int(os.environ.get('SCRAPER_CONCURRENCY', '2') or 2),
+        help='Worker: requests served at once (env: SCRAPER_CONCURRENCY)'
+    )
+    parser.add_argument(
+        '--queue-capacity', type=int,
+        default=int(os.environ.get('SCRAPER_QUEUE_CAPACITY', str(DEFAULT_CAPACITY)) or DEFAULT_CAPACITY),
+        help='Worker: requests allowed to wait; beyond this, lower-priority requests are shed '
+             'or new ones rejected (env: SCRAPER_QUEUE_CAPACITY)'
+    )
+    parser.add_argument(
+        '--tenant-limit', type=int, default=0,
+        help='Worker: requests one tenant may have waiting (default: no limit beyond capacity)'
+    )
+    parser.add_argument(
+        '--prewarm', action='append',
+        default=[u for u in os.environ.get('SCRAPER_PREWARM_URLS', '').split(',') if u.strip()],
+        help='Worker: store URL to connect to at startup; repeatable '
+             '(env: SCRAPER_PREWARM_URLS, comma-separated)'
+    )
+    parser.add_argument(
+        '--shards', type=int, default=int(os.environ.get('SCRAPER_SHARDS', '0') or 0),
+        help='Scrape on this many worker processes, each owning a share of the store hosts '
+             '(env: SCRAPER_SHARDS)'
+    )
+    parser.add_argument(
+        '--job-queue', default=os.environ.get('SCRAPER_JOB_QUEUE') or None,
+        help='SQLite job queue to send scrapes through, for workers on other machines '
+             '(env: SCRAPER_JOB_QUEUE)'
+    )
+    parser.add_argument(
+        '--queue-worker', action='store_true',
+        help='Serve scrapes from --job-queue for the store hosts this worker owns'
+    )
+    parser.add_argument(
+        '--worker-id', default=f'{socket.gethostname()}-{os.getpid()}',
+        help='Queue worker: id used for host assignment (default: hostname-pid)'
+    )
+    parser.add_argument(
+        '--reextract', action='store_true',
+        help='Parse the pages in --archive with the current parsers instead of reading stdin; '
+             'results go to stdout and into --index/--history if given'
+    )
+    parser.add_argument(
+        '--store', default=None,
+        help='Re-extract: only pages from this store (id or name)'
+    )
+    parser.add_argument(
+        '--query', default=None,
+        help='Re-extract: only pages for this query (or an equivalent phrasing)'
+    )
+    parser.add_argument(
+        '--since', type=float, default=None,
+        help='Re-extract: only pages fetched at or after this epoch time'
+    )
+    parser.add_argument(
+        '--until', type=float, default=None,
+        help='Re-extract: only pages fetched at or before this epoch time'
+    )
+    parser.add_argument(
+        '--scheduler', action='store_true',
+        help='Run the background refresh scheduler against --cache instead of reading stdin'
+    )
+    parser.add_argument(
+        '--refresh-top', type=int, default=20,
+        help='Scheduler: number of hottest (store, query) pairs to keep warm'
+    )
+    parser.add_argument(
+        '--refresh-ahead', type=float, default=300,
+        help='Scheduler: refresh entries this many seconds before they expire'
+    )
+    parser.add_argument(
+        '--host-rate', type=float, default=1.0,
+        help='Scheduler: per-host request budget (req/s) shared with interactive traffic'
+    )
+    return parser.parse_args(argv)
+
+
+def run_scheduler(args: argparse.Namespace) -> None:
+    """Run the refresh scheduler until SIGTERM/SIGINT."""
+    if not args.cache:
+        logger.error("--scheduler requires --cache")
+        sys.exit(2)
+
+    cache = ResultCache(args.cache, ttl=args.cache_ttl)
+    scheduler = RefreshScheduler(
+        cache,
+        top_n=args.refresh_top,
+        refresh_ahead=args.refresh_ahead,
+        host_rate=args.host_rate
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cache.close()
+
+
+def configure_process(http_cache: Optional[str], archive: Optional[str],
+                      templates: Optional[str] = None, http2: bool = False,
+                      log_format: Optional[str] = None, log_rate: Optional[float] = None) -> None:
+    """
+    Point this process's shared session, page archive and learned templates
+    at their paths, and switch the session to HTTP/2 if asked. log_format
+    and log_rate reconfigure logging (see scrapers.logs).
+    """
+    if log_format or log_rate is not None:
+        configure_logging(log_format, log_rate)
+    if http_cache or http2:
+        configure_http_cache(http_cache, http2)
+    if archive:
+        configure_archive(archive)
+    if templates:
+        configure_templates(templates)
+
+
+def run_reextract(args: argparse.Namespace) -> None:
+    """Re-run extraction over archived pages and write the results."""
+    output = new_output()
+    if not args.archive:
+        output["errors"].append("--reextract requires --archive")
+        write_response(output, args)
+        sys.exit(2)
+
+    archive = PageArchive(args.archive)
+    try:
+        pages = archive.pages(store=args.store, query=args.query, since=args.since, until=args.until)
+    finally:
+        archive.close()
+
+    logger.info("Re-extracting %s archived pages", len(pages))
+    start = time.monotonic()
+    page_results = reextract(args.archive, pages, workers=args.parse_workers)
+    elapsed = time.monotonic() - start
+    results = [r for page in page_results for r in page]
+
+    if args.index:
+        index = ProductIndex(args.index)
+        index.add(results)
+        index.close()
+    if args.history:
+        history = PriceHistory(args.history)
+        output["meta"]["price_changes"] = len(history.record(results))
+        history.close()
+
+    normalize_units(results)
+    output["meta"]["matching"] = match_products(results, default_match_index()).to_dict()
+    output["results"] = results
+    output["meta"]["query"] = args.query or ""
+    output["meta"]["stores_processed"] = len({page.store_id for page in pages})
+    output["meta"]["total_results"] = len(results)
+    output["meta"]["reextract"] = {
+        'pages': len(pages),
+        'elapsed_ms': round(elapsed * 1000, 1),
+        'pages_per_s': round(len(pages) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    write_response(output, args)
+
+
+def open_shards(args: argparse.Namespace):
+    """
+    Backend that runs scrape jobs sharded by store host: the job queue
+    (--job-queue), local worker processes (--shards), or None.
+    """
+    if args.job_queue and not args.queue_worker:
+        return JobQueue(args.job_queue)
+    if args.shards > 0:
+        return Supervisor(
+            scrape_jobs, args.shards,
+            initializer=configure_process,
+            initargs=(args.http_cache, args.archive, args.templates, args.http2,
+                      args.log_format, args.log_rate)
+        )
+    return None
+
+
+def run_queue_worker(args: argparse.Namespace) -> None:
+    """Serve --job-queue tasks until SIGTERM/SIGINT."""
+    if not args.job_queue:
+        logger.error("--queue-worker requires --job-queue")
+        sys.exit(2)
+
+    job_queue = JobQueue(args.job_queue)
+    shards = open_shards(args)
+    stop = threading.Event()
+    shutdown = CancelToken()
+    # Stop claiming tasks and cancel the ones in hand, which go back on the queue
+    shutdown.on_cancel(stop.set)
+    cancel_on_signal(shutdown, signal.SIGTERM)
+    try:
+        with cancel_scope(shutdown):
+            serve_job_queue(job_queue, args.worker_id, shards.run if shards else scrape_jobs, stop=stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if shards:
+            shards.close()
+        job_queue.close()
+
+
+def new_output() -> Dict[str, Any]:
+    """Empty output document."""
+    return {
         "results": [],
         "errors": [],
         "meta": {
@@ -161,86 +664,468 @@ def main():
         }
     }
 
-    try:
-        # Read input from stdin
-        input_data = sys.stdin.read()
 
-        if not input_data.strip():
-            output["errors"].append("No input provided")
-            print(json.dumps(output))
-            sys.exit(1)
+def process_request(data: Any, args: argparse.Namespace, shards=None) -> Tuple[Dict[str, Any], int]:
+    """
+    Run one scrape request (parsed input JSON). Live scrapes go to shards
+    (see open_shards) when given.
+    Returns (output document, exit code).
+    """
+    started = time.monotonic()
+    output = new_output()
 
-        # Parse JSON
-        try:
-            data = json.loads(input_data)
-        except json.JSONDecodeError as e:
-            output["errors"].append(f"Invalid JSON: {str(e)}")
-            print(json.dumps(output))
-            sys.exit(1)
+    # Validate input
+    is_valid, error = validate_input(data)
+    if not is_valid:
+        output["errors"].append(error)
+        return output, 1
 
-        # Validate input
-        is_valid, error = validate_input(data)
-        if not is_valid:
-            output["errors"].append(error)
-            print(json.dumps(output))
-            sys.exit(1)
+    stores = data['stores']
+    # Stores are searched with the user's phrasing; caches and the
+    # index key on scrapers.query.canonical_key
+    if 'queries' in data:
+        queries = [normalize_query(q) for q in data['queries']]
+        output["meta"]["queries"] = queries
+    else:
+        queries = [normalize_query(data['query'])]
+    query = queries[0]
+
+    output["meta"]["query"] = query
+
+    logger.info("Processing %s stores for %s queries: %s", len(stores), len(queries), queries)
+
+    session = default_session()
+    connections_before = session.transport.stats.snapshot()
+    versions_before = session.http2.snapshot() if session.http2 else None
 
-        query = data['query'].strip()
-        stores = data['stores']
+    deep_pages = min(data.get('deep_pages', args.deep_pages), MAX_DEEP_PAGES)
+    if deep_pages > 0:
+        # Travels with each store, so shards and queue workers see it too.
+        # Other sources search the first page only, and share its cache key.
+        stores = [
+            {**store, 'deep_pages': deep_pages} if store.get('source', 'requests') in PAGE_SOURCES else store
+            for store in stores
+        ]
+        output["meta"]["deep_pages"] = deep_pages
 
-        output["meta"]["query"] = query
+    jobs = [(store, q) for q in queries for store in stores]
 
-        logger.info(f"Processing {len(stores)} stores for query: '{query}'")
+    cache = ResultCache(args.cache, ttl=args.cache_ttl) if args.cache else None
+    cached_results = []
+    if cache:
+        # Serve unexpired cache entries; every request counts toward popularity
+        uncached_jobs = []
+        for store, q in jobs:
+            cache.record_request(store, q)
+            hits = cache.get(store.get('id', ''), q, store.get('deep_pages', 0))
+            if hits is not None:
+                cached_results.extend(hits)
+            else:
+                uncached_jobs.append((store, q))
+        output["meta"]["cache_hits"] = len(jobs) - len(uncached_jobs)
+        jobs = uncached_jobs
 
+    index = ProductIndex(args.index) if args.index else None
+    index_results = []
+    if index and args.lookup:
+        # Serve fresh indexed matches; only stale or missing stores are scraped
+        store_ids: Dict[str, List[str]] = {}
+        for store, q in jobs:
+            store_ids.setdefault(q, []).append(store.get('id', ''))
+        answers = {q: index.lookup(q, ids, max_age=args.max_age) for q, ids in store_ids.items()}
+        live_jobs = []
+        for store, q in jobs:
+            hits = answers[q].get(store.get('id', ''))
+            if hits:
+                index_results.extend(hits)
+            else:
+                live_jobs.append((store, q))
+        output["meta"]["index_hits"] = len(index_results)
+        logger.info("Index answered %s of %s searches", len(index_results), len(jobs))
+        jobs = live_jobs
+
+    if not jobs:
+        job_results, errors = [], []
+    elif shards is not None:
+        # Each store host is scraped by the worker that owns it
+        job_results, errors = shards.run(jobs)
+        output["meta"]["shards"] = shards.stats()
+    elif args.parse_workers > 0:
+        # Fetch on threads, parse on a process pool
+        pipeline = ScrapePipeline(
+            parse_workers=args.parse_workers,
+            queue_depth=args.queue_depth,
+            timeout=STORE_SCRAPE_TIMEOUT
+        )
+        job_results, errors = pipeline.run(jobs)
+    else:
         # Scrape stores in parallel with timeout
-        all_results = []
-        errors = []
+        job_results, errors = scrape_jobs(jobs)
+
+    live_results = [r for results in job_results for r in results]
+    # Comparable unit prices, before the results are cached and indexed
+    normalize_units(live_results)
+
+    if cache:
+        for (store, q), results in zip(jobs, job_results):
+            if is_cacheable(results):
+                cache.put(store.get('id', ''), q, results, deep_pages=store.get('deep_pages', 0))
+        cache.close()
+
+    if index:
+        index.add(live_results)
+        index.close()
+
+    all_results = cached_results + index_results + live_results
+
+    if args.history:
+        history = PriceHistory(args.history)
+        changes = history.record(live_results)
+        history.close()
+        output["meta"]["price_changes"] = len(changes)
+        if args.changes_only:
+            changed = {(c.store_id, c.product_key) for c in changes}
+            all_results = [
+                r for r in live_results
+                if r.price_cents is not None and (r.store_id, product_key(r)) in changed
+            ]
+
+    token = current_token()
+    if data.get('enrich', args.enrich) and not token.cancelled:
+        # Product pages for the final results only, within the job deadline
+        deadline = min(started + STORE_SCRAPE_TIMEOUT, time.monotonic() + args.enrich_timeout)
+        sources = {store.get('id', ''): store.get('source', 'requests') for store in stores}
+        stats = enrich(all_results, deadline, sources, default_detail_cache())
+        output["meta"]["enrichment"] = stats.to_dict()
+
+    # Comparable unit prices for the results not scraped just now
+    normalize_units(cached_results + index_results)
+    # Same product at several stores -> one product_group (pack sizes from normalize_units)
+    output["meta"]["matching"] = match_products(all_results, default_match_index()).to_dict()
+
+    output["results"] = all_results
+    output["errors"] = errors
+    if token.cancelled:
+        # Whatever finished before the cancel, placeholders for the rest
+        output["errors"].append(f"Cancelled ({token.reason})")
+        output["meta"]["cancelled"] = True
+    output["meta"]["stores_processed"] = len(stores)
+    output["meta"]["total_results"] = len(all_results)
+    # Connection setup cost (DNS / TCP connect / TLS handshake) for this request
+    output["meta"]["transport"] = ConnectionStats.report(
+        session.transport.stats.snapshot(), connections_before
+    )
+    if session.http2:
+        # Connections made by the HTTP/2 client aren't timed; report the protocols used
+        output["meta"]["transport"]["http_versions"] = {
+            version: count - versions_before.get(version, 0)
+            for version, count in session.http2.snapshot().items()
+            if count > versions_before.get(version, 0)
+        }
+
+    return output, 0
+
+
+def write_response(output: Dict[str, Any], args: argparse.Namespace) -> None:
+    """Write one output document to stdout in the negotiated protocol."""
+    if args.protocol == 'framed':
+        write_output_frame(output, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        # Results are encoded as they are written
+        write_output(output, sys.stdout)
+        sys.stdout.flush()
+
+
+def read_requests(args: argparse.Namespace) -> Iterator[Tuple[Any, Optional[str]]]:
+    """
+    Yield (request, error) for each request on stdin: one JSON document
+    per line, or one frame each with --protocol framed. A framing error
+    ends the stream, since frame boundaries are lost.
+    """
+    if args.protocol == 'framed':
+        while True:
+            try:
+                data = read_frame(sys.stdin.buffer)
+            except FramingError as e:
+                yield None, f"Invalid frame: {str(e)}"
+                return
+            if data is None:
+                return
+            yield data, None
+    else:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield None, f"Invalid JSON: {str(e)}"
+
+
+def request_priority(data: Any) -> str:
+    """
+    Priority class of a worker request: its "priority" field if given,
+    else batch for multi-query requests and interactive otherwise.
+    """
+    if not isinstance(data, dict):
+        return 'interactive'
+    if data.get('priority'):
+        return data['priority']
+    queries = data.get('queries')
+    return 'batch' if isinstance(queries, list) and len(queries) > 1 else 'interactive'
+
+
+def run_worker(args: argparse.Namespace, shards=None, capture: Optional[WorkloadCapture] = None) -> None:
+    """
+    Serve requests until stdin closes, one output document per input
+    document. The HTTP session (connection pool, DNS cache, TLS sessions)
+    is kept across requests.
+
+    Requests pass through an AdmissionQueue and are served by
+    --concurrency executor threads, so outputs can come back out of
+    order; a request's "request_id" is echoed in meta.request_id. A
+    {"stats": true} request returns the queue metrics.
 
-        with ThreadPoolExecutor(max_workers=min(len(stores), 3)) as executor:
-            futures = {
-                executor.submit(scrape_store, store, query): store
-                for store in stores
+    {"cancel": "<request_id>"} cancels that request, queued or running:
+    it is answered with whatever finished plus placeholders. A request
+    reusing the id of one still queued or running is rejected. SIGTERM or
+    SIGINT cancels every request, answers them and stops the worker.
+
+    Answered requests (rejected and shed ones too) are recorded in
+    capture, if given.
+    """
+    if shards is None:
+        session = default_session()
+        if args.prewarm:
+            session.prewarm(args.prewarm)
+
+    admission = AdmissionQueue(args.queue_capacity, args.tenant_limit or None)
+    write_lock = threading.Lock()
+    shutdown = CancelToken()
+    # Tokens of queued and running requests, by request_id. Requests
+    # without one get their token when an executor picks them up.
+    tokens: Dict[Any, CancelToken] = {}
+    tokens_lock = threading.Lock()
+
+    def request_id_of(data: Any) -> Any:
+        request_id = data.get('request_id') if isinstance(data, dict) else None
+        # Only ids a client can name in {"cancel": ...} are tracked
+        return request_id if isinstance(request_id, (str, int)) else None
+
+    def forget(data: Any, token: CancelToken) -> None:
+        with tokens_lock:
+            if tokens.get(request_id_of(data)) is token:
+                del tokens[request_id_of(data)]
+        token.close()
+
+    def respond(output: Dict[str, Any], data: Any = None) -> None:
+        if isinstance(data, dict) and 'request_id' in data:
+            output["meta"]["request_id"] = data['request_id']
+        with write_lock:
+            write_response(output, args)
+
+    def captured(data: Any, output: Dict[str, Any], enqueued_at: float,
+                 scrape_s: float = 0.0, wait_s: Optional[float] = None) -> None:
+        if capture is not None:
+            arrived = time.time() - (time.monotonic() - enqueued_at)
+            capture.record(data, output, arrived, scrape_s, wait_s)
+
+    def error_output(error: str) -> Dict[str, Any]:
+        output = new_output()
+        output["errors"].append(error)
+        return output
+
+    def execute() -> None:
+        while True:
+            request = admission.get()
+            if request is None:
+                return
+            with tokens_lock:
+                token = tokens.get(request_id_of(request.payload))
+            if token is None:
+                token = CancelToken(shutdown)
+            try:
+                if token.cancelled:
+                    output = error_output(f"Cancelled ({token.reason})")
+                else:
+                    with cancel_scope(token):
+                        output, _ = process_request(request.payload, args, shards)
+            except Exception as e:
+                logger.exception("Unexpected error")
+                output = error_output(f"Unexpected error: {str(e)}")
+            finally:
+                forget(request.payload, token)
+            scrape_s = admission.done(request)
+            # Time waiting for an executor is reported apart from scrape time
+            output["meta"]["queue"] = {
+                "priority": request.priority,
+                "tenant": request.tenant,
+                "wait_ms": round(request.wait_s * 1000, 2),
+                "scrape_ms": round(scrape_s * 1000, 2),
             }
+            respond(output, request.payload)
+            captured(request.payload, output, request.enqueued_at, scrape_s, request.wait_s)
+
+    executors = [
+        threading.Thread(target=execute, name=f'request-executor-{i}', daemon=True)
+        for i in range(max(1, args.concurrency))
+    ]
+    for executor in executors:
+        executor.start()
+    logger.info("Worker ready (%s executors, queue capacity %s)", len(executors), admission.capacity)
+
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for data, error in read_requests(args):
+            if error:
+                respond(error_output(error))
+                continue
+            if isinstance(data, dict) and data.get('stats'):
+                output = new_output()
+                output["meta"]["queue_stats"] = admission.stats()
+                respond(output, data)
+                continue
+            if isinstance(data, dict) and 'cancel' in data:
+                cancel_id = data['cancel']
+                with tokens_lock:
+                    token = tokens.get(cancel_id) if isinstance(cancel_id, (str, int)) else None
+                output = new_output()
+                output["meta"]["cancel"] = {
+                    "request_id": data['cancel'],
+                    "found": token is not None and token.cancel('cancelled by client'),
+                }
+                respond(output, data)
+                continue
+
+            tenant = str(data.get('tenant', '')) if isinstance(data, dict) else ''
+            request_id = request_id_of(data)
+            token = None
+            if request_id is not None:
+                with tokens_lock:
+                    if request_id not in tokens:
+                        token = tokens[request_id] = CancelToken(shutdown)
+                if token is None:
+                    # Cancels name requests by id, so in-flight ids must be unique
+                    output = error_output(f"Rejected: request_id {request_id!r} is already queued or running")
+                    respond(output, data)
+                    captured(data, output, time.monotonic())
+                    continue
+            try:
+                shed = admission.put(data, request_priority(data), tenant)
+            except (QueueFull, ValueError) as e:
+                if token is not None:
+                    forget(data, token)
+                output = error_output(f"Rejected: {str(e)}")
+                respond(output, data)
+                captured(data, output, time.monotonic())
+                continue
+            for victim in shed:
+                logger.warning("Shed a queued %s request for tenant %r", victim.priority, victim.tenant)
+                with tokens_lock:
+                    victim_token = tokens.get(request_id_of(victim.payload))
+                if victim_token is not None:
+                    forget(victim.payload, victim_token)
+                output = error_output("Shed: queue full, displaced by a higher-priority request")
+                respond(output, victim.payload)
+                captured(victim.payload, output, victim.enqueued_at, wait_s=victim.wait_s)
+    except KeyboardInterrupt:
+        logger.warning("Worker stopping, cancelling queued and running requests")
+        shutdown.cancel('worker stopping')
+
+    admission.close()
+    for executor in executors:
+        executor.join()
+
+
+def read_single_request(args: argparse.Namespace) -> Tuple[Any, Optional[str]]:
+    """Read the one request of a one-shot run. Returns (request, error)."""
+    if args.protocol == 'framed':
+        try:
+            data = read_frame(sys.stdin.buffer)
+        except FramingError as e:
+            return None, f"Invalid frame: {str(e)}"
+        return (data, None) if data is not None else (None, "No input provided")
+
+    input_data = sys.stdin.read()
+    if not input_data.strip():
+        return None, "No input provided"
+    try:
+        return json.loads(input_data), None
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {str(e)}"
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+    configure_process(args.http_cache, args.archive, args.templates, args.http2,
+                      args.log_format, args.log_rate)
+    configure_detail_cache(args.detail_cache, args.detail_ttl)
+    configure_match_index(args.match_index)
+    if args.reextract:
+        run_reextract(args)
+        return
+    if args.scheduler:
+        run_scheduler(args)
+        return
+    if args.queue_worker:
+        run_queue_worker(args)
+        return
+
+    shards = open_shards(args)
+    capture = WorkloadCapture(args.capture) if args.capture else None
+    try:
+        if args.worker:
+            run_worker(args, shards, capture)
+            return
+        run_once(args, shards, capture)
+    finally:
+        if capture:
+            capture.close()
+        if shards:
+            shards.close()
+        shutdown_parse_pools()
+
+
+def run_once(args: argparse.Namespace, shards=None, capture: Optional[WorkloadCapture] = None) -> None:
+    """
+    Serve the single request on stdin and exit with its status. SIGTERM
+    cancels the scrape: what finished is written out, with placeholders
+    for the rest, and the exit status is 128 + SIGTERM. The request is
+    recorded in capture, if given.
+    """
+    arrived = time.time()
+    started = time.monotonic()
+    output = new_output()
+    shutdown = CancelToken()
+    cancel_on_signal(shutdown, signal.SIGTERM)
+
+    try:
+        # Read input from stdin
+        data, error = read_single_request(args)
+        if error:
+            output["errors"].append(error)
+            write_response(output, args)
+            sys.exit(1)
+
+        with cancel_scope(shutdown):
+            output, exit_code = process_request(data, args, shards)
 
-            for future in futures:
-                store = futures[future]
-                try:
-                    results = future.result(timeout=STORE_SCRAPE_TIMEOUT)
-                    all_results.extend(results)
-                except FuturesTimeoutError:
-                    logger.warning(f"Timeout scraping {store.get('name')}")
-                    all_results.append({
-                        "store_id": store.get('id', ''),
-                        "store_name": store.get('name', 'Unknown'),
-                        "item_name": query,
-                        "price": "not available",
-                        "unit": "each",
-                        "product_url": store.get('base_url', ''),
-                        "notes": "Scraping timed out",
-                        "collected_at": datetime.now().strftime("%b %d, %Y %H:%M")
-                    })
-                except Exception as e:
-                    logger.error(f"Error with {store.get('name')}: {e}")
-                    errors.append(f"{store.get('name')}: {str(e)[:80]}")
-
-        output["results"] = all_results
-        output["errors"] = errors
-        output["meta"]["stores_processed"] = len(stores)
-        output["meta"]["total_results"] = len(all_results)
-
-        # Output JSON to stdout
-        print(json.dumps(output, indent=None))
-        sys.exit(0)
+        write_response(output, args)
+        if capture:
+            capture.record(data, output, arrived, time.monotonic() - started)
+        sys.exit(128 + signal.SIGTERM if shutdown.cancelled else exit_code)
 
     except KeyboardInterrupt:
         output["errors"].append("Interrupted by user")
-        print(json.dumps(output))
+        write_response(output, args)
         sys.exit(130)
 
     except Exception as e:
         logger.exception("Unexpected error")
         output["errors"].append(f"Unexpected error: {str(e)}")
-        print(json.dumps(output))
+        write_response(output, args)
         sys.exit(1)
 
 
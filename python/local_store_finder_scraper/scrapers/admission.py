@@ -0,0 +1,250 @@
+"""
+Request Admission Queue
+
+Bounded, prioritized queue in front of the scraping engine in worker mode:
+
+- Priority classes: interactive > batch > refresh. Executors always take
+  the highest class with work waiting.
+- Per-tenant fairness: within a class, tenants are served round-robin, so
+  one tenant's burst of batch jobs doesn't delay another's.
+- Backpressure: at capacity, a request displaces the newest request of a
+  lower class (which is shed), or is rejected if there is none. A tenant
+  may also be capped at tenant_limit queued requests.
+- Metrics: time spent queued (wait) is recorded apart from time spent
+  scraping, per class.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+PRIORITY_CLASSES = ('interactive', 'batch', 'refresh')
+
+DEFAULT_CAPACITY = 64
+
+# Samples kept per class for wait/scrape percentiles
+METRIC_SAMPLES = 1024
+
+
+class QueueFull(Exception):
+    """Request rejected: the queue (or the tenant's share of it) is full."""
+
+
+class QueuedRequest:
+    """A request waiting for, or being served by, an executor."""
+
+    __slots__ = ('seq', 'priority', 'tenant', 'payload', 'enqueued_at', 'started_at')
+
+    def __init__(self, seq: int, priority: str, tenant: str, payload: Any):
+        self.seq = seq
+        self.priority = priority
+        self.tenant = tenant
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def wait_s(self) -> float:
+        return (self.started_at or time.monotonic()) - self.enqueued_at
+
+
+class _PriorityClass:
+    """Per-tenant FIFOs and the round-robin order of tenants with work."""
+
+    def __init__(self):
+        self.tenants: Dict[str, Deque[QueuedRequest]] = {}
+        self.ring: Deque[str] = deque()
+        self.size = 0
+
+    def push(self, request: QueuedRequest) -> None:
+        fifo = self.tenants.get(request.tenant)
+        if fifo is None:
+            fifo = self.tenants[request.tenant] = deque()
+            self.ring.append(request.tenant)
+        fifo.append(request)
+        self.size += 1
+
+    def pop(self) -> QueuedRequest:
+        tenant = self.ring.popleft()
+        fifo = self.tenants[tenant]
+        request = fifo.popleft()
+        if fifo:
+            self.ring.append(tenant)
+        else:
+            del self.tenants[tenant]
+        self.size -= 1
+        return request
+
+    def pop_newest(self) -> QueuedRequest:
+        """Remove the most recently queued request (the one to shed)."""
+        tenant = max(self.tenants, key=lambda t: self.tenants[t][-1].seq)
+        fifo = self.tenants[tenant]
+        request = fifo.pop()
+        if not fifo:
+            del self.tenants[tenant]
+            self.ring.remove(tenant)
+        self.size -= 1
+        return request
+
+
+class QueueMetrics:
+    """Per-class counters and recent wait/scrape times. Thread-safe."""
+
+    COUNTERS = ('admitted', 'rejected', 'shed', 'completed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {c: dict.fromkeys(self.COUNTERS, 0) for c in PRIORITY_CLASSES}
+        self._wait = {c: deque(maxlen=METRIC_SAMPLES) for c in PRIORITY_CLASSES}
+        self._scrape = {c: deque(maxlen=METRIC_SAMPLES) for c in PRIORITY_CLASSES}
+
+    def count(self, priority: str, counter: str) -> None:
+        with self._lock:
+            self._counts[priority][counter] += 1
+
+    def record(self, priority: str, wait_s: float, scrape_s: float) -> None:
+        with self._lock:
+            self._counts[priority]['completed'] += 1
+            self._wait[priority].append(wait_s)
+            self._scrape[priority].append(scrape_s)
+
+    @staticmethod
+    def _summary(samples) -> Dict[str, float]:
+        if not samples:
+            return {'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        ordered = sorted(samples)
+        return {
+            'p50_ms': round(ordered[len(ordered) // 2] * 1000, 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                c: {
+                    **self._counts[c],
+                    'wait': self._summary(self._wait[c]),
+                    'scrape': self._summary(self._scrape[c]),
+                }
+                for c in PRIORITY_CLASSES
+            }
+
+
+class AdmissionQueue:
+    """
+    Bounded priority queue of requests with per-tenant round-robin.
+
+    Args:
+        capacity: Requests allowed to wait at once
+        tenant_limit: Requests one tenant may have waiting (default: capacity)
+
+    Producers call put(); executors call get() and done(). Thread-safe.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, tenant_limit: Optional[int] = None):
+        self.capacity = max(1, capacity)
+        self.tenant_limit = tenant_limit or self.capacity
+        self.metrics = QueueMetrics()
+        self._classes = {c: _PriorityClass() for c in PRIORITY_CLASSES}
+        self._tenant_counts: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size()
+
+    def _size(self) -> int:
+        return sum(pc.size for pc in self._classes.values())
+
+    def put(self, payload: Any, priority: str = 'interactive', tenant: str = '') -> List[QueuedRequest]:
+        """
+        Queue payload. Returns the lower-priority requests shed to make
+        room (usually none). Raises QueueFull if it can't be admitted.
+        """
+        # Client-supplied; may be any JSON value
+        if not isinstance(priority, str) or priority not in self._classes:
+            raise ValueError(f"Unknown priority {priority!r}")
+        request = QueuedRequest(next(self._seq), priority, tenant, payload)
+        shed = []
+        with self._cond:
+            if self._closed:
+                raise QueueFull("Queue is closed")
+            if self.tenant_limit < self.capacity and self._tenant_counts.get(tenant, 0) >= self.tenant_limit:
+                self.metrics.count(priority, 'rejected')
+                raise QueueFull(f"Tenant has {self.tenant_limit} requests queued")
+            if self._size() >= self.capacity:
+                victim = self._shed_below(priority)
+                if victim is None:
+                    self.metrics.count(priority, 'rejected')
+                    raise QueueFull(f"Queue full ({self.capacity} requests waiting)")
+                shed.append(victim)
+            self._classes[priority].push(request)
+            self._tenant_counts[tenant] = self._tenant_counts.get(tenant, 0) + 1
+            self.metrics.count(priority, 'admitted')
+            self._cond.notify()
+        return shed
+
+    def _shed_below(self, priority: str) -> Optional[QueuedRequest]:
+        """Remove the newest request of the lowest class below priority."""
+        rank = PRIORITY_CLASSES.index(priority)
+        for lower in reversed(PRIORITY_CLASSES[rank + 1:]):
+            pc = self._classes[lower]
+            if pc.size:
+                victim = pc.pop_newest()
+                self._release_tenant(victim.tenant)
+                self.metrics.count(lower, 'shed')
+                return victim
+        return None
+
+    def _release_tenant(self, tenant: str) -> None:
+        remaining = self._tenant_counts[tenant] - 1
+        if remaining:
+            self._tenant_counts[tenant] = remaining
+        else:
+            del self._tenant_counts[tenant]
+
+    def get(self, timeout: Optional[float] = None) -> Optional[QueuedRequest]:
+        """
+        Next request to serve: highest class first, tenants round-robin.
+        Blocks while empty; returns None once closed and drained (or on timeout).
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._size():
+                if self._closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            for priority in PRIORITY_CLASSES:
+                pc = self._classes[priority]
+                if pc.size:
+                    request = pc.pop()
+                    self._release_tenant(request.tenant)
+                    request.started_at = time.monotonic()
+                    return request
+        return None
+
+    def done(self, request: QueuedRequest) -> float:
+        """Record a served request. Returns its scrape time in seconds."""
+        scrape_s = time.monotonic() - request.started_at
+        self.metrics.record(request.priority, request.wait_s, scrape_s)
+        return scrape_s
+
+    def close(self) -> None:
+        """Stop admitting; get() drains what is queued, then returns None."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth per class plus the per-class metrics."""
+        with self._cond:
+            depth = {c: pc.size for c, pc in self._classes.items()}
+        return {'capacity': self.capacity, 'depth': depth, 'classes': self.metrics.snapshot()}
@@ -0,0 +1,177 @@
+"""
+Store Search APIs
+
+Source 'api' reads the JSON search endpoint a store's own pages call,
+instead of fetching and parsing HTML or driving a browser:
+
+- The endpoint is the store's "api_url_template" ({query} is filled in),
+  or the scraper's API_SEARCH_URL.
+- It is requested through the shared session (pooled connections, the
+  HTTP cache), like any requests-mode page.
+- The scraper maps the payload to results (parse_api_results). Home
+  Depot and Best Buy map their own payloads; other stores use the
+  generic mapping here, which finds the product list by its keys.
+
+A payload without the expected shape raises ApiSchemaError, and the
+scrape falls back to the scraper's API_FALLBACK_SOURCE. So does an
+endpoint that is gone or refuses the request, and a store with no
+endpoint at all.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urljoin
+
+from .base import MAX_CANDIDATES, ScraperResult
+from .pricing import normalize_price
+
+logger = logging.getLogger(__name__)
+
+# Keys the generic mapping reads, most specific first
+TITLE_KEYS = ('name', 'title', 'productName', 'product_name', 'displayName', 'label')
+PRICE_KEYS = ('salePrice', 'sale_price', 'currentPrice', 'current_price', 'finalPrice', 'price', 'regularPrice')
+URL_KEYS = ('url', 'productUrl', 'product_url', 'canonicalUrl', 'link', 'href')
+UNIT_KEYS = ('unit', 'unitOfMeasure', 'priceUnit', 'price_unit')
+SKU_KEYS = ('sku', 'skuId', 'itemId', 'id')
+MODEL_KEYS = ('modelNumber', 'model', 'mpn')
+UPC_KEYS = ('upc', 'gtin', 'gtin13', 'gtin12', 'ean')
+RATING_KEYS = ('customerReviewAverage', 'rating', 'averageRating')
+REVIEW_COUNT_KEYS = ('customerReviewCount', 'reviewCount', 'totalReviews')
+STOCK_KEYS = ('inStock', 'in_stock', 'onlineAvailability', 'available')
+
+# How deep the generic mapping looks for the product list
+MAX_SEARCH_DEPTH = 4
+
+
+class ApiSchemaError(ValueError):
+    """A search API payload doesn't have the shape its mapping expects."""
+
+
+def dig(payload: Any, *path, default=None) -> Any:
+    """payload[path[0]][path[1]]..., or default where a step is missing."""
+    for step in path:
+        if isinstance(payload, dict) and step in payload:
+            payload = payload[step]
+        elif isinstance(payload, list) and isinstance(step, int) and -len(payload) <= step < len(payload):
+            payload = payload[step]
+        else:
+            return default
+    return payload
+
+
+def first(item: Dict[str, Any], keys: Sequence[str]) -> Any:
+    """The value of the first of keys present (and not None) in item."""
+    for key in keys:
+        value = item.get(key)
+        if value is not None and value != '':
+            return value
+    return None
+
+
+def price_cents(value: Any) -> Optional[int]:
+    """Cents from an API price: a number of dollars, a price string, or {amount|value: ...}."""
+    if isinstance(value, dict):
+        value = first(value, ('amount', 'value', 'current', 'price'))
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value * 100))
+    text = str(value).strip()
+    return normalize_price(text if '$' in text else f"${text}").cents
+
+
+def number(value: Any, kind=float) -> Optional[Any]:
+    try:
+        return kind(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def products_list(payload: Any, path: Sequence[Any]) -> List[Dict[str, Any]]:
+    """The product list at path; raises ApiSchemaError if it isn't there."""
+    products = dig(payload, *path)
+    if not isinstance(products, list) or any(not isinstance(p, dict) for p in products):
+        raise ApiSchemaError(f"No product list at {'.'.join(map(str, path))}")
+    return products
+
+
+def find_products(payload: Any, depth: int = 0) -> Optional[List[Dict[str, Any]]]:
+    """The first list of objects with a title key, searched depth-first."""
+    if depth > MAX_SEARCH_DEPTH:
+        return None
+    if isinstance(payload, list):
+        if payload and all(isinstance(p, dict) for p in payload) and first(payload[0], TITLE_KEYS):
+            return payload
+        children = payload
+    elif isinstance(payload, dict):
+        children = list(payload.values())
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (list, dict)):
+            found = find_products(child, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+def find_products_empty(payload: Any) -> bool:
+    """Whether payload holds an empty product list under a usual key (a search with no hits)."""
+    if not isinstance(payload, dict):
+        return False
+    for key in ('products', 'items', 'results', 'hits'):
+        value = payload.get(key)
+        if value == []:
+            return True
+        if isinstance(value, dict) and find_products_empty(value):
+            return True
+    return False
+
+
+def generic_results(
+    payload: Any,
+    store_id: str,
+    store_name: str,
+    api_url: str
+) -> List[ScraperResult]:
+    """Map a search payload by common key names (TITLE_KEYS, PRICE_KEYS, ...)."""
+    products = find_products(payload)
+    if products is None:
+        if find_products_empty(payload):
+            return []
+        raise ApiSchemaError("No product list in payload")
+
+    results = []
+    for item in products[:MAX_CANDIDATES]:
+        title = first(item, TITLE_KEYS)
+        if not isinstance(title, str) or not title.strip():
+            continue
+        price = first(item, PRICE_KEYS)
+        unit = first(item, UNIT_KEYS) or (first(price, UNIT_KEYS) if isinstance(price, dict) else None)
+        url = first(item, URL_KEYS)
+
+        details = {}
+        for field, keys, kind in (
+            ('model', MODEL_KEYS, str), ('sku', SKU_KEYS, str), ('upc', UPC_KEYS, str),
+            ('rating', RATING_KEYS, float), ('review_count', REVIEW_COUNT_KEYS, int),
+        ):
+            value = number(first(item, keys), kind) if kind is not str else first(item, keys)
+            if value is not None:
+                details[field] = str(value) if kind is str else value
+        in_stock = first(item, STOCK_KEYS)
+        if isinstance(in_stock, bool):
+            details['in_stock'] = in_stock
+
+        results.append(ScraperResult(
+            store_id=store_id,
+            store_name=store_name,
+            item_name=title.strip()[:150],
+            price_cents=price_cents(price),
+            price_unit=str(unit) if unit and unit != 'each' else "",
+            unit="each",
+            product_url=urljoin(api_url, url) if isinstance(url, str) and url else api_url,
+            notes="",
+            sponsored=bool(first(item, ('sponsored', 'isSponsored', 'is_sponsored'))),
+            details=details or None
+        ))
+    return results
@@ -0,0 +1,337 @@
+"""
+Page Snapshot Archive
+
+Keeps the raw search pages that scrapes fetched (requests or Playwright),
+so extraction can be re-run with the current parsers after a selector
+fix, or to benchmark a parser change, without fetching anything again.
+
+Layout of an archive directory:
+
+    index.db               SQLite offset index: (store, query, fetch time)
+                           -> segment, offset, length
+    seg-<ns>.pages         append-only segments of compressed page records
+
+Every record is a header, JSON metadata and the zlib-compressed body, so
+a segment can be read without the index. Writers append to the newest
+segment under an exclusive file lock, so front ends and shard workers can
+archive into one directory at once; a segment past segment_bytes is left
+for a new one. A page is indexed only after its record is written.
+
+Re-extraction memory-maps the segments and parses pages on a process
+pool. Workers slice bodies straight out of the mapping; only index rows
+cross process boundaries.
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from .base import ScraperResult
+from .query import canonical_key
+
+logger = logging.getLogger(__name__)
+
+# Record header: magic, metadata length, compressed body length
+_RECORD = struct.Struct('<4sII')
+_RECORD_MAGIC = b'PGA1'
+
+# Segments roll over past this size
+SEGMENT_BYTES = 64 * 1024 * 1024
+
+COMPRESSION_LEVEL = 6
+
+# Pages handed to a re-extraction worker at a time
+EXTRACT_CHUNK = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store_id TEXT NOT NULL,
+    store_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    search_url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    encoding TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    body_offset INTEGER NOT NULL,
+    body_length INTEGER NOT NULL,
+    raw_length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_store ON pages (store_id, query_key, fetched_at);
+CREATE INDEX IF NOT EXISTS pages_time ON pages (fetched_at);
+"""
+
+
+class ArchivedPage(NamedTuple):
+    """An index row: where one archived page's body is. Picklable."""
+    id: int
+    store_id: str
+    store_name: str
+    source: str
+    query: str
+    search_url: str
+    fetched_at: float
+    encoding: str
+    segment: str
+    body_offset: int
+    body_length: int
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched search pages.
+
+    Safe to share between threads; multiple processes may archive into
+    the same directory.
+    """
+
+    def __init__(self, path: str, segment_bytes: int = SEGMENT_BYTES):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(path, 'index.db'), check_same_thread=False, timeout=30
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._segment: Optional[str] = None
+        self._fd: Optional[int] = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._conn.close()
+
+    def _open_segment(self) -> None:
+        """Append to the newest segment with room left, or start one."""
+        segments = sorted(name for name in os.listdir(self.path) if name.endswith('.pages'))
+        if segments and os.path.getsize(os.path.join(self.path, segments[-1])) < self.segment_bytes:
+            self._segment = segments[-1]
+        else:
+            self._segment = f'seg-{time.time_ns():020d}.pages'
+        self._fd = os.open(
+            os.path.join(self.path, self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+
+    def add(
+        self,
+        store_id: str,
+        store_name: str,
+        source: str,
+        search_url: str,
+        query: str,
+        body: bytes,
+        encoding: str,
+        fetched_at: float = None
+    ) -> None:
+        """Append one fetched page and index it."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        meta = json.dumps({
+            'store_id': store_id, 'store_name': store_name, 'source': source,
+            'search_url': search_url, 'query': query, 'fetched_at': fetched_at,
+            'encoding': encoding,
+        }).encode('utf-8')
+        compressed = zlib.compress(body, COMPRESSION_LEVEL)
+        record = b''.join((_RECORD.pack(_RECORD_MAGIC, len(meta), len(compressed)), meta, compressed))
+
+        with self._lock:
+            if self._fd is None:
+                self._open_segment()
+            # Other processes may be appending to the same segment
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                start = os.lseek(self._fd, 0, os.SEEK_END)
+                written = 0
+                while written < len(record):
+                    written += os.write(self._fd, record[written:])
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            segment = self._segment
+            if start + len(record) >= self.segment_bytes:
+                os.close(self._fd)
+                self._fd = None
+            with self._conn:
+                self._conn.execute(
+                    'INSERT INTO pages (store_id, store_name, source, query, query_key, search_url, '
+                    'fetched_at, encoding, segment, body_offset, body_length, raw_length) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (store_id, store_name, source, query, canonical_key(query), search_url,
+                     fetched_at, encoding, segment, start + _RECORD.size + len(meta),
+                     len(compressed), len(body))
+                )
+
+    def pages(
+        self,
+        store: Optional[str] = None,
+        query: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> List[ArchivedPage]:
+        """
+        Archived pages, oldest first. store matches a store id or name
+        (case-insensitive); query matches equivalent phrasings.
+        """
+        clauses, params = [], []
+        if store:
+            clauses.append('(store_id = ? OR lower(store_name) = ?)')
+            params += [store, store.lower().strip()]
+        if query:
+            clauses.append('query_key = ?')
+            params.append(canonical_key(query))
+        if since is not None:
+            clauses.append('fetched_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('fetched_at <= ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, store_id, store_name, source, query, search_url, fetched_at, '
+                f'encoding, segment, body_offset, body_length FROM pages {where} '
+                'ORDER BY fetched_at, id',
+                params
+            ).fetchall()
+        return [ArchivedPage(*row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Pages archived, segments, and compressed vs original bytes."""
+        with self._lock:
+            pages, segments, stored, raw = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT segment), COALESCE(SUM(body_length), 0), '
+                'COALESCE(SUM(raw_length), 0) FROM pages'
+            ).fetchone()
+        return {'pages': pages, 'segments': segments, 'stored_bytes': stored, 'raw_bytes': raw}
+
+
+class SegmentReader:
+    """Reads page bodies out of memory-mapped archive segments."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def body(self, page: ArchivedPage) -> bytes:
+        """The decompressed body of an archived page."""
+        end = page.body_offset + page.body_length
+        mapped = self._maps.get(page.segment)
+        if mapped is None or len(mapped) < end:
+            # First use, or the segment grew since it was mapped
+            if mapped is not None:
+                mapped.close()
+            with open(os.path.join(self.path, page.segment), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[page.segment] = mapped
+        return zlib.decompress(mapped[page.body_offset:end])
+
+    def close(self) -> None:
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+
+
+def extract_page(reader: SegmentReader, page: ArchivedPage, max_results: int = 1) -> List[ScraperResult]:
+    """
+    Parse an archived page with the store's current parser, dated to
+    when the page was fetched.
+    """
+    from . import get_scraper_for_store
+
+    scraper = get_scraper_for_store(page.store_name, 'requests')
+    try:
+        html = reader.body(page).decode(page.encoding, errors='replace')
+        results = scraper.parse_page(
+            html, page.store_id, page.store_name, page.search_url, page.query, max_results
+        )
+    except Exception as e:
+        results = [ScraperResult(
+            store_id=page.store_id,
+            store_name=page.store_name,
+            item_name=page.query,
+            notes=f"Re-extraction failed: {str(e)[:100]}",
+            product_url=page.search_url
+        )]
+    for result in results:
+        result.collected_at = page.fetched_at
+    return results
+
+
+# Per-process reader for re-extraction workers
+_worker_reader: Optional[SegmentReader] = None
+
+
+def _init_worker(path: str) -> None:
+    global _worker_reader
+    logging.disable(logging.INFO)
+    _worker_reader = SegmentReader(path)
+
+
+def _extract_chunk(pages: List[ArchivedPage], max_results: int) -> List[List[ScraperResult]]:
+    return [extract_page(_worker_reader, page, max_results) for page in pages]
+
+
+def reextract(
+    path: str,
+    pages: List[ArchivedPage],
+    workers: int = 0,
+    max_results: int = 1
+) -> List[List[ScraperResult]]:
+    """
+    Re-run extraction over archived pages on `workers` processes (0 parses
+    in this process). Returns one result list per page, in page order.
+    """
+    if workers <= 0:
+        reader = SegmentReader(path)
+        try:
+            return [extract_page(reader, page, max_results) for page in pages]
+        finally:
+            reader.close()
+
+    chunks = [pages[i:i + EXTRACT_CHUNK] for i in range(0, len(pages), EXTRACT_CHUNK)]
+    results: List[List[ScraperResult]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        for chunk_results in pool.map(_extract_chunk, chunks, [max_results] * len(chunks)):
+            results.extend(chunk_results)
+    return results
+
+
+_default_archive: Optional[PageArchive] = None
+_default_configured = False
+_default_lock = threading.Lock()
+
+
+def configure_archive(path: Optional[str]) -> Optional[PageArchive]:
+    """Archive fetched pages under path from now on (None stops archiving)."""
+    global _default_archive, _default_configured
+    with _default_lock:
+        if _default_archive is not None:
+            _default_archive.close()
+        _default_archive = PageArchive(path) if path else None
+        _default_configured = True
+        return _default_archive
+
+
+def default_archive() -> Optional[PageArchive]:
+    """The shared archive, opened on first use from SCRAPER_ARCHIVE_PATH, or None."""
+    global _default_archive, _default_configured
+    with _default_lock:
+        if not _default_configured:
+            path = os.environ.get('SCRAPER_ARCHIVE_PATH') or None
+            _default_archive = PageArchive(path) if path else None
+            _default_configured = True
+        return _default_archive
@@ -2,16 +2,27 @@
 Base Scraper Class
 
 Provides common functionality for all store scrapers.
-Supports both requests-based and Playwright-based scraping.
+Supports requests-based and Playwright-based scraping, stores' JSON
+search APIs, and generated pages from the mock backend.
 """
 
 import re
+import time
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Callable, TYPE_CHECKING
 from urllib.parse import urlencode, quote_plus
 
+from .cancel import CancelToken, Cancelled, current_token
+from .pricing import (
+    PRICE_NOT_AVAILABLE, PriceInfo, NO_PRICE, format_price, normalize_price, price_to_cents
+)
+
+if TYPE_CHECKING:
+    from .session import FetchResult
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,32 +37,109 @@ USER_AGENT = (
 # Default timeouts
 DEFAULT_TIMEOUT = 15  # seconds
 PLAYWRIGHT_TIMEOUT = 20000  # milliseconds
+PLAYWRIGHT_POLL = 250  # milliseconds between cancellation checks while a page loads
+
+# Notes of the placeholder result for a cancelled scrape
+CANCELLED_NOTES = "Scraping cancelled"
+
+# Sources whose search pages are fetched whole, then parsed with parse_page
+PAGE_SOURCES = ('requests', 'mock')
+
+# Product cards parsed per page before relevance ranking picks the best
+MAX_CANDIDATES = 12
+
+# Sponsored/ad placements, by class name/test id or by label text
+SPONSORED_SELECTOR = '[class*="sponsor" i], [data-testid*="sponsor" i]'
+_SPONSORED_TEXT_RE = re.compile(r'^\s*(sponsored|ad|advertisement)\s*$', re.IGNORECASE)
+
+
+# Output format for collected_at (kept stable for the Node bridge)
+TIMESTAMP_FORMAT = "%b %d, %Y %H:%M"
+
+
+@lru_cache(maxsize=256)
+def _format_minute(minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60).strftime(TIMESTAMP_FORMAT)
+
+
+def format_timestamp(epoch: float) -> str:
+    """Render an epoch timestamp as the bridge's collected_at string."""
+    # The output format has minute resolution, so results collected in the
+    # same minute share one formatted string.
+    return _format_minute(int(epoch // 60))
 
 
 class ScraperResult:
-    """Represents a single product result from scraping."""
+    """
+    Represents a single product result from scraping.
+
+    Stored compactly: the price is integer cents plus a currency code and
+    collected_at is an epoch timestamp. Both are only rendered as strings
+    when the result is serialized.
+
+    price_unit is set for per-unit prices ("lb" for "$3.49/lb"). The
+    unit_* fields are filled in by scrapers.units.normalize_units().
+
+    sponsored marks ad placements; it only feeds relevance ranking and is
+    not serialized.
+
+    details holds structured product fields (model, sku, upc, rating,
+    review_count, in_stock, availability) from the search card and, with
+    enrichment, the product page (see scrapers.enrich); None if unknown.
+
+    product_group is shared by the results for one physical product across
+    stores, set by scrapers.matching.match_products().
+    """
+
+    __slots__ = (
+        'store_id', 'store_name', 'item_name', 'price_cents', 'currency',
+        'unit', 'product_url', 'notes', 'collected_at', 'price_unit',
+        'unit_quantity', 'unit_measure', 'unit_price_cents', 'sponsored',
+        'details', 'product_group',
+    )
 
     def __init__(
         self,
         store_id: str,
         store_name: str,
         item_name: str = "",
-        price: str = "not available",
+        price: str = PRICE_NOT_AVAILABLE,
         unit: str = "each",
         product_url: str = "",
         notes: str = "",
-        collected_at: str = None
+        collected_at: float = None,
+        price_cents: Optional[int] = None,
+        currency: str = 'USD',
+        price_unit: str = "",
+        sponsored: bool = False,
+        details: Optional[Dict[str, Any]] = None
     ):
         self.store_id = store_id
         self.store_name = store_name
         self.item_name = item_name
-        self.price = price
+        self.price_cents = price_cents if price_cents is not None else price_to_cents(price)
+        self.currency = currency
         self.unit = unit
         self.product_url = product_url
         self.notes = notes
-        self.collected_at = collected_at or datetime.now().strftime("%b %d, %Y %H:%M")
-
-    def to_dict(self) -> Dict[str, str]:
+        self.collected_at = collected_at if collected_at is not None else time.time()
+        self.price_unit = price_unit
+        self.unit_quantity = None
+        self.unit_measure = None
+        self.unit_price_cents = None
+        self.sponsored = sponsored
+        self.details = details
+        self.product_group = None
+
+    @property
+    def price(self) -> str:
+        return format_price(self.price_cents, self.currency)
+
+    @property
+    def collected_at_str(self) -> str:
+        return format_timestamp(self.collected_at)
+
+    def to_dict(self) -> Dict[str, Any]:
         return {
             "store_id": self.store_id,
             "store_name": self.store_name,
@@ -60,9 +148,40 @@ class ScraperResult:
             "unit": self.unit,
             "product_url": self.product_url,
             "notes": self.notes,
-            "collected_at": self.collected_at
+            "collected_at": self.collected_at_str,
+            "price_cents": self.price_cents,
+            "unit_quantity": self.unit_quantity,
+            "unit_measure": self.unit_measure,
+            "unit_price_cents": self.unit_price_cents,
+            "details": self.details,
+            "product_group": self.product_group
         }
 
+    def __repr__(self) -> str:
+        return f"ScraperResult({self.store_name!r}, {self.item_name!r}, {self.price!r})"
+
+    def to_state(self) -> tuple:
+        """Flat tuple of slot values, for caches and process boundaries."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def from_state(cls, values) -> 'ScraperResult':
+        """
+        Rebuild a result from to_state() values. Slots added since the
+        state was saved are set to None.
+        """
+        result = cls.__new__(cls)
+        values = tuple(values)
+        values += (None,) * (len(cls.__slots__) - len(values))
+        for name, value in zip(cls.__slots__, values):
+            setattr(result, name, value)
+        return result
+
+    def __reduce__(self):
+        # Pickle as a flat tuple of slot values; results cross process
+        # boundaries in the parse pipeline.
+        return (ScraperResult.from_state, (self.to_state(),))
+
 
 class BaseScraper(ABC):
     """
@@ -71,16 +190,44 @@ class BaseScraper(ABC):
     Subclasses should override:
     - parse_results_requests() for requests-based scraping
     - parse_results_playwright() for Playwright-based scraping
+    - NEXT_PAGE_SELECTORS, if the store's "next page" link isn't found
+      by the generic selectors (deep search)
+    - parse_product_details(), if the store's product pages lack
+      schema.org data (enrichment)
+    - API_SEARCH_URL and parse_api_results(), for the store's JSON search
+      API (source 'api')
     """
 
+    # Parse pages with templates learned per host (see scrapers.templates)
+    # before trying the generic selectors below
+    LEARN_TEMPLATES = True
+
+    # JSON search endpoint for source 'api', with a {query} placeholder;
+    # a store's "api_url_template" takes precedence
+    API_SEARCH_URL = ''
+
+    # Source scraped instead when the API fails or its payload changed shape
+    API_FALLBACK_SOURCE = 'requests'
+
+    # Links to the next results page, most specific first
+    NEXT_PAGE_SELECTORS = [
+        'a[rel="next"]',
+        'link[rel="next"]',
+        'a[aria-label*="next" i][href]',
+        '.pagination a[class*="next"]',
+        'a[class*="next"][href]',
+    ]
+
     def __init__(self, source: str = 'requests'):
         """
         Initialize scraper.
 
         Args:
-            source: 'requests' for HTTP-based or 'playwright' for browser-based
+            source: 'requests' for HTTP-based, 'playwright' for browser-based
+                or 'mock' for generated pages (scrapers.mock, no network)
         """
         self.source = source.lower()
+        self.timeout = DEFAULT_TIMEOUT
         self.session = None
         self.browser = None
         self.page = None
@@ -98,18 +245,33 @@ class BaseScraper(ABC):
         Returns 'not available' if parsing fails.
         """
         if not price_str:
-            return "not available"
+            return PRICE_NOT_AVAILABLE
+        return format_price(normalize_price(price_str).cents)
 
-        # Remove whitespace and common prefixes
-        price_str = price_str.strip()
+    def parse_price_info(self, price_str: str) -> PriceInfo:
+        """
+        Normalize a price string, keeping sale, range and per-unit details.
+        Returns NO_PRICE if parsing fails.
+        """
+        if not price_str:
+            return NO_PRICE
+        return normalize_price(price_str)
 
-        # Try to extract price pattern like $99.99 or 99.99
-        match = re.search(r'\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', price_str)
-        if match:
-            price_val = match.group(1).replace(',', '')
-            return f"${price_val}"
+    def is_sponsored(self, element) -> bool:
+        """Whether a product card is a sponsored/ad placement."""
+        if element.select_one(SPONSORED_SELECTOR):
+            return True
+        return element.find(string=_SPONSORED_TEXT_RE) is not None
 
-        return "not available"
+    def select_results(
+        self,
+        results: List[ScraperResult],
+        query: str,
+        max_results: int
+    ) -> List[ScraperResult]:
+        """Rank parsed candidates by relevance and keep the best max_results."""
+        from .ranking import rank_results
+        return rank_results(results, query)[:max_results]
 
     def scrape(
         self,
@@ -118,7 +280,9 @@ class BaseScraper(ABC):
         base_url: str,
         search_url_template: str,
         query: str,
-        max_results: int = 1
+        max_results: int = 1,
+        deep_pages: int = 0,
+        api_url_template: str = ''
     ) -> List[ScraperResult]:
         """
         Main scraping method. Routes to appropriate implementation.
@@ -130,24 +294,46 @@ class BaseScraper(ABC):
             search_url_template: URL template with {query} placeholder
             query: Search query string
             max_results: Maximum number of results to return (default 1)
+            deep_pages: Further results pages to search when the first has
+                no confident match (requests and mock sources only)
+            api_url_template: JSON search endpoint for source 'api', with a
+                {query} placeholder (default: API_SEARCH_URL)
 
         Returns:
             List of ScraperResult objects
         """
         search_url = self.build_search_url(base_url, search_url_template, query)
-        logger.info(f"Scraping {store_name}: {search_url}")
+        logger.info("Scraping %s: %s", store_name, search_url)
+        if deep_pages > 0 and self.source not in PAGE_SOURCES:
+            logger.info("Deep search skipped for %s: source '%s' searches the first page only",
+                        store_name, self.source)
 
         try:
+            if self.source == 'api':
+                return self.scrape_api(
+                    store_id, store_name, base_url, search_url_template,
+                    api_url_template, query, max_results
+                )
             if self.source == 'playwright':
                 return self.scrape_playwright(
                     store_id, store_name, search_url, query, max_results
                 )
             else:
                 return self.scrape_requests(
-                    store_id, store_name, search_url, query, max_results
+                    store_id, store_name, search_url, query, max_results, deep_pages
                 )
+        except Cancelled as e:
+            logger.info("Scrape of %s cancelled (%s)", store_name, e)
+            return [ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=query,
+                price="not available",
+                notes=CANCELLED_NOTES,
+                product_url=search_url
+            )]
         except Exception as e:
-            logger.error(f"Scraping error for {store_name}: {str(e)}")
+            logger.error("Scraping error for %s: %s", store_name, e)
             return [ScraperResult(
                 store_id=store_id,
                 store_name=store_name,
@@ -163,61 +349,237 @@ class BaseScraper(ABC):
         store_name: str,
         search_url: str,
         query: str,
-        max_results: int
+        max_results: int,
+        deep_pages: int = 0
     ) -> List[ScraperResult]:
-        """Scrape using requests + BeautifulSoup."""
+        """Scrape using requests (or the mock backend) + BeautifulSoup."""
         import requests
-        from bs4 import BeautifulSoup
-
-        headers = {
-            'User-Agent': USER_AGENT,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
 
         try:
-            response = requests.get(
-                search_url,
-                headers=headers,
-                timeout=DEFAULT_TIMEOUT,
-                allow_redirects=True
-            )
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = self.parse_results_requests(
-                soup, store_id, store_name, search_url, query
-            )
-
-            return results[:max_results] if results else [ScraperResult(
+            page = self.fetch_page(search_url, store_name, query)
+        except requests.Timeout:
+            return [ScraperResult(
                 store_id=store_id,
                 store_name=store_name,
                 item_name=query,
                 price="not available",
-                notes="No products found",
+                notes="Request timed out",
                 product_url=search_url
             )]
-
-        except requests.Timeout:
+        except requests.RequestException as e:
             return [ScraperResult(
                 store_id=store_id,
                 store_name=store_name,
                 item_name=query,
                 price="not available",
-                notes="Request timed out",
+                notes=f"Request failed: {str(e)[:80]}",
                 product_url=search_url
             )]
-        except requests.RequestException as e:
+
+        if page.status == 'fetched':
+            self.archive_page(store_id, store_name, search_url, query, page.body, page.encoding)
+
+        if deep_pages > 0:
+            from .deep import deep_search
+            return deep_search(
+                self, page.body.decode(page.encoding, errors='replace'),
+                store_id, store_name, search_url, query, max_results, deep_pages
+            )
+
+        key = self.parse_key(page, store_id, store_name, search_url, query, max_results)
+        cached = self.cached_parse(page, key)
+        if cached is not None:
+            return cached
+
+        results = self.parse_page(
+            page.body.decode(page.encoding, errors='replace'),
+            store_id, store_name, search_url, query, max_results
+        )
+        if key:
+            self.session.cache.put_parsed(key, page.body_hash, results)
+        return results
+
+    def build_api_url(self, api_url_template: str, query: str) -> str:
+        """Search API URL for query, or '' if the store has no endpoint."""
+        template = api_url_template or self.API_SEARCH_URL
+        if '{query}' not in template:
+            return ''
+        return template.replace('{query}', quote_plus(query))
+
+    def scrape_api(
+        self,
+        store_id: str,
+        store_name: str,
+        base_url: str,
+        search_url_template: str,
+        api_url_template: str,
+        query: str,
+        max_results: int
+    ) -> List[ScraperResult]:
+        """
+        Scrape the store's JSON search API, falling back to
+        API_FALLBACK_SOURCE if there is no endpoint, it fails, or its
+        payload has changed shape.
+        """
+        import json
+        import requests
+
+        api_url = self.build_api_url(api_url_template, query)
+        try:
+            if not api_url:
+                raise ValueError("no search API endpoint")
+            page = self.fetch_requests(api_url, accept='application/json')
+            payload = json.loads(page.body.decode(page.encoding or 'utf-8', errors='replace'))
+            results = self.parse_api_results(payload, store_id, store_name, api_url, query)
+        except requests.Timeout:
             return [ScraperResult(
                 store_id=store_id,
                 store_name=store_name,
                 item_name=query,
                 price="not available",
-                notes=f"Request failed: {str(e)[:80]}",
-                product_url=search_url
+                notes="Request timed out",
+                product_url=api_url
             )]
+        except (requests.RequestException, ValueError) as e:
+            # ValueError covers ApiSchemaError and undecodable JSON
+            logger.warning(
+                "Search API unusable for %s (%.80s), falling back to %s",
+                store_name, e, self.API_FALLBACK_SOURCE
+            )
+            fallback = type(self)(source=self.API_FALLBACK_SOURCE)
+            return fallback.scrape(store_id, store_name, base_url, search_url_template, query, max_results)
+
+        return self.select_results(results, query, max_results) if results else [ScraperResult(
+            store_id=store_id,
+            store_name=store_name,
+            item_name=query,
+            price="not available",
+            notes="No products found",
+            product_url=self.build_search_url(base_url, search_url_template, query)
+        )]
+
+    def parse_api_results(
+        self,
+        payload: Any,
+        store_id: str,
+        store_name: str,
+        api_url: str,
+        query: str
+    ) -> List[ScraperResult]:
+        """
+        Map a search API payload to results. Override in subclasses for the
+        store's payload; raise scrapers.api.ApiSchemaError if it doesn't
+        have the expected shape.
+
+        Default implementation finds the product list by common key names.
+        """
+        from .api import generic_results
+        return generic_results(payload, store_id, store_name, api_url)
+
+    def fetch_page(self, search_url: str, store_name: str, query: str) -> 'FetchResult':
+        """
+        Fetch a search page from this scraper's source: over HTTP, or from
+        the mock backend for source 'mock'.
+        """
+        if self.source == 'mock':
+            from .mock import default_backend
+            return default_backend().fetch(search_url, store_name, query)
+        return self.fetch_requests(search_url)
+
+    def fetch_requests(self, search_url: str, accept: str = '') -> 'FetchResult':
+        """
+        Fetch a search page over HTTP through the shared session (and its
+        HTTP cache, if configured). accept replaces the HTML Accept header
+        (e.g. for JSON APIs).
+
+        Returns a scrapers.session.FetchResult. Raises requests exceptions
+        on network errors and non-2xx responses.
+        """
+        from .session import default_session
+
+        if self.session is None:
+            self.session = default_session()
+
+        headers = {
+            'User-Agent': USER_AGENT,
+            'Accept': accept or 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': self.session.accept_encoding,
+            'Connection': 'keep-alive',
+        }
+
+        return self.session.get(search_url, headers=headers, timeout=self.timeout)
+
+    def archive_page(self, store_id: str, store_name: str, search_url: str,
+                     query: str, body: bytes, encoding: str) -> None:
+        """Keep a fetched page in the snapshot archive, if one is configured."""
+        from .archive import default_archive
+
+        archive = default_archive()
+        if archive is None:
+            return
+        try:
+            archive.add(store_id, store_name, self.source, search_url, query, body, encoding)
+        except Exception as e:
+            logger.warning("Could not archive page for %s: %s", store_name, e)
+
+    def parse_key(self, page: 'FetchResult', store_id: str, store_name: str,
+                  search_url: str, query: str, max_results: int) -> str:
+        """
+        Key of this page's extraction in the HTTP cache, or '' when
+        extractions can't be reused (no cache configured).
+        """
+        if not page.body_hash or self.session is None or self.session.cache is None:
+            return ''
+        from .session import parse_key
+        return parse_key(
+            type(self).__name__, page.body_hash, store_id, store_name,
+            search_url, query, max_results
+        )
+
+    def cached_parse(self, page: 'FetchResult', key: str) -> Optional[List[ScraperResult]]:
+        """
+        Results previously extracted from an identical body, dated to when
+        the origin last confirmed it. None if this body wasn't parsed yet.
+        """
+        if not key:
+            return None
+        results = self.session.cache.get_parsed(key)
+        if results is None:
+            return None
+        for result in results:
+            result.collected_at = page.validated_at
+        logger.info("Reusing extraction for unchanged page (%s): %.12s", page.status, page.body_hash)
+        return results
+
+    def parse_page(
+        self,
+        html: str,
+        store_id: str,
+        store_name: str,
+        search_url: str,
+        query: str,
+        max_results: int
+    ) -> List[ScraperResult]:
+        """
+        Parse a fetched search page into at most max_results results.
+        Pure CPU work, safe to run in a separate process.
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        results = self.parse_results_requests(
+            soup, store_id, store_name, search_url, query
+        )
+
+        return self.select_results(results, query, max_results) if results else [ScraperResult(
+            store_id=store_id,
+            store_name=store_name,
+            item_name=query,
+            price="not available",
+            notes="No products found",
+            product_url=search_url
+        )]
 
     def scrape_playwright(
         self,
@@ -240,17 +602,25 @@ class BaseScraper(ABC):
                 product_url=search_url
             )]
 
+        token = current_token()
         try:
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
-                context = browser.new_context(user_agent=USER_AGENT)
-                page = context.new_page()
-
-                page.goto(search_url, timeout=PLAYWRIGHT_TIMEOUT)
-                page.wait_for_load_state('networkidle', timeout=PLAYWRIGHT_TIMEOUT)
-
-                html = page.content()
-                browser.close()
+                try:
+                    context = browser.new_context(user_agent=USER_AGENT)
+                    page = context.new_page()
+
+                    token.raise_if_cancelled()
+                    page.goto(search_url, timeout=PLAYWRIGHT_TIMEOUT, wait_until='commit')
+                    for state in ('load', 'networkidle'):
+                        self.wait_for(lambda ms: page.wait_for_load_state(state, timeout=ms),
+                                      PLAYWRIGHT_TIMEOUT, token)
+
+                    html = page.content()
+                finally:
+                    # Also on errors and cancellation, so no browser outlives its scrape
+                    browser.close()
+                self.archive_page(store_id, store_name, search_url, query, html.encode('utf-8'), 'utf-8')
 
                 from bs4 import BeautifulSoup
                 soup = BeautifulSoup(html, 'html.parser')
@@ -259,7 +629,7 @@ class BaseScraper(ABC):
                     soup, page, store_id, store_name, search_url, query
                 )
 
-                return results[:max_results] if results else [ScraperResult(
+                return self.select_results(results, query, max_results) if results else [ScraperResult(
                     store_id=store_id,
                     store_name=store_name,
                     item_name=query,
@@ -268,6 +638,8 @@ class BaseScraper(ABC):
                     product_url=search_url
                 )]
 
+        except Cancelled:
+            raise
         except Exception as e:
             return [ScraperResult(
                 store_id=store_id,
@@ -278,6 +650,25 @@ class BaseScraper(ABC):
                 product_url=search_url
             )]
 
+    def wait_for(self, wait: Callable[[float], Any], timeout_ms: float, token: CancelToken) -> None:
+        """
+        Run a Playwright wait (wait(timeout_ms)) in PLAYWRIGHT_POLL slices
+        until it succeeds, checking token between slices. Raises Cancelled,
+        or Playwright's TimeoutError once timeout_ms has passed.
+        """
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            token.raise_if_cancelled()
+            remaining_ms = (deadline - time.monotonic()) * 1000
+            try:
+                wait(max(1, min(PLAYWRIGHT_POLL, remaining_ms)))
+                return
+            except PlaywrightTimeoutError:
+                if remaining_ms <= PLAYWRIGHT_POLL:
+                    raise
+
     def parse_results_requests(
         self,
         soup,
@@ -290,8 +681,16 @@ class BaseScraper(ABC):
         Parse search results from BeautifulSoup object (requests mode).
         Override in subclasses for store-specific parsing.
 
-        This base implementation tries common patterns.
+        This base implementation uses the template learned for the host
+        (see scrapers.templates), falling back to common patterns.
         """
+        if self.LEARN_TEMPLATES:
+            from .templates import default_templates
+
+            cards = default_templates().cards(soup, search_url)
+            if cards is not None:
+                return self._template_results(cards, store_id, store_name, search_url)
+
         results = []
 
         # Common product container selectors
@@ -317,13 +716,60 @@ class BaseScraper(ABC):
         if not products:
             products = soup.select('[class*="product"]')[:5]
 
-        for product in products[:3]:  # Limit to first 3 for efficiency
+        for product in products[:MAX_CANDIDATES]:
             result = self._extract_product_info(product, store_id, store_name, search_url)
             if result and result.item_name:
+                result.sponsored = self.is_sponsored(product)
                 results.append(result)
 
         return results
 
+    def _template_results(self, cards, store_id: str, store_name: str, search_url: str) -> List[ScraperResult]:
+        """Results from the product cards a learned template matched."""
+        from urllib.parse import urljoin
+
+        results = []
+        for card in cards[:MAX_CANDIDATES]:
+            if not card.title:
+                continue
+            price = self.parse_price_info(card.price_text)
+            results.append(ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=card.title[:150],
+                price_cents=price.cents,
+                price_unit=price.per_unit,
+                unit="each",
+                product_url=urljoin(search_url, card.href) if card.href else search_url,
+                notes="",
+                sponsored=self.is_sponsored(card.element)
+            ))
+        return results
+
+    def next_page_urls(self, soup, search_url: str, pages: int) -> List[str]:
+        """
+        URLs of up to `pages` results pages after this one, extrapolated
+        from its "next" link. Empty if the page links to no next page.
+        """
+        from urllib.parse import urljoin
+        from .deep import page_urls
+
+        for selector in self.NEXT_PAGE_SELECTORS:
+            link = soup.select_one(selector)
+            if link is not None and link.get('href'):
+                return page_urls(search_url, urljoin(search_url, link['href']), pages)
+        return []
+
+    def parse_product_details(self, soup) -> Dict[str, Any]:
+        """
+        Structured details (see scrapers.enrich.DETAIL_FIELDS) from a
+        product page. Override in subclasses for store-specific markup.
+
+        Default implementation reads schema.org Product data.
+        """
+        from .enrich import product_details_from_schema
+        return product_details_from_schema(soup)
+
     def parse_results_playwright(
         self,
         soup,
@@ -368,7 +814,7 @@ class BaseScraper(ABC):
                 return None
 
             # Try to find price
-            price = "not available"
+            price = NO_PRICE
             price_selectors = [
                 '[class*="price"]', '[data-price]',
                 '.price', 'span[class*="Price"]',
@@ -378,8 +824,8 @@ class BaseScraper(ABC):
                 elem = element.select_one(sel)
                 if elem:
                     price_text = elem.get_text(strip=True)
-                    parsed = self.parse_price(price_text)
-                    if parsed != "not available":
+                    parsed = self.parse_price_info(price_text)
+                    if parsed.cents is not None:
                         price = parsed
                         break
 
@@ -399,12 +845,13 @@ class BaseScraper(ABC):
                 store_id=store_id,
                 store_name=store_name,
                 item_name=title,
-                price=price,
+                price_cents=price.cents,
+                price_unit=price.per_unit,
                 unit="each",
                 product_url=product_url,
                 notes=""
             )
 
         except Exception as e:
-            logger.debug(f"Failed to extract product info: {e}")
+            logger.debug("Failed to extract product info: %s", e)
             return None
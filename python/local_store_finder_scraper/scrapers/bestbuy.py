@@ -9,8 +9,13 @@ making Playwright the preferred method.
 """
 
 import logging
-from typing import List
-from .base import BaseScraper, ScraperResult, PLAYWRIGHT_TIMEOUT
+import os
+from typing import Any, Dict, List
+from urllib.parse import quote
+from .base import BaseScraper, ScraperResult, PLAYWRIGHT_TIMEOUT, NO_PRICE, MAX_CANDIDATES
+from .cancel import Cancelled, current_token
+from .api import ApiSchemaError, number, products_list
+from .enrich import parse_rating, stock_from_text
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,21 @@ class BestBuyScraper(BaseScraper):
     so this scraper defaults to Playwright mode.
     """
 
+    NEXT_PAGE_SELECTORS = [
+        '.sku-list-page-next',
+        '.footer-pagination a[aria-label*="next" i]',
+    ] + BaseScraper.NEXT_PAGE_SELECTORS
+
+    # Best Buy Products API; needs a key in BESTBUY_API_KEY
+    API_SEARCH_URL = (
+        'https://api.bestbuy.com/v1/products({query})?format=json&pageSize=12'
+        '&show=sku,name,salePrice,regularPrice,url,modelNumber,customerReviewAverage,'
+        'customerReviewCount,onlineAvailability&apiKey={api_key}'
+    )
+
+    # Without the API, the JS-rendered search page needs a browser
+    API_FALLBACK_SOURCE = 'playwright'
+
     def __init__(self, source: str = 'playwright'):
         # Default to playwright for Best Buy since it's JS-heavy
         super().__init__(source=source)
@@ -65,14 +85,14 @@ class BestBuyScraper(BaseScraper):
         for selector in product_selectors:
             products = soup.select(selector)
             if products:
-                logger.info(f"Found {len(products)} products with selector: {selector}")
+                logger.info("Found %s products with selector: %s", len(products), selector)
                 break
 
         if not products:
             # Fallback
             products = soup.select('[class*="product"]')[:5]
 
-        for product in products[:3]:
+        for product in products[:MAX_CANDIDATES]:
             try:
                 # Extract title
                 title = None
@@ -93,7 +113,7 @@ class BestBuyScraper(BaseScraper):
                     continue
 
                 # Extract price
-                price = "not available"
+                price = NO_PRICE
                 price_selectors = [
                     '[data-testid="customer-price"] span',
                     '.priceView-hero-price span',
@@ -106,11 +126,11 @@ class BestBuyScraper(BaseScraper):
                     for elem in elems:
                         price_text = elem.get_text(strip=True)
                         if '$' in price_text or price_text.replace(',', '').replace('.', '').isdigit():
-                            parsed = self.parse_price(price_text)
-                            if parsed != "not available":
+                            parsed = self.parse_price_info(price_text)
+                            if parsed.cents is not None:
                                 price = parsed
                                 break
-                    if price != "not available":
+                    if price.cents is not None:
                         break
 
                 # Extract product URL
@@ -132,11 +152,13 @@ class BestBuyScraper(BaseScraper):
 
                 # Extract rating if available
                 rating = ""
+                details = {'sku': sku} if sku else {}
                 rating_elem = product.select_one('[class*="rating"]')
                 if rating_elem:
                     rating_text = rating_elem.get_text(strip=True)
                     if rating_text:
                         rating = f"Rating: {rating_text}"
+                        details.update(parse_rating(rating_elem.get_text(' ', strip=True)))
 
                 notes = []
                 if sku:
@@ -148,18 +170,117 @@ class BestBuyScraper(BaseScraper):
                     store_id=store_id,
                     store_name=store_name,
                     item_name=title,
-                    price=price,
+                    price_cents=price.cents,
+                    price_unit=price.per_unit,
                     unit="each",
                     product_url=product_url,
-                    notes="; ".join(notes) if notes else ""
+                    notes="; ".join(notes) if notes else "",
+                    sponsored=self.is_sponsored(product),
+                    details=details or None
                 ))
 
             except Exception as e:
-                logger.debug(f"Error parsing Best Buy product: {e}")
+                logger.debug("Error parsing Best Buy product: %s", e)
+                continue
+
+        return results
+
+    def build_api_url(self, api_url_template: str, query: str) -> str:
+        """
+        Products API URL: each query word becomes a search=... term. ''
+        if the template needs an API key and BESTBUY_API_KEY is unset.
+        """
+        template = api_url_template or self.API_SEARCH_URL
+        if '{query}' not in template:
+            return ''
+        if '{api_key}' in template:
+            api_key = os.environ.get('BESTBUY_API_KEY', '')
+            if not api_key:
+                return ''
+            template = template.replace('{api_key}', quote(api_key, safe=''))
+        if template.startswith('https://api.bestbuy.com/'):
+            terms = '&'.join(f"search={quote(word, safe='')}" for word in query.split())
+            return template.replace('{query}', f"({terms})")
+        return super().build_api_url(template, query)
+
+    def parse_api_results(
+        self,
+        payload: Any,
+        store_id: str,
+        store_name: str,
+        api_url: str,
+        query: str
+    ) -> List[ScraperResult]:
+        """Map a Products API response (products[] with sku, name, salePrice, ...)."""
+        results = []
+        for product in products_list(payload, ('products',))[:MAX_CANDIDATES]:
+            if 'name' not in product or 'sku' not in product:
+                raise ApiSchemaError("Products API item without name or sku")
+            title = product.get('name') or ''
+            if not title:
                 continue
 
+            price = number(product.get('salePrice'))
+            if price is None:
+                price = number(product.get('regularPrice'))
+            sku = str(product['sku'])
+            details = {'sku': sku}
+            if product.get('modelNumber'):
+                details['model'] = str(product['modelNumber'])
+            if product.get('upc'):
+                details['upc'] = str(product['upc'])
+            rating = number(product.get('customerReviewAverage'))
+            reviews = number(product.get('customerReviewCount'), int)
+            if rating is not None:
+                details['rating'] = rating
+            if reviews is not None:
+                details['review_count'] = reviews
+            if isinstance(product.get('onlineAvailability'), bool):
+                details['in_stock'] = product['onlineAvailability']
+
+            notes = [f"SKU: {sku}"]
+            if rating is not None:
+                notes.append(f"Rating: {rating} out of 5 stars")
+            url = product.get('url') or ''
+            results.append(ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=title[:150],
+                price_cents=int(round(price * 100)) if price is not None else None,
+                unit="each",
+                product_url=f"https://www.bestbuy.com{url}" if url.startswith('/') else (url or api_url),
+                notes="; ".join(notes),
+                details=details
+            ))
         return results
 
+    def parse_product_details(self, soup) -> Dict[str, Any]:
+        """
+        Parse a Best Buy product page: schema.org data, plus the SKU and
+        model panel and the add-to-cart and pickup state.
+        """
+        details = super().parse_product_details(soup)
+
+        for field, selector in (('sku', '.sku .product-data-value'), ('model', '.model .product-data-value')):
+            elem = soup.select_one(selector)
+            if field not in details and elem and elem.get_text(strip=True):
+                details[field] = elem.get_text(strip=True)
+
+        button = soup.select_one('.fulfillment-add-to-cart-button button, [data-button-state]')
+        if button and 'in_stock' not in details:
+            state = button.get('data-button-state', '')
+            in_stock = stock_from_text(button.get_text(' ', strip=True))
+            if state:
+                in_stock = state.upper() == 'ADD_TO_CART'
+            if in_stock is not None:
+                details['in_stock'] = in_stock
+
+        pickup = soup.select_one('[class*="fulfillment-fulfillment-summary"], [class*="store-availability"]')
+        if pickup:
+            details['store_availability'] = pickup.get_text(' ', strip=True)[:120]
+
+        return details
+
     def parse_results_playwright(
         self,
         soup,
@@ -183,7 +304,7 @@ class BestBuyScraper(BaseScraper):
             page.wait_for_timeout(500)
 
         except Exception as e:
-            logger.debug(f"Playwright wait error: {e}")
+            logger.debug("Playwright wait error: %s", e)
 
         # Parse the rendered HTML
         return self.parse_results_requests(soup, store_id, store_name, search_url, query)
@@ -203,36 +324,47 @@ class BestBuyScraper(BaseScraper):
             logger.warning("Playwright not installed, falling back to requests")
             return self.scrape_requests(store_id, store_name, search_url, query, max_results)
 
+        token = current_token()
         try:
             with sync_playwright() as p:
                 browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    user_agent=self.__class__.__bases__[0].__module__.split('.')[0],
-                    viewport={'width': 1920, 'height': 1080}
-                )
-                page = context.new_page()
-
-                # Navigate with retry
-                for attempt in range(2):
-                    try:
-                        page.goto(search_url, timeout=PLAYWRIGHT_TIMEOUT, wait_until='domcontentloaded')
-                        break
-                    except Exception as e:
-                        if attempt == 1:
-                            raise e
-                        logger.debug(f"Retry navigation: {e}")
-
-                # Wait for content
                 try:
-                    page.wait_for_selector('.sku-item, .list-item, [class*="product"]', timeout=10000)
-                except Exception:
-                    pass
-
-                # Small delay for JS to settle
-                page.wait_for_timeout(1000)
-
-                html = page.content()
-                browser.close()
+                    context = browser.new_context(
+                        user_agent=self.__class__.__bases__[0].__module__.split('.')[0],
+                        viewport={'width': 1920, 'height': 1080}
+                    )
+                    page = context.new_page()
+
+                    # Navigate with retry
+                    for attempt in range(2):
+                        token.raise_if_cancelled()
+                        try:
+                            page.goto(search_url, timeout=PLAYWRIGHT_TIMEOUT, wait_until='domcontentloaded')
+                            break
+                        except Exception as e:
+                            if attempt == 1:
+                                raise e
+                            logger.debug("Retry navigation: %s", e)
+
+                    # Wait for content
+                    try:
+                        self.wait_for(
+                            lambda ms: page.wait_for_selector('.sku-item, .list-item, [class*="product"]', timeout=ms),
+                            10000, token
+                        )
+                    except Cancelled:
+                        raise
+                    except Exception:
+                        pass
+
+                    # Small delay for JS to settle
+                    page.wait_for_timeout(1000)
+                    token.raise_if_cancelled()
+
+                    html = page.content()
+                finally:
+                    browser.close()
+                self.archive_page(store_id, store_name, search_url, query, html.encode('utf-8'), 'utf-8')
 
                 from bs4 import BeautifulSoup
                 soup = BeautifulSoup(html, 'html.parser')
@@ -241,7 +373,7 @@ class BestBuyScraper(BaseScraper):
                     soup, page, store_id, store_name, search_url, query
                 )
 
-                return results[:max_results] if results else [ScraperResult(
+                return self.select_results(results, query, max_results) if results else [ScraperResult(
                     store_id=store_id,
                     store_name=store_name,
                     item_name=query,
@@ -250,8 +382,10 @@ class BestBuyScraper(BaseScraper):
                     product_url=search_url
                 )]
 
+        except Cancelled:
+            raise
         except Exception as e:
-            logger.error(f"Best Buy Playwright scrape failed: {e}")
+            logger.error("Best Buy Playwright scrape failed: %s", e)
             return [ScraperResult(
                 store_id=store_id,
                 store_name=store_name,
@@ -0,0 +1,203 @@
+"""
+Result Cache
+
+SQLite-backed cache of scrape results per (store, query), shared by
+run_scrape and the background refresh scheduler. It also tracks query
+popularity and recent interactive traffic, which the scheduler uses to
+decide what to refresh and when to back off.
+
+A pair's popularity decays with a half-life. Next to its score, each row
+keeps its heat, log2(score) + updated_at / half-life, which orders rows
+by decayed score without recomputing it: hot_queries() ranks and limits
+in SQL on an index over heat, and prune() drops pairs whose score has
+decayed below POPULARITY_FLOOR.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .base import ScraperResult
+from .query import canonical_key
+from .ratelimit import host_of
+
+DEFAULT_CACHE_TTL = 60 * 60  # seconds
+
+# Popularity scores halve every POPULARITY_HALF_LIFE seconds
+POPULARITY_HALF_LIFE = 6 * 60 * 60
+
+# Pairs whose decayed score falls below this are pruned (one request
+# about 40 hours ago, at a six-hour half-life)
+POPULARITY_FLOOR = 0.01
+
+# Interactive activity older than this is pruned
+ACTIVITY_RETENTION = 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    store_id TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    results TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (store_id, query_key)
+);
+CREATE TABLE IF NOT EXISTS popularity (
+    store_id TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    query TEXT NOT NULL,
+    store TEXT NOT NULL,
+    score REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heat REAL NOT NULL,
+    PRIMARY KEY (store_id, query_key)
+);
+CREATE INDEX IF NOT EXISTS popularity_heat ON popularity (heat);
+CREATE TABLE IF NOT EXISTS activity (
+    at REAL NOT NULL,
+    host TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS activity_at ON activity (at);
+"""
+
+
+class HotQuery(NamedTuple):
+    """A popular (store, query) pair and the state of its cache entry."""
+    store: Dict
+    query: str
+    score: float
+    expires_at: Optional[float]
+
+
+def cache_key(query: str, deep_pages: int = 0) -> str:
+    """
+    Cache key for a query; equivalent phrasings share one entry. Deep
+    searches get their own entry per page count.
+    """
+    key = canonical_key(query)
+    return f"{key}|deep={deep_pages}" if deep_pages > 0 else key
+
+
+def _decayed(score: float, updated_at: float, now: float) -> float:
+    return score * math.pow(0.5, max(0.0, now - updated_at) / POPULARITY_HALF_LIFE)
+
+
+def _heat(score: float, at: float) -> float:
+    """Sorts like the score decayed to any common time: log2(score) + at / half-life."""
+    return math.log2(score) + at / POPULARITY_HALF_LIFE
+
+
+class ResultCache:
+    """
+    Result cache with TTL'd entries, popularity tracking and an
+    interactive activity log.
+
+    Safe to share between threads; multiple processes may open the same
+    database file.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(self, store_id: str, query: str, deep_pages: int = 0) -> Optional[List[ScraperResult]]:
+        """Cached results for a store and query, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT results FROM results WHERE store_id = ? AND query_key = ? AND expires_at > ?',
+                (store_id, cache_key(query, deep_pages), time.time())
+            ).fetchone()
+        if not row:
+            return None
+        return [ScraperResult.from_state(state) for state in json.loads(row[0])]
+
+    def put(self, store_id: str, query: str, results: Sequence[ScraperResult],
+            ttl: Optional[float] = None, deep_pages: int = 0) -> None:
+        """Store results for a store and query."""
+        now = time.time()
+        payload = json.dumps([r.to_state() for r in results])
+        with self._lock, self._conn:
+            self._conn.execute(
+                '''
+                INSERT OR REPLACE INTO results (store_id, query_key, results, stored_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ''',
+                (store_id, cache_key(query, deep_pages), payload, now,
+                 now + (self.ttl if ttl is None else ttl))
+            )
+
+    def record_request(self, store: Dict, query: str) -> None:
+        """Count an interactive request toward popularity and current load."""
+        now = time.time()
+        store_id = store.get('id', '')
+        key = cache_key(query)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT score, updated_at FROM popularity WHERE store_id = ? AND query_key = ?',
+                (store_id, key)
+            ).fetchone()
+            score = (_decayed(row[0], row[1], now) if row else 0.0) + 1.0
+            self._conn.execute(
+                '''
+                INSERT OR REPLACE INTO popularity (store_id, query_key, query, store, score, updated_at, heat)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (store_id, key, query, json.dumps(store), score, now, _heat(score, now))
+            )
+            self._conn.execute(
+                'INSERT INTO activity (at, host) VALUES (?, ?)',
+                (now, host_of(store.get('base_url', '')))
+            )
+
+    def hot_queries(self, limit: int = 20) -> List[HotQuery]:
+        """The most popular (store, query) pairs, hottest first."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                '''
+                SELECT p.store, p.query, p.score, p.updated_at, r.expires_at
+                FROM popularity p
+                LEFT JOIN results r ON r.store_id = p.store_id AND r.query_key = p.query_key
+                ORDER BY p.heat DESC
+                LIMIT ?
+                ''',
+                (limit,)
+            ).fetchall()
+        return [
+            HotQuery(json.loads(store), query, _decayed(score, updated_at, now), expires_at)
+            for store, query, score, updated_at, expires_at in rows
+        ]
+
+    def recent_requests(self, window: float, host: Optional[str] = None) -> int:
+        """Interactive requests in the last `window` seconds, optionally for one host."""
+        since = time.time() - window
+        with self._lock:
+            if host is None:
+                row = self._conn.execute(
+                    'SELECT COUNT(*) FROM activity WHERE at >= ?', (since,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT COUNT(*) FROM activity WHERE at >= ? AND host = ?', (since, host)
+                ).fetchone()
+        return row[0]
+
+    def prune(self) -> None:
+        """Drop expired entries, pairs no longer popular, and old activity."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM results WHERE expires_at <= ?', (now,))
+            self._conn.execute('DELETE FROM popularity WHERE heat < ?', (_heat(POPULARITY_FLOOR, now),))
+            self._conn.execute('DELETE FROM activity WHERE at < ?', (now - ACTIVITY_RETENTION,))
@@ -0,0 +1,182 @@
+"""
+Cooperative Cancellation
+
+A CancelToken is handed down through a scrape so it can be stopped without
+killing the process. run_scrape cancels it on SIGTERM (the Node bridge's
+timeout or abort) or on a worker {"cancel": request_id} message, and each
+stage checks it:
+
+- scrape_jobs, the fetch/parse pipeline, shard workers and the job queue
+  stop waiting and return placeholder results for unfinished jobs
+- HttpSession refuses new requests and shuts down the socket under a
+  blocked read, so the connection is dropped rather than left half-read
+- Playwright waits for the page in short slices and closes its browser on
+  the way out
+- deep search and enrichment stop fetching further pages
+
+The token travels in a context variable: cancel_scope() sets it for a
+block, current_token() reads it, and bind() carries it onto pool threads.
+Shard worker processes get a token per task, cancelled by a message from
+the supervisor.
+"""
+
+import contextvars
+import functools
+import itertools
+import logging
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FuturesTimeoutError, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """Raised by work whose CancelToken was cancelled."""
+
+
+class _Registration:
+    """A callback registered with CancelToken.on_cancel(); a context manager that unregisters it."""
+
+    __slots__ = ('_token', '_id')
+
+    def __init__(self, token: 'CancelToken', callback_id: Optional[int]):
+        self._token = token
+        self._id = callback_id
+
+    def unregister(self) -> None:
+        if self._id is not None:
+            self._token._unregister(self._id)
+            self._id = None
+
+    def __enter__(self) -> '_Registration':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unregister()
+
+
+class CancelToken:
+    """
+    Cancellation flag with callbacks. Thread-safe.
+
+    A token made with a parent is cancelled along with it (e.g. one token
+    per worker request, all cancelled at shutdown); close() detaches it
+    from the parent once the work is done.
+    """
+
+    def __init__(self, parent: Optional['CancelToken'] = None):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._future: Future = Future()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], Any]] = {}
+        self._ids = itertools.count()
+        self._parent = parent.on_cancel(lambda: self.cancel(parent.reason)) if parent is not None else None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = 'cancelled') -> bool:
+        """Cancel and run the callbacks. Returns False if already cancelled."""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+        self._future.set_result(reason)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Cancel callback failed")
+        return True
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep up to timeout seconds; returns True (early) if cancelled."""
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback: Callable[[], Any]) -> _Registration:
+        """
+        Call callback (from the cancelling thread) when cancelled, or now if
+        already cancelled. Use the returned registration as a context
+        manager, or unregister() it, once the callback no longer applies.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                callback_id = next(self._ids)
+                self._callbacks[callback_id] = callback
+                return _Registration(self, callback_id)
+        callback()
+        return _Registration(self, None)
+
+    def _unregister(self, callback_id: int) -> None:
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+    def result(self, future: Future, timeout: Optional[float] = None) -> Any:
+        """
+        future.result(timeout), giving up early if cancelled. Raises
+        Cancelled, or concurrent.futures.TimeoutError.
+        """
+        wait([future, self._future], timeout=timeout, return_when=FIRST_COMPLETED)
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+        if not future.done():
+            raise FuturesTimeoutError()
+        return future.result()
+
+    def close(self) -> None:
+        """Detach from the parent token."""
+        if self._parent is not None:
+            self._parent.unregister()
+
+
+# Current token when none was set: never cancelled
+_NEVER = CancelToken()
+_current: contextvars.ContextVar = contextvars.ContextVar('cancel_token', default=_NEVER)
+
+
+def current_token() -> CancelToken:
+    """The token the running work should check."""
+    return _current.get()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Make token the current token for the block."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def bind(fn: Callable) -> Callable:
+    """fn, run under the caller's current token on whatever thread calls it."""
+    token = current_token()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with cancel_scope(token):
+            return fn(*args, **kwargs)
+    return run
+
+
+def cancel_on_signal(token: CancelToken, signum: int = signal.SIGTERM) -> None:
+    """Cancel token when signum arrives. Call from the main thread."""
+    def handler(received, frame):
+        name = signal.Signals(received).name
+        logger.warning("%s received, cancelling", name)
+        # Callbacks take locks the interrupted code may hold; run them elsewhere
+        threading.Thread(target=token.cancel, args=(name,), name='cancel', daemon=True).start()
+
+    signal.signal(signum, handler)
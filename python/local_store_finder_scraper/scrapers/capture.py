@@ -0,0 +1,169 @@
+"""
+Workload Capture
+
+With --capture (SCRAPER_CAPTURE_PATH), run_scrape appends one JSON line
+per request it answers, for benchmarks/replay_workload.py to re-issue
+against the mock backend. A line keeps the shape of the traffic, not
+its content:
+
+- t: arrival time (epoch seconds); replays keep the gaps between arrivals
+- stores: per store, the scraper that handled it ('homedepot', 'bestbuy'
+  or 'generic'), its source, and a token for its host. Names are kept
+  only for stores with their own scraper.
+- queries: each query's words replaced by tokens, so repeated queries,
+  and words shared between queries, still repeat
+- options: deep_pages, enrich, priority and a tenant token, when given
+- wait_ms (worker mode), duration_ms and outcome: result, priced result
+  and error counts, cache and index hits, and whether it was cancelled
+
+Tokens are keyed BLAKE2b hashes. The key is kept in <path>.key, created
+on first use and readable by its owner only: share the capture, not the
+key. Processes sharing a capture file share its key, so one-shot runs
+line up (the same query gets the same tokens).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from . import SCRAPER_REGISTRY
+from .base import ScraperResult
+from .query import normalize_query
+
+logger = logging.getLogger(__name__)
+
+KEY_SUFFIX = '.key'
+KEY_BYTES = 32
+
+# Hex digits per token
+TOKEN_DIGITS = 8
+
+
+def _load_key(path: str) -> bytes:
+    """The capture's key, created (owner-only) if it does not exist yet."""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another process may be writing it; give it a moment
+        for _ in range(50):
+            with open(path) as f:
+                key = f.read().strip()
+            if key:
+                return bytes.fromhex(key)
+            time.sleep(0.01)
+        raise ValueError(f"Capture key file is empty: {path}")
+    key = secrets.token_bytes(KEY_BYTES)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key.hex())
+    return key
+
+
+class WorkloadCapture:
+    """
+    Appends request descriptors to a JSON-lines file. Thread-safe, and
+    each line is a single append, so several processes may share a file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._key = _load_key(path + KEY_SUFFIX)
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._lock = threading.Lock()
+
+    def token(self, prefix: str, value: str) -> str:
+        digest = hashlib.blake2b(value.encode('utf-8'), key=self._key, digest_size=TOKEN_DIGITS // 2)
+        return prefix + digest.hexdigest()
+
+    def _store(self, store: Dict) -> Dict[str, Any]:
+        name = str(store.get('name', '')).lower().strip()
+        scraper = SCRAPER_REGISTRY.get(name)
+        host = (urlsplit(str(store.get('base_url', ''))).hostname or '').removeprefix('www.')
+        entry = {
+            'scraper': scraper.__name__.replace('Scraper', '').lower() if scraper else 'generic',
+            'source': store.get('source') or 'requests',
+            'host': self.token('h', host),
+        }
+        if scraper:
+            entry['name'] = store['name']
+        return entry
+
+    def _query(self, query: str) -> str:
+        return ' '.join(self.token('w', word) for word in normalize_query(query).lower().split())
+
+    def describe(self, data: Dict, output: Dict, arrived: float, duration: float,
+                 wait: Optional[float] = None) -> Dict[str, Any]:
+        """
+        The descriptor line for request data, answered with output. data
+        is what the client sent, so fields of the wrong type (which the
+        request was rejected for) are left out rather than trusted.
+        """
+        queries = data['queries'] if 'queries' in data else [data.get('query', '')]
+        if not isinstance(queries, list):
+            queries = []
+        stores = data.get('stores')
+        if not isinstance(stores, list):
+            stores = []
+        results: List[ScraperResult] = output.get('results', [])
+        meta = output.get('meta', {})
+        options = {
+            key: data[key] for key, kind in (('deep_pages', int), ('enrich', bool), ('priority', str))
+            if isinstance(data.get(key), kind)
+        }
+        if data.get('tenant'):
+            options['tenant'] = self.token('t', str(data['tenant']))
+
+        entry = {
+            't': round(arrived, 3),
+            'stores': [self._store(s) for s in stores if isinstance(s, dict)],
+            'queries': [self._query(q) for q in queries if isinstance(q, str)],
+        }
+        if options:
+            entry['options'] = options
+        if wait is not None:
+            entry['wait_ms'] = round(wait * 1000, 1)
+        entry['duration_ms'] = round(duration * 1000, 1)
+        entry['outcome'] = {
+            'results': len(results),
+            'priced': sum(1 for r in results if r.price_cents is not None),
+            'errors': len(output.get('errors', [])),
+            'cache_hits': meta.get('cache_hits', 0),
+            'index_hits': meta.get('index_hits', 0),
+            'cancelled': bool(meta.get('cancelled')),
+        }
+        return entry
+
+    def record(self, data: Any, output: Dict, arrived: float, duration: float,
+               wait: Optional[float] = None) -> None:
+        """
+        Append the descriptor for one request (ignored unless data is a
+        JSON object). Errors are logged, never raised to the request: in
+        worker mode this runs on an executor thread.
+        """
+        if not isinstance(data, dict):
+            return
+        try:
+            line = json.dumps(self.describe(data, output, arrived, duration, wait), separators=(',', ':'))
+            with self._lock:
+                os.write(self._fd, (line + '\n').encode('utf-8'))
+        except Exception as e:
+            logger.warning("Could not write to capture %s: %s", self.path, e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def read_capture(path: str) -> List[Dict[str, Any]]:
+    """Descriptors from a capture file, in arrival order."""
+    with open(path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    entries.sort(key=lambda e: e['t'])
+    return entries
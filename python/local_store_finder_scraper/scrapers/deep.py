@@ -0,0 +1,183 @@
+"""
+Deep Search
+
+Optional multi-page search for stores whose best match isn't on the
+first results page. From the first page's "next" link, the URLs of the
+following pages are extrapolated (the page-number or result-offset
+parameter is stepped), and up to `pages` of them are fetched at once on
+a few threads, each fetch taking a token from a per-host rate limiter.
+
+Candidates from each page join the ranking as the page arrives. Once
+there are enough confident matches (see ranking.confident_matches),
+the page fetches that haven't started are cancelled and the rest are
+ignored.
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, List, Optional
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+from .base import ScraperResult
+from .cancel import Cancelled, bind
+from .ranking import confident_matches
+from .ratelimit import RateLimiter, host_of
+
+if TYPE_CHECKING:
+    from .base import BaseScraper
+
+logger = logging.getLogger(__name__)
+
+# Extra pages fetched at once per deep search
+DEEP_FETCH_THREADS = 3
+
+# Per-host budget for extra pages, shared by every deep search in the process
+DEEP_HOST_RATE = 1.0  # requests per second
+DEEP_HOST_BURST = 3
+
+# Seconds an extra page waits for a rate-limit token before it is skipped
+TOKEN_TIMEOUT = 5
+
+# Replace to change the extra-page budget (e.g. in benchmarks)
+page_limiter = RateLimiter(rate=DEEP_HOST_RATE, burst=DEEP_HOST_BURST)
+
+
+def page_urls(current_url: str, next_url: str, pages: int) -> List[str]:
+    """
+    URLs of the `pages` results pages after current_url, given its next
+    link. The numeric query parameter that differs between the two is
+    taken as a page number (page=2, cp=2) or a result offset (Nao=24)
+    and stepped evenly. Without one, only next_url is known.
+    """
+    current = {}
+    for piece in urlsplit(current_url).query.split('&'):
+        name, _, value = piece.partition('=')
+        current[unquote(name)] = unquote(value)
+
+    parts = urlsplit(next_url)
+    pieces = parts.query.split('&')
+    for i, piece in enumerate(pieces):
+        name, _, value = piece.partition('=')
+        name, value = unquote(name), unquote(value)
+        if not value.isdigit() or current.get(name) == value:
+            continue
+        number = int(value)
+        if current.get(name, '').isdigit():
+            first = int(current[name])
+        else:
+            # Absent on the first page: numbering from 1, or offsets from 0
+            first = 1 if number == 2 else 0
+        step = number - first
+        if step <= 0:
+            continue
+        urls = []
+        for k in range(pages):
+            stepped = pieces[:i] + [f"{piece.partition('=')[0]}={number + k * step}"] + pieces[i + 1:]
+            urls.append(urlunsplit(parts._replace(query='&'.join(stepped))))
+        return urls
+    return [next_url][:pages]
+
+
+def deep_search(
+    scraper: 'BaseScraper',
+    html: str,
+    store_id: str,
+    store_name: str,
+    search_url: str,
+    query: str,
+    max_results: int,
+    pages: int
+) -> List[ScraperResult]:
+    """
+    Rank candidates from the first page (html) and up to `pages` more,
+    stopping as soon as max_results confident matches are found.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    candidates = scraper.parse_results_requests(soup, store_id, store_name, search_url, query)
+    urls = [] if confident_matches(candidates, query) >= max_results else \
+        scraper.next_page_urls(soup, search_url, pages)
+
+    if urls:
+        candidates = _search_pages(scraper, urls, candidates, store_id, store_name, query, max_results)
+
+    return scraper.select_results(candidates, query, max_results) if candidates else [ScraperResult(
+        store_id=store_id,
+        store_name=store_name,
+        item_name=query,
+        price="not available",
+        notes="No products found",
+        product_url=search_url
+    )]
+
+
+def _search_pages(
+    scraper: 'BaseScraper',
+    urls: List[str],
+    candidates: List[ScraperResult],
+    store_id: str,
+    store_name: str,
+    query: str,
+    max_results: int
+) -> List[ScraperResult]:
+    """Fetch and parse urls concurrently, adding their candidates until enough match."""
+    import requests
+    from bs4 import BeautifulSoup
+
+    stop = threading.Event()
+    seen = {r.product_url for r in candidates}
+
+    def fetch(url: str) -> Optional[List[ScraperResult]]:
+        if stop.is_set() or not page_limiter.acquire(host_of(url), timeout=TOKEN_TIMEOUT) or stop.is_set():
+            return None
+        try:
+            page = scraper.fetch_page(url, store_name, query)
+        except Cancelled:
+            return None
+        except requests.RequestException as e:
+            logger.info("Deep search page failed for %s: %.80s", store_name, e)
+            return None
+        if page.status == 'fetched':
+            scraper.archive_page(store_id, store_name, url, query, page.body, page.encoding)
+        if stop.is_set():
+            return None
+        soup = BeautifulSoup(page.body.decode(page.encoding, errors='replace'), 'html.parser')
+        return scraper.parse_results_requests(soup, store_id, store_name, url, query)
+
+    candidates = list(candidates)
+    searched = 0
+    pool = ThreadPoolExecutor(max_workers=min(DEEP_FETCH_THREADS, len(urls)), thread_name_prefix='deep-page')
+    try:
+        pending = {pool.submit(bind(fetch), url) for url in urls}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_results = _result_of(future)
+                if page_results is None:
+                    continue
+                searched += 1
+                for result in page_results:
+                    if result.product_url not in seen:
+                        seen.add(result.product_url)
+                        candidates.append(result)
+            if pending and confident_matches(candidates, query) >= max_results:
+                stop.set()
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(
+        "Deep search %s: %s of %s extra pages%s",
+        store_name, searched, len(urls), ", stopped early" if stop.is_set() else ""
+    )
+    return candidates
+
+
+def _result_of(future: Future) -> Optional[List[ScraperResult]]:
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning("Deep search page failed: %s", e)
+        return None
@@ -0,0 +1,374 @@
+"""
+Product Detail Enrichment
+
+Optional stage that fetches the product page of each selected result
+(after ranking, so at most max_results pages per store and query) and
+merges stock, availability, rating, model, SKU and UPC into result.details.
+
+- Pages are fetched in parallel on a few threads, each fetch taking a
+  token from a per-host rate limiter. Enrichment waits only until the
+  request's deadline; results whose page isn't back by then keep the
+  details their search card gave them.
+- Parsed details are cached per product URL in their own table with
+  their own TTL (stock moves faster than search results), independent of
+  the result and parse caches.
+- Each store's scraper parses its product pages (parse_product_details);
+  the base implementation reads schema.org Product JSON-LD and microdata,
+  which most stores publish.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .base import PAGE_SOURCES, ScraperResult
+from .cancel import Cancelled, bind
+from .ratelimit import RateLimiter, host_of
+
+logger = logging.getLogger(__name__)
+
+# Keys of result.details, in output order
+DETAIL_FIELDS = (
+    'model', 'sku', 'upc', 'rating', 'review_count', 'in_stock', 'availability',
+    'store_availability',
+)
+
+DEFAULT_DETAIL_TTL = 30 * 60  # seconds
+
+# Product pages fetched at once per request
+DETAIL_FETCH_THREADS = 4
+
+# Per-host budget for product pages, shared by every request in the process
+DETAIL_HOST_RATE = 2.0  # requests per second
+DETAIL_HOST_BURST = 4
+
+# Replace to change the product-page budget (e.g. in benchmarks)
+detail_limiter = RateLimiter(rate=DETAIL_HOST_RATE, burst=DETAIL_HOST_BURST)
+
+# schema.org availability values that mean the item can be bought
+IN_STOCK_AVAILABILITY = frozenset({
+    'InStock', 'InStoreOnly', 'LimitedAvailability', 'OnlineOnly', 'PreOrder', 'PreSale',
+})
+
+# schema.org Product properties holding a UPC/EAN, in order of preference
+UPC_PROPERTIES = ('gtin12', 'gtin13', 'gtin14', 'gtin', 'upc')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    product_url TEXT PRIMARY KEY,
+    details TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+_MODEL_PREFIX_RE = re.compile(r'^\s*model\s*(?:#|no\.?|number)?\s*:?\s*', re.IGNORECASE)
+_RATING_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:out of\s*5|/\s*5|stars?)?', re.IGNORECASE)
+_REVIEWS_RE = re.compile(r'([\d,]+)\s*(?:reviews?|ratings?)', re.IGNORECASE)
+_OUT_OF_STOCK_RE = re.compile(r'\b(?:out of stock|sold out|unavailable|not available)\b', re.IGNORECASE)
+_IN_STOCK_RE = re.compile(r'\b(?:in stock|available|add to cart|pick ?up today)\b', re.IGNORECASE)
+
+
+class EnrichStats(NamedTuple):
+    """What one enrich() call did, per distinct product URL."""
+    products: int
+    cached: int
+    fetched: int
+    failed: int
+    timed_out: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return self._asdict()
+
+
+def model_number(text: str) -> str:
+    """'Model# DCD771C2' -> 'DCD771C2'."""
+    return _MODEL_PREFIX_RE.sub('', text or '').strip()
+
+
+def parse_rating(text: str) -> Dict[str, Any]:
+    """
+    Rating and review count from card text such as
+    'Rating 4.7 out of 5 stars with 1,234 reviews'.
+    """
+    details: Dict[str, Any] = {}
+    reviews = _REVIEWS_RE.search(text or '')
+    rating_text = (text or '')[:reviews.start()] if reviews else (text or '')
+    rating = _RATING_RE.search(rating_text)
+    if rating and float(rating.group(1)) <= 5:
+        details['rating'] = float(rating.group(1))
+    if reviews:
+        details['review_count'] = int(reviews.group(1).replace(',', ''))
+    return details
+
+
+def stock_from_text(text: str) -> Optional[bool]:
+    """True/False if text says the item is (or isn't) available, else None."""
+    if _OUT_OF_STOCK_RE.search(text or ''):
+        return False
+    if _IN_STOCK_RE.search(text or ''):
+        return True
+    return None
+
+
+def _number(value: Any, kind=float) -> Optional[Any]:
+    try:
+        return kind(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def _schema_products(soup) -> List[Dict[str, Any]]:
+    """schema.org Product objects from a page's JSON-LD blocks."""
+    products = []
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(script.string or script.get_text() or '')
+        except ValueError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop(0)
+            if not isinstance(item, dict):
+                continue
+            kind = item.get('@type')
+            if kind == 'Product' or (isinstance(kind, list) and 'Product' in kind):
+                products.append(item)
+            stack.extend(item.get('@graph') or [])
+    return products
+
+
+def _itemprop(soup, name: str) -> str:
+    elem = soup.select_one(f'[itemprop="{name}"]')
+    if elem is None:
+        return ''
+    return (elem.get('content') or elem.get('href') or elem.get_text(strip=True) or '').strip()
+
+
+def product_details_from_schema(soup) -> Dict[str, Any]:
+    """Details from schema.org Product JSON-LD, falling back to microdata."""
+    details: Dict[str, Any] = {}
+    products = _schema_products(soup)
+    if products:
+        product = products[0]
+        model = product.get('model') or product.get('mpn')
+        if isinstance(model, dict):
+            model = model.get('name')
+        if model:
+            details['model'] = str(model)
+        if product.get('sku'):
+            details['sku'] = str(product['sku'])
+        upc = next((product[k] for k in UPC_PROPERTIES if product.get(k)), None)
+        if upc:
+            details['upc'] = str(upc)
+        rating = product.get('aggregateRating') or {}
+        if isinstance(rating, dict):
+            value = _number(rating.get('ratingValue'))
+            count = _number(rating.get('reviewCount') or rating.get('ratingCount'), int)
+            if value is not None:
+                details['rating'] = value
+            if count is not None:
+                details['review_count'] = count
+        offers = product.get('offers') or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        if isinstance(offers, dict) and offers.get('availability'):
+            details['availability'] = str(offers['availability']).rstrip('/').rsplit('/', 1)[-1]
+    else:
+        for field, prop in (('model', 'model'), ('model', 'mpn'), ('sku', 'sku'),
+                            *(('upc', prop) for prop in UPC_PROPERTIES),
+                            ('availability', 'availability')):
+            value = _itemprop(soup, prop)
+            if value and field not in details:
+                details[field] = value.rstrip('/').rsplit('/', 1)[-1] if field == 'availability' else value
+        rating = _number(_itemprop(soup, 'ratingValue'))
+        count = _number(_itemprop(soup, 'reviewCount') or _itemprop(soup, 'ratingCount'), int)
+        if rating is not None:
+            details['rating'] = rating
+        if count is not None:
+            details['review_count'] = count
+
+    if 'availability' in details:
+        details['in_stock'] = details['availability'] in IN_STOCK_AVAILABILITY
+    return details
+
+
+class DetailCache:
+    """
+    SQLite-backed cache of parsed product details per product URL.
+
+    Safe to share between threads. In memory by default: details fetched
+    for one request are reused by later ones in a worker-mode process,
+    and are fetched again once they are older than ttl.
+    """
+
+    def __init__(self, path: str = ':memory:', ttl: float = DEFAULT_DETAIL_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, urls: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Unexpired details for whichever of urls are cached."""
+        if not urls:
+            return {}
+        found = {}
+        now = time.time()
+        with self._lock:
+            for url in urls:
+                row = self._conn.execute(
+                    'SELECT details FROM details WHERE product_url = ? AND expires_at > ?', (url, now)
+                ).fetchone()
+                if row:
+                    found[url] = json.loads(row[0])
+        return found
+
+    def put(self, url: str, details: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store the details parsed from a product page."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO details (product_url, details, stored_at, expires_at) '
+                'VALUES (?, ?, ?, ?)',
+                (url, json.dumps(details), now, now + (self.ttl if ttl is None else ttl))
+            )
+
+    def prune(self) -> int:
+        """Drop expired entries. Returns the number removed."""
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM details WHERE expires_at <= ?', (time.time(),)).rowcount
+
+
+def fetch_details(store_name: str, source: str, url: str) -> Dict[str, Any]:
+    """Fetch a product page with the store's scraper and parse its details."""
+    from bs4 import BeautifulSoup
+    from . import get_scraper_for_store
+
+    # Playwright stores' product pages are read over plain HTTP
+    scraper = get_scraper_for_store(store_name, source if source in PAGE_SOURCES else 'requests')
+    page = scraper.fetch_page(url, store_name, '')
+    soup = BeautifulSoup(page.body.decode(page.encoding, errors='replace'), 'html.parser')
+    return scraper.parse_product_details(soup)
+
+
+def _merge(result: ScraperResult, details: Dict[str, Any]) -> None:
+    merged = dict(result.details or {})
+    merged.update((k, v) for k, v in details.items() if v is not None)
+    result.details = {k: merged[k] for k in DETAIL_FIELDS if k in merged} or None
+
+
+def enrich(
+    results: Sequence[ScraperResult],
+    deadline: float,
+    sources: Optional[Dict[str, str]] = None,
+    cache: Optional[DetailCache] = None
+) -> EnrichStats:
+    """
+    Add product-page details to results in place, giving up at deadline
+    (a time.monotonic() value) or once the current CancelToken is
+    cancelled. sources maps store ids to their source ('requests' when
+    missing). Only priced results with a product URL are enriched; each
+    distinct URL is fetched once.
+    """
+    sources = sources or {}
+    targets: Dict[str, List[ScraperResult]] = {}
+    for result in results:
+        if result.price_cents is not None and result.product_url.startswith(('http://', 'https://')):
+            targets.setdefault(result.product_url, []).append(result)
+    if not targets:
+        return EnrichStats(0, 0, 0, 0, 0)
+
+    cached = cache.get_many(list(targets)) if cache is not None else {}
+    for url, details in cached.items():
+        for result in targets[url]:
+            _merge(result, details)
+
+    missing = [url for url in targets if url not in cached]
+    fetched = failed = timed_out = 0
+    if missing:
+        def fetch(url: str) -> Optional[Dict[str, Any]]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not detail_limiter.acquire(host_of(url), timeout=remaining):
+                return None
+            first = targets[url][0]
+            try:
+                return fetch_details(first.store_name, sources.get(first.store_id, 'requests'), url)
+            except Cancelled:
+                return None
+
+        pool = ThreadPoolExecutor(
+            max_workers=min(DETAIL_FETCH_THREADS, len(missing)), thread_name_prefix='detail-page'
+        )
+        try:
+            futures = {pool.submit(bind(fetch), url): url for url in missing}
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            timed_out = len(not_done)
+            for future in done:
+                url = futures[future]
+                try:
+                    details = future.result()
+                except Exception as e:
+                    logger.info("Product page failed for %s: %.80s", targets[url][0].store_name, e)
+                    failed += 1
+                    continue
+                if details is None:
+                    timed_out += 1
+                    continue
+                fetched += 1
+                if cache is not None:
+                    cache.put(url, details)
+                for result in targets[url]:
+                    _merge(result, details)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    stats = EnrichStats(len(targets), len(cached), fetched, failed, timed_out)
+    logger.info(
+        "Enriched %s of %s products (%s cached, %s fetched, %s failed, %s past the deadline)",
+        stats.cached + stats.fetched, stats.products, stats.cached, stats.fetched, stats.failed,
+        stats.timed_out
+    )
+    return stats
+
+
+_default_cache: Optional[DetailCache] = None
+_default_lock = threading.Lock()
+
+
+def configure_detail_cache(path: Optional[str], ttl: float = DEFAULT_DETAIL_TTL) -> DetailCache:
+    """Cache product details in path from now on (None keeps them in memory)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = DetailCache(path or ':memory:', ttl)
+        return _default_cache
+
+
+def default_detail_cache() -> DetailCache:
+    """
+    The shared detail cache, opened on first use from
+    SCRAPER_DETAIL_CACHE_PATH and SCRAPER_DETAIL_TTL (in memory if unset).
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DetailCache(
+                os.environ.get('SCRAPER_DETAIL_CACHE_PATH') or ':memory:',
+                float(os.environ.get('SCRAPER_DETAIL_TTL', DEFAULT_DETAIL_TTL))
+            )
+        return _default_cache
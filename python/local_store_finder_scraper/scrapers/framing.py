@@ -0,0 +1,332 @@
+"""
+Framed Binary Protocol
+
+Optional wire format for the Node bridge (run_scrape.py --protocol framed),
+replacing one JSON document per run with length-prefixed frames:
+
+    +-------+----------------+-----------------------------+
+    | flags | length (u32 BE)| payload (length bytes)      |
+    +-------+----------------+-----------------------------+
+
+flags bit 0 marks a zlib-compressed payload. The payload is MessagePack,
+encoded with the msgpack package when installed and with a pure-stdlib
+encoder otherwise; both produce the same bytes for the types used here.
+
+Results are sent as a table (field names once, then one row of values
+per result) instead of one map per result. services/scraperFraming.js
+rebuilds the same result objects the JSON mode produces.
+"""
+
+import struct
+import zlib
+from typing import Any, BinaryIO, Dict, Optional
+
+from .base import ScraperResult
+from .serialize import RESULT_FIELDS, result_values
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+_HEADER = struct.Struct('>BI')
+FLAG_COMPRESSED = 0x01
+
+# Payloads at least this large are compressed (if it makes them smaller)
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 1
+
+# Refuse frames larger than this (bytes)
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+class FramingError(ValueError):
+    """Malformed frame or payload."""
+
+
+# ---------------------------------------------------------------------------
+# MessagePack subset: None, bool, int, float, str, bytes, list/tuple, dict
+# ---------------------------------------------------------------------------
+
+def _pack_into(obj: Any, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj <= 0xff:
+            out += b'\xcc' + struct.pack('>B', obj)
+        elif 0 <= obj <= 0xffff:
+            out += b'\xcd' + struct.pack('>H', obj)
+        elif 0 <= obj <= 0xffffffff:
+            out += b'\xce' + struct.pack('>I', obj)
+        elif 0 <= obj <= 0xffffffffffffffff:
+            out += b'\xcf' + struct.pack('>Q', obj)
+        elif -0x80 <= obj:
+            out += b'\xd0' + struct.pack('>b', obj)
+        elif -0x8000 <= obj:
+            out += b'\xd1' + struct.pack('>h', obj)
+        elif -0x80000000 <= obj:
+            out += b'\xd2' + struct.pack('>i', obj)
+        elif -0x8000000000000000 <= obj:
+            out += b'\xd3' + struct.pack('>q', obj)
+        else:
+            raise FramingError(f"Integer out of range: {obj}")
+    elif isinstance(obj, float):
+        out += b'\xcb' + struct.pack('>d', obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        n = len(data)
+        if n < 32:
+            out.append(0xa0 | n)
+        elif n <= 0xff:
+            out += b'\xd9' + struct.pack('>B', n)
+        elif n <= 0xffff:
+            out += b'\xda' + struct.pack('>H', n)
+        else:
+            out += b'\xdb' + struct.pack('>I', n)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        n = len(obj)
+        if n <= 0xff:
+            out += b'\xc4' + struct.pack('>B', n)
+        elif n <= 0xffff:
+            out += b'\xc5' + struct.pack('>H', n)
+        else:
+            out += b'\xc6' + struct.pack('>I', n)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xffff:
+            out += b'\xdc' + struct.pack('>H', n)
+        else:
+            out += b'\xdd' + struct.pack('>I', n)
+        for item in obj:
+            _pack_into(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n <= 0xffff:
+            out += b'\xde' + struct.pack('>H', n)
+        else:
+            out += b'\xdf' + struct.pack('>I', n)
+        for key, value in obj.items():
+            _pack_into(key, out)
+            _pack_into(value, out)
+    else:
+        raise FramingError(f"Cannot encode {type(obj).__name__}")
+
+
+# (struct format, size) for fixed-width types, by type byte
+_FIXED = {
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+}
+# Length prefix (struct format, size) for str/bin/array/map, by type byte
+_LENGTHS = {
+    0xd9: ('>B', 1), 0xda: ('>H', 2), 0xdb: ('>I', 4),
+    0xc4: ('>B', 1), 0xc5: ('>H', 2), 0xc6: ('>I', 4),
+    0xdc: ('>H', 2), 0xdd: ('>I', 4),
+    0xde: ('>H', 2), 0xdf: ('>I', 4),
+}
+
+
+def _unpack_from(data: bytes, pos: int):
+    """Decode one value at pos. Returns (value, next position)."""
+    try:
+        code = data[pos]
+    except IndexError:
+        raise FramingError("Truncated payload") from None
+    pos += 1
+
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if 0xa0 <= code <= 0xbf:
+        n = code & 0x1f
+        return data[pos:pos + n].decode('utf-8'), pos + n
+    if 0x90 <= code <= 0x9f:
+        return _unpack_array(data, pos, code & 0x0f)
+    if 0x80 <= code <= 0x8f:
+        return _unpack_map(data, pos, code & 0x0f)
+    if code == 0xc0:
+        return None, pos
+    if code == 0xc2:
+        return False, pos
+    if code == 0xc3:
+        return True, pos
+    if code in _FIXED:
+        fmt, size = _FIXED[code]
+        if pos + size > len(data):
+            raise FramingError("Truncated payload")
+        return struct.unpack_from(fmt, data, pos)[0], pos + size
+    if code in _LENGTHS:
+        fmt, size = _LENGTHS[code]
+        if pos + size > len(data):
+            raise FramingError("Truncated payload")
+        n = struct.unpack_from(fmt, data, pos)[0]
+        pos += size
+        if code in (0xd9, 0xda, 0xdb):
+            return data[pos:pos + n].decode('utf-8'), pos + n
+        if code in (0xc4, 0xc5, 0xc6):
+            return bytes(data[pos:pos + n]), pos + n
+        if code in (0xdc, 0xdd):
+            return _unpack_array(data, pos, n)
+        return _unpack_map(data, pos, n)
+    raise FramingError(f"Unsupported type byte 0x{code:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, n: int):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack_from(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, n: int):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack_from(data, pos)
+        value, pos = _unpack_from(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def pack(obj: Any) -> bytes:
+    """Encode obj as MessagePack."""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack_into(obj, out)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    """Decode one MessagePack value occupying all of data."""
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as e:
+            raise FramingError(str(e)) from e
+    try:
+        value, pos = _unpack_from(data, 0)
+    except (UnicodeDecodeError, struct.error) as e:
+        raise FramingError(str(e)) from e
+    if pos > len(data):
+        raise FramingError("Truncated payload")
+    if pos < len(data):
+        raise FramingError("Trailing bytes after payload")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Frames
+# ---------------------------------------------------------------------------
+
+def encode_frame(obj: Any, compress_threshold: int = COMPRESS_THRESHOLD) -> bytes:
+    """Encode obj as one frame, compressing large payloads."""
+    payload = pack(obj)
+    flags = 0
+    if len(payload) >= compress_threshold:
+        compressed = zlib.compress(payload, COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_COMPRESSED
+    return _HEADER.pack(flags, len(payload)) + payload
+
+
+def decode_frame(frame: bytes) -> Any:
+    """Decode a complete frame (header and payload)."""
+    if len(frame) < _HEADER.size:
+        raise FramingError("Truncated frame header")
+    flags, length = _HEADER.unpack_from(frame)
+    payload = frame[_HEADER.size:]
+    if len(payload) != length:
+        raise FramingError(f"Frame length {length} does not match payload of {len(payload)} bytes")
+    return _decode_payload(flags, payload)
+
+
+def _decode_payload(flags: int, payload: bytes) -> Any:
+    if flags & FLAG_COMPRESSED:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as e:
+            raise FramingError(f"Bad compressed payload: {e}") from e
+    return unpack(payload)
+
+
+def _read_exact(stream: BinaryIO, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = stream.read(n)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(stream: BinaryIO) -> Optional[Any]:
+    """Read and decode the next frame. Returns None at a clean end of stream."""
+    header = _read_exact(stream, _HEADER.size)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        raise FramingError("Truncated frame header")
+    flags, length = _HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise FramingError(f"Frame of {length} bytes exceeds limit")
+    payload = _read_exact(stream, length)
+    if len(payload) < length:
+        raise FramingError("Truncated frame payload")
+    return _decode_payload(flags, payload)
+
+
+def write_frame(obj: Any, stream: BinaryIO) -> int:
+    """Write obj as one frame. Returns the frame size in bytes."""
+    frame = encode_frame(obj)
+    stream.write(frame)
+    return len(frame)
+
+
+# ---------------------------------------------------------------------------
+# run_scrape output
+# ---------------------------------------------------------------------------
+
+def output_payload(output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The run_scrape output envelope with 'results' as a table:
+    {"fields": [...], "rows": [[...], ...]}.
+    """
+    payload = dict(output)
+    rows = []
+    for result in output.get('results', []):
+        if isinstance(result, ScraperResult):
+            rows.append(result_values(result))
+        else:
+            rows.append(tuple(result.get(field) for field in RESULT_FIELDS))
+    payload['results'] = {'fields': RESULT_FIELDS, 'rows': rows}
+    return payload
+
+
+def results_from_table(table: Dict[str, Any]) -> list:
+    """Rebuild result dicts from an output_payload() results table."""
+    fields = table['fields']
+    return [dict(zip(fields, row)) for row in table['rows']]
+
+
+def write_output_frame(output: Dict[str, Any], stream: BinaryIO) -> int:
+    """Write the run_scrape output envelope as one frame."""
+    return write_frame(output_payload(output), stream)
@@ -0,0 +1,393 @@
+"""
+Price History Store
+
+Records every observed price in a compact, append-only local store and
+reports only the rows whose price changed.
+
+Layout of a history directory:
+
+    keys.tsv      append-only key table: key_id, store_id, product_key
+    log.bin       log id, then append-only (key_id, epoch, cents) structs
+    history.col   compacted columnar segment: key_id[], epoch[], cents[],
+                  ordered by (key_id, epoch)
+    history.lock  flock()ed to read (shared) or write (exclusive) the above
+
+Products are keyed by (store_id, product_key) where product_key is the
+SKU when one is known and the product URL otherwise. Prices are integer
+cents and timestamps are integer epoch seconds.
+
+Compaction merges the log into the columnar segment, keeping only the
+observations where a product's price changed plus its latest observation.
+It runs automatically once the log grows past compact_threshold rows.
+The segment records the log id and row count it folded in, so if the
+process dies after the segment is replaced but before a fresh log is
+started, those rows are skipped rather than replayed a second time.
+
+Several processes may share a directory (the Node bridge runs one
+run_scrape per request). Each keeps the history in memory and, under the
+lock, first loads what the others appended since: new keys, new log rows,
+or, when the log id changed because another process compacted, the whole
+segment. Key ids are handed out under the exclusive lock, so they stay
+unique across processes.
+
+In memory, each product's observations are kept in epoch order, so
+price_range() and changed_since() binary-search a product's series
+instead of scanning every observation.
+"""
+
+import fcntl
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .base import ScraperResult
+from .index import parse_identifiers
+
+logger = logging.getLogger(__name__)
+
+# One observation in log.bin
+_RECORD = struct.Struct('<Iqq')
+
+# Columnar segment header: magic, row count, then the id of the log it
+# folded in and how many of that log's rows
+_SEGMENT_MAGIC = b'PHC2'
+_SEGMENT_HEADER = struct.Struct('<4sIQQ')
+
+# log.bin header: magic, log id
+_LOG_MAGIC = b'PHL1'
+_LOG_HEADER = struct.Struct('<4sQ')
+
+DEFAULT_COMPACT_THRESHOLD = 50000
+
+
+class PriceChange(NamedTuple):
+    """A product whose price differs from its last known price."""
+    store_id: str
+    product_key: str
+    old_cents: Optional[int]   # None for a product seen for the first time
+    new_cents: int
+    epoch: int
+
+
+def product_key(result: ScraperResult) -> str:
+    """History key for a result: its SKU when known, else its product URL."""
+    sku = parse_identifiers(result.notes)['sku']
+    return f"sku:{sku}" if sku else result.product_url
+
+
+class PriceHistory:
+    """
+    Append-only price history for scraped products.
+
+    Safe to share between threads; multiple processes may record into
+    the same directory.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._lock_fd = os.open(self._file('history.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+
+        self._keys: Dict[Tuple[str, str], int] = {}
+        self._key_names: List[Tuple[str, str]] = []
+        # Bytes of keys.tsv loaded so far
+        self._keys_offset = 0
+        # key_id -> (epochs, cents) of its observations, in epoch order
+        self._series: Dict[int, Tuple[array, array]] = {}
+        self._rows = 0
+        # Log loaded so far: its id, bytes read and records in them
+        self._log_id = None
+        self._log_offset = 0
+        self._log_rows = 0
+
+        with self._lock, self._locked(fcntl.LOCK_EX):
+            if not os.path.exists(self._file('log.bin')):
+                self._new_log()
+            self._sync()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self, operation: int):
+        """
+        Hold history.lock: shared to read the files, exclusive to append
+        to or replace them. Taken after self._lock.
+        """
+        fcntl.flock(self._lock_fd, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """Load what other processes have written since the last sync."""
+        self._load_keys()
+        with open(self._file('log.bin'), 'rb') as f:
+            header = f.read(_LOG_HEADER.size)
+        if header[:4] != _LOG_MAGIC:
+            raise ValueError(f"Not a price history log: {self._file('log.bin')}")
+        _, log_id = _LOG_HEADER.unpack(header)
+        if log_id == self._log_id:
+            self._load_log()
+        else:
+            # First load, or another process compacted: start from the segment
+            self._load_segment(log_id)
+
+    def _load_keys(self) -> None:
+        try:
+            with open(self._file('keys.tsv'), 'rb') as f:
+                f.seek(self._keys_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A line without its newline is a writer's torn append
+        complete = data.rfind(b'\n') + 1
+        for line in data[:complete].decode('utf-8').splitlines():
+            key_id, store_id, key = line.split('\t')
+            self._keys[(store_id, key)] = int(key_id)
+            self._key_names.append((store_id, key))
+        self._keys_offset += complete
+
+    def _load_segment(self, log_id: int) -> None:
+        """Reload every observation: the segment, then log log_id."""
+        self._series = {}
+        self._rows = 0
+        # Rows of which log the segment already holds
+        folded_log, folded_rows = None, 0
+        segment = self._file('history.col')
+        if os.path.exists(segment):
+            with open(segment, 'rb') as f:
+                header = f.read(_SEGMENT_HEADER.size)
+                if header[:4] != _SEGMENT_MAGIC:
+                    raise ValueError(f"Not a price history segment: {segment}")
+                _, count, folded_log, folded_rows = _SEGMENT_HEADER.unpack(header)
+                key_ids, epochs, cents = array('I'), array('q'), array('q')
+                key_ids.fromfile(f, count)
+                epochs.fromfile(f, count)
+                cents.fromfile(f, count)
+            for key_id, epoch, price in zip(key_ids, epochs, cents):
+                self._add(key_id, epoch, price)
+
+        self._log_id = log_id
+        self._log_offset = _LOG_HEADER.size
+        self._log_rows = 0
+        if folded_log == log_id:
+            # Compaction finished but the old log survived it
+            self._log_offset += folded_rows * _RECORD.size
+            self._log_rows = folded_rows
+        self._load_log()
+
+    def _load_log(self) -> None:
+        with open(self._file('log.bin'), 'rb') as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # A partial record is a writer's torn append
+        usable = len(data) - len(data) % _RECORD.size
+        for key_id, epoch, cents in _RECORD.iter_unpack(data[:usable]):
+            self._log_rows += 1
+            if key_id < len(self._key_names):
+                self._add(key_id, epoch, cents)
+        self._log_offset += usable
+
+    def _append(self, name: str, offset: int, data: bytes) -> int:
+        """
+        Write data at offset, the end of the last complete entry in the
+        file, dropping any torn append a crashed writer left past it.
+        Returns the new end. Call with the exclusive lock held.
+        """
+        fd = os.open(self._file(name), os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, offset)
+            os.lseek(fd, offset, os.SEEK_SET)
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+        finally:
+            os.close(fd)
+        return offset + len(data)
+
+    def _new_log(self) -> int:
+        """Replace log.bin with an empty log under a fresh id, and return the id."""
+        log_id = time.time_ns()
+        tmp = self._file('log.bin.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_LOG_HEADER.pack(_LOG_MAGIC, log_id))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file('log.bin'))
+        return log_id
+
+    def _add(self, key_id: int, epoch: int, cents: int) -> None:
+        """Add an observation to its product's series, after any at the same epoch."""
+        series = self._series.get(key_id)
+        if series is None:
+            series = self._series[key_id] = (array('q'), array('q'))
+        epochs, prices = series
+        if not epochs or epoch >= epochs[-1]:
+            epochs.append(epoch)
+            prices.append(cents)
+        else:
+            position = bisect_right(epochs, epoch)
+            epochs.insert(position, epoch)
+            prices.insert(position, cents)
+        self._rows += 1
+
+    def _last(self, key_id: int) -> Optional[Tuple[int, int]]:
+        """(epoch, cents) of a product's latest observation."""
+        series = self._series.get(key_id)
+        return (series[0][-1], series[1][-1]) if series else None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def _key_id(self, store_id: str, key: str, new_keys: List[str]) -> int:
+        key_tuple = (store_id, key)
+        key_id = self._keys.get(key_tuple)
+        if key_id is None:
+            key_id = len(self._key_names)
+            self._keys[key_tuple] = key_id
+            self._key_names.append(key_tuple)
+            new_keys.append(f"{key_id}\t{store_id}\t{key}\n")
+        return key_id
+
+    def record(self, results: Iterable[ScraperResult]) -> List[PriceChange]:
+        """
+        Append an observation for every priced result.
+        Returns only the results whose price changed (or are new).
+        """
+        changes = []
+        new_keys: List[str] = []
+        rows = bytearray()
+        with self._lock, self._locked(fcntl.LOCK_EX):
+            # Key ids and last prices must include other processes' writes
+            self._sync()
+            for result in results:
+                if result.price_cents is None or not result.product_url:
+                    continue
+                key = product_key(result)
+                key_id = self._key_id(result.store_id, key, new_keys)
+                epoch = int(result.collected_at)
+                cents = result.price_cents
+
+                last = self._last(key_id)
+                if last is None or last[1] != cents:
+                    changes.append(PriceChange(
+                        result.store_id, key, last[1] if last else None, cents, epoch
+                    ))
+
+                rows += _RECORD.pack(key_id, epoch, cents)
+                self._add(key_id, epoch, cents)
+                self._log_rows += 1
+
+            # Keys first, so a reader never sees a row for an unknown key
+            if new_keys:
+                self._keys_offset = self._append('keys.tsv', self._keys_offset, ''.join(new_keys).encode('utf-8'))
+            if rows:
+                self._log_offset = self._append('log.bin', self._log_offset, bytes(rows))
+
+            if self._log_rows >= self.compact_threshold:
+                self._compact()
+        return changes
+
+    def last_price(self, store_id: str, key: str) -> Optional[Tuple[int, int]]:
+        """Last known (cents, epoch) for a product, or None."""
+        with self._lock, self._locked(fcntl.LOCK_SH):
+            self._sync()
+            key_id = self._keys.get((store_id, key))
+            last = self._last(key_id) if key_id is not None else None
+        return (last[1], last[0]) if last else None
+
+    def changed_since(self, since: float) -> List[PriceChange]:
+        """Every price change observed at or after `since`, oldest first."""
+        since = int(since)
+        changes = []
+        with self._lock, self._locked(fcntl.LOCK_SH):
+            self._sync()
+            for key_id, (epochs, prices) in self._series.items():
+                if epochs[-1] < since:
+                    continue
+                i = bisect_left(epochs, since)
+                old = prices[i - 1] if i else None
+                store_id, key = self._key_names[key_id]
+                for epoch, cents in zip(epochs[i:], prices[i:]):
+                    if cents != old:
+                        changes.append(PriceChange(store_id, key, old, cents, epoch))
+                    old = cents
+        changes.sort(key=lambda c: c.epoch)
+        return changes
+
+    def price_range(
+        self,
+        store_id: str,
+        key: str,
+        start: float,
+        end: float = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        (min, max) cents for a product over [start, end], including the
+        price already in effect at `start`. None if nothing is known.
+        """
+        end = time.time() if end is None else end
+        with self._lock, self._locked(fcntl.LOCK_SH):
+            self._sync()
+            key_id = self._keys.get((store_id, key))
+            series = self._series.get(key_id) if key_id is not None else None
+            if series is None:
+                return None
+            epochs, prices = series
+            # The last observation before start is still in effect at it
+            first = max(0, bisect_left(epochs, start) - 1)
+            last = bisect_right(epochs, end)
+            window = prices[first:last]
+        return (min(window), max(window)) if window else None
+
+    def compact(self) -> None:
+        """Merge the log into the columnar segment."""
+        with self._lock, self._locked(fcntl.LOCK_EX):
+            self._sync()
+            self._compact()
+
+    def _compact(self) -> None:
+        count = self._rows
+        key_ids, epochs, cents = array('I'), array('q'), array('q')
+        for key_id in sorted(self._series):
+            series_epochs, series_prices = self._series[key_id]
+            kept_epochs, kept_prices = array('q'), array('q')
+            for position, (epoch, price) in enumerate(zip(series_epochs, series_prices)):
+                is_last = position + 1 == len(series_epochs)
+                if not kept_prices or kept_prices[-1] != price or is_last:
+                    kept_epochs.append(epoch)
+                    kept_prices.append(price)
+            key_ids.extend([key_id] * len(kept_epochs))
+            epochs.extend(kept_epochs)
+            cents.extend(kept_prices)
+            self._series[key_id] = (kept_epochs, kept_prices)
+
+        tmp = self._file('history.col.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_SEGMENT_HEADER.pack(_SEGMENT_MAGIC, len(key_ids), self._log_id, self._log_rows))
+            key_ids.tofile(f)
+            epochs.tofile(f)
+            cents.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file('history.col'))
+
+        # Segment is durable; the log can start over under a new id
+        self._log_id = self._new_log()
+        self._log_offset = _LOG_HEADER.size
+        self._log_rows = 0
+        self._rows = len(key_ids)
+        logger.info("Compacted price history: %s rows -> %s", count, len(key_ids))
@@ -6,8 +6,10 @@ Uses requests + BeautifulSoup for standard HTTP scraping.
 """
 
 import logging
-from typing import List
-from .base import BaseScraper, ScraperResult
+from typing import Any, Dict, List
+from .base import BaseScraper, ScraperResult, NO_PRICE, MAX_CANDIDATES
+from .api import ApiSchemaError, dig, number, products_list
+from .enrich import model_number, stock_from_text
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,16 @@ class HomeDepotScraper(BaseScraper):
     though some dynamic content may require Playwright.
     """
 
+    NEXT_PAGE_SELECTORS = [
+        '.hd-pagination__link[aria-label="Next"]',
+        '[class*="pagination"] a[aria-label*="next" i]',
+    ] + BaseScraper.NEXT_PAGE_SELECTORS
+
+    # No public GET endpoint: the site's search is a GraphQL POST, so source
+    # 'api' needs the store's "api_url_template" (e.g. a proxy returning the
+    # searchModel payload)
+    API_SEARCH_URL = ''
+
     def __init__(self, source: str = 'requests'):
         super().__init__(source=source)
 
@@ -56,15 +68,15 @@ class HomeDepotScraper(BaseScraper):
         for selector in product_selectors:
             products = soup.select(selector)
             if products:
-                logger.info(f"Found {len(products)} products with selector: {selector}")
+                logger.info("Found %s products with selector: %s", len(products), selector)
                 break
 
         if not products:
             # Fallback: look for any product-like containers
             products = soup.select('[class*="product"]')[:5]
-            logger.info(f"Fallback: found {len(products)} product-like elements")
+            logger.info("Fallback: found %s product-like elements", len(products))
 
-        for product in products[:3]:
+        for product in products[:MAX_CANDIDATES]:
             try:
                 # Extract title
                 title = None
@@ -85,7 +97,7 @@ class HomeDepotScraper(BaseScraper):
                     continue
 
                 # Extract price
-                price = "not available"
+                price = NO_PRICE
                 price_selectors = [
                     '[data-testid="product-pod-price"]',
                     '.price-format__main-price',
@@ -96,8 +108,8 @@ class HomeDepotScraper(BaseScraper):
                     elem = product.select_one(sel)
                     if elem:
                         price_text = elem.get_text(strip=True)
-                        parsed = self.parse_price(price_text)
-                        if parsed != "not available":
+                        parsed = self.parse_price_info(price_text)
+                        if parsed.cents is not None:
                             price = parsed
                             break
 
@@ -116,23 +128,102 @@ class HomeDepotScraper(BaseScraper):
                 model_elem = product.select_one('[class*="model"]')
                 if model_elem:
                     model = model_elem.get_text(strip=True)
+                model_id = model_number(model)
 
                 results.append(ScraperResult(
                     store_id=store_id,
                     store_name=store_name,
                     item_name=title,
-                    price=price,
+                    price_cents=price.cents,
+                    price_unit=price.per_unit,
                     unit="each",
                     product_url=product_url,
-                    notes=f"Model: {model}" if model else ""
+                    notes=f"Model: {model}" if model else "",
+                    sponsored=self.is_sponsored(product),
+                    details={'model': model_id} if model_id else None
                 ))
 
             except Exception as e:
-                logger.debug(f"Error parsing Home Depot product: {e}")
+                logger.debug("Error parsing Home Depot product: %s", e)
                 continue
 
         return results
 
+    def parse_api_results(
+        self,
+        payload: Any,
+        store_id: str,
+        store_name: str,
+        api_url: str,
+        query: str
+    ) -> List[ScraperResult]:
+        """Map Home Depot's searchModel payload (data.searchModel.products)."""
+        results = []
+        for product in products_list(payload, ('data', 'searchModel', 'products'))[:MAX_CANDIDATES]:
+            identifiers = product.get('identifiers')
+            pricing = product.get('pricing')
+            if not isinstance(identifiers, dict) or not isinstance(pricing, dict):
+                raise ApiSchemaError("searchModel product without identifiers or pricing")
+            label = identifiers.get('productLabel') or ''
+            brand = identifiers.get('brandName') or ''
+            if not label:
+                continue
+            title = label if not brand or label.startswith(brand) else f"{brand} {label}"
+
+            value = number(pricing.get('value'))
+            unit = pricing.get('unitOfMeasure') or ''
+            details = {}
+            if identifiers.get('modelNumber'):
+                details['model'] = str(identifiers['modelNumber'])
+            rating = number(dig(product, 'reviews', 'ratingsReviews', 'averageRating'))
+            reviews = number(dig(product, 'reviews', 'ratingsReviews', 'totalReviews'), int)
+            if rating is not None:
+                details['rating'] = rating
+            if reviews is not None:
+                details['review_count'] = reviews
+            pickup = [o for o in dig(product, 'fulfillment', 'fulfillmentOptions', default=[]) or []
+                      if isinstance(o, dict) and o.get('type') == 'pickup']
+            if pickup:
+                details['in_stock'] = bool(pickup[0].get('fulfillable'))
+
+            url = identifiers.get('canonicalUrl') or ''
+            results.append(ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=title[:150],
+                price_cents=int(round(value * 100)) if value is not None else None,
+                price_unit=unit if unit != 'each' else "",
+                unit="each",
+                product_url=f"https://www.homedepot.com{url}" if url.startswith('/') else (url or api_url),
+                notes=f"Model: {details['model']}" if 'model' in details else "",
+                sponsored=bool(dig(product, 'info', 'isSponsored')),
+                details=details or None
+            ))
+        return results
+
+    def parse_product_details(self, soup) -> Dict[str, Any]:
+        """
+        Parse a Home Depot product page: schema.org data, plus the model
+        number and the local store's fulfillment tile when it's missing.
+        """
+        details = super().parse_product_details(soup)
+
+        if 'model' not in details:
+            model_elem = soup.select_one('[class*="product-identifier--model"], [class*="model"]')
+            if model_elem and model_number(model_elem.get_text(strip=True)):
+                details['model'] = model_number(model_elem.get_text(strip=True))
+
+        store_elem = soup.select_one(
+            '[data-testid="fulfillment-store"], [class*="fulfillment__store"], [class*="store-availability"]'
+        )
+        if store_elem:
+            text = store_elem.get_text(' ', strip=True)
+            details['store_availability'] = text[:120]
+            if 'in_stock' not in details and stock_from_text(text) is not None:
+                details['in_stock'] = stock_from_text(text)
+
+        return details
+
     def parse_results_playwright(
         self,
         soup,
@@ -0,0 +1,183 @@
+"""
+HTTP/2 Transport
+
+Optional HTTP/2 client for the shared HttpSession, built on httpx (with
+its h2 extra). Over HTTP/1.1 every concurrent request to a store needs a
+connection of its own; over HTTP/2 a batch of searches against one store
+is multiplexed as streams over a single connection, negotiated with ALPN.
+
+- Responses come back as requests.Response objects and errors as
+  requests exceptions, so HttpSession, its cache and the scrapers don't
+  change with the transport.
+- Bodies compressed with brotli or zstd are accepted when the decoder
+  libraries (brotli/brotlicffi, zstandard) are installed.
+- A host whose HTTP/2 exchange fails at the protocol level is sent back
+  to the requests (HTTP/1.1) session for the rest of the process.
+
+Enable with --http2 or SCRAPER_HTTP2=1. Without httpx and h2 installed
+the requests session is used throughout.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Set
+
+from .ratelimit import host_of
+from .transport import create_ssl_context
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx only offers HTTP/2 when h2 is installed
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+else:
+    # httpx logs every request at INFO; the scrapers already log their fetches
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+def _importable(*modules: str) -> bool:
+    for module in modules:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def http2_available() -> bool:
+    """Whether httpx and h2 are installed."""
+    return httpx is not None
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding for the HTTP/2 client: gzip and deflate, plus br and zstd where decodable."""
+    codings = ['gzip', 'deflate']
+    if _importable('brotli', 'brotlicffi'):
+        codings.append('br')
+    if _importable('zstandard'):
+        codings.append('zstd')
+    return ', '.join(codings)
+
+
+def requests_accept_encoding() -> str:
+    """Accept-Encoding for the requests session: what urllib3 can decode here."""
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return ', '.join(ACCEPT_ENCODING.split(','))
+
+
+def _ca_file() -> str:
+    """The CA bundle requests would verify against (honours REQUESTS_CA_BUNDLE)."""
+    import requests.certs
+
+    return os.environ.get('REQUESTS_CA_BUNDLE') or os.environ.get('CURL_CA_BUNDLE') or requests.certs.where()
+
+
+def _to_requests_response(response, request_url: str):
+    """Copy an httpx response into a requests.Response."""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    result = requests.Response()
+    result.status_code = response.status_code
+    result.reason = response.reason_phrase
+    result.headers = CaseInsensitiveDict(response.headers.items())
+    result._content = response.content
+    result.encoding = response.charset_encoding
+    result.url = str(response.url) or request_url
+    result.http_version = response.http_version
+    return result
+
+
+def _to_requests_error(error: Exception, url: str) -> Exception:
+    """The requests exception matching an httpx one."""
+    import requests
+
+    if isinstance(error, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(f"Connection to {url} timed out: {error}")
+    if isinstance(error, httpx.TimeoutException):
+        return requests.ReadTimeout(f"Read from {url} timed out: {error}")
+    if isinstance(error, httpx.TooManyRedirects):
+        return requests.TooManyRedirects(str(error))
+    if isinstance(error, httpx.InvalidURL):
+        return requests.exceptions.InvalidURL(str(error))
+    return requests.ConnectionError(f"HTTP/2 request to {url} failed: {error}")
+
+
+class Http2Client:
+    """
+    httpx client negotiating HTTP/2 per host, with a requests session to
+    fall back on. Safe to share between threads; concurrent requests to
+    one host share its connection.
+    """
+
+    def __init__(self, fallback):
+        if httpx is None:
+            raise RuntimeError("HTTP/2 transport needs httpx and h2: pip install 'httpx[http2]'")
+        self.fallback = fallback
+        self.accept_encoding = accept_encoding()
+        self._context = create_ssl_context()
+        self._context.load_ca_file(_ca_file())
+        self._client = httpx.Client(http2=True, verify=self._context)
+        self._lock = threading.Lock()
+        self.http1_hosts: Set[str] = set()
+        self.responses: Dict[str, int] = {}
+
+    def request(self, method: str, url: str, headers: Dict[str, str], timeout: float,
+                allow_redirects: bool = True):
+        """Send a request; returns a requests.Response, raises requests exceptions."""
+        host = host_of(url)
+        if host in self.http1_hosts:
+            return self._fall_back(method, url, headers, timeout, allow_redirects)
+        try:
+            response = self._client.request(method, url, headers=headers, timeout=timeout,
+                                            follow_redirects=allow_redirects)
+        except (httpx.RemoteProtocolError, httpx.LocalProtocolError) as e:
+            logger.warning("HTTP/2 exchange with %s failed (%s), using HTTP/1.1 from now on", host, e)
+            with self._lock:
+                self.http1_hosts.add(host)
+            return self._fall_back(method, url, headers, timeout, allow_redirects)
+        except httpx.HTTPError as e:
+            raise _to_requests_error(e, url) from e
+
+        self._count(response.http_version)
+        return _to_requests_response(response, url)
+
+    def _fall_back(self, method: str, url: str, headers: Dict[str, str], timeout: float,
+                   allow_redirects: bool):
+        # urllib3 may not decode everything httpx does (zstd)
+        headers = dict(headers, **{'Accept-Encoding': requests_accept_encoding()})
+        response = self.fallback.request(method, url, headers=headers, timeout=timeout,
+                                         allow_redirects=allow_redirects)
+        self._count('HTTP/1.1')
+        return response
+
+    def _count(self, version: str) -> None:
+        with self._lock:
+            self.responses[version] = self.responses.get(version, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Responses received so far per HTTP version ('HTTP/2', 'HTTP/1.1')."""
+        with self._lock:
+            return dict(self.responses)
+
+    def drop_connections(self) -> None:
+        """Close open connections; the next request to each host connects again."""
+        with self._lock:
+            client, self._client = self._client, httpx.Client(http2=True, verify=self._context)
+        client.close()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_client(fallback) -> Optional[Http2Client]:
+    """An Http2Client over fallback, or None (with a warning) if httpx/h2 aren't installed."""
+    if not http2_available():
+        logger.warning("HTTP/2 requested but httpx/h2 are not installed; using HTTP/1.1")
+        return None
+    return Http2Client(fallback)
@@ -0,0 +1,208 @@
+"""
+Local Product Index
+
+Persists scraped results into a SQLite database with an FTS5 full-text
+index so repeat queries can be answered without scraping.
+
+Each product is keyed by (store_id, product_url); re-indexing a product
+replaces its previous row. SKU and model numbers are parsed out of the
+result notes ("SKU: 6501234", "Model: Model# DCD771C2") and indexed
+alongside the item name.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .base import ScraperResult
+from .query import query_tokens
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    store_id TEXT NOT NULL,
+    store_name TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    price_cents INTEGER,
+    currency TEXT NOT NULL DEFAULT 'USD',
+    unit TEXT NOT NULL DEFAULT 'each',
+    product_url TEXT NOT NULL,
+    sku TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    collected_at REAL NOT NULL,
+    UNIQUE (store_id, product_url)
+);
+CREATE INDEX IF NOT EXISTS products_store_time ON products (store_id, collected_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5 (
+    item_name, sku, model, tokenize = 'porter unicode61'
+);
+"""
+
+_SKU_RE = re.compile(r'\bSKU:\s*([A-Za-z0-9-]+)', re.IGNORECASE)
+_MODEL_RE = re.compile(r'\bModel:\s*(?:Model\s*#\s*)?([A-Za-z0-9][A-Za-z0-9-]*)', re.IGNORECASE)
+_TOKEN_RE = re.compile(r'[0-9A-Za-z]+')
+
+# Default freshness cutoff for lookups (seconds)
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+
+def parse_identifiers(notes: str) -> Dict[str, str]:
+    """Extract SKU and model number from a result's notes."""
+    sku = _SKU_RE.search(notes or '')
+    model = _MODEL_RE.search(notes or '')
+    return {
+        'sku': sku.group(1) if sku else '',
+        'model': model.group(1) if model else '',
+    }
+
+
+def _match_expression(query: str) -> str:
+    """
+    Build an FTS5 MATCH expression requiring every canonical query token
+    (prefix match), so stopwords and plurals don't cause misses.
+    """
+    tokens = [t for t in query_tokens(query) if _TOKEN_RE.fullmatch(t)]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+class ProductIndex:
+    """
+    SQLite FTS index of scraped products.
+
+    Safe to share between threads; writes are serialized.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add(self, results: Iterable[ScraperResult]) -> int:
+        """
+        Index results that carry a real product (a parsed price).
+        Returns the number of rows written.
+        """
+        written = 0
+        with self._lock, self._conn:
+            for result in results:
+                if result.price_cents is None or not result.product_url:
+                    continue
+                ids = parse_identifiers(result.notes)
+                row = self._conn.execute(
+                    'SELECT id FROM products WHERE store_id = ? AND product_url = ?',
+                    (result.store_id, result.product_url)
+                ).fetchone()
+                if row:
+                    self._conn.execute('DELETE FROM products_fts WHERE rowid = ?', (row[0],))
+                cursor = self._conn.execute(
+                    '''
+                    INSERT INTO products (store_id, store_name, item_name, price_cents, currency,
+                                          unit, product_url, sku, model, notes, collected_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (store_id, product_url) DO UPDATE SET
+                        store_name = excluded.store_name,
+                        item_name = excluded.item_name,
+                        price_cents = excluded.price_cents,
+                        currency = excluded.currency,
+                        unit = excluded.unit,
+                        sku = excluded.sku,
+                        model = excluded.model,
+                        notes = excluded.notes,
+                        collected_at = excluded.collected_at
+                    RETURNING id
+                    ''',
+                    (result.store_id, result.store_name, result.item_name, result.price_cents,
+                     result.currency, result.unit, result.product_url, ids['sku'], ids['model'],
+                     result.notes, result.collected_at)
+                )
+                product_id = cursor.fetchone()[0]
+                self._conn.execute(
+                    'INSERT INTO products_fts (rowid, item_name, sku, model) VALUES (?, ?, ?, ?)',
+                    (product_id, result.item_name, ids['sku'], ids['model'])
+                )
+                written += 1
+        return written
+
+    def search(
+        self,
+        query: str,
+        store_ids: Optional[Sequence[str]] = None,
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        limit: int = 10
+    ) -> List[ScraperResult]:
+        """
+        Return indexed products matching every query token, best match first.
+
+        Args:
+            query: Search query
+            store_ids: Restrict to these stores
+            max_age: Ignore products collected more than max_age seconds ago
+            limit: Maximum results
+        """
+        expression = _match_expression(query)
+        if not expression:
+            return []
+
+        sql = '''
+            SELECT p.store_id, p.store_name, p.item_name, p.price_cents, p.currency,
+                   p.unit, p.product_url, p.notes, p.collected_at
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+        '''
+        params: list = [expression]
+        if store_ids:
+            sql += f" AND p.store_id IN ({','.join('?' * len(store_ids))})"
+            params.extend(store_ids)
+        if max_age is not None:
+            sql += ' AND p.collected_at >= ?'
+            params.append(time.time() - max_age)
+        sql += ' ORDER BY bm25(products_fts, 10.0, 5.0, 5.0), p.collected_at DESC LIMIT ?'
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=item_name,
+                price_cents=price_cents,
+                currency=currency,
+                unit=unit,
+                product_url=product_url,
+                notes=notes,
+                collected_at=collected_at
+            )
+            for (store_id, store_name, item_name, price_cents, currency,
+                 unit, product_url, notes, collected_at) in rows
+        ]
+
+    def lookup(
+        self,
+        query: str,
+        store_ids: Sequence[str],
+        max_age: Optional[float] = DEFAULT_MAX_AGE,
+        per_store: int = 1
+    ) -> Dict[str, List[ScraperResult]]:
+        """
+        Answer a query per store from the index.
+        Stores without a fresh enough match are absent from the result.
+        """
+        answers = {}
+        for store_id in store_ids:
+            hits = self.search(query, [store_id], max_age=max_age, limit=per_store)
+            if hits:
+                answers[store_id] = hits
+        return answers
@@ -0,0 +1,282 @@
+"""
+Shared Job Queue
+
+SQLite stand-in for a job queue between front ends and scrape workers on
+several machines (any host that can open the database file). Jobs are
+queued as one task per store host, and workers claim only the tasks whose
+host they own by the same rendezvous assignment as scrapers.shard, so a
+host's requests keep going to one machine's warm connections.
+
+Workers heartbeat while they run. A worker whose heartbeat is older than
+the lease drops out of the assignment: its hosts move to the remaining
+workers, which also take over the tasks it had claimed but not finished.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import CANCELLED_NOTES, ScraperResult
+from .cancel import bind, current_token
+from .shard import Job, failed_results, group_jobs, owner
+
+logger = logging.getLogger(__name__)
+
+# Seconds without a heartbeat before a worker's hosts and claims move
+DEFAULT_LEASE = 15
+
+# Seconds between polls of the task table
+POLL_INTERVAL = 0.1
+
+# Finished tasks nobody collected, and workers gone this long, are pruned
+TASK_RETENTION = 10 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard TEXT NOT NULL,
+    jobs TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker_id TEXT,
+    claimed_at REAL,
+    result TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+"""
+
+
+class JobQueue:
+    """
+    Task table shared by front ends (run, stats) and workers (heartbeat,
+    claim, complete).
+
+    Safe to share between threads; multiple processes and hosts may open
+    the same database file.
+    """
+
+    def __init__(self, path: str, lease: float = DEFAULT_LEASE):
+        self.path = path
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- workers --
+
+    def heartbeat(self, worker_id: str) -> None:
+        """Register worker_id as alive."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO workers (worker_id, heartbeat) VALUES (?, ?)',
+                (worker_id, time.time())
+            )
+
+    def leave(self, worker_id: str) -> None:
+        """Deregister worker_id, releasing its unfinished claims."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+            self._conn.execute(
+                "UPDATE tasks SET status = 'queued', worker_id = NULL WHERE status = 'claimed' AND worker_id = ?",
+                (worker_id,)
+            )
+            self._conn.execute('COMMIT')
+
+    def _live_workers(self, now: float) -> List[str]:
+        rows = self._conn.execute(
+            'SELECT worker_id FROM workers WHERE heartbeat > ? ORDER BY worker_id', (now - self.lease,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[Tuple[int, List[Job]]]:
+        """
+        Claim up to limit tasks for hosts worker_id owns, including tasks
+        claimed by workers that have since stopped heartbeating.
+        Returns [(task id, jobs)].
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                live = self._live_workers(now)
+                rows = self._conn.execute(
+                    "SELECT id, shard, jobs, status, worker_id FROM tasks "
+                    "WHERE status IN ('queued', 'claimed') ORDER BY id"
+                ).fetchall()
+                for task_id, shard, jobs, status, holder in rows:
+                    if status == 'claimed' and holder in live:
+                        continue
+                    if owner(shard, live) != worker_id:
+                        continue
+                    self._conn.execute(
+                        "UPDATE tasks SET status = 'claimed', worker_id = ?, claimed_at = ? WHERE id = ?",
+                        (worker_id, now, task_id)
+                    )
+                    claimed.append((task_id, [tuple(job) for job in json.loads(jobs)]))
+                    if len(claimed) >= limit:
+                        break
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+        return claimed
+
+    def complete(self, task_id: int, job_results: List[List[ScraperResult]], errors: List[str]) -> None:
+        """Store a claimed task's results."""
+        payload = json.dumps({
+            'results': [[r.to_state() for r in results] for results in job_results],
+            'errors': errors,
+        })
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = 'done', result = ? WHERE id = ?", (payload, task_id)
+            )
+
+    # -- front ends --
+
+    def run(self, jobs: Sequence[Job], timeout: float = 120) -> Tuple[List[List[ScraperResult]], List[str]]:
+        """
+        Queue (store, query) jobs, one task per host, and wait for workers
+        to finish them. Returns (one result list per job, in job order;
+        errors). Tasks nobody finished within timeout, or before the
+        current CancelToken was cancelled, get placeholder results.
+        """
+        now = time.time()
+        pending: Dict[int, List[int]] = {}
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for shard, indexes in group_jobs(jobs).items():
+                cursor = self._conn.execute(
+                    'INSERT INTO tasks (shard, jobs, created_at) VALUES (?, ?, ?)',
+                    (shard, json.dumps([jobs[i] for i in indexes]), now)
+                )
+                pending[cursor.lastrowid] = indexes
+            self._conn.execute('COMMIT')
+
+        job_results: List[List[ScraperResult]] = [[] for _ in jobs]
+        errors: List[str] = []
+        token = current_token()
+        deadline = time.monotonic() + timeout
+        while pending and time.monotonic() < deadline:
+            if token.wait(POLL_INTERVAL):
+                break
+            marks = ','.join('?' * len(pending))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, result FROM tasks WHERE status = 'done' AND id IN ({marks})",
+                    list(pending)
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        f"DELETE FROM tasks WHERE id IN ({','.join('?' * len(rows))})",
+                        [task_id for task_id, _ in rows]
+                    )
+            for task_id, result in rows:
+                data = json.loads(result)
+                for i, states in zip(pending.pop(task_id), data['results']):
+                    job_results[i] = [ScraperResult.from_state(state) for state in states]
+                errors.extend(data['errors'])
+
+        if pending:
+            if token.cancelled:
+                notes = CANCELLED_NOTES
+            else:
+                notes = "Scraping timed out"
+                logger.warning("%s queued tasks not finished within %ss", len(pending), timeout)
+            # Unclaimed tasks are dropped; a worker finishing a claimed one stores into nothing
+            marks = ','.join('?' * len(pending))
+            with self._lock:
+                self._conn.execute(f'DELETE FROM tasks WHERE id IN ({marks})', list(pending))
+            for indexes in pending.values():
+                for i, results in zip(indexes, failed_results([jobs[i] for i in indexes], notes)):
+                    job_results[i] = results
+        return job_results, errors
+
+    def stats(self) -> List[Dict]:
+        """Per live worker: hosts' tasks waiting on it (queue_depth) and claimed."""
+        now = time.time()
+        with self._lock:
+            live = self._live_workers(now)
+            rows = self._conn.execute(
+                "SELECT shard, status, worker_id FROM tasks WHERE status IN ('queued', 'claimed')"
+            ).fetchall()
+        depth = {worker: {'worker': worker, 'queue_depth': 0, 'claimed': 0} for worker in live}
+        for shard, status, holder in rows:
+            worker = holder if status == 'claimed' and holder in depth else owner(shard, live)
+            if worker is None:
+                continue
+            depth[worker]['queue_depth'] += 1
+            if status == 'claimed':
+                depth[worker]['claimed'] += 1
+        return list(depth.values())
+
+    def prune(self) -> None:
+        """Drop finished tasks whose front end went away, and long-gone workers."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM tasks WHERE status = 'done' AND created_at < ?", (now - TASK_RETENTION,)
+            )
+            self._conn.execute('DELETE FROM workers WHERE heartbeat < ?', (now - TASK_RETENTION,))
+
+
+def serve(job_queue: JobQueue, worker_id: str, scrape: Callable,
+          threads: int = 3, stop: Optional[threading.Event] = None) -> None:
+    """
+    Worker loop: heartbeat, claim tasks for owned hosts, scrape them on up
+    to `threads` threads, store the results. Runs until stop is set.
+    Tasks running when the current CancelToken is cancelled are not
+    stored, so they go back on the queue when the worker leaves.
+    """
+    stop = stop or threading.Event()
+    running = threading.BoundedSemaphore(threads)
+
+    def run(task_id: int, jobs: List[Job]) -> None:
+        try:
+            try:
+                job_results, errors = scrape(jobs)
+            except Exception as e:
+                logger.exception("Task %s failed", task_id)
+                job_results, errors = failed_results(jobs, f"Scraping error: {str(e)[:100]}"), []
+            if current_token().cancelled:
+                # Left claimed: leave() re-queues it for another worker
+                return
+            job_queue.complete(task_id, job_results, errors)
+        finally:
+            running.release()
+
+    logger.info("Queue worker %s serving %s", worker_id, job_queue.path)
+    job_queue.prune()
+    last_beat = 0.0
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            while not stop.is_set():
+                if time.monotonic() - last_beat > job_queue.lease / 3:
+                    job_queue.heartbeat(worker_id)
+                    last_beat = time.monotonic()
+                if not running.acquire(timeout=POLL_INTERVAL):
+                    continue
+                tasks = job_queue.claim(worker_id, limit=1)
+                if not tasks:
+                    running.release()
+                    stop.wait(POLL_INTERVAL)
+                    continue
+                pool.submit(bind(run), *tasks[0])
+    finally:
+        job_queue.leave(worker_id)
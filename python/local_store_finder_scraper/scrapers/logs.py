@@ -0,0 +1,222 @@
+"""
+Non-blocking Log Pipeline
+
+Scrapes log from many threads: every search, selector match and failure.
+Writing those to stderr from the scraping thread makes the scrape wait on
+the pipe, and so on the Node bridge draining it. configure_logging()
+changes the root logger so that:
+
+- Records go on an in-memory queue and a listener thread writes them. A
+  slow or stalled stderr only holds up the listener.
+- Messages are formatted on the listener thread, so callers pass %-style
+  arguments (logger.info("Found %d products", n)) rather than f-strings.
+- Each message type (logger and format string) may log a burst, then a
+  steady rate; past that, 1 in SAMPLE records is kept. Kept records say
+  how many similar ones were suppressed. ERROR and above always pass.
+- The queue is capped. At the cap, records are dropped and counted, and a
+  "Dropped N log records" notice follows once there is room again.
+- Records can be written as JSON lines (--log-format json) with the
+  format string as "event", for grouping by message type.
+
+Forked children (parser processes) get a fresh queue and listener.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, Dict, List, Optional, TextIO
+
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records waiting for the listener before new ones are dropped
+DEFAULT_CAPACITY = 10000
+
+# Per message type: records per second, the burst allowed on top, and
+# the 1-in-N share kept once both are used up
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 50
+DEFAULT_SAMPLE = 100
+
+# Message types tracked before the sampler starts over
+MAX_MESSAGE_TYPES = 1024
+
+# Seconds to wait at exit for queued records to be written
+STOP_TIMEOUT = 2.0
+
+
+class Sampler(logging.Filter):
+    """
+    Rate limit per message type: a token bucket of burst records, refilled
+    at rate per second, then sampling 1 in sample. rate <= 0 keeps all.
+    Kept records get a `suppressed` attribute: similar records dropped
+    since the last one kept.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 sample: int = DEFAULT_SAMPLE):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.sample = max(1, sample)
+        # (logger, format string) -> [tokens, last refill, dropped, over budget]
+        self._types: Dict[Any, List[float]] = {}
+        # Reentrant: a signal handler may log while its thread is in here
+        self._lock = threading.RLock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.ERROR:
+            return True
+        msg = record.msg if isinstance(record.msg, str) else type(record.msg)
+        now = time.monotonic()
+        with self._lock:
+            state = self._types.get((record.name, msg))
+            if state is None:
+                if len(self._types) >= MAX_MESSAGE_TYPES:
+                    self._types.clear()
+                state = self._types[(record.name, msg)] = [self.burst, now, 0, 0]
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            if state[0] >= 1:
+                state[0] -= 1
+            else:
+                state[3] += 1
+                if state[3] % self.sample:
+                    state[2] += 1
+                    return False
+            if state[2]:
+                record.suppressed = state[2]
+                state[2] = 0
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: at capacity queued records, records
+    are dropped and counted instead. Records are queued unformatted.
+    """
+
+    def __init__(self, queue: SimpleQueue, capacity: int = DEFAULT_CAPACITY):
+        super().__init__(queue)
+        self.capacity = capacity
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener formats it, in this process
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler's lock, so dropped needs no other
+        if self.queue.qsize() >= self.capacity:
+            self.dropped += 1
+            return
+        if self.dropped:
+            self.queue.put_nowait(logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "Dropped %d log records (queue full)", (self.dropped,), None
+            ))
+            self.dropped = 0
+        self.queue.put_nowait(record)
+
+
+class TextFormatter(logging.Formatter):
+    """The usual text line, noting suppressed similar records."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{line} [{suppressed} similar suppressed]" if suppressed else line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.msg if isinstance(record.msg, str) else None,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    def stop(self, timeout: Optional[float] = STOP_TIMEOUT) -> None:
+        """Write what is queued, for up to timeout seconds."""
+        if self._thread is not None:
+            self.enqueue_sentinel()
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[_Listener] = None
+_state_lock = threading.Lock()
+
+
+def configure_logging(log_format: Optional[str] = None, rate: Optional[float] = None,
+                      level: int = logging.INFO, capacity: int = DEFAULT_CAPACITY,
+                      stream: Optional[TextIO] = None) -> None:
+    """
+    Route the root logger through the queue, sampler and listener, writing
+    to stream (stderr). log_format and rate default to SCRAPER_LOG_FORMAT
+    and SCRAPER_LOG_RATE. Calling it again replaces the previous setup.
+    """
+    global _handler, _listener
+    log_format = log_format or os.environ.get('SCRAPER_LOG_FORMAT') or 'text'
+    if rate is None:
+        rate = float(os.environ.get('SCRAPER_LOG_RATE') or DEFAULT_RATE)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter(TEXT_FORMAT))
+    handler = BoundedQueueHandler(SimpleQueue(), capacity)
+    handler.addFilter(Sampler(rate))
+
+    with _state_lock:
+        stop_logging()
+        root = logging.getLogger()
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+        root.addHandler(handler)
+        root.setLevel(level)
+        _handler = handler
+        _listener = _Listener(handler.queue, output)
+        _listener.start()
+
+
+def stop_logging(timeout: Optional[float] = STOP_TIMEOUT) -> None:
+    """Write out queued records (for up to timeout seconds) and stop the listener."""
+    if _listener is not None:
+        _listener.stop(timeout)
+
+
+def _after_fork() -> None:
+    # The parent's listener thread is gone, and its queue and sampler
+    # locks may have been held mid-fork
+    if _listener is None:
+        return
+    queue = SimpleQueue()
+    _handler.queue = _listener.queue = queue
+    for sampler in _handler.filters:
+        if isinstance(sampler, Sampler):
+            sampler._lock = threading.RLock()
+    _listener._thread = None
+    _listener.start()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,395 @@
+"""
+Cross-Store Product Matching
+
+The same physical product comes back from several stores under slightly
+different titles ("DEWALT 20V MAX Cordless Drill/Driver Kit" at one,
+"DEWALT - 20V MAX Cordless Drill/Driver Kit - Yellow/Black" at another).
+match_products() gives every result a product_group id, shared by all
+results for the same product, from an index of the products seen so far.
+Only results with a parsed price are matched; placeholders for failed
+or empty searches ("No products found", timeouts) keep product_group
+None:
+
+- Identifiers: a UPC/GTIN or model number already in the index puts the
+  result straight into that product's group. SKUs are store-specific and
+  only match within their own store.
+- Titles: each title is cut into shingles (its distinct stemmed words,
+  so word order and store-specific punctuation don't matter; colors and
+  unit words like "pack" or "ct" are left out, as stores add them
+  freely) and
+  summarised by a MinHash signature. The signature is split into LSH
+  bands; products sharing a band's bucket are the candidates, and the
+  one with the most similar shingles (Jaccard similarity) is the match if
+  it reaches MATCH_THRESHOLD. A lookup reads BANDS buckets, however many
+  products are indexed.
+- Different model numbers, UPCs or pack sizes veto a title match, as do
+  numbers in the titles that disagree (18V vs 20V, 50" vs 65").
+
+A new group's id is derived from its first product (UPC, else model,
+else title shingles), so a product indexed afresh gets the same id again.
+The index is an SQLite database, in memory unless a path is configured
+(--match-index), in which case groups persist across runs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import struct
+import threading
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .base import ScraperResult
+from .index import parse_identifiers
+from .query import tokenize
+
+logger = logging.getLogger(__name__)
+
+# MinHash signature length, split into BANDS bands of ROWS rows. Titles
+# with Jaccard similarity s share a bucket with probability
+# 1 - (1 - s**ROWS)**BANDS: ~0.64 at s=0.5, ~0.9998 at s=0.8.
+BANDS = 16
+ROWS = 6
+NUM_HASHES = BANDS * ROWS
+
+# Jaccard similarity of title shingles needed for a title match
+MATCH_THRESHOLD = 0.8
+
+# Candidates compared per lookup, most shared buckets first
+MAX_CANDIDATES = 32
+
+# Products read from any one bucket per lookup
+BUCKET_READ = 64
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Fixed permutations (a*x + b mod p), so signatures are stable across processes
+_PERMUTATIONS = tuple(
+    (int.from_bytes(hashlib.blake2b(f'a{i}'.encode(), digest_size=8).digest(), 'big') % (_MERSENNE_PRIME - 1) + 1,
+     int.from_bytes(hashlib.blake2b(f'b{i}'.encode(), digest_size=8).digest(), 'big') % _MERSENNE_PRIME)
+    for i in range(NUM_HASHES)
+)
+
+# Words stores add or spell differently for the same product; pack sizes
+# and numbers are compared separately
+NOISE_WORDS = frozenset({
+    'pack', 'pk', 'ct', 'count', 'piece', 'pc', 'set', 'each', 'ea',
+    'in', 'inch', 'ft', 'foot', 'feet', 'oz', 'lb', 'fl', 'sq', 'gal', 'qt', 'ml', 'l', 'g', 'kg',
+    'v', 'volt', 'w', 'watt',
+    'black', 'white', 'gray', 'grey', 'silver', 'red', 'blue', 'green', 'yellow', 'orange',
+    'purple', 'pink', 'brown', 'gold', 'beige',
+})
+
+_NON_ALNUM_RE = re.compile(r'[^0-9A-Za-z]')
+_DIGITS_RE = re.compile(r'\D')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS match_products (
+    id INTEGER PRIMARY KEY,
+    product_key TEXT NOT NULL UNIQUE,
+    group_id TEXT NOT NULL,
+    shingles TEXT NOT NULL,
+    identifiers TEXT NOT NULL,
+    pack TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS match_products_group ON match_products (group_id);
+CREATE TABLE IF NOT EXISTS match_identifiers (
+    identifier TEXT PRIMARY KEY,
+    group_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_buckets (
+    bucket INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, product_id)
+) WITHOUT ROWID;
+"""
+
+
+class MatchStats(NamedTuple):
+    """How one match_products() call placed its results (priced results only)."""
+    results: int
+    groups: int
+    known: int
+    by_identifier: int
+    by_title: int
+    new_groups: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return self._asdict()
+
+
+class ProductKey(NamedTuple):
+    """What a result is matched on."""
+    key: str
+    identifiers: Dict[str, str]
+    shingles: FrozenSet[str]
+    numbers: FrozenSet[str]
+    pack: str
+
+
+def normalize_model(model: str) -> str:
+    """'MTJV3AM/A' -> 'MTJV3AMA'; '' unless it looks like a model number."""
+    model = _NON_ALNUM_RE.sub('', model or '').upper()
+    return model if len(model) >= 4 and any(c.isdigit() for c in model) else ''
+
+
+def normalize_upc(upc: str) -> str:
+    """Digits of a UPC/EAN/GTIN without leading zeros, so GTIN-12/13/14 forms agree."""
+    digits = _DIGITS_RE.sub('', str(upc or '')).lstrip('0')
+    return digits if len(digits) >= 7 else ''
+
+
+def identifiers(result: ScraperResult) -> Dict[str, str]:
+    """Normalized upc, model and store-scoped sku of a result (missing ones left out)."""
+    details = result.details or {}
+    parsed = parse_identifiers(result.notes)
+    found = {
+        'upc': normalize_upc(details.get('upc', '')),
+        'model': normalize_model(details.get('model') or parsed['model']),
+        'sku': _NON_ALNUM_RE.sub('', str(details.get('sku') or parsed['sku'])).upper(),
+    }
+    if found['sku']:
+        found['sku'] = f"{result.store_id}:{found['sku']}"
+    return {kind: value for kind, value in found.items() if value}
+
+
+def shingles(title: str) -> FrozenSet[str]:
+    """Distinct stemmed words of a title, less NOISE_WORDS."""
+    return frozenset(tokenize(title)) - NOISE_WORDS
+
+
+@lru_cache(maxsize=65536)
+def _permuted(shingle: str) -> Tuple[int, ...]:
+    """A shingle's value under each permutation (titles share most of their words)."""
+    h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+    return tuple(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for a, b in _PERMUTATIONS)
+
+
+def minhash(shingle_set: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature (NUM_HASHES values) of a set of shingles."""
+    rows = [_permuted(s) for s in shingle_set]
+    if not rows:
+        return (_MAX_HASH,) * NUM_HASHES
+    return tuple(map(min, zip(*rows)))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def band_buckets(signature: Sequence[int]) -> List[int]:
+    """One bucket number per band (signed 64-bit, for SQLite)."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<I{ROWS}I', band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+
+def _pack(result: ScraperResult) -> str:
+    if result.unit_quantity is None or not result.unit_measure:
+        return ''
+    return f'{result.unit_quantity:g} {result.unit_measure}'
+
+
+def product_key(result: ScraperResult) -> ProductKey:
+    key = f'{result.store_id}\x1f{result.product_url or result.item_name}'
+    words = shingles(result.item_name)
+    numbers = frozenset(word for word in words if word[0].isdigit())
+    return ProductKey(key, identifiers(result), words, numbers, _pack(result))
+
+
+def group_id_for(key: ProductKey) -> str:
+    """Id for a new group, from the identity of its first product."""
+    ids = key.identifiers
+    if 'upc' in ids:
+        basis = f"upc:{ids['upc']}"
+    elif 'model' in ids:
+        basis = f"model:{ids['model']}"
+    elif key.shingles:
+        basis = 'title:' + '\x1f'.join(sorted(key.shingles))
+    else:
+        basis = f'product:{key.key}'
+    return 'pg_' + hashlib.blake2b(basis.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def conflicts(a: ProductKey, b: ProductKey) -> bool:
+    """
+    Whether two products are told apart by their identifiers, pack sizes
+    or title numbers (neither title's numbers contain the other's).
+    """
+    for kind in ('upc', 'model'):
+        if kind in a.identifiers and kind in b.identifiers and a.identifiers[kind] != b.identifiers[kind]:
+            return True
+    if a.pack and b.pack and a.pack != b.pack:
+        return True
+    return not (a.numbers <= b.numbers or b.numbers <= a.numbers)
+
+
+class MatchIndex:
+    """
+    SQLite-backed index of products seen, their groups, identifiers and
+    MinHash LSH buckets.
+
+    Safe to share between threads. In memory by default, so groups are
+    only stable within one process; give a path (--match-index) for
+    group ids that hold across runs.
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM match_products').fetchone()[0]
+
+    def match(self, result: ScraperResult) -> Tuple[str, str]:
+        """
+        The group for a result, indexing it. Returns (group_id, how):
+        how is 'known', 'identifier', 'title' or 'new'.
+        """
+        return self.match_all([result])[0]
+
+    def match_all(self, results: Sequence[ScraperResult]) -> List[Tuple[str, str]]:
+        """match() for each result in turn, in a single transaction."""
+        with self._lock, self._conn:
+            return [self._match(product_key(result)) for result in results]
+
+    def _match(self, key: ProductKey) -> Tuple[str, str]:
+        row = self._conn.execute(
+            'SELECT group_id FROM match_products WHERE product_key = ?', (key.key,)
+        ).fetchone()
+        if row:
+            return row[0], 'known'
+
+        group_id, how = self._by_identifier(key), 'identifier'
+        buckets = band_buckets(minhash(key.shingles))
+        if group_id is None and key.shingles:
+            group_id, how = self._by_title(key, buckets), 'title'
+        if group_id is None:
+            group_id, how = self._new_group_id(key), 'new'
+
+        product_id = self._conn.execute(
+            'INSERT INTO match_products (product_key, group_id, shingles, identifiers, pack) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key.key, group_id, '\x1f'.join(sorted(key.shingles)), json.dumps(key.identifiers), key.pack)
+        ).lastrowid
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO match_identifiers (identifier, group_id) VALUES (?, ?)',
+            [(f'{kind}:{value}', group_id) for kind, value in key.identifiers.items()]
+        )
+        if key.shingles:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO match_buckets (bucket, product_id) VALUES (?, ?)',
+                [(bucket, product_id) for bucket in buckets]
+            )
+        return group_id, how
+
+    def _new_group_id(self, key: ProductKey) -> str:
+        group_id = group_id_for(key)
+        taken = self._conn.execute(
+            'SELECT 1 FROM match_products WHERE group_id = ? LIMIT 1', (group_id,)
+        ).fetchone()
+        if taken:
+            # Same title as a product it was told apart from (model, pack size)
+            group_id = group_id_for(key._replace(identifiers={}, shingles=frozenset({key.key})))
+        return group_id
+
+    def _by_identifier(self, key: ProductKey) -> Optional[str]:
+        for kind in ('upc', 'model', 'sku'):
+            if kind in key.identifiers:
+                row = self._conn.execute(
+                    'SELECT group_id FROM match_identifiers WHERE identifier = ?',
+                    (f'{kind}:{key.identifiers[kind]}',)
+                ).fetchone()
+                if row:
+                    return row[0]
+        return None
+
+    def _by_title(self, key: ProductKey, buckets: List[int]) -> Optional[str]:
+        # Titles sharing a template ("... - Home Depot Edition") crowd some
+        # buckets; a lookup reads at most BUCKET_READ products from each
+        per_bucket = 'SELECT * FROM (SELECT product_id FROM match_buckets WHERE bucket = ? LIMIT ?)'
+        candidates = [row[0] for row in self._conn.execute(
+            'SELECT product_id FROM (' + ' UNION ALL '.join([per_bucket] * len(buckets)) + ') '
+            'GROUP BY product_id ORDER BY COUNT(*) DESC LIMIT ?',
+            (*(value for bucket in buckets for value in (bucket, BUCKET_READ)), MAX_CANDIDATES)
+        )]
+        if not candidates:
+            return None
+        rows = self._conn.execute(
+            'SELECT product_key, group_id, shingles, identifiers, pack FROM match_products '
+            f"WHERE id IN ({','.join('?' * len(candidates))})",
+            candidates
+        ).fetchall()
+        best, best_score = None, MATCH_THRESHOLD
+        for product, group_id, words, ids, pack in rows:
+            words = frozenset(words.split('\x1f'))
+            score = jaccard(key.shingles, words)
+            if score < best_score:
+                continue
+            other = ProductKey(product, json.loads(ids), words,
+                               frozenset(w for w in words if w[0].isdigit()), pack)
+            if not conflicts(key, other):
+                best, best_score = group_id, score
+        return best
+
+
+def match_products(results: Sequence[ScraperResult], index: MatchIndex) -> MatchStats:
+    """
+    Set product_group on every priced result in place, matching against
+    and extending index. Placeholders (no price) are neither matched nor
+    indexed.
+    """
+    products = [r for r in results if r.price_cents is not None and r.product_url]
+    counts = {'known': 0, 'identifier': 0, 'title': 0, 'new': 0}
+    groups = set()
+    for result, (group_id, how) in zip(products, index.match_all(products)):
+        result.product_group = group_id
+        groups.add(group_id)
+        counts[how] += 1
+    stats = MatchStats(len(products), len(groups), counts['known'], counts['identifier'],
+                       counts['title'], counts['new'])
+    logger.info(
+        "Matched %s results into %s product groups (%s by identifier, %s by title, %s new)",
+        stats.results, stats.groups, stats.by_identifier, stats.by_title, stats.new_groups
+    )
+    return stats
+
+
+_default_index: Optional[MatchIndex] = None
+_default_lock = threading.Lock()
+
+
+def configure_match_index(path: Optional[str]) -> MatchIndex:
+    """Keep the product match index in path from now on (None keeps it in memory)."""
+    global _default_index
+    with _default_lock:
+        if _default_index is not None:
+            _default_index.close()
+        _default_index = MatchIndex(path or ':memory:')
+        return _default_index
+
+
+def default_match_index() -> MatchIndex:
+    """The shared match index, opened on first use from SCRAPER_MATCH_PATH (in memory if unset)."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = MatchIndex(os.environ.get('SCRAPER_MATCH_PATH') or ':memory:')
+        return _default_index
@@ -0,0 +1,171 @@
+"""
+Mock Store Backend
+
+Serves generated search pages in place of store websites for stores
+scraped with source 'mock'. Pages are a pure function of (store name,
+query), so the same job always yields the same results, and they go
+through the same parsing, ranking and serialization as fetched pages.
+No network is touched, which makes it the backend for load tests and
+for the legacy store-finder CLI's --mock flag.
+
+Card markup matches the generic, Home Depot and Best Buy selectors. The
+first card is the legacy mock item ("<Query> - <Store> Edition", priced
+from an md5 of store name and query). Card links (/p/<sku>) serve product
+pages with schema.org data, for enrichment.
+
+Another generator can be plugged in with set_backend(): any object with
+fetch(search_url, store_name, query) returning a FetchResult.
+"""
+
+import hashlib
+import html
+import json
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .cancel import Cancelled, current_token
+from .session import FetchResult
+
+# Product cards per generated page
+DEFAULT_CARDS = 5
+
+# Appended to the query to title the cards after the first: accessories
+# and bundles, which usually rank below the first card's plain match
+CARD_VARIANTS = (
+    'Replacement Parts Value Bundle',
+    'Protective Carrying Case Accessory',
+    'Starter Kit With Extra Refills',
+    'Wall Mount Storage Organizer Set',
+    'Cleaning And Maintenance Supply Pack',
+)
+
+_CARD = (
+    '<div class="product-card product-pod sku-item" data-testid="product-pod" data-sku-id="{sku}">'
+    '{badge}<h3 class="product-title"><a class="sku-title" href="{url}">{title}</a></h3>'
+    '<div class="price"><span>{price}</span></div>'
+    '</div>'
+)
+
+_PAGE = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8"><title>{query} | {store}</title></head>'
+    '<body><main class="search-results">{cards}</main></body></html>'
+)
+
+
+_PRODUCT_PAGE = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Product {sku}</title>'
+    '<script type="application/ld+json">{schema}</script></head>'
+    '<body><main class="product-details"><h1>Product {sku}</h1></main></body></html>'
+)
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+
+
+class MockBackend:
+    """
+    Deterministic search-page generator.
+
+    Args:
+        cards: Product cards per page
+        latency: Seconds each fetch sleeps, to stand in for network time
+        error_rate: Fraction of (store, query) pairs whose fetch fails
+            with a connection error, chosen by hash so it is repeatable
+    """
+
+    def __init__(self, cards: int = DEFAULT_CARDS, latency: float = 0.0, error_rate: float = 0.0):
+        self.cards = max(1, cards)
+        self.latency = max(0.0, latency)
+        self.error_rate = error_rate
+
+    def render(self, store_name: str, query: str) -> str:
+        """Search results page for query at store_name."""
+        cards = []
+        for i in range(self.cards):
+            if i == 0:
+                seed = _seed(f"{store_name}{query}")
+                title = f"{query.title()} - {store_name} Edition"
+            else:
+                seed = _seed(f"{store_name}{query}#{i}")
+                title = f"{query.title()} {CARD_VARIANTS[(i - 1) % len(CARD_VARIANTS)]}"
+            cards.append(_CARD.format(
+                sku=seed,
+                # The second card is an ad, so ranking has one to demote
+                badge='<span class="sponsored-label">Sponsored</span>' if i == 1 else '',
+                url=f"https://www.example.com/p/{seed}",
+                title=html.escape(title),
+                price=f"${20 + seed % 500}.{seed % 100:02d}",
+            ))
+        return _PAGE.format(query=html.escape(query), store=html.escape(store_name), cards=''.join(cards))
+
+    def render_product(self, sku: str) -> str:
+        """Product page for a card's sku; about one in seven is out of stock."""
+        seed = int(sku) if sku.isdigit() else _seed(sku)
+        schema = {
+            '@context': 'https://schema.org',
+            '@type': 'Product',
+            'sku': sku,
+            'mpn': f"MK-{seed % 100000:05d}",
+            'gtin12': f"{seed % 10 ** 12:012d}",
+            'aggregateRating': {
+                '@type': 'AggregateRating',
+                'ratingValue': round(3 + seed % 21 / 10, 1),
+                'reviewCount': seed % 2000,
+            },
+            'offers': {
+                '@type': 'Offer',
+                'availability': 'https://schema.org/' + ('OutOfStock' if seed % 7 == 0 else 'InStock'),
+            },
+        }
+        return _PRODUCT_PAGE.format(sku=html.escape(sku), schema=json.dumps(schema))
+
+    def fetch(self, search_url: str, store_name: str, query: str) -> FetchResult:
+        """
+        The page for (store_name, query), as a fetch of search_url would
+        return it, or the product page for a card link. Raises
+        requests.ConnectionError for the failing share, and Cancelled if
+        the current token is cancelled while it waits.
+        """
+        token = current_token()
+        if token.wait(self.latency) if self.latency else token.cancelled:
+            raise Cancelled(token.reason)
+        path = urlsplit(search_url).path
+        if path.startswith('/p/'):
+            body = self.render_product(path[3:].strip('/')).encode('utf-8')
+            return FetchResult(body, 'utf-8', '', 'fetched', time.time())
+        if self.error_rate and _seed(f"{store_name}{query}!") % 10000 < self.error_rate * 10000:
+            import requests
+            raise requests.ConnectionError(f"Mock connection failure: {search_url}")
+        body = self.render(store_name, query).encode('utf-8')
+        return FetchResult(body, 'utf-8', '', 'fetched', time.time())
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def default_backend():
+    """
+    The shared mock backend, created on first use from SCRAPER_MOCK_CARDS,
+    SCRAPER_MOCK_LATENCY_MS and SCRAPER_MOCK_ERROR_RATE.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = MockBackend(
+                cards=int(os.environ.get('SCRAPER_MOCK_CARDS') or DEFAULT_CARDS),
+                latency=float(os.environ.get('SCRAPER_MOCK_LATENCY_MS') or 0) / 1000,
+                error_rate=float(os.environ.get('SCRAPER_MOCK_ERROR_RATE') or 0),
+            )
+        return _backend
+
+
+def set_backend(backend: Optional[MockBackend]) -> None:
+    """Serve source 'mock' from backend (None restores the default)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
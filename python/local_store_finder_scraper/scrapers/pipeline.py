@@ -0,0 +1,350 @@
+"""
+Fetch/Parse Pipeline
+
+Separates network I/O from HTML parsing for batch scrapes:
+
+    fetch threads --> bounded queue --> process pool of parser workers
+
+Fetch threads download search pages and put the raw bytes on a bounded
+queue. A dispatcher hands queued pages to a process pool so parsing and
+selector extraction use every core instead of sharing one GIL with the
+I/O threads. When the queue is full, fetch threads block, so fetching
+never runs more than queue_depth pages ahead of the parsers. The pool is
+started on first use and shared by every run in the process, so a
+--worker starts its parser processes once rather than per request.
+
+Playwright stores are scraped directly on the fetch threads, since their
+parsers need the live page, and so are deep searches, which parse each
+results page as it arrives to decide whether to fetch the next.
+
+Each job's fetch runs under its own CancelToken, cancelled timeout
+seconds after it starts, so a stalled store gets a "Scraping timed out"
+placeholder as it would from scrape_jobs. Once the caller's token is
+cancelled, fetches in flight are aborted and jobs not yet fetched get a
+placeholder result; pages already queued are still parsed.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .base import CANCELLED_NOTES, PAGE_SOURCES, ScraperResult
+from .cancel import CancelToken, Cancelled, bind, cancel_scope, current_token
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable via environment for the Node bridge
+DEFAULT_FETCH_WORKERS = 3
+DEFAULT_PARSE_WORKERS = int(os.environ.get('SCRAPER_PARSE_WORKERS', '0') or 0)
+DEFAULT_QUEUE_DEPTH = int(os.environ.get('SCRAPER_PARSE_QUEUE_DEPTH', '8') or 8)
+
+# Seconds a job's fetch may take, as STORE_SCRAPE_TIMEOUT in run_scrape
+DEFAULT_TIMEOUT = 20
+
+# Marks the end of the fetch stage on the parse queue
+_DONE = object()
+
+# Reason a job's own token is cancelled with when its timeout passes
+_TIMEOUT = 'timeout'
+
+
+# Parser pools by worker count, shared by every pipeline in the process
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def parse_pool(workers: int) -> ProcessPoolExecutor:
+    """The process's pool of `workers` parser processes, started on first use."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool, so the next run starts a fresh one."""
+    with _pools_lock:
+        for workers, shared in list(_pools.items()):
+            if shared is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_parse_pools() -> None:
+    """Stop every parser pool (at process exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+class ParseJob(NamedTuple):
+    """A fetched page waiting to be parsed. Must stay picklable."""
+    index: int
+    store_name: str
+    source: str
+    store_id: str
+    search_url: str
+    query: str
+    max_results: int
+    body: bytes
+    encoding: str
+    body_hash: str = ''
+    parse_key: str = ''
+
+
+def parse_job(job: ParseJob) -> List[ScraperResult]:
+    """Parse one fetched page. Runs inside a parser worker process."""
+    from . import get_scraper_for_store
+
+    scraper = get_scraper_for_store(job.store_name, job.source)
+    try:
+        return scraper.parse_page(
+            job.body.decode(job.encoding, errors='replace'),
+            job.store_id, job.store_name, job.search_url, job.query, job.max_results
+        )
+    except Exception as e:
+        return [ScraperResult(
+            store_id=job.store_id,
+            store_name=job.store_name,
+            item_name=job.query,
+            price="not available",
+            notes=f"Scraping failed: {str(e)[:100]}",
+            product_url=job.search_url
+        )]
+
+
+class ScrapePipeline:
+    """
+    Scrapes (store, query) jobs with fetching and parsing in separate stages.
+
+    Args:
+        parse_workers: Parser processes (defaults to the CPU count)
+        queue_depth: Maximum fetched pages waiting for a parser
+        fetch_workers: Threads doing network I/O
+        max_results: Results kept per page
+        timeout: Seconds each job's fetch may take
+    """
+
+    def __init__(
+        self,
+        parse_workers: int = None,
+        queue_depth: int = DEFAULT_QUEUE_DEPTH,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        max_results: int = 1,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.queue_depth = max(1, queue_depth)
+        self.fetch_workers = max(1, fetch_workers)
+        self.max_results = max_results
+        self.timeout = timeout
+        self.queue_high_water = 0
+
+    def run(self, jobs: Sequence[Tuple[Dict, str]]) -> Tuple[List[List[ScraperResult]], List[str]]:
+        """
+        Scrape every (store, query) job.
+        Returns (one result list per job, in job order, errors).
+        """
+        results: List[Optional[List[ScraperResult]]] = [None] * len(jobs)
+        errors: List[str] = []
+        parse_queue: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        # Bounds pages handed to the pool but not yet parsed
+        in_flight = threading.BoundedSemaphore(self.parse_workers)
+
+        pool = parse_pool(self.parse_workers)
+        dispatcher = threading.Thread(
+            target=self._dispatch,
+            args=(parse_queue, pool, in_flight, results, errors),
+            name='parse-dispatcher',
+            daemon=True
+        )
+        dispatcher.start()
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers:
+            fetch = bind(self._fetch)
+            for index, (store, query) in enumerate(jobs):
+                fetchers.submit(fetch, index, store, query, parse_queue, results, errors)
+
+        parse_queue.put(_DONE)
+        dispatcher.join()
+
+        logger.info(
+            "Pipeline scraped %s pages (%s parsers, queue high-water %s/%s)",
+            len(jobs), self.parse_workers, self.queue_high_water, self.queue_depth
+        )
+        for index, r in enumerate(results):
+            if r is None:
+                errors.append(f"{jobs[index][0].get('name')}: No result")
+        return [r if r is not None else [] for r in results], errors
+
+    def _fetch(self, index: int, store: Dict, query: str,
+               parse_queue: queue.Queue, results: List, errors: List[str]) -> None:
+        job_token = CancelToken(current_token())
+        timer = threading.Timer(self.timeout, job_token.cancel, args=(_TIMEOUT,))
+        timer.daemon = True
+        timer.start()
+        try:
+            with cancel_scope(job_token):
+                self._fetch_job(index, store, query, parse_queue, results)
+        except Exception as e:
+            # Anything fetch_page, the scraper or the parse cache let through
+            store_name = store.get('name', 'Unknown Store')
+            logger.error("Error scraping %s: %s", store_name, e)
+            errors.append(f"{store_name}: {str(e)[:80]}")
+            results[index] = [ScraperResult(
+                store_id=store.get('id', ''),
+                store_name=store_name,
+                item_name=query,
+                product_url=store.get('base_url', ''),
+                notes=f"Scraping error: {str(e)[:100]}"
+            )]
+        finally:
+            timer.cancel()
+            job_token.close()
+        if job_token.reason == _TIMEOUT and results[index] is not None \
+                and all(r.notes == CANCELLED_NOTES for r in results[index]):
+            logger.warning("Timeout scraping %s", store.get('name'))
+            for r in results[index]:
+                r.notes = "Scraping timed out"
+
+    def _fetch_job(self, index: int, store: Dict, query: str,
+                   parse_queue: queue.Queue, results: List) -> None:
+        from . import get_scraper_for_store
+
+        store_id = store.get('id', '')
+        store_name = store.get('name', 'Unknown Store')
+        base_url = store.get('base_url', '')
+        source = store.get('source', 'requests')
+
+        if current_token().cancelled:
+            results[index] = [ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=query,
+                product_url=base_url,
+                notes=CANCELLED_NOTES
+            )]
+            return
+
+        try:
+            scraper = get_scraper_for_store(store_name, source)
+            if scraper.source not in PAGE_SOURCES or store.get('deep_pages', 0) > 0:
+                results[index] = scraper.scrape(
+                    store_id=store_id,
+                    store_name=store_name,
+                    base_url=base_url,
+                    search_url_template=store.get('search_url_template', ''),
+                    query=query,
+                    max_results=self.max_results,
+                    deep_pages=store.get('deep_pages', 0),
+                    api_url_template=store.get('api_url_template', '')
+                )
+                return
+
+            search_url = scraper.build_search_url(
+                base_url, store.get('search_url_template', ''), query
+            )
+        except Exception as e:
+            logger.error("Error scraping %s: %s", store_name, e)
+            results[index] = [ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=query,
+                product_url=base_url,
+                notes=f"Scraping error: {str(e)[:100]}"
+            )]
+            return
+
+        import requests
+
+        logger.info("Fetching %s: %s", store_name, search_url)
+        try:
+            page = scraper.fetch_page(search_url, store_name, query)
+        except Cancelled:
+            notes = CANCELLED_NOTES
+        except requests.Timeout:
+            notes = "Request timed out"
+        except requests.RequestException as e:
+            notes = f"Request failed: {str(e)[:80]}"
+        else:
+            notes = None
+        if notes is not None:
+            results[index] = [ScraperResult(
+                store_id=store_id,
+                store_name=store_name,
+                item_name=query,
+                notes=notes,
+                product_url=search_url
+            )]
+            return
+
+        if page.status == 'fetched':
+            scraper.archive_page(store_id, store_name, search_url, query, page.body, page.encoding)
+
+        # Unchanged pages reuse their earlier extraction and skip the parsers
+        key = scraper.parse_key(page, store_id, store_name, search_url, query, self.max_results)
+        cached = scraper.cached_parse(page, key)
+        if cached is not None:
+            results[index] = cached
+            return
+
+        # Blocks while the parsers are queue_depth pages behind
+        parse_queue.put(ParseJob(
+            index, store_name, scraper.source, store_id, search_url,
+            query, self.max_results, page.body, page.encoding, page.body_hash, key
+        ))
+        self.queue_high_water = max(self.queue_high_water, parse_queue.qsize())
+
+    def _dispatch(self, parse_queue: queue.Queue, pool: ProcessPoolExecutor,
+                  in_flight: threading.BoundedSemaphore, results: List, errors: List[str]) -> None:
+        pending: List[Future] = []
+        while True:
+            job = parse_queue.get()
+            if job is _DONE:
+                break
+            in_flight.acquire()
+            try:
+                future = pool.submit(parse_job, job)
+            except BrokenProcessPool as e:
+                # Fails through the collector like a worker that died
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(self._collector(job, pool, in_flight, results, errors))
+            pending.append(future)
+        for future in pending:
+            try:
+                future.result()
+            except Exception:
+                pass  # Recorded by the collector
+
+    @staticmethod
+    def _collector(job: ParseJob, pool: ProcessPoolExecutor, in_flight: threading.BoundedSemaphore,
+                   results: List, errors: List[str]):
+        def collect(future: Future) -> None:
+            try:
+                results[job.index] = future.result()
+                if job.parse_key:
+                    from .session import default_session
+                    default_session().cache.put_parsed(job.parse_key, job.body_hash, results[job.index])
+            except Exception as e:
+                logger.error("Parser worker failed for %s: %s", job.store_name, e)
+                if isinstance(e, BrokenProcessPool):
+                    _discard_pool(pool)
+                errors.append(f"{job.store_name}: {str(e)[:80]}")
+                results[job.index] = [ScraperResult(
+                    store_id=job.store_id,
+                    store_name=job.store_name,
+                    item_name=job.query,
+                    notes=f"Scraping failed: {str(e)[:100]}",
+                    product_url=job.search_url
+                )]
+            finally:
+                in_flight.release()
+        return collect
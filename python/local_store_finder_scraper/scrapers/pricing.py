@@ -0,0 +1,192 @@
+"""
+Price Normalization
+
+Shared parsing of raw price text into integer cents. All patterns are
+compiled once at import time.
+
+Handles the formats seen on store search pages:
+- plain prices: "$99.99", "$1,299.99", "99.99"
+- sale/was prices: "Was $129.00 Now $79.00", "Sale $4.99 Reg $6.49"
+- ranges: "$5.98 - $12.97", "$5.98–$12.97", "$5 to $10"
+- per-unit prices: "$0.45/sq. ft.", "$3.49/lb"
+- cents: "98¢", "89 cents/lb"
+
+normalize_prices() processes a whole list of strings with a single regex
+scan, which is what bulk callers should use.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+# Sentinel rendered for results without a usable price
+PRICE_NOT_AVAILABLE = "not available"
+
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+}
+
+
+class PriceInfo(NamedTuple):
+    """Normalized price. All amounts are integer cents."""
+    cents: Optional[int]          # Current price (low end for ranges)
+    was_cents: Optional[int] = None   # Regular price when on sale
+    high_cents: Optional[int] = None  # High end of a range
+    per_unit: str = ""            # Unit for per-unit prices ("sq. ft.")
+
+
+NO_PRICE = PriceInfo(None)
+
+# One token per price component. Newlines separate entries in bulk mode.
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<nl>\n)
+    | (?P<was>\b(?:was|reg(?:ular)?|list|orig(?:inal)?|compare\ at)\b)
+    | (?P<now>\b(?:now|sale)\b)
+    | (?P<save>\bsave\b)
+    | \$[^\S\n]*(?P<dollars>\d{1,3}(?:,\d{3})+|\d+)(?:\.(?P<dfrac>\d{1,2}))?
+    | (?P<cents>\d{1,2})[^\S\n]*(?:¢|cents?\b)
+    | (?P<bare>\d{1,3}(?:,\d{3})+(?:\.\d{2})?|\d+\.\d{2}|\d+)
+    | (?P<dash>[^\S\n]+(?:-|–|to)[^\S\n]+|[^\S\n]*[-–][^\S\n]*(?=\$))
+    | /[^\S\n]*(?P<per>[a-z][a-z.]*(?:[^\S\n][a-z][a-z.]*)?)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+def _amount(match) -> Optional[int]:
+    """Convert a price token match to cents."""
+    dollars = match.group('dollars')
+    if dollars is not None:
+        frac = match.group('dfrac') or ''
+        return int(dollars.replace(',', '')) * 100 + int((frac + '00')[:2])
+    cents = match.group('cents')
+    if cents is not None:
+        return int(cents)
+    whole, _, frac = match.group('bare').replace(',', '').partition('.')
+    return int(whole) * 100 + int((frac + '00')[:2])
+
+
+class _EntryState:
+    """Accumulates the tokens of one price string."""
+
+    __slots__ = ('current', 'was', 'high', 'per_unit', 'bare',
+                 'pending', 'after_dash', 'last')
+
+    def __init__(self):
+        self.current = None
+        self.was = None
+        self.high = None
+        self.per_unit = ""
+        self.bare = None
+        self.pending = None     # 'was' / 'save' marker awaiting an amount
+        self.after_dash = False
+        self.last = None        # Slot the last amount was assigned to
+
+    def feed(self, kind: str, match) -> None:
+        if kind == 'was' or kind == 'save':
+            self.pending = kind
+            return
+        if kind == 'now':
+            self.pending = None
+            return
+        if kind == 'dash':
+            self.after_dash = self.last == 'current'
+            return
+        if kind == 'per':
+            if self.last == 'current' and not self.per_unit:
+                self.per_unit = match.group('per').strip()
+            return
+
+        amount = _amount(match)
+        if kind == 'bare':
+            # Bare numbers only count when the string has no marked price
+            if self.bare is None:
+                self.bare = amount
+            return
+
+        if self.pending == 'save':
+            self.last = 'save'
+        elif self.pending == 'was':
+            if self.was is None:
+                self.was = amount
+            self.last = 'was'
+        elif self.after_dash and self.high is None:
+            self.high = amount
+            self.last = 'high'
+        elif self.current is None:
+            self.current = amount
+            self.last = 'current'
+        self.pending = None
+        self.after_dash = False
+
+    def result(self) -> PriceInfo:
+        current = self.current
+        if current is None:
+            if self.was is not None:
+                # "Was $X" with no other amount is still the price shown
+                return PriceInfo(self.was, None, self.high, self.per_unit)
+            if self.bare is not None:
+                return PriceInfo(self.bare)
+            return NO_PRICE
+        return PriceInfo(current, self.was, self.high, self.per_unit)
+
+
+def normalize_price(text: str) -> PriceInfo:
+    """Normalize a single raw price string."""
+    if not text:
+        return NO_PRICE
+    state = _EntryState()
+    feed = state.feed
+    for match in _TOKEN_RE.finditer(text.replace('\n', ' ')):
+        feed(match.lastgroup, match)
+    return state.result()
+
+
+def normalize_prices(texts: Iterable[str]) -> List[PriceInfo]:
+    """
+    Normalize a list of raw price strings in one pass.
+
+    Repeated strings are parsed once, and all distinct strings are scanned
+    together as a single newline-joined buffer.
+    """
+    texts = list(texts)
+    slots = {}
+    unique = []
+    for text in texts:
+        if text not in slots:
+            slots[text] = len(unique)
+            unique.append(text)
+
+    parsed = []
+    state = _EntryState()
+    feed = state.feed
+    buffer = '\n'.join((text or '').replace('\n', ' ') for text in unique)
+    for match in _TOKEN_RE.finditer(buffer):
+        kind = match.lastgroup
+        if kind == 'nl':
+            parsed.append(state.result())
+            state = _EntryState()
+            feed = state.feed
+        else:
+            feed(kind, match)
+    parsed.append(state.result())
+
+    return [parsed[slots[text]] for text in texts]
+
+
+def format_price(cents: Optional[int], currency: str = 'USD') -> str:
+    """Render integer cents as the bridge's price string ("$99.99")."""
+    if cents is None:
+        return PRICE_NOT_AVAILABLE
+    symbol = CURRENCY_SYMBOLS.get(currency, '$')
+    return f"{symbol}{cents // 100}.{cents % 100:02d}"
+
+
+def price_to_cents(price: str) -> Optional[int]:
+    """
+    Convert a price string ("$1,299.99") to integer cents.
+    Returns None for 'not available' or anything unparseable.
+    """
+    if not price or price == PRICE_NOT_AVAILABLE:
+        return None
+    return normalize_price(price).cents
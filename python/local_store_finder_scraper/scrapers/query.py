@@ -0,0 +1,64 @@
+"""
+Query Canonicalization
+
+Maps differently-phrased searches for the same thing onto one key, so
+"Cordless Drill", "cordless  drill" and "drills, cordless" share cache
+entries, popularity and index lookups.
+
+canonical_key() lowercases, drops punctuation and stopwords, applies
+simple plural stemming and sorts the tokens. The key is only used for
+lookups: stores are still searched with the user's original phrasing,
+since word order and plurals can change what a store's search returns.
+"""
+
+import re
+from functools import lru_cache
+from typing import List
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'of', 'on', 'or',
+    'the', 'to', 'with',
+})
+
+# Numbers (incl. decimals and fractions like 1/2) or runs of letters
+_TOKEN_RE = re.compile(r'\d+(?:[./]\d+)*|[^\W\d_]+')
+
+
+def stem(token: str) -> str:
+    """Strip simple English plural endings."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        return token[:-3] + 'y'
+    if token.endswith(('ches', 'shes', 'sses', 'xes', 'zes')):
+        return token[:-2]
+    if token.endswith('oes') and len(token) > 5:
+        return token[:-2]
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, stemmed, stopword-free tokens, repeats included."""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def query_tokens(query: str) -> List[str]:
+    """Distinct canonical tokens of a query, in their original order."""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+@lru_cache(maxsize=4096)
+def canonical_key(query: str) -> str:
+    """Order-independent lookup key for a query."""
+    tokens = query_tokens(query)
+    if not tokens:
+        # Nothing but stopwords/punctuation; fall back to the normalized text
+        return ' '.join(query.lower().split())
+    return ' '.join(sorted(tokens))
+
+
+def normalize_query(query: str) -> str:
+    """The user's phrasing with whitespace collapsed, as sent to stores."""
+    return ' '.join(query.split())
@@ -0,0 +1,103 @@
+"""
+Relevance Ranking
+
+Orders the candidate product cards parsed from one search page so the
+best hit comes first, instead of whichever card the store put at the top.
+
+The score combines, in one pass over the candidates:
+- BM25 of the query tokens against each title, with IDF computed over
+  the candidates themselves
+- coverage: the fraction of query tokens the title contains
+- price sanity: no parsed price, or a price far from the page's median
+  (accessories, bundles), is penalized
+- sponsored placement, which is penalized
+
+Ties keep the page order.
+
+confident_matches() counts candidates good enough to stop searching
+further pages on (deep search): every query token in the title, a
+parsed price, and not sponsored.
+"""
+
+import math
+from statistics import median
+from typing import Dict, List, Sequence
+
+from .base import ScraperResult
+from .query import query_tokens, tokenize
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Score adjustments
+COVERAGE_WEIGHT = 2.0
+NO_PRICE_PENALTY = 1.5
+PRICE_OUTLIER_PENALTY = 1.0
+PRICE_OUTLIER_RATIO = 5.0
+SPONSORED_PENALTY = 2.0
+
+
+def score_candidates(results: Sequence[ScraperResult], query: str) -> List[float]:
+    """Relevance score per candidate, aligned with `results`."""
+    terms = query_tokens(query)
+    if not results:
+        return []
+
+    docs = [tokenize(r.item_name) for r in results]
+    n = len(docs)
+    avg_len = (sum(len(d) for d in docs) / n) or 1.0
+
+    term_counts: List[Dict[str, int]] = []
+    doc_freq = dict.fromkeys(terms, 0)
+    for doc in docs:
+        counts: Dict[str, int] = {}
+        for token in doc:
+            if token in doc_freq:
+                counts[token] = counts.get(token, 0) + 1
+        for token in counts:
+            doc_freq[token] += 1
+        term_counts.append(counts)
+
+    idf = {t: math.log(1.0 + (n - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()}
+
+    prices = [r.price_cents for r in results if r.price_cents]
+    typical = median(prices) if len(prices) >= 3 else None
+
+    scores = []
+    for result, doc, counts in zip(results, docs, term_counts):
+        norm = K1 * (1.0 - B + B * len(doc) / avg_len)
+        score = sum(
+            idf[t] * tf * (K1 + 1.0) / (tf + norm)
+            for t, tf in counts.items()
+        )
+        if terms:
+            score += COVERAGE_WEIGHT * len(counts) / len(terms)
+
+        if result.price_cents is None:
+            score -= NO_PRICE_PENALTY
+        elif typical and not (
+            typical / PRICE_OUTLIER_RATIO <= result.price_cents <= typical * PRICE_OUTLIER_RATIO
+        ):
+            score -= PRICE_OUTLIER_PENALTY
+
+        if result.sponsored:
+            score -= SPONSORED_PENALTY
+        scores.append(score)
+    return scores
+
+
+def rank_results(results: Sequence[ScraperResult], query: str) -> List[ScraperResult]:
+    """Candidates sorted best first; stable for equal scores."""
+    scores = score_candidates(results, query)
+    order = sorted(range(len(results)), key=lambda i: -scores[i])
+    return [results[i] for i in order]
+
+
+def confident_matches(results: Sequence[ScraperResult], query: str) -> int:
+    """Number of candidates that fully match the query, are priced and aren't ads."""
+    terms = set(query_tokens(query))
+    return sum(
+        1 for r in results
+        if r.price_cents is not None and not r.sponsored and terms <= set(tokenize(r.item_name))
+    )
@@ -0,0 +1,89 @@
+"""
+Per-Host Rate Limiting
+
+Token buckets keyed by store host. Each bucket refills at `rate` requests
+per second up to `burst` tokens.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .cancel import current_token
+
+DEFAULT_HOST_RATE = 1.0  # requests per second
+DEFAULT_HOST_BURST = 3
+
+
+def host_of(url: str) -> str:
+    """Rate-limit key for a URL: its lowercase host."""
+    return (urlparse(url).hostname or '').lower()
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with one bucket per host.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, rate: float = DEFAULT_HOST_RATE, burst: int = DEFAULT_HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        # host -> (tokens, last refill time)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def _take(self, host: str, rate: float, now: float) -> float:
+        """
+        Take a token if one is available.
+        Returns 0 on success, else seconds until the next token.
+        """
+        tokens, last = self._buckets.get(host, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * rate)
+        if tokens >= 1.0:
+            self._buckets[host] = (tokens - 1.0, now)
+            return 0.0
+        self._buckets[host] = (tokens, now)
+        return (1.0 - tokens) / rate if rate > 0 else float('inf')
+
+    def try_acquire(self, host: str, rate: Optional[float] = None) -> bool:
+        """
+        Take a token for host without waiting.
+
+        Args:
+            host: Bucket key
+            rate: Refill rate to apply for this call, e.g. only the spare
+                  budget left over by interactive traffic. A host first
+                  seen here starts with an empty bucket, and a rate of 0
+                  grants nothing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if rate is None:
+                return self._take(host, self.rate, now) == 0.0
+            if rate <= 0:
+                return False
+            self._buckets.setdefault(host, (0.0, now))
+            return self._take(host, rate, now) == 0.0
+
+    def acquire(self, host: str, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a token for host. Returns False if timeout expires (or the
+        current CancelToken is cancelled) first.
+        """
+        cancel = current_token()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                wait = self._take(host, self.rate, time.monotonic())
+            if wait == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            if cancel.wait(wait):
+                return False
@@ -0,0 +1,145 @@
+"""
+Background Refresh Scheduler
+
+Keeps the result cache warm for the most popular (store, query) pairs.
+Each round it:
+
+1. Backs off entirely while interactive traffic is above busy_threshold.
+2. Takes the hottest pairs recorded by run_scrape (ResultCache.hot_queries).
+3. Re-scrapes the ones whose cache entry is missing or expires within
+   refresh_ahead seconds, hottest first.
+
+Refreshes run at low priority: a host is only scraped when its token
+bucket has budget left over after the interactive requests seen for that
+host in the last window.
+"""
+
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from .base import ScraperResult
+from .cache import ResultCache, HotQuery
+from .ratelimit import RateLimiter, host_of, DEFAULT_HOST_RATE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 20
+DEFAULT_REFRESH_AHEAD = 5 * 60        # seconds before expiry
+DEFAULT_POLL_INTERVAL = 10.0          # seconds between rounds
+DEFAULT_BUSY_THRESHOLD = 30           # interactive requests per load window
+LOAD_WINDOW = 60.0                    # seconds
+
+
+class RefreshScheduler:
+    """
+    Pre-warms cache entries for popular queries in the background.
+
+    Args:
+        cache: Result cache shared with run_scrape
+        top_n: How many of the hottest pairs to keep warm
+        refresh_ahead: Refresh entries expiring within this many seconds
+        host_rate: Per-host request budget (requests/second) shared with
+                   interactive traffic
+        busy_threshold: Pause while more interactive requests than this
+                        arrived in the last LOAD_WINDOW seconds
+        poll_interval: Seconds between rounds
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        top_n: int = DEFAULT_TOP_N,
+        refresh_ahead: float = DEFAULT_REFRESH_AHEAD,
+        host_rate: float = DEFAULT_HOST_RATE,
+        busy_threshold: int = DEFAULT_BUSY_THRESHOLD,
+        poll_interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        self.cache = cache
+        self.top_n = top_n
+        self.refresh_ahead = refresh_ahead
+        self.host_rate = host_rate
+        self.busy_threshold = busy_threshold
+        self.poll_interval = poll_interval
+        self.limiter = RateLimiter(rate=host_rate, burst=1)
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def spare_rate(self, host: str) -> float:
+        """Requests/second left for host after recent interactive traffic."""
+        interactive = self.cache.recent_requests(LOAD_WINDOW, host) / LOAD_WINDOW
+        return max(0.0, self.host_rate - interactive)
+
+    def due(self, hot: List[HotQuery], now: float) -> List[HotQuery]:
+        """Hot pairs whose cache entry is missing or about to expire."""
+        return [
+            h for h in hot
+            if h.expires_at is None or h.expires_at - now <= self.refresh_ahead
+        ]
+
+    def run_once(self) -> int:
+        """Run one refresh round. Returns the number of pairs refreshed."""
+        load = self.cache.recent_requests(LOAD_WINDOW)
+        if load > self.busy_threshold:
+            logger.info("Interactive load %s/%ds, pausing refresh", load, LOAD_WINDOW)
+            return 0
+
+        refreshed = 0
+        for hot in self.due(self.cache.hot_queries(self.top_n), time.time()):
+            if self._stop.is_set():
+                break
+            host = host_of(hot.store.get('base_url', ''))
+            if not self.limiter.try_acquire(host, rate=self.spare_rate(host)):
+                continue  # No spare budget for this host this round
+            if self.refresh(hot):
+                refreshed += 1
+        return refreshed
+
+    def refresh(self, hot: HotQuery) -> bool:
+        """Re-scrape one pair into the cache. Returns True if it was stored."""
+        from . import get_scraper_for_store
+
+        store = hot.store
+        store_name = store.get('name', 'Unknown Store')
+        logger.info("Refreshing %s for '%s' (score %.1f)", store_name, hot.query, hot.score)
+        try:
+            scraper = get_scraper_for_store(store_name, store.get('source', 'requests'))
+            results = scraper.scrape(
+                store_id=store.get('id', ''),
+                store_name=store_name,
+                base_url=store.get('base_url', ''),
+                search_url_template=store.get('search_url_template', ''),
+                query=hot.query,
+                max_results=1,
+                api_url_template=store.get('api_url_template', '')
+            )
+        except Exception as e:
+            logger.warning("Refresh failed for %s: %s", store_name, e)
+            return False
+
+        if not is_cacheable(results):
+            return False
+        self.cache.put(store.get('id', ''), hot.query, results)
+        return True
+
+    def run_forever(self) -> None:
+        """Refresh in rounds until stop() is called."""
+        logger.info(
+            "Refresh scheduler started (top %s, refresh %.0fs ahead, %s req/s per host)",
+            self.top_n, self.refresh_ahead, self.host_rate
+        )
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self.cache.prune()
+            except Exception:
+                logger.exception("Refresh round failed")
+            self._stop.wait(self.poll_interval)
+
+
+def is_cacheable(results: Optional[List[ScraperResult]]) -> bool:
+    """Only cache scrapes that found at least one priced product."""
+    return bool(results) and any(r.price_cents is not None for r in results)
@@ -0,0 +1,93 @@
+"""
+Output Serialization
+
+Writes scraper output straight to a stream without building an
+intermediate dict per result. The bytes produced are identical to
+json.dumps(output) so the Node bridge sees the same schema and formatting.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii as _quote
+from typing import Any, Dict, Iterable, TextIO, Union
+
+from .base import ScraperResult
+
+# Field order of a serialized result (matches ScraperResult.to_dict)
+RESULT_FIELDS = (
+    'store_id', 'store_name', 'item_name', 'price',
+    'unit', 'product_url', 'notes', 'collected_at',
+    'price_cents', 'unit_quantity', 'unit_measure', 'unit_price_cents',
+    'details', 'product_group',
+)
+
+# Pre-encoded '"key": ' prefixes, one per field
+_KEY_PREFIXES = tuple(_quote(field) + ': ' for field in RESULT_FIELDS)
+
+
+def result_values(result: ScraperResult) -> tuple:
+    return (
+        result.store_id,
+        result.store_name,
+        result.item_name,
+        result.price,
+        result.unit,
+        result.product_url,
+        result.notes,
+        result.collected_at_str,
+        result.price_cents,
+        result.unit_quantity,
+        result.unit_measure,
+        result.unit_price_cents,
+        result.details,
+        result.product_group,
+    )
+
+
+def encode_result(result: Union[ScraperResult, Dict[str, Any]]) -> str:
+    """Encode a single result as a JSON object string."""
+    if not isinstance(result, ScraperResult):
+        return json.dumps(result)
+
+    parts = []
+    for prefix, value in zip(_KEY_PREFIXES, result_values(result)):
+        parts.append(prefix + (_quote(value) if isinstance(value, str) else json.dumps(value)))
+    return '{' + ', '.join(parts) + '}'
+
+
+def write_results(results: Iterable[Union[ScraperResult, Dict[str, Any]]], stream: TextIO) -> int:
+    """
+    Write results as a JSON array to stream.
+    Returns the number of results written.
+    """
+    write = stream.write
+    write('[')
+    count = 0
+    for result in results:
+        if count:
+            write(', ')
+        write(encode_result(result))
+        count += 1
+    write(']')
+    return count
+
+
+def write_output(output: Dict[str, Any], stream: TextIO) -> None:
+    """
+    Write the run_scrape output envelope to stream.
+
+    'results' may hold ScraperResult objects, which are encoded directly;
+    every other key is passed through json.dumps.
+    """
+    write = stream.write
+    write('{')
+    first = True
+    for key, value in output.items():
+        if not first:
+            write(', ')
+        first = False
+        write(_quote(key) + ': ')
+        if key == 'results':
+            write_results(value, stream)
+        else:
+            write(json.dumps(value))
+    write('}\n')
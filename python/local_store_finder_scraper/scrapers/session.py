@@ -0,0 +1,455 @@
+"""
+HTTP Session and Response Cache
+
+All requests-mode page fetches go through one shared HttpSession, which
+keeps connections alive and, when a cache directory is configured, acts
+as a private HTTP cache:
+
+- Response bodies are stored zlib-compressed on disk, addressed by their
+  SHA-256, next to their validators (ETag, Last-Modified) and freshness
+  lifetime (Cache-Control max-age, Expires).
+- Fresh entries are served without touching the network.
+- Stale entries are revalidated with If-None-Match/If-Modified-Since; a
+  304 reuses the stored body.
+- Extracted results are cached by body hash, so an unchanged page is not
+  parsed again.
+
+Enable with --http-cache or SCRAPER_HTTP_CACHE_PATH.
+
+Connection setup (DNS cache, TLS session reuse, timings) is handled by
+scrapers.transport; the optional HTTP/2 client (--http2) by
+scrapers.http2. Requests honour the current CancelToken
+(scrapers.cancel).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .base import ScraperResult, USER_AGENT
+from .cancel import Cancelled, current_token
+from .http2 import create_client, requests_accept_encoding
+from .transport import Transport, TransportAdapter
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    encoding TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    validated_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parsed (
+    parse_key TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    results TEXT NOT NULL
+);
+"""
+
+# zlib level for stored bodies; HTML compresses ~8x at this level
+BODY_COMPRESSION_LEVEL = 6
+
+# Per-host timeout when prewarming connections (seconds)
+PREWARM_TIMEOUT = 5
+
+
+class FetchResult(NamedTuple):
+    """
+    A fetched page.
+
+    status is 'fetched' (full response from the origin), 'revalidated'
+    (304, stored body reused) or 'fresh' (served from cache without a
+    request). validated_at is when the origin last confirmed the body.
+    body_hash is empty when the body isn't cached (no cache configured,
+    or the response was no-store).
+    """
+    body: bytes
+    encoding: str
+    body_hash: str
+    status: str
+    validated_at: float
+
+
+class CacheEntry(NamedTuple):
+    body_hash: str
+    encoding: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated_at: float
+    expires_at: float
+
+
+def parse_cache_control(header: str) -> Dict[str, Optional[str]]:
+    """Split a Cache-Control header into {directive: value or None}."""
+    directives = {}
+    for part in (header or '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') if value else None
+    return directives
+
+
+def freshness_lifetime(headers, now: float) -> Optional[float]:
+    """
+    Seconds a response stays fresh, from Cache-Control max-age (minus Age)
+    or Expires. Returns None if it must not be stored (no-store), and 0 if
+    it must be revalidated before every use.
+    """
+    directives = parse_cache_control(headers.get('Cache-Control', ''))
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0.0
+
+    age = _to_float(headers.get('Age')) or 0.0
+    max_age = _to_float(directives.get('max-age'))
+    if max_age is not None:
+        return max(0.0, max_age - age)
+
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0  # Invalid Expires means already expired
+    return 0.0
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_key(scraper: str, body_hash: str, store_id: str, store_name: str,
+              search_url: str, query: str, max_results: int) -> str:
+    """Key for the extraction of one page body for one search."""
+    raw = '\x1f'.join((scraper, body_hash, store_id, store_name, search_url, query, str(max_results)))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk HTTP response cache plus cached extractions per body hash.
+
+    Layout: <path>/meta.db (validators, freshness, extractions) and
+    <path>/bodies/<sha256>.z (compressed bodies, shared by URLs with
+    identical content). Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.bodies_dir = os.path.join(path, 'bodies')
+        os.makedirs(self.bodies_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(path, 'meta.db'), check_same_thread=False, timeout=10
+        )
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.bodies_dir, f'{body_hash}.z')
+
+    def entry(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                '''
+                SELECT body_hash, encoding, etag, last_modified, validated_at, expires_at
+                FROM responses WHERE url = ?
+                ''',
+                (url,)
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def read_body(self, body_hash: str) -> Optional[bytes]:
+        """Stored body for a hash, or None if the file is missing or corrupt."""
+        try:
+            with open(self._body_path(body_hash), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def store(self, url: str, body: bytes, encoding: str, etag: Optional[str],
+              last_modified: Optional[str], now: float, lifetime: float) -> str:
+        """Store a full response. Returns the body hash."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not os.path.exists(body_path):
+            tmp_path = f'{body_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(body, BODY_COMPRESSION_LEVEL))
+            os.replace(tmp_path, body_path)
+
+        with self._lock, self._conn:
+            old = self._conn.execute(
+                'SELECT body_hash FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            self._conn.execute(
+                '''
+                INSERT OR REPLACE INTO responses
+                    (url, body_hash, encoding, etag, last_modified, validated_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                (url, body_hash, encoding, etag, last_modified, now, now + lifetime)
+            )
+            if old and old[0] != body_hash:
+                self._drop_body(old[0])
+        return body_hash
+
+    def revalidated(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                    now: float, lifetime: float) -> None:
+        """Record a 304: the stored body is current for another lifetime."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                '''
+                UPDATE responses
+                SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),
+                    validated_at = ?, expires_at = ?
+                WHERE url = ?
+                ''',
+                (etag, last_modified, now, now + lifetime, url)
+            )
+
+    def forget(self, url: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT body_hash FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+            if row:
+                self._drop_body(row[0])
+
+    def _drop_body(self, body_hash: str) -> None:
+        """Delete a body and its extractions once no URL references it. Caller holds the lock."""
+        still_used = self._conn.execute(
+            'SELECT 1 FROM responses WHERE body_hash = ? LIMIT 1', (body_hash,)
+        ).fetchone()
+        if still_used:
+            return
+        self._conn.execute('DELETE FROM parsed WHERE body_hash = ?', (body_hash,))
+        try:
+            os.remove(self._body_path(body_hash))
+        except OSError:
+            pass
+
+    def get_parsed(self, key: str) -> Optional[List[ScraperResult]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT results FROM parsed WHERE parse_key = ?', (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return [ScraperResult.from_state(state) for state in json.loads(row[0])]
+
+    def put_parsed(self, key: str, body_hash: str, results: List[ScraperResult]) -> None:
+        payload = json.dumps([r.to_state() for r in results])
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO parsed (parse_key, body_hash, results) VALUES (?, ?, ?)',
+                (key, body_hash, payload)
+            )
+
+
+class HttpSession:
+    """
+    Keep-alive HTTP session with an optional HttpCache underneath.
+    Connections go through a Transport (DNS cache, TLS session reuse,
+    connection timings), or with http2 through an Http2Client that
+    multiplexes requests to each host over one connection.
+    accept_encoding is the Accept-Encoding the active client can decode.
+
+    get() raises requests exceptions on network errors and non-2xx
+    responses, like requests.get().raise_for_status(), and
+    scrapers.cancel.Cancelled once the current token is cancelled.
+    """
+
+    def __init__(self, cache: Optional[HttpCache] = None, transport: Optional[Transport] = None,
+                 http2: bool = False):
+        import requests
+
+        self.cache = cache
+        self.transport = transport or Transport()
+        self._session = requests.Session()
+        adapter = TransportAdapter(self.transport)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self.http2 = create_client(self._session) if http2 else None
+        self.accept_encoding = self.http2.accept_encoding if self.http2 else requests_accept_encoding()
+
+    def _request(self, method: str, url: str, headers: Dict[str, str], timeout: float,
+                 allow_redirects: bool = True):
+        """
+        Send a request, or raise Cancelled if the current token is (or
+        gets) cancelled. Over HTTP/1.1 a cancel shuts down the socket
+        mid-request; HTTP/2 requests are left to finish first.
+        """
+        import requests
+
+        token = current_token()
+        token.raise_if_cancelled()
+        if self.http2 is not None:
+            response = self.http2.request(method, url, headers, timeout, allow_redirects)
+            token.raise_if_cancelled()
+            return response
+
+        self.transport.untrack()
+        try:
+            with token.on_cancel(functools.partial(self.transport.interrupt, threading.get_ident())):
+                return self._session.request(method, url, headers=headers, timeout=timeout,
+                                             allow_redirects=allow_redirects)
+        except requests.RequestException:
+            if token.cancelled:
+                raise Cancelled(token.reason) from None
+            raise
+        finally:
+            self.transport.untrack()
+
+    def prewarm(self, urls: Sequence[str], timeout: float = PREWARM_TIMEOUT) -> int:
+        """
+        Resolve and connect to each URL's host ahead of the first scrape,
+        leaving an open connection (and TLS session) behind.
+        Returns the number of hosts reached.
+        """
+        import requests
+
+        origins = list(dict.fromkeys(
+            f'{parts.scheme}://{parts.netloc}/'
+            for parts in map(urlsplit, urls) if parts.scheme in ('http', 'https') and parts.netloc
+        ))
+
+        def warm(origin: str) -> bool:
+            try:
+                self._request('HEAD', origin, {'User-Agent': USER_AGENT}, timeout,
+                              allow_redirects=False)
+                return True
+            except requests.RequestException as e:
+                logger.warning("Prewarm failed for %s: %s", origin, e)
+                return False
+
+        if not origins:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(len(origins), 8)) as pool:
+            reached = sum(pool.map(warm, origins))
+        logger.info("Prewarmed %s/%s store hosts", reached, len(origins))
+        return reached
+
+    def close(self) -> None:
+        self._session.close()
+        if self.http2 is not None:
+            self.http2.close()
+        if self.cache:
+            self.cache.close()
+
+    def drop_connections(self) -> None:
+        """Close pooled connections; DNS and TLS session caches are kept."""
+        self._session.close()
+        if self.http2 is not None:
+            self.http2.drop_connections()
+
+    def get(self, url: str, headers: Dict[str, str], timeout: float) -> FetchResult:
+        now = time.time()
+        if self.cache is None:
+            response = self._request('GET', url, headers, timeout)
+            response.raise_for_status()
+            return FetchResult(response.content, _encoding_of(response), '', 'fetched', now)
+
+        entry = self.cache.entry(url)
+        stored = None
+        if entry:
+            stored = self.cache.read_body(entry.body_hash)
+            if stored is None:
+                self.cache.forget(url)
+                entry = None
+            elif entry.expires_at > now:
+                return FetchResult(stored, entry.encoding, entry.body_hash, 'fresh', entry.validated_at)
+
+        request_headers = dict(headers)
+        if entry:
+            if entry.etag:
+                request_headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request_headers['If-Modified-Since'] = entry.last_modified
+
+        response = self._request('GET', url, request_headers, timeout)
+        lifetime = freshness_lifetime(response.headers, now)
+
+        if response.status_code == 304 and entry:
+            if lifetime is None:
+                self.cache.forget(url)
+            else:
+                self.cache.revalidated(
+                    url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                    now, lifetime
+                )
+            return FetchResult(stored, entry.encoding, entry.body_hash, 'revalidated', now)
+
+        response.raise_for_status()
+        body = response.content
+        encoding = _encoding_of(response)
+        if lifetime is None:
+            self.cache.forget(url)
+            return FetchResult(body, encoding, '', 'fetched', now)
+
+        body_hash = self.cache.store(
+            url, body, encoding, response.headers.get('ETag'),
+            response.headers.get('Last-Modified'), now, lifetime
+        )
+        return FetchResult(body, encoding, body_hash, 'fetched', now)
+
+
+def _encoding_of(response) -> str:
+    return response.encoding or response.apparent_encoding or 'utf-8'
+
+
+_default_session: Optional[HttpSession] = None
+_default_lock = threading.Lock()
+
+
+def _env_http2() -> bool:
+    return os.environ.get('SCRAPER_HTTP2', '') not in ('', '0')
+
+
+def configure_http_cache(path: Optional[str], http2: Optional[bool] = None) -> HttpSession:
+    """
+    Replace the shared session, caching under path (None disables caching)
+    and speaking HTTP/2 where hosts offer it if http2 (None: SCRAPER_HTTP2).
+    """
+    global _default_session
+    with _default_lock:
+        if _default_session is not None:
+            _default_session.close()
+        _default_session = HttpSession(
+            HttpCache(path) if path else None, http2=_env_http2() if http2 is None else http2
+        )
+        return _default_session
+
+
+def default_session() -> HttpSession:
+    """The shared session, created on first use from SCRAPER_HTTP_CACHE_PATH and SCRAPER_HTTP2."""
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            path = os.environ.get('SCRAPER_HTTP_CACHE_PATH') or None
+            _default_session = HttpSession(HttpCache(path) if path else None, http2=_env_http2())
+        return _default_session
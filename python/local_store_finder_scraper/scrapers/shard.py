@@ -0,0 +1,368 @@
+"""
+Sharded Scrape Workers
+
+Spreads (store, query) jobs over N long-lived worker processes, keyed by
+store host:
+
+    supervisor --task per host--> worker process (own session, DNS/TLS
+                                  caches and browser for the hosts it owns)
+
+Hosts are assigned with rendezvous hashing, so every job for a host lands
+on the same worker and its connection pool stays warm. When a worker
+dies, only the hosts it owned move: its queued and in-flight tasks are
+re-sent to the new owners and a replacement is started under the same
+id, which takes those hosts back.
+
+Each task runs under a CancelToken of its own in the worker process; when
+the caller's token is cancelled, run() stops waiting and the workers
+cancel the tasks they are running.
+
+shard_key() and owner() are shared with scrapers.jobqueue, which uses the
+same assignment for workers on several machines.
+"""
+
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import CANCELLED_NOTES, ScraperResult
+from .cancel import CancelToken, Cancelled, cancel_scope, current_token
+from .ratelimit import host_of
+
+logger = logging.getLogger(__name__)
+
+# Tasks a worker process scrapes at once (each task is one host)
+DEFAULT_TASK_THREADS = 3
+
+# Times a task is re-sent after its worker died before it is given up
+MAX_TASK_ATTEMPTS = 3
+
+# Replacement processes started per worker slot
+MAX_RESTARTS = 5
+
+# Seconds to wait for a worker to exit on close()
+SHUTDOWN_TIMEOUT = 5
+
+Job = Tuple[Dict, str]
+ScrapeFn = Callable[[List[Job]], Tuple[List[List[ScraperResult]], List[str]]]
+
+
+def shard_key(store: Dict) -> str:
+    """Sharding key for a store: its host, the same key rate limits use."""
+    return host_of(store.get('base_url') or store.get('search_url_template', ''))
+
+
+def owner(key: str, workers: Sequence[str]) -> Optional[str]:
+    """
+    The worker that owns key (highest rendezvous weight), or None if
+    there are no workers. Removing a worker only moves the keys it owned.
+    """
+    best, best_weight = None, b''
+    for worker in workers:
+        weight = hashlib.blake2b(f'{worker}\0{key}'.encode('utf-8'), digest_size=8).digest()
+        if best is None or weight > best_weight:
+            best, best_weight = worker, weight
+    return best
+
+
+def group_jobs(jobs: Sequence[Job]) -> Dict[str, List[int]]:
+    """Job indexes grouped by shard key, in first-seen order."""
+    groups: Dict[str, List[int]] = {}
+    for i, (store, _) in enumerate(jobs):
+        groups.setdefault(shard_key(store), []).append(i)
+    return groups
+
+
+def failed_results(jobs: Sequence[Job], notes: str) -> List[List[ScraperResult]]:
+    """One placeholder result per job, for jobs no worker could finish."""
+    return [[ScraperResult(
+        store_id=store.get('id', ''),
+        store_name=store.get('name', 'Unknown'),
+        item_name=query,
+        product_url=store.get('base_url', ''),
+        notes=notes
+    )] for store, query in jobs]
+
+
+def _worker_main(worker_id: str, tasks, done, scrape: ScrapeFn,
+                 initializer: Optional[Callable], initargs: tuple) -> None:
+    """
+    Worker process: scrape tasks from `tasks` until a None arrives, then
+    cancel the ones still running. A (task id, None) message cancels
+    that task.
+    """
+    if initializer is not None:
+        initializer(*initargs)
+    running: Dict[int, CancelToken] = {}
+
+    def run(task_id: int, jobs: List[Job], token: CancelToken) -> None:
+        try:
+            with cancel_scope(token):
+                job_results, errors = scrape(jobs)
+        except Exception as e:
+            logger.exception("Worker %s task failed", worker_id)
+            job_results, errors = failed_results(jobs, f"Scraping error: {str(e)[:100]}"), []
+        finally:
+            running.pop(task_id, None)
+        done.put((worker_id, task_id, job_results, errors))
+
+    with ThreadPoolExecutor(max_workers=DEFAULT_TASK_THREADS) as pool:
+        while True:
+            task = tasks.get()
+            if task is None:
+                for token in list(running.values()):
+                    token.cancel('worker stopping')
+                break
+            task_id, jobs = task
+            if jobs is None:
+                if task_id in running:
+                    running[task_id].cancel('cancelled by supervisor')
+                continue
+            running[task_id] = CancelToken()
+            pool.submit(run, task_id, jobs, running[task_id])
+
+
+class _Task:
+    """Jobs for one host, sent to one worker at a time."""
+
+    __slots__ = ('id', 'key', 'jobs', 'future', 'attempts', 'worker')
+
+    def __init__(self, task_id: int, key: str, jobs: List[Job]):
+        self.id = task_id
+        self.key = key
+        self.jobs = jobs
+        self.future: Future = Future()
+        self.attempts = 0
+        self.worker: Optional[str] = None
+
+
+class _WorkerSlot:
+    """A worker id and its current process."""
+
+    def __init__(self, worker_id: str):
+        self.id = worker_id
+        self.process: Optional[multiprocessing.Process] = None
+        self.tasks = None
+        self.pending: Dict[int, _Task] = {}
+        self.completed = 0
+        self.restarts = 0
+        self.high_water = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """
+    Runs scrape jobs on `workers` processes, sharded by store host.
+
+    Args:
+        scrape: Picklable function run in the workers; takes a list of
+            (store, query) jobs, returns (one result list per job, errors)
+        workers: Worker processes
+        initializer: Called with initargs in each worker at startup
+        task_timeout: Seconds run() waits for any one task
+
+    Use as a context manager, or call close().
+    """
+
+    def __init__(
+        self,
+        scrape: ScrapeFn,
+        workers: int,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        task_timeout: float = 120
+    ):
+        self.scrape = scrape
+        self.initializer = initializer
+        self.initargs = initargs
+        self.task_timeout = task_timeout
+        # Workers are spawned, not forked: replacements start while the
+        # supervisor's threads run, and a fresh interpreter doesn't inherit
+        # the parent's sessions or open databases
+        self._ctx = multiprocessing.get_context('spawn')
+        self._done = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = threading.Event()
+        self._slots = {f'worker-{i}': _WorkerSlot(f'worker-{i}') for i in range(max(1, workers))}
+        for slot in self._slots.values():
+            self._start(slot)
+
+        self._threads = [
+            threading.Thread(target=self._collect, name='shard-collector', daemon=True),
+            threading.Thread(target=self._monitor, name='shard-monitor', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Started %s shard workers", len(self._slots))
+
+    def __enter__(self) -> 'Supervisor':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self, slot: _WorkerSlot) -> None:
+        # A fresh queue each time: anything left in a dead worker's queue
+        # has already been re-sent elsewhere
+        slot.tasks = self._ctx.Queue()
+        slot.process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot.id, slot.tasks, self._done, self.scrape, self.initializer, self.initargs),
+            name=f'scrape-{slot.id}',
+            daemon=True
+        )
+        slot.process.start()
+
+    def _live(self) -> List[str]:
+        return [slot.id for slot in self._slots.values() if slot.alive]
+
+    def _send(self, task: _Task) -> None:
+        """Queue task on the live owner of its host. Call with the lock held."""
+        worker = owner(task.key, self._live())
+        if worker is None or task.attempts >= MAX_TASK_ATTEMPTS:
+            task.future.set_result((failed_results(task.jobs, "Scrape worker unavailable"), []))
+            return
+        task.attempts += 1
+        task.worker = worker
+        slot = self._slots[worker]
+        slot.pending[task.id] = task
+        slot.high_water = max(slot.high_water, len(slot.pending))
+        slot.tasks.put((task.id, task.jobs))
+
+    def run(self, jobs: Sequence[Job]) -> Tuple[List[List[ScraperResult]], List[str]]:
+        """
+        Scrape every (store, query) job on the worker owning its host.
+        Returns (one result list per job, in job order; errors). If the
+        current CancelToken is cancelled, the workers are told to cancel
+        their tasks and unfinished jobs get placeholder results.
+        """
+        tasks = []
+        with self._lock:
+            for key, indexes in group_jobs(jobs).items():
+                task = _Task(next(self._ids), key, [jobs[i] for i in indexes])
+                self._send(task)
+                tasks.append((task, indexes))
+
+        job_results: List[List[ScraperResult]] = [[] for _ in jobs]
+        errors: List[str] = []
+        token = current_token()
+        deadline = time.monotonic() + self.task_timeout
+        for task, indexes in tasks:
+            try:
+                results, task_errors = token.result(task.future, timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                logger.warning("Timeout waiting for %s on %s", task.key, task.worker)
+                results, task_errors = failed_results(task.jobs, "Scraping timed out"), []
+            except Cancelled:
+                self._cancel(task)
+                results, task_errors = failed_results(task.jobs, CANCELLED_NOTES), []
+            for i, result in zip(indexes, results):
+                job_results[i] = result
+            errors.extend(task_errors)
+        return job_results, errors
+
+    def _cancel(self, task: _Task) -> None:
+        """Ask the worker running task to cancel it; its result is still collected."""
+        with self._lock:
+            slot = self._slots.get(task.worker)
+            if not task.future.done() and slot is not None and slot.alive:
+                slot.tasks.put((task.id, None))
+
+    def _collect(self) -> None:
+        """Resolve tasks as workers report them done."""
+        while not self._closed.is_set():
+            try:
+                worker, task_id, results, errors = self._done.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                slot = self._slots[worker]
+                task = slot.pending.pop(task_id, None)
+                if task is None:
+                    # Already re-sent after this worker was taken for dead
+                    continue
+                slot.completed += 1
+            task.future.set_result((results, errors))
+
+    def _monitor(self) -> None:
+        """Re-send a dead worker's tasks and start its replacement."""
+        while not self._closed.is_set():
+            with self._lock:
+                sentinels = {slot.process.sentinel: slot for slot in self._slots.values() if slot.process}
+            if not sentinels:
+                self._closed.wait(0.5)
+                continue
+            ready = wait(list(sentinels), timeout=0.5)
+            if self._closed.is_set():
+                return
+            for sentinel in ready:
+                slot = sentinels[sentinel]
+                self._worker_died(slot)
+
+    def _worker_died(self, slot: _WorkerSlot) -> None:
+        with self._lock:
+            slot.process.join(1)
+            exitcode = slot.process.exitcode
+            orphans = list(slot.pending.values())
+            slot.pending.clear()
+            slot.process = None
+            logger.warning(
+                "Shard %s exited with %s; moving %s tasks to other workers",
+                slot.id, exitcode, len(orphans)
+            )
+            for task in orphans:
+                self._send(task)
+
+            if slot.restarts < MAX_RESTARTS:
+                slot.restarts += 1
+                self._start(slot)
+            else:
+                logger.error("Shard %s restarted %s times; leaving it down", slot.id, slot.restarts)
+
+    def stats(self) -> List[Dict]:
+        """Per-worker state: pid, liveness, queued tasks and totals."""
+        with self._lock:
+            return [{
+                'worker': slot.id,
+                'pid': slot.process.pid if slot.process else None,
+                'alive': slot.alive,
+                'queue_depth': len(slot.pending),
+                'queue_high_water': slot.high_water,
+                'completed': slot.completed,
+                'restarts': slot.restarts,
+            } for slot in self._slots.values()]
+
+    def close(self) -> None:
+        """Stop the workers, failing any tasks still pending."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        for thread in self._threads:
+            thread.join()
+        with self._lock:
+            for slot in self._slots.values():
+                if slot.process is None:
+                    continue
+                slot.tasks.put(None)
+            for slot in self._slots.values():
+                if slot.process is None:
+                    continue
+                slot.process.join(SHUTDOWN_TIMEOUT)
+                if slot.process.is_alive():
+                    slot.process.terminate()
+                for task in slot.pending.values():
+                    task.future.set_result((failed_results(task.jobs, "Scrape worker stopped"), []))
+                slot.pending.clear()
@@ -0,0 +1,351 @@
+"""
+Learned Page Templates
+
+Stores without a scraper of their own are parsed by BaseScraper, which
+has no idea of their markup. Rather than trying every generic container
+and field selector on every page, the first page from a new host is used
+to learn a template:
+
+- Price texts are located, and the repeated subtree around them (the
+  ancestor that recurs with the same tag and class under one parent,
+  once per price) is taken as the product card.
+- Within each card the title (most prominent non-price text), price and
+  link elements are located. Their paths from the card are compared, and
+  the path most cards agree on becomes the slot's selector.
+
+Templates are cached per host with their selectors compiled once, so
+later pages go straight to the cards and their slots. When too few cards
+on a page fill their title and price slots, the page is learned again
+and the new template replaces the old one.
+
+Templates live in memory per process, and also in a SQLite table shared
+by every process when a path is configured (--templates).
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .pricing import normalize_price
+from .ratelimit import host_of
+
+logger = logging.getLogger(__name__)
+
+# Fewest repeated cards that make a product grid
+MIN_CARDS = 3
+
+# Share of a page's cards that must fill the title and price slots;
+# below it the page is learned again
+MIN_HIT_RATE = 0.6
+
+_PRICE_TEXT_RE = re.compile(r'\$\s*\d|\d\s*(?:¢|cents?\b)', re.IGNORECASE)
+
+# Classes with digits are usually per-item (ids, positions), not structure
+_UNSTABLE_CLASS_RE = re.compile(r'\d')
+
+_HEADINGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_SKIP_TAGS = frozenset({'script', 'style', 'noscript', 'button', 'svg', 'img', 'input', 'select'})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS templates (
+    host TEXT PRIMARY KEY,
+    template TEXT NOT NULL,
+    learned_at REAL NOT NULL
+);
+"""
+
+
+class PageTemplate(NamedTuple):
+    """
+    Selectors for one host's search pages. Slot selectors are relative to
+    the card; an empty one means the card element itself.
+    """
+    card: str
+    title: str
+    price: str
+    link: str
+
+
+class Card(NamedTuple):
+    """A product card matched by a template."""
+    element: object
+    title: str
+    price_text: str
+    href: str
+
+
+def _classes(elem) -> List[str]:
+    return [c for c in elem.get('class') or [] if not _UNSTABLE_CLASS_RE.search(c)]
+
+
+def _step(elem, classes: Optional[List[str]] = None) -> str:
+    import soupsieve
+
+    classes = _classes(elem) if classes is None else classes
+    return elem.name + ''.join('.' + soupsieve.escape(c) for c in classes)
+
+
+def _path(card, elem) -> str:
+    """Selector for elem relative to card ('' for the card itself)."""
+    steps = []
+    while elem is not None and elem is not card:
+        steps.append(_step(elem))
+        elem = elem.parent
+    return ':scope > ' + ' > '.join(reversed(steps)) if steps else ''
+
+
+def _find_cards(soup) -> list:
+    """The largest group of same-looking siblings that each hold a price."""
+    groups: Dict[Tuple[int, str], Dict[int, object]] = {}
+    depths: Dict[Tuple[int, str], int] = {}
+    for text in soup.find_all(string=_PRICE_TEXT_RE):
+        elem = text.parent
+        if elem is None or elem.name in _SKIP_TAGS:
+            continue
+        chain = [elem] + [p for p in elem.parents if p.name not in ('body', 'html', '[document]')]
+        for depth, ancestor in enumerate(reversed(chain)):
+            if ancestor.parent is None:
+                continue
+            classes = _classes(ancestor)
+            key = (id(ancestor.parent), ancestor.name + ('.' + classes[0] if classes else ''))
+            groups.setdefault(key, {})[id(ancestor)] = ancestor
+            depths[key] = depth
+    if not groups:
+        return []
+    # Most members wins; among equals, the innermost (tightest) card
+    key = max(groups, key=lambda k: (len(groups[k]), depths[k]))
+    return list(groups[key].values())
+
+
+def _card_selector(soup, cards: list) -> str:
+    shared = set(_classes(cards[0]))
+    for card in cards[1:]:
+        shared &= set(_classes(card))
+    card_step = _step(cards[0], [c for c in _classes(cards[0]) if c in shared])
+    container = cards[0].parent
+    container_step = _step(container)
+    if container.get('id') and not _UNSTABLE_CLASS_RE.search(container['id']):
+        import soupsieve
+        container_step = f"{container.name}#{soupsieve.escape(container['id'])}"
+
+    # The tightest selector that still matches every card
+    for selector in (f"{container_step} > {card_step}", card_step):
+        if len(soup.select(selector)) == len(cards):
+            return selector
+    return f"{container_step} > {card_step}"
+
+
+def _price_element(card):
+    for text in card.find_all(string=_PRICE_TEXT_RE):
+        elem = text.parent
+        if elem is not None and elem.name not in _SKIP_TAGS and \
+                normalize_price(elem.get_text(' ', strip=True)).cents is not None:
+            return elem
+    return None
+
+
+def _title_element(card):
+    """The card's most prominent non-price text: longest, favouring headings and links."""
+    best, best_score = None, 0.0
+    for elem in card.find_all(True):
+        if elem.name in _SKIP_TAGS or elem.find_parent(_SKIP_TAGS) is not None:
+            continue
+        text = elem.get_text(' ', strip=True)
+        if len(text) < 3 or _PRICE_TEXT_RE.search(text):
+            continue
+        # Take the innermost element carrying the text
+        if any(child.get_text(' ', strip=True) == text for child in elem.find_all(True, recursive=False)):
+            continue
+        classes = ' '.join(elem.get('class') or []).lower()
+        score = len(text.split()) + min(len(text), 150) / 50
+        if elem.name in _HEADINGS:
+            score += 5
+        if 'title' in classes or 'name' in classes:
+            score += 3
+        if elem.name == 'a' or elem.find_parent('a') is not None:
+            score += 2
+        if score > best_score:
+            best, best_score = elem, score
+    return best
+
+
+def _link_element(card, title):
+    if card.name == 'a' and card.get('href'):
+        return card
+    if title is not None:
+        link = title if title.name == 'a' else title.find_parent('a')
+        if link is not None and link.get('href') and any(p is card for p in link.parents):
+            return link
+        link = title.find('a', href=True)
+        if link is not None:
+            return link
+    return card.find('a', href=True)
+
+
+def learn_template(soup) -> Optional[PageTemplate]:
+    """Learn a template from a search results page, or None if no product grid is found."""
+    cards = _find_cards(soup)
+    if len(cards) < MIN_CARDS:
+        return None
+
+    titles, prices, links = Counter(), Counter(), Counter()
+    for card in cards:
+        price = _price_element(card)
+        title = _title_element(card)
+        link = _link_element(card, title)
+        if price is not None:
+            prices[_path(card, price)] += 1
+        if title is not None:
+            titles[_path(card, title)] += 1
+        if link is not None:
+            links[_path(card, link)] += 1
+    if not titles or not prices:
+        return None
+
+    return PageTemplate(
+        card=_card_selector(soup, cards),
+        title=titles.most_common(1)[0][0],
+        price=prices.most_common(1)[0][0],
+        link=links.most_common(1)[0][0] if links else '',
+    )
+
+
+@lru_cache(maxsize=1024)
+def _compiled(template: PageTemplate) -> tuple:
+    import soupsieve
+
+    return tuple(soupsieve.compile(s) if s else None for s in template)
+
+
+def _select_one(pattern, card):
+    return card if pattern is None else pattern.select_one(card)
+
+
+def extract_cards(soup, template: PageTemplate) -> Tuple[List[Card], float]:
+    """
+    Apply a template to a page. Returns the cards found and the share of
+    them whose title and price slots matched.
+    """
+    card_pattern, title_pattern, price_pattern, link_pattern = _compiled(template)
+    cards = []
+    hits = 0
+    elements = card_pattern.select(soup)
+    for elem in elements:
+        title = _select_one(title_pattern, elem)
+        price = _select_one(price_pattern, elem)
+        link = _select_one(link_pattern, elem)
+        title_text = title.get_text(' ', strip=True) if title is not None else ''
+        price_text = price.get_text(' ', strip=True) if price is not None else ''
+        if title_text and price_text:
+            hits += 1
+        cards.append(Card(elem, title_text, price_text, (link.get('href') or '') if link is not None else ''))
+    return cards, (hits / len(elements) if elements else 0.0)
+
+
+class TemplateStore:
+    """
+    Learned templates per host, in memory and optionally in SQLite.
+
+    Safe to share between threads; processes may share one database.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._templates: Dict[str, PageTemplate] = {}
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """This process's connection (parse workers are forked with the store)."""
+        if self.path and self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
+
+    def get(self, host: str) -> Optional[PageTemplate]:
+        with self._lock:
+            template = self._templates.get(host)
+            conn = self._connection() if template is None else None
+            if conn is not None:
+                row = conn.execute('SELECT template FROM templates WHERE host = ?', (host,)).fetchone()
+                if row:
+                    template = self._templates[host] = PageTemplate(*json.loads(row[0]))
+            return template
+
+    def put(self, host: str, template: PageTemplate) -> None:
+        with self._lock:
+            self._templates[host] = template
+            conn = self._connection()
+            if conn is not None:
+                with conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO templates (host, template, learned_at) VALUES (?, ?, ?)',
+                        (host, json.dumps(template), time.time())
+                    )
+
+    def cards(self, soup, search_url: str) -> Optional[List[Card]]:
+        """
+        Product cards on a page from search_url's host, learning (or
+        re-learning) the host's template as needed. None if no template
+        fits the page.
+        """
+        host = host_of(search_url)
+        template = self.get(host)
+        cards: List[Card] = []
+        if template is not None:
+            cards, hit_rate = extract_cards(soup, template)
+            if cards and hit_rate >= MIN_HIT_RATE:
+                return cards
+            logger.info("Template for %s matched %.0f%% of %s cards, re-learning", host, hit_rate * 100, len(cards))
+
+        learned = learn_template(soup)
+        if learned is None:
+            return cards or None
+        learned_cards, hit_rate = extract_cards(soup, learned)
+        if hit_rate < MIN_HIT_RATE:
+            return cards or None
+        if learned != template:
+            logger.info("Learned template for %s: %s", host, learned.card)
+            self.put(host, learned)
+        return learned_cards
+
+
+_default_store: Optional[TemplateStore] = None
+_default_lock = threading.Lock()
+
+
+def configure_templates(path: Optional[str]) -> TemplateStore:
+    """Keep learned templates in path from now on (None keeps them in memory)."""
+    global _default_store
+    with _default_lock:
+        if _default_store is not None:
+            _default_store.close()
+        _default_store = TemplateStore(path)
+        return _default_store
+
+
+def default_templates() -> TemplateStore:
+    """The shared template store, opened on first use from SCRAPER_TEMPLATE_PATH."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = TemplateStore(os.environ.get('SCRAPER_TEMPLATE_PATH') or None)
+        return _default_store
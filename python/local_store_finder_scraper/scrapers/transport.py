@@ -0,0 +1,273 @@
+"""
+Connection Transport
+
+Connection setup for the shared HttpSession, mounted as a requests
+adapter:
+
+- DnsCache: TTL'd in-process cache of getaddrinfo() results, so each new
+  connection to a store host doesn't pay for a lookup
+- TLS session resumption: sessions are kept per hostname and offered on
+  the next handshake, which turns repeat handshakes into abbreviated ones
+- The CA bundle is loaded into the SSL context once, not on every connect
+- ConnectionStats: DNS, TCP connect and TLS handshake time per connection,
+  so the effect of the caches can be measured
+- interrupt(): shuts down the socket a thread is blocked on, for
+  cancellation (scrapers.cancel)
+
+These matter most in worker mode (run_scrape.py --worker), where one
+process serves many requests and prewarms connections at startup.
+"""
+
+import os
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util import connection
+
+DEFAULT_DNS_TTL = float(os.environ.get('SCRAPER_DNS_TTL', '300') or 300)  # seconds
+
+
+class DnsCache:
+    """getaddrinfo() results per (host, port), kept for ttl seconds. Thread-safe."""
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[tuple]:
+        """Address records for host:port. Raises socket.gaierror on failure (not cached)."""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        records = socket.getaddrinfo(host, port, connection.allowed_gai_family(), socket.SOCK_STREAM)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, records)
+        return records
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ConnectionStats:
+    """Cumulative connection setup timings. Thread-safe."""
+
+    FIELDS = ('connections', 'dns_s', 'connect_s', 'tls_handshakes', 'tls_s', 'tls_resumed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = dict.fromkeys(self.FIELDS, 0)
+
+    def record_connect(self, dns_s: float, connect_s: float) -> None:
+        with self._lock:
+            self._totals['connections'] += 1
+            self._totals['dns_s'] += dns_s
+            self._totals['connect_s'] += connect_s
+
+    def record_tls(self, tls_s: float, resumed: bool) -> None:
+        with self._lock:
+            self._totals['tls_handshakes'] += 1
+            self._totals['tls_s'] += tls_s
+            self._totals['tls_resumed'] += int(resumed)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+    @staticmethod
+    def report(after: Dict[str, float], before: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Connection setup between two snapshots, as output-friendly numbers:
+        counts plus total dns/connect/tls milliseconds.
+        """
+        before = before or {}
+        delta = {k: after[k] - before.get(k, 0) for k in after}
+        return {
+            'connections': delta['connections'],
+            'dns_ms': round(delta['dns_s'] * 1000, 2),
+            'connect_ms': round(delta['connect_s'] * 1000, 2),
+            'tls_handshakes': delta['tls_handshakes'],
+            'tls_ms': round(delta['tls_s'] * 1000, 2),
+            'tls_resumed': delta['tls_resumed'],
+        }
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSL context that offers the last session seen for a hostname."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.sessions: Dict[str, ssl.SSLSession] = {}
+        self.loaded_ca_files = set()
+        self._ca_lock = threading.Lock()
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and server_hostname:
+            session = self.sessions.get(server_hostname)
+        return super().wrap_socket(
+            sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname,
+            session=session
+        )
+
+    def remember(self, hostname: str, sock) -> None:
+        """Keep a connection's session for the next handshake to hostname."""
+        try:
+            session = sock.session
+        except (AttributeError, ValueError, OSError):
+            return
+        if session is not None:
+            self.sessions[hostname] = session
+
+    def load_ca_file(self, path: str) -> None:
+        """Load a CA bundle once; later connections reuse the parsed store."""
+        with self._ca_lock:
+            if path not in self.loaded_ca_files:
+                self.load_verify_locations(cafile=path)
+                self.loaded_ca_files.add(path)
+
+
+def create_ssl_context() -> ResumingSSLContext:
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    return context
+
+
+class Transport:
+    """DNS cache, SSL context and timings shared by one session's connections."""
+
+    def __init__(self, dns_ttl: float = DEFAULT_DNS_TTL):
+        self.dns = DnsCache(dns_ttl)
+        self.ssl_context = create_ssl_context()
+        self.stats = ConnectionStats()
+        self.pool_classes = _pool_classes(self)
+        # Connection each thread is sending on, by thread id
+        self._active: Dict[int, HTTPConnection] = {}
+
+    def track(self, conn: HTTPConnection) -> None:
+        """Note the connection the calling thread is sending a request on."""
+        self._active[threading.get_ident()] = conn
+
+    def untrack(self) -> None:
+        self._active.pop(threading.get_ident(), None)
+
+    def interrupt(self, thread_id: int) -> None:
+        """
+        Shut down the socket thread_id's request is using, so a blocked
+        read fails at once; urllib3 then discards the connection.
+        """
+        sock = getattr(self._active.get(thread_id), 'sock', None)
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Already closed
+
+
+class _TimedConnection:
+    """Connection mixin: resolves through the DnsCache and records timings."""
+
+    transport: Transport = None
+
+    def request(self, *args, **kwargs):
+        self.transport.track(self)
+        return super().request(*args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        start = time.perf_counter()
+        try:
+            records = self.transport.dns.resolve(self._dns_host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+
+        error: Optional[OSError] = None
+        for _, _, _, _, sockaddr in records:
+            try:
+                sock = connection.create_connection(
+                    (sockaddr[0], self.port),
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options,
+                )
+                break
+            except socket.timeout as e:
+                raise ConnectTimeoutError(
+                    self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+                ) from e
+            except OSError as e:
+                error = e
+        else:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {error}")
+
+        self._connected_at = time.perf_counter()
+        self.transport.stats.record_connect(resolved - start, self._connected_at - resolved)
+        return sock
+
+
+class _TimedTLSConnection(_TimedConnection):
+    """HTTPS connection mixin: times the handshake and keeps the TLS session."""
+
+    def connect(self) -> None:
+        super().connect()
+        if isinstance(self.sock, ssl.SSLSocket):
+            self.transport.stats.record_tls(
+                time.perf_counter() - self._connected_at, self.sock.session_reused
+            )
+            self.transport.ssl_context.remember(self.host, self.sock)
+
+    def close(self) -> None:
+        # TLS 1.3 tickets arrive after the handshake; take the latest
+        # session before the socket goes away
+        if isinstance(self.sock, ssl.SSLSocket):
+            self.transport.ssl_context.remember(self.host, self.sock)
+        super().close()
+
+
+def _pool_classes(transport: Transport) -> dict:
+    """Connection pool classes whose connections use transport."""
+    http_conn = type('TimedHTTPConnection', (_TimedConnection, HTTPConnection), {'transport': transport})
+    https_conn = type('TimedHTTPSConnection', (_TimedTLSConnection, HTTPSConnection), {'transport': transport})
+    return {
+        'http': type('TimedHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+        'https': type('TimedHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn}),
+    }
+
+
+class TransportAdapter(HTTPAdapter):
+    """requests adapter whose connection pools use a Transport."""
+
+    def __init__(self, transport: Transport, **kwargs):
+        self.transport = transport
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('ssl_context', self.transport.ssl_context)
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.transport.pool_classes
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        # Load the bundle into the shared context once instead of having
+        # urllib3 re-read it on every new connection
+        if conn.ca_certs and conn.conn_kw.get('ssl_context') is self.transport.ssl_context:
+            self.transport.ssl_context.load_ca_file(conn.ca_certs)
+            conn.ca_certs = None
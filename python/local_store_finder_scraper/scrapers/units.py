@@ -0,0 +1,181 @@
+"""
+Unit Price Normalization
+
+Parses pack counts, weights, volumes and areas out of product names and
+per-unit price text, then computes a price per base unit so results from
+different stores can be compared directly.
+
+Base units per dimension:
+- weight: oz
+- volume: fl oz
+- count:  ct
+- area:   sq ft
+
+normalize_units() runs over the combined results of a whole job.
+"""
+
+import re
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from .base import ScraperResult
+
+# Unit spelling -> (base unit, factor to base unit)
+UNIT_FACTORS: Dict[str, Tuple[str, float]] = {
+    'oz': ('oz', 1.0),
+    'ounce': ('oz', 1.0),
+    'lb': ('oz', 16.0),
+    'lbs': ('oz', 16.0),
+    'pound': ('oz', 16.0),
+    'g': ('oz', 0.035274),
+    'gram': ('oz', 0.035274),
+    'kg': ('oz', 35.274),
+    'fl oz': ('fl oz', 1.0),
+    'gal': ('fl oz', 128.0),
+    'gallon': ('fl oz', 128.0),
+    'qt': ('fl oz', 32.0),
+    'quart': ('fl oz', 32.0),
+    'pt': ('fl oz', 16.0),
+    'pint': ('fl oz', 16.0),
+    'l': ('fl oz', 33.814),
+    'liter': ('fl oz', 33.814),
+    'litre': ('fl oz', 33.814),
+    'ml': ('fl oz', 0.033814),
+    'sq ft': ('sq ft', 1.0),
+    'ct': ('ct', 1.0),
+    'each': ('ct', 1.0),
+    'ea': ('ct', 1.0),
+}
+
+_MEASURE = (
+    r'(?P<unit>fl\.?\s?oz|sq\.?\s?ft|ounces?|oz|pounds?|lbs?|grams?|kg|g'
+    r'|gallons?|gal|quarts?|qt|pints?|pt|lit(?:er|re)s?|ml|l)\.?'
+)
+_NUMBER = r'(?P<num>\d+(?:\.\d+)?|\d+/\d+)'
+
+# "12 x 12 fl oz", "6 x 500ml"
+_MULTIPACK_RE = re.compile(
+    r'(?P<count>\d+)\s*[x×]\s*' + _NUMBER + r'\s*-?\s*' + _MEASURE + r'(?![a-z])',
+    re.IGNORECASE,
+)
+# "12-Pack", "12 ct", "24 count", "pack of 6", "100-Piece". A pack count
+# followed by another word ("2-Pack Batteries") describes an accessory.
+_COUNT_RE = re.compile(
+    r'(?:(?P<n1>\d+)\s*-?\s*(?:pack|pk|ct|count|pieces?|pcs?)(?![a-z])(?!\s+[a-z])'
+    r'|pack\s+of\s+(?P<n2>\d+))',
+    re.IGNORECASE,
+)
+# "80 lb.", "1 gal", "20.5 sq. ft.", "500 ml"
+_SIZE_RE = re.compile(_NUMBER + r'\s*-?\s*' + _MEASURE + r'(?![a-z])', re.IGNORECASE)
+# Network generations in phone and router names ("5G", "4G LTE"), which
+# would otherwise read as grams
+_NETWORK_RE = re.compile(r'\b[2-6]G(?:\s+LTE)?\b|\bLTE\b')
+
+_WS_RE = re.compile(r'[\s.]+')
+
+
+class UnitInfo(NamedTuple):
+    """Quantity of a product in base units, with a display label."""
+    quantity: float       # Amount in base units
+    measure: str          # Base unit ('oz', 'fl oz', 'ct', 'sq ft')
+    label: str            # Human-readable size ("12 ct", "80 lb")
+
+
+def _canonical_unit(raw: str) -> Optional[str]:
+    unit = _WS_RE.sub(' ', raw.lower()).strip()
+    if unit.startswith('fl'):
+        return 'fl oz'
+    if unit.startswith('sq'):
+        return 'sq ft'
+    if unit.endswith('s') and unit[:-1] in UNIT_FACTORS:
+        unit = unit[:-1]
+    return unit if unit in UNIT_FACTORS else None
+
+
+def _number(text: str) -> float:
+    if '/' in text:
+        numerator, denominator = text.split('/', 1)
+        return float(numerator) / float(denominator) if float(denominator) else 0.0
+    return float(text)
+
+
+def _label(amount: float, unit: str) -> str:
+    return f"{amount:g} {unit}"
+
+
+def parse_size(text: str) -> Optional[UnitInfo]:
+    """
+    Parse the package size from a product name.
+    Returns None when no size can be found.
+    """
+    if not text:
+        return None
+
+    match = _MULTIPACK_RE.search(text)
+    if match:
+        unit = _canonical_unit(match.group('unit'))
+        if unit:
+            base, factor = UNIT_FACTORS[unit]
+            count = int(match.group('count'))
+            amount = _number(match.group('num'))
+            return UnitInfo(count * amount * factor, base, f"{count} x {_label(amount, unit)}")
+
+    text = _NETWORK_RE.sub(' ', text)
+    count_match = _COUNT_RE.search(text)
+    count = int(count_match.group('n1') or count_match.group('n2')) if count_match else 0
+
+    match = _SIZE_RE.search(text)
+    if match:
+        unit = _canonical_unit(match.group('unit'))
+        amount = _number(match.group('num'))
+        if unit and amount > 0:
+            base, factor = UNIT_FACTORS[unit]
+            # "19 oz. spray, 2 pack"
+            if count > 1 and (count_match.end() <= match.start() or count_match.start() >= match.end()):
+                return UnitInfo(count * amount * factor, base, f"{count} x {_label(amount, unit)}")
+            return UnitInfo(amount * factor, base, _label(amount, unit))
+
+    if count > 0:
+        return UnitInfo(float(count), 'ct', f"{count} ct")
+
+    return None
+
+
+def parse_price_unit(price_unit: str) -> Optional[UnitInfo]:
+    """Parse the unit of a per-unit price ("lb", "sq. ft.")."""
+    if not price_unit:
+        return None
+    unit = _canonical_unit(price_unit)
+    if not unit:
+        return None
+    base, factor = UNIT_FACTORS[unit]
+    return UnitInfo(factor, base, unit)
+
+
+def apply_unit_info(result: ScraperResult, info: Optional[UnitInfo]) -> None:
+    """Set a result's unit fields from parsed unit info."""
+    if info is None or info.quantity <= 0:
+        return
+    result.unit = info.label
+    result.unit_quantity = round(info.quantity, 4)
+    result.unit_measure = info.measure
+    if result.price_cents is not None:
+        result.unit_price_cents = round(result.price_cents / info.quantity, 4)
+
+
+def normalize_units(results: Iterable[ScraperResult]) -> None:
+    """
+    Fill in unit, unit_quantity, unit_measure and unit_price_cents for a
+    batch of results, in place.
+
+    Per-unit prices ("$3.49/lb") take precedence over sizes parsed from the
+    item name. Identical item names across stores are parsed once.
+    """
+    sizes: Dict[str, Optional[UnitInfo]] = {}
+    for result in results:
+        info = parse_price_unit(result.price_unit)
+        if info is None:
+            name = result.item_name
+            if name not in sizes:
+                sizes[name] = parse_size(name)
+            info = sizes[name]
+        apply_unit_info(result, info)
@@ -0,0 +1,33 @@
+"""
+Shared setup for the scraper tests: run_scrape.py's directory on the
+import path, and the recorded pages in fixtures/ (also served over HTTP
+by the fixture_server fixture).
+"""
+
+import os
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FIXTURES = os.path.join(ROOT, 'fixtures')
+
+sys.path.insert(0, ROOT)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='session')
+def fixture_server():
+    """Base URL of a local HTTP server serving fixtures/."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
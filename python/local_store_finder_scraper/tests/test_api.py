@@ -0,0 +1,110 @@
+"""
+Source 'api' against the recorded JSON payloads in fixtures/, served
+locally: each store's mapping, the HTML path it must agree with, and the
+fallback to HTML when the payload is unusable.
+"""
+
+import json
+import logging
+import os
+
+import pytest
+
+from conftest import FIXTURES
+from scrapers import BaseScraper, get_scraper_for_store
+from scrapers.api import ApiSchemaError, generic_results
+
+FALLBACK_WARNING = 'Search API unusable'
+
+# (store name, HTML page, JSON payload, payload of another shape, query, expected best title)
+CASES = [
+    ('Home Depot', 'homedepot_search.html', 'homedepot_search.json', 'bestbuy_search.json',
+     'cordless drill', 'RYOBI ONE+ 18V Cordless 1/2 in. Drill/Driver Kit'),
+    ('Best Buy', 'bestbuy_search.html', 'bestbuy_search.json', 'homedepot_search.json',
+     'aa batteries', 'Duracell - Coppertop AA Batteries (24-Pack)'),
+    ('Corner Grocer', 'generic_search.html', 'generic_search.json', 'homedepot_search.html',
+     'olive oil', 'Extra Virgin Olive Oil, 500 ml'),
+]
+
+
+def load(name: str):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def scraper_for(store_name: str, source: str):
+    scraper = get_scraper_for_store(store_name, source)
+    if source == 'requests' and type(scraper) is not BaseScraper:
+        # Best Buy defaults to Playwright; read its recorded page instead
+        scraper = type(scraper)(source='requests')
+    return scraper
+
+
+def scrape(root: str, store_name: str, source: str, page: str, payload: str, query: str):
+    scraper = scraper_for(store_name, source)
+    api_url_template = f"{root}/{payload}?q={{query}}" if payload else ''
+    return scraper.scrape(
+        'store-1', store_name, root, f"{root}/{page}?q={{query}}", query,
+        api_url_template=api_url_template
+    )
+
+
+@pytest.mark.parametrize('store_name,page,payload,other,query,expected', CASES)
+def test_api_and_html_agree(fixture_server, caplog, store_name, page, payload, other, query, expected):
+    html = scrape(fixture_server, store_name, 'requests', page, '', query)[0]
+    with caplog.at_level(logging.WARNING):
+        api = scrape(fixture_server, store_name, 'api', page, payload, query)[0]
+    assert FALLBACK_WARNING not in caplog.text
+    assert api.item_name == html.item_name == expected
+    assert api.price_cents == html.price_cents is not None
+
+
+@pytest.mark.parametrize('store_name,page,payload,other,query,expected', CASES)
+def test_payload_of_another_shape_falls_back_to_html(fixture_server, caplog, store_name, page, payload,
+                                                     other, query, expected):
+    with caplog.at_level(logging.WARNING):
+        result = scrape(fixture_server, store_name, 'api', page, other, query)[0]
+    assert FALLBACK_WARNING in caplog.text
+    assert result.item_name == expected
+    assert result.price_cents is not None
+
+
+@pytest.mark.parametrize('payload', ['missing.json', ''])
+def test_missing_endpoint_falls_back_to_html(fixture_server, caplog, payload):
+    with caplog.at_level(logging.WARNING):
+        result = scrape(fixture_server, 'Corner Grocer', 'api', 'generic_search.html', payload, 'olive oil')[0]
+    assert FALLBACK_WARNING in caplog.text
+    assert result.item_name == 'Extra Virgin Olive Oil, 500 ml'
+
+
+def test_store_mappings():
+    homedepot = get_scraper_for_store('Home Depot', 'api')
+    results = homedepot.parse_api_results(load('homedepot_search.json'), 's', 'Home Depot', 'http://x/', 'drill')
+    assert results and all(r.item_name and r.price_cents for r in results)
+    assert results[0].item_name.startswith('DEWALT')
+
+    bestbuy = get_scraper_for_store('Best Buy', 'api')
+    results = bestbuy.parse_api_results(load('bestbuy_search.json'), 's', 'Best Buy', 'http://x/', 'airpods')
+    assert results[0].item_name == 'Apple - AirPods Pro 2 (USB-C) - White'
+    assert results[0].price_cents == 18999
+    assert results[0].details['sku'] == '6501234'
+
+    results = generic_results(load('generic_search.json'), 's', 'Corner Grocer', 'http://grocer.test/api')
+    assert results[0].item_name == 'Organic Whole Milk, 1 gal'
+    assert results[0].product_url == 'http://grocer.test/product/organic-whole-milk-1-gal'
+    assert results[0].details['in_stock'] is True
+
+
+def test_mappings_reject_other_shapes():
+    homedepot = get_scraper_for_store('Home Depot', 'api')
+    bestbuy = get_scraper_for_store('Best Buy', 'api')
+    with pytest.raises(ApiSchemaError):
+        homedepot.parse_api_results(load('bestbuy_search.json'), 's', 'Home Depot', 'http://x/', 'drill')
+    with pytest.raises(ApiSchemaError):
+        bestbuy.parse_api_results(load('homedepot_search.json'), 's', 'Best Buy', 'http://x/', 'drill')
+    with pytest.raises(ApiSchemaError):
+        generic_results({'status': 'ok', 'count': 3}, 's', 'Corner Grocer', 'http://x/')
+
+
+def test_empty_result_list_is_not_a_schema_error():
+    assert generic_results({'results': {'items': []}}, 's', 'Corner Grocer', 'http://x/') == []
@@ -0,0 +1,65 @@
+"""
+Result cache popularity: decayed ranking done in SQL, and pruning of
+pairs nobody asks for any more.
+"""
+
+import pytest
+
+from scrapers import cache as cache_module
+from scrapers.cache import POPULARITY_HALF_LIFE, ResultCache
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1_700_000_000.0)
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+
+def store(store_id: str) -> dict:
+    return {'id': store_id, 'name': store_id.title(), 'base_url': f"https://{store_id}.test"}
+
+
+def test_hot_queries_rank_by_decayed_score(cache, clock):
+    for _ in range(4):
+        cache.record_request(store('old'), 'drill')
+    clock.now += 3 * POPULARITY_HALF_LIFE  # 4 requests decay to 0.5
+    cache.record_request(store('new'), 'drill')
+    cache.record_request(store('mid'), 'saw')
+    cache.record_request(store('mid'), 'saw')
+
+    hot = cache.hot_queries()
+    assert [(h.store['id'], h.query) for h in hot] == [('mid', 'saw'), ('new', 'drill'), ('old', 'drill')]
+    assert [round(h.score, 6) for h in hot] == [2.0, 1.0, 0.5]
+    assert [h.store['id'] for h in cache.hot_queries(limit=2)] == ['mid', 'new']
+
+
+def test_repeat_requests_accumulate(cache, clock):
+    cache.record_request(store('a'), 'drill')
+    clock.now += POPULARITY_HALF_LIFE
+    cache.record_request(store('a'), 'Drill')
+    [hot] = cache.hot_queries()
+    assert hot.score == pytest.approx(1.5)
+
+
+def test_prune_drops_cold_pairs(cache, clock):
+    cache.record_request(store('cold'), 'drill')
+    clock.now += 7 * POPULARITY_HALF_LIFE  # 1/128, under the floor
+    cache.record_request(store('warm'), 'drill')
+    cache.prune()
+    assert [h.store['id'] for h in cache.hot_queries()] == ['warm']
@@ -0,0 +1,72 @@
+"""
+Price history shared between writers: key ids stay unique, appends land
+in the live log, and compaction by one writer is picked up by the others.
+"""
+
+import multiprocessing
+
+from scrapers.base import ScraperResult
+from scrapers.history import PriceHistory
+
+
+def priced(url: str, cents: int, epoch: int) -> ScraperResult:
+    return ScraperResult('s', 'Store', product_url=url, price_cents=cents, collected_at=epoch)
+
+
+def write_many(path: str, prefix: str, count: int) -> None:
+    history = PriceHistory(path, compact_threshold=25)
+    for n in range(count):
+        history.record([priced(f"http://x/{prefix}{n}", 100 + n, 1000 + n)])
+    history.close()
+
+
+def test_two_writers_get_distinct_key_ids(tmp_path):
+    a, b = PriceHistory(str(tmp_path)), PriceHistory(str(tmp_path))
+    a.record([priced('http://x/a', 100, 1000)])
+    b.record([priced('http://x/b', 999, 1000)])
+
+    assert a.last_price('s', 'http://x/a') == (100, 1000)
+    assert a.last_price('s', 'http://x/b') == (999, 1000)
+    assert b.last_price('s', 'http://x/a') == (100, 1000)
+    ids = [line.split('\t')[0] for line in (tmp_path / 'keys.tsv').read_text().splitlines()]
+    assert sorted(ids) == ['0', '1']
+
+
+def test_writer_sees_other_writers_prices(tmp_path):
+    a, b = PriceHistory(str(tmp_path)), PriceHistory(str(tmp_path))
+    a.record([priced('http://x/a', 100, 1000)])
+    changes = b.record([priced('http://x/a', 100, 1001), priced('http://x/a', 120, 1002)])
+    assert [(c.old_cents, c.new_cents) for c in changes] == [(100, 120)]
+
+
+def test_appends_after_another_writer_compacts(tmp_path):
+    a = PriceHistory(str(tmp_path), compact_threshold=1000)
+    b = PriceHistory(str(tmp_path), compact_threshold=1000)
+    a.record([priced('http://x/a', 100, 1000)])
+    b.record([priced('http://x/b', 200, 1000)])
+    a.compact()
+    b.record([priced('http://x/b', 250, 1001)])
+
+    reopened = PriceHistory(str(tmp_path))
+    assert reopened.last_price('s', 'http://x/a') == (100, 1000)
+    assert reopened.last_price('s', 'http://x/b') == (250, 1001)
+    assert a.price_range('s', 'http://x/b', 0, 2000) == (200, 250)
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path)
+    workers = [
+        multiprocessing.Process(target=write_many, args=(path, prefix, 60))
+        for prefix in ('a', 'b', 'c')
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    history = PriceHistory(path)
+    for prefix in ('a', 'b', 'c'):
+        for n in range(60):
+            assert history.last_price('s', f"http://x/{prefix}{n}") == (100 + n, 1000 + n)
+    assert len(history.changed_since(0)) == 180
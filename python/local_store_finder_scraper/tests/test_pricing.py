@@ -0,0 +1,59 @@
+"""
+Price normalization: each format the pricing module documents, parsed
+one at a time and in bulk.
+"""
+
+import pytest
+
+from scrapers.pricing import (
+    NO_PRICE, PriceInfo, format_price, normalize_price, normalize_prices, price_to_cents,
+)
+
+CASES = [
+    # Plain prices
+    ('$99.99', PriceInfo(9999)),
+    ('$1,299.99', PriceInfo(129999)),
+    ('99.99', PriceInfo(9999)),
+    ('$5', PriceInfo(500)),
+    # Sale / was prices
+    ('Was $129.00 Now $79.00', PriceInfo(7900, was_cents=12900)),
+    ('Sale $4.99 Reg $6.49', PriceInfo(499, was_cents=649)),
+    ('$79.00 Save $50.00 Was $129.00', PriceInfo(7900, was_cents=12900)),
+    # Ranges, spaced or not
+    ('$5.98 - $12.97', PriceInfo(598, high_cents=1297)),
+    ('$5.98 – $12.97', PriceInfo(598, high_cents=1297)),
+    ('$5.98-$12.97', PriceInfo(598, high_cents=1297)),
+    ('$5.98–$12.97', PriceInfo(598, high_cents=1297)),
+    ('$5 to $10', PriceInfo(500, high_cents=1000)),
+    # Per-unit prices
+    ('$0.45/sq. ft.', PriceInfo(45, per_unit='sq. ft.')),
+    ('$3.49/lb', PriceInfo(349, per_unit='lb')),
+    # Cents
+    ('98¢', PriceInfo(98)),
+    ('89 cents/lb', PriceInfo(89, per_unit='lb')),
+    # Nothing usable
+    ('', NO_PRICE),
+    ('Out of stock', NO_PRICE),
+]
+
+
+@pytest.mark.parametrize('text,expected', CASES)
+def test_normalize_price(text, expected):
+    assert normalize_price(text) == expected
+
+
+def test_bulk_matches_single():
+    texts = [text for text, _ in CASES] + ['$99.99', '']
+    assert normalize_prices(texts) == [normalize_price(text) for text in texts]
+
+
+def test_dash_needs_a_second_amount():
+    # A hyphen in a model number is not a range
+    assert normalize_price('$19.99 DW-200') == PriceInfo(1999)
+
+
+def test_format_and_cents_round_trip():
+    assert format_price(129999) == '$1299.99'
+    assert format_price(None) == 'not available'
+    assert price_to_cents('$1,299.99') == 129999
+    assert price_to_cents('not available') is None
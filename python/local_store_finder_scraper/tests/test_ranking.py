@@ -0,0 +1,74 @@
+"""Relevance ranking on the recorded search pages in fixtures/."""
+
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from conftest import FIXTURES
+from scrapers import get_scraper_for_store
+from scrapers.base import ScraperResult
+from scrapers.ranking import confident_matches, rank_results
+
+# (fixture, store name, query, expected title substring), as in
+# benchmarks/eval_ranking.py
+CASES = [
+    ('homedepot_search.html', 'Home Depot', 'cordless drill', 'RYOBI'),
+    ('homedepot_search.html', 'Home Depot', 'drill bit set', 'Drill Bit Set'),
+    ('homedepot_search.html', 'Home Depot', 'concrete mix', 'Concrete Mix'),
+    ('homedepot_search.html', 'Home Depot', 'white interior paint', 'Interior Paint'),
+    ('bestbuy_search.html', 'Best Buy', 'drill', 'Drill/Driver'),
+    ('bestbuy_search.html', 'Best Buy', 'aa batteries', 'AA Batteries'),
+    ('bestbuy_search.html', 'Best Buy', 'airpods', 'AirPods'),
+    ('bestbuy_search.html', 'Best Buy', 'microsd card', 'microSDXC'),
+    ('generic_search.html', 'Local Grocer', 'eggs', 'Eggs'),
+    ('generic_search.html', 'Local Grocer', 'cheddar cheese', 'Cheddar'),
+    ('generic_search.html', 'Local Grocer', 'olive oil', 'Olive Oil'),
+]
+
+
+def parse_candidates(fixture: str, store_name: str, query: str):
+    with open(os.path.join(FIXTURES, fixture), encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    scraper = get_scraper_for_store(store_name, 'requests')
+    return scraper.parse_results_requests(soup, 'test', store_name, 'http://fixture/', query)
+
+
+@pytest.mark.parametrize('fixture,store_name,query,expected', CASES)
+def test_best_hit_is_the_intended_product(fixture, store_name, query, expected):
+    candidates = parse_candidates(fixture, store_name, query)
+    assert len(candidates) > 1
+    ranked = rank_results(candidates, query)
+    assert expected in ranked[0].item_name
+    assert sorted(ranked, key=id) == sorted(candidates, key=id)
+
+
+def test_ranking_beats_page_order():
+    # The store's first card is rarely what was searched for
+    first_hits = sum(
+        expected in parse_candidates(fixture, store_name, query)[0].item_name
+        for fixture, store_name, query, expected in CASES
+    )
+    assert first_hits < len(CASES) // 2
+
+
+def test_ties_keep_page_order():
+    results = [
+        ScraperResult(store_id='s', store_name='S', item_name=f"Garden Hose {n}", price="$20.00")
+        for n in range(3)
+    ]
+    assert rank_results(results, 'garden hose') == results
+
+
+def test_no_candidates():
+    assert rank_results([], 'drill') == []
+    assert confident_matches([], 'drill') == 0
+
+
+def test_confident_matches_need_every_term_and_a_price():
+    results = [
+        ScraperResult(store_id='s', store_name='S', item_name="Cordless Drill", price="$99.00"),
+        ScraperResult(store_id='s', store_name='S', item_name="Cordless Drill"),
+        ScraperResult(store_id='s', store_name='S', item_name="Drill Bit", price="$9.00"),
+    ]
+    assert confident_matches(results, 'cordless drill') == 1
@@ -0,0 +1,55 @@
+"""
+The legacy store-finder CLI (scrapers/store-finder/scraper.py) with
+--mock: its output must stay what the old built-in mock_scrape printed.
+"""
+
+import hashlib
+import importlib.util
+import os
+
+import pytest
+
+from conftest import ROOT
+from scrapers.mock import set_backend
+
+CLI = os.path.join(ROOT, '..', '..', 'scrapers', 'store-finder', 'scraper.py')
+
+STORES = ['Home Depot', 'Best Buy', 'Lowes', 'Target', 'Walmart', 'Corner Grocer']
+QUERIES = ['drill', 'aa batteries', 'paint brush', 'olive oil', '5 gallon bucket', 'Weber Grill & Cover']
+
+
+def legacy_mock_scrape(store_name, query):
+    """mock_scrape as the CLI shipped it before it moved onto the shared engine."""
+    hash_val = int(hashlib.md5(f"{store_name}{query}".encode()).hexdigest()[:8], 16)
+    base_price = 20 + (hash_val % 500)
+    cents = hash_val % 100
+
+    return {
+        "success": True,
+        "store": store_name,
+        "results": [{
+            "item": f"{query.title()} - {store_name} Edition",
+            "price": f"${base_price}.{cents:02d}",
+            "unit": "each",
+            "product_url": f"https://www.example.com/product/{hash_val}",
+            "notes": "Mock data - actual scraping not available"
+        }],
+        "error": None
+    }
+
+
+@pytest.fixture(scope='module')
+def cli():
+    spec = importlib.util.spec_from_file_location('store_finder_cli', CLI)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    # --mock swaps in a one-card backend; give other tests the default
+    set_backend(None)
+
+
+@pytest.mark.parametrize('store_name', STORES)
+@pytest.mark.parametrize('query', QUERIES)
+def test_mock_matches_legacy(cli, store_name, query):
+    search_url = f"https://www.example.com/search?q={query}"
+    assert cli.scrape(store_name, search_url, query, mock=True) == legacy_mock_scrape(store_name, query)
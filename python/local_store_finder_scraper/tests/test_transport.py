@@ -0,0 +1,130 @@
+"""
+scrapers.transport against the installed urllib3.
+
+The timed connection classes override urllib3 internals (_new_conn,
+_dns_host) and TransportAdapter clears conn.ca_certs once the bundle is
+in the shared SSL context. These tests fail if a urllib3 release stops
+calling those hooks, or if clearing ca_certs stops verification.
+"""
+
+import shutil
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+import urllib3
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+from scrapers.transport import Transport, TransportAdapter
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    def start(context=None):
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        if context is not None:
+            httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        servers.append(httpd)
+        return httpd.server_address[1]
+
+    servers = []
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def certificate(tmp_path):
+    if not shutil.which('openssl'):
+        pytest.skip('openssl not available')
+    cert, key = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+         '-keyout', str(key), '-out', str(cert)],
+        check=True, capture_output=True
+    )
+    return str(cert), str(key)
+
+
+def session_for(transport: Transport) -> requests.Session:
+    session = requests.Session()
+    adapter = TransportAdapter(transport)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def test_supported_urllib3():
+    assert urllib3.__version__.split('.')[0] == '2', \
+        "scrapers.transport supports urllib3 2.x only (see requirements.txt)"
+
+
+def test_connection_internals_exist():
+    conn = HTTPConnection('localhost', 80)
+    assert callable(getattr(HTTPConnection, '_new_conn', None))
+    assert conn._dns_host == 'localhost'
+    assert hasattr(HTTPSConnection('localhost', 443), 'ca_certs')
+
+
+def test_new_connections_resolve_through_the_dns_cache(server):
+    port = server()
+    transport = Transport()
+    session = session_for(transport)
+
+    for _ in range(2):
+        assert session.get(f"http://localhost:{port}/", timeout=5).text == 'ok'
+
+    stats = transport.stats.snapshot()
+    # Connection: close, so both requests went through _new_conn
+    assert stats['connections'] == 2
+    assert transport.dns.resolve('localhost', port)
+
+
+def test_tls_loads_the_bundle_once_and_resumes(server, certificate):
+    cert, key = certificate
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    port = server(context)
+    transport = Transport()
+    session = session_for(transport)
+
+    for _ in range(3):
+        assert session.get(f"https://localhost:{port}/", verify=cert, timeout=5).text == 'ok'
+
+    stats = transport.stats.snapshot()
+    assert stats['tls_handshakes'] == 3
+    assert stats['tls_resumed'] >= 1
+    assert transport.ssl_context.loaded_ca_files == {cert}
+
+
+def test_clearing_ca_certs_keeps_verification(server, certificate):
+    cert, key = certificate
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    port = server(context)
+    session = session_for(Transport())
+
+    # The self-signed certificate is not in the default bundle
+    with pytest.raises(requests.exceptions.SSLError):
+        session.get(f"https://localhost:{port}/", timeout=5)
@@ -5,6 +5,12 @@ Store Finder Scraper
 Searches store websites for product information and prices.
 Called from Node.js via child_process.spawn.
 
+Fetching, parsing and price normalization come from the local store
+finder scraper package (python/local_store_finder_scraper), using the
+store's own scraper when it has one. With --mock, pages come from that
+package's deterministic mock backend instead of the network, one card per
+page, so the output is the legacy mock item.
+
 Usage:
     python scraper.py --store-name "Home Depot" --search-url "https://..." --query "drill"
 
@@ -28,171 +34,85 @@ Output:
 
 import argparse
 import json
+import os
 import sys
-import re
 from datetime import datetime
-from urllib.parse import quote_plus
 
-# Try to import scraping libraries (optional - falls back to mock data)
+# The shared scraping engine lives in the local store finder scraper package
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', 'python', 'local_store_finder_scraper'
+))
+
 try:
     import requests
-    from bs4 import BeautifulSoup
+    from scrapers import get_scraper_for_store
+    from scrapers.mock import MockBackend, set_backend
     SCRAPING_AVAILABLE = True
 except ImportError:
     SCRAPING_AVAILABLE = False
 
 
-def parse_price(price_str):
-    """Extract numeric price from string like '$99.99' or '99.99'"""
-    if not price_str:
-        return None
-    match = re.search(r'[\$]?\s*(\d+(?:,\d{3})*(?:\.\d{2})?)', price_str.replace(',', ''))
-    if match:
-        return f"${match.group(1)}"
-    return price_str
+def failure(store_name, error):
+    return {
+        "success": False,
+        "store": store_name,
+        "results": [],
+        "error": error
+    }
 
 
-def scrape_generic(store_name, search_url, query, timeout=10):
+def scrape(store_name, search_url, query, timeout=10, mock=False):
     """
-    Generic scraper that attempts to extract product info from search results page.
-    Works with common e-commerce patterns.
+    Fetch search_url (or its mock page) and return the best result,
+    parsed by the store's scraper.
     """
     if not SCRAPING_AVAILABLE:
-        return {
-            "success": False,
-            "store": store_name,
-            "results": [],
-            "error": "Scraping libraries not installed (requests, beautifulsoup4)"
-        }
+        return failure(store_name, "Scraping libraries not installed (requests, beautifulsoup4)")
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-    }
+    if mock:
+        # Only the legacy card, so ranking has nothing else to pick
+        set_backend(MockBackend(cards=1))
+    scraper = get_scraper_for_store(store_name, 'mock' if mock else 'requests')
+    scraper.timeout = timeout
 
     try:
-        response = requests.get(search_url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-
-        # Common product container selectors
-        product_selectors = [
-            '[data-testid="product-card"]',
-            '.product-card',
-            '.product-item',
-            '.search-result-product',
-            '[class*="ProductCard"]',
-            '[class*="product-pod"]',
-            '.plp-pod',
-            '.browse-search__pod',
-        ]
-
-        products = []
-        for selector in product_selectors:
-            products = soup.select(selector)
-            if products:
-                break
-
-        # Try to extract info from first product found
-        if products:
-            product = products[0]
-
-            # Extract title
-            title = None
-            title_selectors = ['h2', 'h3', '.product-title', '[class*="title"]', '[class*="name"]', 'a[href*="product"]']
-            for sel in title_selectors:
-                elem = product.select_one(sel)
-                if elem and elem.get_text(strip=True):
-                    title = elem.get_text(strip=True)[:100]  # Limit length
-                    break
-
-            # Extract price
-            price = None
-            price_selectors = ['[class*="price"]', '[data-price]', '.price', 'span[class*="Price"]']
-            for sel in price_selectors:
-                elem = product.select_one(sel)
-                if elem:
-                    price_text = elem.get_text(strip=True)
-                    price = parse_price(price_text)
-                    if price:
-                        break
-
-            # Extract product URL
-            product_url = None
-            link = product.select_one('a[href]')
-            if link:
-                href = link.get('href', '')
-                if href.startswith('/'):
-                    # Relative URL - construct full URL
-                    from urllib.parse import urlparse
-                    parsed = urlparse(search_url)
-                    product_url = f"{parsed.scheme}://{parsed.netloc}{href}"
-                elif href.startswith('http'):
-                    product_url = href
-
-            if title:
-                results.append({
-                    "item": title,
-                    "price": price or "Price not available",
-                    "unit": "each",
-                    "product_url": product_url,
-                    "notes": "Found via web search"
-                })
-
-        return {
-            "success": True,
-            "store": store_name,
-            "results": results[:1],  # Return only first/best result
-            "error": None
-        }
-
+        page = scraper.fetch_page(search_url, store_name, query)
+        found = scraper.parse_page(
+            page.body.decode(page.encoding, errors='replace'),
+            '', store_name, search_url, query, 1
+        )
     except requests.Timeout:
-        return {
-            "success": False,
-            "store": store_name,
-            "results": [],
-            "error": "Request timed out"
-        }
+        return failure(store_name, "Request timed out")
     except requests.RequestException as e:
-        return {
-            "success": False,
-            "store": store_name,
-            "results": [],
-            "error": str(e)
-        }
+        return failure(store_name, str(e))
     except Exception as e:
-        return {
-            "success": False,
-            "store": store_name,
-            "results": [],
-            "error": f"Scraping error: {str(e)}"
-        }
-
-
-def mock_scrape(store_name, query):
-    """
-    Mock scraper for testing and when real scraping is not available.
-    Returns realistic-looking data based on store and query.
-    """
-    # Generate mock price based on query complexity
-    import hashlib
-    hash_val = int(hashlib.md5(f"{store_name}{query}".encode()).hexdigest()[:8], 16)
-    base_price = 20 + (hash_val % 500)
-    cents = hash_val % 100
+        return failure(store_name, f"Scraping error: {str(e)}")
+
+    results = []
+    for result in found:
+        if result.price_cents is None and result.notes == "No products found":
+            continue
+        product_url = result.product_url
+        notes = result.notes or "Found via web search"
+        if mock:
+            # Mock cards link to the backend's /p/ product pages, and store
+            # scrapers note SKUs; keep the URLs and notes --mock has always
+            # printed
+            product_url = product_url.replace('/p/', '/product/', 1)
+            notes = "Mock data - actual scraping not available"
+        results.append({
+            "item": result.item_name,
+            "price": result.price if result.price_cents is not None else "Price not available",
+            "unit": result.unit,
+            "product_url": product_url,
+            "notes": notes
+        })
 
     return {
         "success": True,
         "store": store_name,
-        "results": [{
-            "item": f"{query.title()} - {store_name} Edition",
-            "price": f"${base_price}.{cents:02d}",
-            "unit": "each",
-            "product_url": f"https://www.example.com/product/{hash_val}",
-            "notes": "Mock data - actual scraping not available"
-        }],
+        "results": results,
         "error": None
     }
 
@@ -203,22 +123,12 @@ def main():
     parser.add_argument('--search-url', required=True, help='Full search URL with query embedded')
     parser.add_argument('--query', required=True, help='Search query for reference')
     parser.add_argument('--timeout', type=int, default=10, help='Request timeout in seconds')
-    parser.add_argument('--mock', action='store_true', help='Use mock data instead of real scraping')
+    parser.add_argument('--mock', action='store_true', help='Use generated pages instead of real scraping')
 
     args = parser.parse_args()
 
     try:
-        if args.mock or not SCRAPING_AVAILABLE:
-            result = mock_scrape(args.store_name, args.query)
-            if not args.mock and not SCRAPING_AVAILABLE:
-                result["notes"] = "Using mock data - install requests and beautifulsoup4 for real scraping"
-        else:
-            result = scrape_generic(
-                args.store_name,
-                args.search_url,
-                args.query,
-                args.timeout
-            )
+        result = scrape(args.store_name, args.search_url, args.query, args.timeout, args.mock)
 
         # Add timestamp
         result["collected_at"] = datetime.now().strftime("%b %d, %Y")
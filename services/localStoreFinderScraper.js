@@ -4,22 +4,32 @@
  * Spawns Python scraper process and handles communication via stdin/stdout.
  * Includes timeout enforcement, output validation, and error sanitization.
  *
+ * Timeouts and aborts (options.signal) stop the scraper with SIGTERM, which
+ * it answers by cancelling in-flight fetches, closing its browsers and
+ * writing what finished; SIGKILL follows if it has not exited within the
+ * grace period.
+ *
  * Environment Variables:
  *   LOCAL_STORE_SCRAPER_PYTHON - Path to Python executable (default: python3)
  *   LOCAL_STORE_SCRAPER_ENTRY - Path to scraper entry script (default: python/local_store_finder_scraper/run_scrape.py)
  *   LOCAL_STORE_SCRAPER_TIMEOUT - Timeout in milliseconds (default: 30000)
+ *   LOCAL_STORE_SCRAPER_CANCEL_GRACE - Milliseconds between SIGTERM and SIGKILL (default: 2000)
+ *   LOCAL_STORE_SCRAPER_PROTOCOL - 'json' or 'framed' (MessagePack frames, default: json)
  *   USE_AI_NORMALIZER - Enable AI normalization (default: false)
  */
 
 const { spawn } = require('child_process');
 const path = require('path');
+const { encodeFrame, decodeFrames, decodeOutput } = require('./scraperFraming');
 
 // Configuration from environment variables
 const PYTHON_PATH = process.env.LOCAL_STORE_SCRAPER_PYTHON || 'python3';
 const SCRAPER_ENTRY = process.env.LOCAL_STORE_SCRAPER_ENTRY ||
   path.join(__dirname, '..', 'python', 'local_store_finder_scraper', 'run_scrape.py');
 const SCRAPER_TIMEOUT = parseInt(process.env.LOCAL_STORE_SCRAPER_TIMEOUT) || 30000;
+const CANCEL_GRACE = parseInt(process.env.LOCAL_STORE_SCRAPER_CANCEL_GRACE) || 2000;
 const USE_AI_NORMALIZER = process.env.USE_AI_NORMALIZER === 'true';
+const SCRAPER_PROTOCOL = process.env.LOCAL_STORE_SCRAPER_PROTOCOL === 'framed' ? 'framed' : 'json';
 
 /**
  * Input schema for scraper
@@ -28,7 +38,8 @@ const USE_AI_NORMALIZER = process.env.USE_AI_NORMALIZER === 'true';
  * @property {string} name - Store display name
  * @property {string} base_url - Store base URL
  * @property {string} [search_url_template] - URL template with {query}
- * @property {string} [source] - 'requests' or 'playwright'
+ * @property {string} [source] - 'requests', 'playwright', 'api' or 'mock'
+ * @property {string} [api_url_template] - JSON search endpoint with {query}, for source 'api'
  */
 
 /**
@@ -42,6 +53,10 @@ const USE_AI_NORMALIZER = process.env.USE_AI_NORMALIZER === 'true';
  * @property {string} product_url - Product page URL
  * @property {string} notes - Additional notes
  * @property {string} collected_at - Timestamp string
+ * @property {Object|null} [details] - Structured product fields (model, sku, upc, rating,
+ *   review_count, in_stock, availability, store_availability), when known
+ * @property {string|null} [product_group] - Id shared by results for the same product
+ *   across stores (cross-store matching)
  */
 
 /**
@@ -122,14 +137,66 @@ async function normalizeWithAI(results, query) {
   }
 }
 
+/**
+ * Decode the scraper's stdout for the given protocol
+ * @param {Buffer} stdout - Raw process output
+ * @param {string} protocol - 'json' or 'framed'
+ * @returns {Object} Output document
+ */
+function parseOutput(stdout, protocol) {
+  if (protocol === 'framed') {
+    const { frames } = decodeFrames(stdout);
+    if (frames.length === 0) {
+      throw new Error('Truncated output frame');
+    }
+    return decodeOutput(frames[0]);
+  }
+  return JSON.parse(stdout.toString('utf8'));
+}
+
+/**
+ * Output written by a scraper stopped on timeout, if it is complete and valid
+ * @param {Buffer} stdout - Raw process output
+ * @param {string} protocol - 'json' or 'framed'
+ * @returns {Object|null} Output document
+ */
+function parsePartialOutput(stdout, protocol) {
+  if (stdout.length === 0) {
+    return null;
+  }
+  try {
+    const output = parseOutput(stdout, protocol);
+    return validateOutputSchema(output) ? output : null;
+  } catch (error) {
+    return null;
+  }
+}
+
+/**
+ * Error a cancelled search rejects with
+ * @returns {Error}
+ */
+function abortError() {
+  const error = new Error('Search cancelled');
+  error.name = 'AbortError';
+  return error;
+}
+
 /**
  * Run the Python scraper
  *
  * @param {StoreInput[]} stores - Array of store objects to scrape
  * @param {string} query - Search query
+ * @param {Object} [options]
+ * @param {string} [options.protocol] - 'json' or 'framed' (default: LOCAL_STORE_SCRAPER_PROTOCOL)
+ * @param {AbortSignal} [options.signal] - Cancels the search (e.g. the client went away);
+ *   the promise rejects with an Error named 'AbortError'
  * @returns {Promise<{results: ScraperResult[], errors: string[]}>}
  */
-async function runScraper(stores, query) {
+async function runScraper(stores, query, options = {}) {
+  const protocol = options.protocol || SCRAPER_PROTOCOL;
+  const { signal } = options;
+
   return new Promise((resolve, reject) => {
     // Validate inputs
     if (!Array.isArray(stores) || stores.length === 0) {
@@ -142,6 +209,11 @@ async function runScraper(stores, query) {
       return;
     }
 
+    if (signal && signal.aborted) {
+      reject(abortError());
+      return;
+    }
+
     // Prepare input JSON
     const input = {
       stores: stores.map(s => ({
@@ -149,36 +221,57 @@ async function runScraper(stores, query) {
         name: s.name,
         base_url: s.base_url,
         search_url_template: s.search_url_template || '',
-        source: s.source || 'requests'
+        source: s.source || 'requests',
+        ...(s.api_url_template ? { api_url_template: s.api_url_template } : {})
       })),
       query: query.trim()
     };
 
-    const inputJson = JSON.stringify(input);
-
     console.log(`[Scraper] Starting Python scraper for ${stores.length} stores, query: "${query}"`);
     console.log(`[Scraper] Python: ${PYTHON_PATH}, Entry: ${SCRAPER_ENTRY}`);
 
     // Spawn Python process
-    const python = spawn(PYTHON_PATH, [SCRAPER_ENTRY], {
+    const args = protocol === 'framed' ? [SCRAPER_ENTRY, '--protocol', 'framed'] : [SCRAPER_ENTRY];
+    const python = spawn(PYTHON_PATH, args, {
       stdio: ['pipe', 'pipe', 'pipe'],
       env: { ...process.env, PYTHONUNBUFFERED: '1' }
     });
 
-    let stdout = '';
+    const stdoutChunks = [];
     let stderr = '';
     let killed = false;
+    let aborted = false;
+    let killTimer = null;
+
+    // SIGTERM lets the scraper cancel its work and write partial output.
+    // Runs once: an abort after the timeout must not replace killTimer.
+    const stop = () => {
+      if (killTimer) {
+        return;
+      }
+      python.kill('SIGTERM');
+      killTimer = setTimeout(() => python.kill('SIGKILL'), CANCEL_GRACE);
+    };
 
     // Set timeout
     const timeoutId = setTimeout(() => {
       killed = true;
-      python.kill('SIGTERM');
-      setTimeout(() => python.kill('SIGKILL'), 1000);
+      stop();
     }, SCRAPER_TIMEOUT);
 
+    const onAbort = () => {
+      clearTimeout(timeoutId);
+      aborted = true;
+      stop();
+      reject(abortError());
+    };
+    if (signal) {
+      signal.addEventListener('abort', onAbort, { once: true });
+    }
+
     // Handle stdout
     python.stdout.on('data', (data) => {
-      stdout += data.toString();
+      stdoutChunks.push(Buffer.isBuffer(data) ? data : Buffer.from(data));
     });
 
     // Handle stderr (logging from Python)
@@ -190,8 +283,22 @@ async function runScraper(stores, query) {
     // Handle process exit
     python.on('close', async (code) => {
       clearTimeout(timeoutId);
+      clearTimeout(killTimer);
+      if (signal) {
+        signal.removeEventListener('abort', onAbort);
+      }
+      if (aborted) {
+        return;
+      }
+      const stdout = Buffer.concat(stdoutChunks);
 
       if (killed) {
+        // Keep whatever the scraper finished before it was stopped
+        const partial = parsePartialOutput(stdout, protocol);
+        if (partial) {
+          resolve({ results: partial.results, errors: ['Scraper timed out'] });
+          return;
+        }
         resolve({
           results: stores.map(s => ({
             store_id: s.id,
@@ -210,7 +317,7 @@ async function runScraper(stores, query) {
         return;
       }
 
-      if (!stdout.trim()) {
+      if (protocol === 'json' ? !stdout.toString('utf8').trim() : stdout.length === 0) {
         resolve({
           results: stores.map(s => ({
             store_id: s.id,
@@ -230,7 +337,7 @@ async function runScraper(stores, query) {
       }
 
       try {
-        const output = JSON.parse(stdout);
+        const output = parseOutput(stdout, protocol);
 
         if (!validateOutputSchema(output)) {
           throw new Error('Invalid output schema');
@@ -246,7 +353,7 @@ async function runScraper(stores, query) {
 
       } catch (parseError) {
         console.error('[Scraper] Failed to parse output:', parseError.message);
-        console.error('[Scraper] Raw stdout:', stdout.substring(0, 500));
+        console.error('[Scraper] Raw stdout:', stdout.toString('utf8', 0, 500));
 
         resolve({
           results: stores.map(s => ({
@@ -269,6 +376,9 @@ async function runScraper(stores, query) {
     // Handle spawn errors
     python.on('error', (err) => {
       clearTimeout(timeoutId);
+      if (signal) {
+        signal.removeEventListener('abort', onAbort);
+      }
       console.error('[Scraper] Spawn error:', err.message);
 
       resolve({
@@ -289,7 +399,7 @@ async function runScraper(stores, query) {
     });
 
     // Write input to stdin
-    python.stdin.write(inputJson);
+    python.stdin.write(protocol === 'framed' ? encodeFrame(input) : JSON.stringify(input));
     python.stdin.end();
   });
 }
@@ -322,6 +432,8 @@ module.exports = {
   validateOutputSchema,
   sanitizeError,
   SCRAPER_TIMEOUT,
+  CANCEL_GRACE,
+  SCRAPER_PROTOCOL,
   PYTHON_PATH,
   SCRAPER_ENTRY
 };
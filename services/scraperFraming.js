@@ -0,0 +1,281 @@
+/**
+ * Scraper Framing
+ *
+ * Node side of the Python scraper's framed protocol
+ * (run_scrape.py --protocol framed, see scrapers/framing.py).
+ *
+ * Each message is a frame:
+ *   1 byte flags (bit 0: zlib-compressed payload)
+ *   4 bytes payload length (unsigned, big-endian)
+ *   payload: MessagePack
+ *
+ * Output frames carry results as a table ({fields, rows}); decodeOutput()
+ * rebuilds the same result objects the JSON protocol produces.
+ */
+
+const zlib = require('zlib');
+
+const HEADER_SIZE = 5;
+const FLAG_COMPRESSED = 0x01;
+const COMPRESS_THRESHOLD = 1024;
+const MAX_FRAME_SIZE = 64 * 1024 * 1024;
+
+// ============================================================================
+// MessagePack subset: null, boolean, number, string, Buffer, array, object
+// ============================================================================
+
+/**
+ * Encode a value as MessagePack
+ * @param {*} value - Value to encode
+ * @returns {Buffer}
+ */
+function encode(value) {
+  const chunks = [];
+  encodeInto(value, chunks);
+  return Buffer.concat(chunks);
+}
+
+function header(type, size, length) {
+  const buf = Buffer.alloc(1 + size);
+  buf[0] = type;
+  if (size === 1) buf.writeUInt8(length, 1);
+  else if (size === 2) buf.writeUInt16BE(length, 1);
+  else buf.writeUInt32BE(length, 1);
+  return buf;
+}
+
+function encodeInto(value, chunks) {
+  if (value === null || value === undefined) {
+    chunks.push(Buffer.from([0xc0]));
+  } else if (value === true) {
+    chunks.push(Buffer.from([0xc3]));
+  } else if (value === false) {
+    chunks.push(Buffer.from([0xc2]));
+  } else if (typeof value === 'number') {
+    if (Number.isInteger(value) && value >= 0 && value < 0x80) {
+      chunks.push(Buffer.from([value]));
+    } else if (Number.isInteger(value) && value >= -32 && value < 0) {
+      chunks.push(Buffer.from([value & 0xff]));
+    } else if (Number.isInteger(value) && value >= 0 && value <= 0xffffffff) {
+      chunks.push(value <= 0xff ? header(0xcc, 1, value)
+        : value <= 0xffff ? header(0xcd, 2, value) : header(0xce, 4, value));
+    } else if (Number.isInteger(value) && value < 0 && value >= -0x80000000) {
+      const buf = Buffer.alloc(5);
+      buf[0] = 0xd2;
+      buf.writeInt32BE(value, 1);
+      chunks.push(buf);
+    } else {
+      const buf = Buffer.alloc(9);
+      buf[0] = 0xcb;
+      buf.writeDoubleBE(value, 1);
+      chunks.push(buf);
+    }
+  } else if (typeof value === 'string') {
+    const data = Buffer.from(value, 'utf8');
+    const n = data.length;
+    if (n < 32) chunks.push(Buffer.from([0xa0 | n]));
+    else if (n <= 0xff) chunks.push(header(0xd9, 1, n));
+    else if (n <= 0xffff) chunks.push(header(0xda, 2, n));
+    else chunks.push(header(0xdb, 4, n));
+    chunks.push(data);
+  } else if (Buffer.isBuffer(value)) {
+    const n = value.length;
+    chunks.push(n <= 0xff ? header(0xc4, 1, n) : n <= 0xffff ? header(0xc5, 2, n) : header(0xc6, 4, n));
+    chunks.push(value);
+  } else if (Array.isArray(value)) {
+    const n = value.length;
+    chunks.push(n < 16 ? Buffer.from([0x90 | n]) : n <= 0xffff ? header(0xdc, 2, n) : header(0xdd, 4, n));
+    for (const item of value) encodeInto(item, chunks);
+  } else if (typeof value === 'object') {
+    const keys = Object.keys(value).filter(k => value[k] !== undefined);
+    const n = keys.length;
+    chunks.push(n < 16 ? Buffer.from([0x80 | n]) : n <= 0xffff ? header(0xde, 2, n) : header(0xdf, 4, n));
+    for (const key of keys) {
+      encodeInto(key, chunks);
+      encodeInto(value[key], chunks);
+    }
+  } else {
+    throw new Error(`Cannot encode ${typeof value}`);
+  }
+}
+
+/**
+ * Decode one MessagePack value occupying the whole buffer
+ * @param {Buffer} buf - MessagePack bytes
+ * @returns {*}
+ */
+function decode(buf) {
+  const state = { buf, pos: 0 };
+  const value = decodeValue(state);
+  if (state.pos !== buf.length) {
+    throw new Error(state.pos > buf.length ? 'Truncated payload' : 'Trailing bytes after payload');
+  }
+  return value;
+}
+
+function need(state, size) {
+  if (state.pos + size > state.buf.length) {
+    throw new Error('Truncated payload');
+  }
+}
+
+function readLength(state, size) {
+  need(state, size);
+  const { buf, pos } = state;
+  state.pos += size;
+  return size === 1 ? buf.readUInt8(pos) : size === 2 ? buf.readUInt16BE(pos) : buf.readUInt32BE(pos);
+}
+
+function readString(state, n) {
+  need(state, n);
+  const s = state.buf.toString('utf8', state.pos, state.pos + n);
+  state.pos += n;
+  return s;
+}
+
+function readArray(state, n) {
+  const items = new Array(n);
+  for (let i = 0; i < n; i++) items[i] = decodeValue(state);
+  return items;
+}
+
+function readMap(state, n) {
+  const obj = {};
+  for (let i = 0; i < n; i++) {
+    const key = decodeValue(state);
+    obj[key] = decodeValue(state);
+  }
+  return obj;
+}
+
+function decodeValue(state) {
+  need(state, 1);
+  const { buf } = state;
+  const code = buf[state.pos++];
+
+  if (code < 0x80) return code;
+  if (code >= 0xe0) return code - 0x100;
+  if (code >= 0xa0 && code <= 0xbf) return readString(state, code & 0x1f);
+  if (code >= 0x90 && code <= 0x9f) return readArray(state, code & 0x0f);
+  if (code >= 0x80 && code <= 0x8f) return readMap(state, code & 0x0f);
+
+  let value;
+  const pos = state.pos;
+  switch (code) {
+    case 0xc0: return null;
+    case 0xc2: return false;
+    case 0xc3: return true;
+    case 0xcc: need(state, 1); state.pos += 1; return buf.readUInt8(pos);
+    case 0xcd: need(state, 2); state.pos += 2; return buf.readUInt16BE(pos);
+    case 0xce: need(state, 4); state.pos += 4; return buf.readUInt32BE(pos);
+    case 0xcf: need(state, 8); state.pos += 8; return Number(buf.readBigUInt64BE(pos));
+    case 0xd0: need(state, 1); state.pos += 1; return buf.readInt8(pos);
+    case 0xd1: need(state, 2); state.pos += 2; return buf.readInt16BE(pos);
+    case 0xd2: need(state, 4); state.pos += 4; return buf.readInt32BE(pos);
+    case 0xd3: need(state, 8); state.pos += 8; return Number(buf.readBigInt64BE(pos));
+    case 0xca: need(state, 4); state.pos += 4; return buf.readFloatBE(pos);
+    case 0xcb: need(state, 8); state.pos += 8; return buf.readDoubleBE(pos);
+    case 0xd9: return readString(state, readLength(state, 1));
+    case 0xda: return readString(state, readLength(state, 2));
+    case 0xdb: return readString(state, readLength(state, 4));
+    case 0xc4: case 0xc5: case 0xc6: {
+      const n = readLength(state, code === 0xc4 ? 1 : code === 0xc5 ? 2 : 4);
+      need(state, n);
+      value = Buffer.from(buf.subarray(state.pos, state.pos + n));
+      state.pos += n;
+      return value;
+    }
+    case 0xdc: return readArray(state, readLength(state, 2));
+    case 0xdd: return readArray(state, readLength(state, 4));
+    case 0xde: return readMap(state, readLength(state, 2));
+    case 0xdf: return readMap(state, readLength(state, 4));
+    default:
+      throw new Error(`Unsupported type byte 0x${code.toString(16)}`);
+  }
+}
+
+// ============================================================================
+// FRAMES
+// ============================================================================
+
+/**
+ * Encode a value as one frame, compressing large payloads
+ * @param {*} value - Value to send
+ * @returns {Buffer}
+ */
+function encodeFrame(value) {
+  let payload = encode(value);
+  let flags = 0;
+  if (payload.length >= COMPRESS_THRESHOLD) {
+    const compressed = zlib.deflateSync(payload, { level: 1 });
+    if (compressed.length < payload.length) {
+      payload = compressed;
+      flags |= FLAG_COMPRESSED;
+    }
+  }
+  const head = Buffer.alloc(HEADER_SIZE);
+  head[0] = flags;
+  head.writeUInt32BE(payload.length, 1);
+  return Buffer.concat([head, payload]);
+}
+
+/**
+ * Split a byte stream into decoded frames
+ * @param {Buffer} buf - Bytes read so far
+ * @returns {{frames: Array, rest: Buffer}} Complete frames and leftover bytes
+ */
+function decodeFrames(buf) {
+  const frames = [];
+  let pos = 0;
+  while (buf.length - pos >= HEADER_SIZE) {
+    const flags = buf[pos];
+    const length = buf.readUInt32BE(pos + 1);
+    if (length > MAX_FRAME_SIZE) {
+      throw new Error(`Frame of ${length} bytes exceeds limit`);
+    }
+    if (buf.length - pos - HEADER_SIZE < length) break;
+    let payload = buf.subarray(pos + HEADER_SIZE, pos + HEADER_SIZE + length);
+    if (flags & FLAG_COMPRESSED) {
+      payload = zlib.inflateSync(payload);
+    }
+    frames.push(decode(payload));
+    pos += HEADER_SIZE + length;
+  }
+  return { frames, rest: buf.subarray(pos) };
+}
+
+/**
+ * Rebuild a run_scrape output document from an output frame
+ * @param {Object} payload - Decoded output frame
+ * @returns {Object} Output with results as objects
+ */
+function decodeOutput(payload) {
+  if (!payload || typeof payload !== 'object') {
+    return payload;
+  }
+  const table = payload.results;
+  if (!table || !Array.isArray(table.fields) || !Array.isArray(table.rows)) {
+    return payload;
+  }
+  const { fields, rows } = table;
+  const results = new Array(rows.length);
+  for (let i = 0; i < rows.length; i++) {
+    const row = rows[i];
+    const result = {};
+    for (let j = 0; j < fields.length; j++) {
+      result[fields[j]] = row[j];
+    }
+    results[i] = result;
+  }
+  return { ...payload, results };
+}
+
+module.exports = {
+  encode,
+  decode,
+  encodeFrame,
+  decodeFrames,
+  decodeOutput,
+  FLAG_COMPRESSED,
+  HEADER_SIZE
+};
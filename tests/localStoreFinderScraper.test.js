@@ -50,12 +50,19 @@ function createMockSpawn() {
 
     const proc = new EventEmitter();
     proc.stdin = {
-      write: () => {},
+      written: [],
+      write(data) { this.written.push(data); },
       end: () => {}
     };
+    mockSpawn.calls[mockSpawn.calls.length - 1].stdin = proc.stdin;
     proc.stdout = new EventEmitter();
     proc.stderr = new EventEmitter();
-    proc.kill = () => {};
+    proc.signals = [];
+    proc.kill = (signal) => {
+      proc.signals.push(signal);
+      setTimeout(() => proc.emit('close', null, signal), 5);
+    };
+    mockSpawn.calls[mockSpawn.calls.length - 1].proc = proc;
 
     // Schedule response/error
     setTimeout(() => {
@@ -69,7 +76,7 @@ function createMockSpawn() {
         }, mockSpawn.timeout + 100);
       } else {
         const response = mockSpawn.nextResponse || { results: [], errors: [] };
-        proc.stdout.emit('data', JSON.stringify(response));
+        proc.stdout.emit('data', Buffer.isBuffer(response) ? response : JSON.stringify(response));
         proc.emit('close', 0);
       }
     }, 10);
@@ -98,6 +105,15 @@ const {
   validateOutputSchema,
   sanitizeError
 } = require('../services/localStoreFinderScraper');
+const {
+  encode,
+  decode,
+  encodeFrame,
+  decodeFrames,
+  decodeOutput,
+  FLAG_COMPRESSED,
+  HEADER_SIZE
+} = require('../services/scraperFraming');
 
 // ============================================================================
 // TEST HELPERS
@@ -192,6 +208,50 @@ test('sanitizeError - limits message length', () => {
   assert.ok(sanitized.length <= 150);
 });
 
+// Test scraperFraming
+test('scraperFraming - encode/decode round trip', () => {
+  const value = {
+    s: 'drill', long: 'x'.repeat(300), n: 7, neg: -5, big: 70000, f: 1.5,
+    t: true, nil: null, list: [1, 'two', [3]], nested: { a: { b: 'é' } }
+  };
+  assert.deepStrictEqual(decode(encode(value)), value);
+});
+
+test('scraperFraming - decode rejects truncated payload', () => {
+  const bytes = encode({ item_name: 'Power Drill' });
+  assert.throws(() => decode(bytes.subarray(0, bytes.length - 2)), /Truncated/);
+});
+
+test('scraperFraming - compresses large frames', () => {
+  const value = { rows: Array.from({ length: 100 }, (_, i) => ['Home Depot', `Drill ${i}`, '$99.00']) };
+  const frame = encodeFrame(value);
+  assert.strictEqual(frame[0] & FLAG_COMPRESSED, FLAG_COMPRESSED);
+  assert.ok(frame.length < encode(value).length);
+  assert.deepStrictEqual(decodeFrames(frame).frames, [value]);
+});
+
+test('scraperFraming - decodeFrames keeps partial frames', () => {
+  const first = encodeFrame({ query: 'drill' });
+  const second = encodeFrame({ query: 'paint' });
+  const stream = Buffer.concat([first, second.subarray(0, HEADER_SIZE + 2)]);
+  const { frames, rest } = decodeFrames(stream);
+  assert.deepStrictEqual(frames, [{ query: 'drill' }]);
+  assert.strictEqual(rest.length, HEADER_SIZE + 2);
+});
+
+test('scraperFraming - decodeOutput rebuilds results from a table', () => {
+  const output = decodeOutput({
+    results: { fields: ['store_name', 'price'], rows: [['Best Buy', '$9.99'], ['Lowes', 'not available']] },
+    errors: [],
+    meta: { total_results: 2 }
+  });
+  assert.deepStrictEqual(output.results, [
+    { store_name: 'Best Buy', price: '$9.99' },
+    { store_name: 'Lowes', price: 'not available' }
+  ]);
+  assert.strictEqual(output.meta.total_results, 2);
+});
+
 // ============================================================================
 // INTEGRATION TESTS WITH MOCKED SPAWN
 // ============================================================================
@@ -308,6 +368,38 @@ testAsync('runScraper - returns results from Python output', async () => {
     }
   });
 
+}).then(() => {
+
+  return testAsync('runScraper - framed protocol', async () => {
+    mockSpawn.reset();
+    const fields = ['store_id', 'store_name', 'item_name', 'price', 'unit', 'product_url', 'notes', 'collected_at'];
+    mockSpawn.setResponse(encodeFrame({
+      results: {
+        fields,
+        rows: [['store-1', 'Home Depot', 'Power Drill', '$129.99', 'each', 'https://homedepot.com/p/123', '', 'Dec 27, 2025']]
+      },
+      errors: [],
+      meta: { query: 'drill', stores_processed: 1, total_results: 1 }
+    }));
+
+    const stores = [
+      { id: 'store-1', name: 'Home Depot', base_url: 'https://homedepot.com' }
+    ];
+
+    const { results, errors } = await runScraper(stores, 'drill', { protocol: 'framed' });
+
+    const call = mockSpawn.calls[0];
+    assert.deepStrictEqual(call.args.slice(1), ['--protocol', 'framed']);
+    const { frames } = decodeFrames(call.stdin.written[0]);
+    assert.strictEqual(frames[0].query, 'drill');
+    assert.strictEqual(frames[0].stores[0].name, 'Home Depot');
+
+    assert.strictEqual(results.length, 1);
+    assert.strictEqual(results[0].item_name, 'Power Drill');
+    assert.strictEqual(results[0].price, '$129.99');
+    assert.strictEqual(errors.length, 0);
+  });
+
 }).then(() => {
 
   return testAsync('scrapeStore - returns single result', async () => {
@@ -335,6 +427,67 @@ testAsync('runScraper - returns results from Python output', async () => {
     assert.strictEqual(result.price, '$599.99');
   });
 
+}).then(() => {
+
+  return testAsync('runScraper - passes api source and endpoint to Python', async () => {
+    mockSpawn.reset();
+    mockSpawn.setResponse({
+      results: [],
+      errors: [],
+      meta: { query: 'drill', stores_processed: 1, total_results: 0 }
+    });
+
+    const stores = [{
+      id: 'store-1',
+      name: 'Best Buy',
+      base_url: 'https://bestbuy.com',
+      source: 'api',
+      api_url_template: 'https://bestbuy.com/api/search?q={query}'
+    }, { id: 'store-2', name: 'Home Depot', base_url: 'https://homedepot.com' }];
+    await runScraper(stores, 'drill');
+
+    const input = JSON.parse(mockSpawn.calls[0].stdin.written[0]);
+    assert.strictEqual(input.stores[0].source, 'api');
+    assert.strictEqual(input.stores[0].api_url_template, 'https://bestbuy.com/api/search?q={query}');
+    assert.strictEqual('api_url_template' in input.stores[1], false);
+  });
+
+}).then(() => {
+
+  return testAsync('runScraper - abort signal sends SIGTERM and rejects', async () => {
+    mockSpawn.reset();
+    mockSpawn.setTimeout(60000);
+
+    const controller = new AbortController();
+    const stores = [{ id: 'store-1', name: 'Home Depot', base_url: 'https://homedepot.com' }];
+    const pending = runScraper(stores, 'drill', { signal: controller.signal });
+    setTimeout(() => controller.abort(), 20);
+
+    try {
+      await pending;
+      assert.fail('Should have rejected');
+    } catch (error) {
+      assert.strictEqual(error.name, 'AbortError');
+    }
+    assert.deepStrictEqual(mockSpawn.calls[0].proc.signals, ['SIGTERM']);
+  });
+
+}).then(() => {
+
+  return testAsync('runScraper - already-aborted signal rejects without spawning', async () => {
+    mockSpawn.reset();
+    const controller = new AbortController();
+    controller.abort();
+
+    try {
+      await runScraper([{ id: '1', name: 'Test', base_url: 'https://test.com' }], 'drill', { signal: controller.signal });
+      assert.fail('Should have rejected');
+    } catch (error) {
+      assert.strictEqual(error.name, 'AbortError');
+    }
+    assert.strictEqual(mockSpawn.calls.length, 0);
+  });
+
 }).then(() => {
 
   // Print results